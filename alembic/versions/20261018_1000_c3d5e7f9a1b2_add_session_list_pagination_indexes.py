@@ -0,0 +1,47 @@
+"""add session list keyset and client trigram search indexes
+
+Revision ID: c3d5e7f9a1b2
+Revises: b2fc2a65cf05
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d5e7f9a1b2"
+down_revision: Union[str, None] = "b2fc2a65cf05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram indexes so ILIKE '%term%' on client name/code can use an index
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_clients_name_trgm",
+        "clients",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_clients_code_trgm",
+        "clients",
+        ["code"],
+        postgresql_using="gin",
+        postgresql_ops={"code": "gin_trgm_ops"},
+    )
+
+    # Matches the session list ORDER BY so keyset pages are index range scans
+    op.execute(
+        "CREATE INDEX ix_sessions_case_sort_time ON sessions "
+        "(case_id, (coalesce(start_time, session_date)) DESC, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_case_sort_time", table_name="sessions")
+    op.drop_index("ix_clients_code_trgm", table_name="clients")
+    op.drop_index("ix_clients_name_trgm", table_name="clients")
@@ -0,0 +1,48 @@
+"""add credit_logs idempotency_key and balance_after
+
+Revision ID: d4e6f8a0b2c3
+Revises: c3d5e7f9a1b2
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e6f8a0b2c3"
+down_revision: Union[str, None] = "c3d5e7f9a1b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "credit_logs",
+        sa.Column(
+            "idempotency_key",
+            sa.String(length=200),
+            nullable=True,
+            comment="Dedup key, e.g. session:<id>:minutes:<from>-<to>. NULL = not deduplicated.",
+        ),
+    )
+    op.add_column(
+        "credit_logs",
+        sa.Column(
+            "balance_after",
+            sa.Float(),
+            nullable=True,
+            comment="Counselor available_credits right after this entry (used by reconciliation)",
+        ),
+    )
+    op.create_unique_constraint(
+        "uq_credit_logs_idempotency_key", "credit_logs", ["idempotency_key"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_credit_logs_idempotency_key", "credit_logs", type_="unique")
+    op.drop_column("credit_logs", "balance_after")
+    op.drop_column("credit_logs", "idempotency_key")
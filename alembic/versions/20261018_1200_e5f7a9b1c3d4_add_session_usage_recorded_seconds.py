@@ -0,0 +1,67 @@
+"""add session_usages recorded_seconds running total
+
+Revision ID: e5f7a9b1c3d4
+Revises: d4e6f8a0b2c3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5f7a9b1c3d4"
+down_revision: Union[str, None] = "d4e6f8a0b2c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "session_usages",
+        sa.Column(
+            "recorded_seconds",
+            sa.Integer(),
+            nullable=True,
+            comment="Sum of recordings[].duration_seconds. NULL = not accumulated yet",
+        ),
+    )
+    op.add_column(
+        "session_usages",
+        sa.Column(
+            "recorded_segments",
+            sa.Integer(),
+            nullable=True,
+            comment="Number of recording segments folded into recorded_seconds (watermark)",
+        ),
+    )
+
+    # Backfill from the recordings JSON so billing never falls back to a
+    # full recompute for existing sessions
+    op.execute(
+        """
+        UPDATE session_usages su
+        SET recorded_seconds = totals.seconds,
+            recorded_segments = totals.segments
+        FROM (
+            SELECT s.id,
+                   COALESCE(SUM(COALESCE((r->>'duration_seconds')::numeric, 0)), 0)::int
+                       AS seconds,
+                   COUNT(r) AS segments
+            FROM sessions s
+            LEFT JOIN LATERAL json_array_elements(
+                CASE WHEN json_typeof(s.recordings) = 'array'
+                     THEN s.recordings ELSE '[]'::json END
+            ) r ON TRUE
+            GROUP BY s.id
+        ) totals
+        WHERE totals.id = su.session_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("session_usages", "recorded_segments")
+    op.drop_column("session_usages", "recorded_seconds")
@@ -0,0 +1,82 @@
+"""add content_blobs and SHA-256 references on session_analysis_logs
+
+Revision ID: f6a8b0c2d4e5
+Revises: e5f7a9b1c3d4
+Create Date: 2026-10-18 13:00:00.000000
+
+Existing inline text is moved by scripts/migrate_analysis_log_blobs.py
+(batched, resumable) rather than inside this migration. Downgrading after that
+script has run drops the references, so restore inline text first.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f6a8b0c2d4e5"
+down_revision: Union[str, None] = "e5f7a9b1c3d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REFERENCE_COLUMNS = (
+    ("system_prompt_sha256", "content_blobs.sha256 of system_prompt (lean storage)"),
+    ("user_prompt_sha256", "content_blobs.sha256 of user_prompt (lean storage)"),
+    (
+        "rag_documents_sha256",
+        "content_blobs.sha256 of rag_documents JSON (lean storage)",
+    ),
+    (
+        "llm_raw_response_sha256",
+        "content_blobs.sha256 of llm_raw_response (lean storage)",
+    ),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "content_blobs",
+        sa.Column(
+            "sha256",
+            sa.String(length=64),
+            nullable=False,
+            comment="SHA-256 hex digest of the uncompressed UTF-8 content",
+        ),
+        sa.Column(
+            "codec",
+            sa.String(length=10),
+            nullable=False,
+            comment="Compression codec: zlib, raw",
+        ),
+        sa.Column(
+            "data",
+            sa.LargeBinary(),
+            nullable=False,
+            comment="Content bytes encoded with codec",
+        ),
+        sa.Column(
+            "size_bytes",
+            sa.Integer(),
+            nullable=False,
+            comment="Uncompressed size in bytes",
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    for name, comment in REFERENCE_COLUMNS:
+        op.add_column(
+            "session_analysis_logs",
+            sa.Column(name, sa.String(length=64), nullable=True, comment=comment),
+        )
+
+
+def downgrade() -> None:
+    for name, _ in reversed(REFERENCE_COLUMNS):
+        op.drop_column("session_analysis_logs", name)
+    op.drop_table("content_blobs")
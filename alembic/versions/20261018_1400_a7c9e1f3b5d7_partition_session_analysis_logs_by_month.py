@@ -0,0 +1,145 @@
+"""partition session_analysis_logs by month on analyzed_at (PostgreSQL)
+
+Revision ID: a7c9e1f3b5d7
+Revises: f6a8b0c2d4e5
+Create Date: 2026-10-18 14:00:00.000000
+
+Converts session_analysis_logs into a RANGE-partitioned table with one
+partition per calendar month (UTC) plus a DEFAULT partition, and copies the
+existing rows. The primary key becomes (id, analyzed_at) because a partitioned
+table's unique constraints must include the partition key.
+
+Later months are created by AnalysisLogPartitionManager.ensure_partitions()
+(POST /api/internal/maintain-analysis-log-partitions, daily). Other dialects
+(SQLite in tests) keep the plain table.
+
+The copy runs inside the migration; on a large table schedule it in a
+maintenance window.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c9e1f3b5d7"
+down_revision: Union[str, None] = "f6a8b0c2d4e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "session_analysis_logs"
+OLD_TABLE = "session_analysis_logs_unpartitioned"
+MONTHS_AHEAD = 3
+
+INDEXES = (
+    ("ix_session_analysis_logs_session_id", "session_id"),
+    ("ix_session_analysis_logs_counselor_id", "counselor_id"),
+    ("ix_session_analysis_logs_tenant_id", "tenant_id"),
+    ("ix_session_analysis_logs_safety_level", "safety_level"),
+    ("ix_session_analysis_logs_analyzed_at", "analyzed_at"),
+    ("ix_session_analysis_logs_session_safety", "session_id, safety_level"),
+)
+FOREIGN_KEYS = (
+    ("session_id", "sessions"),
+    ("counselor_id", "counselors"),
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes(bind, table: str) -> None:
+    for name, columns in INDEXES:
+        bind.execute(sa.text(f"CREATE INDEX {name} ON {table} ({columns})"))
+    for column, target in FOREIGN_KEYS:
+        bind.execute(
+            sa.text(
+                f"ALTER TABLE {table} ADD FOREIGN KEY ({column}) "
+                f"REFERENCES {target} (id) ON DELETE CASCADE"
+            )
+        )
+
+
+def convert(bind, months_ahead: int = MONTHS_AHEAD) -> None:
+    """Plain table -> monthly partitions (also used by the EXPLAIN tests)"""
+    # Free the index / constraint names for the new table
+    bind.execute(sa.text(f"ALTER TABLE {TABLE} RENAME TO {OLD_TABLE}"))
+    bind.execute(
+        sa.text(
+            f"""
+        DO $$
+        DECLARE idx record;
+        BEGIN
+            FOR idx IN
+                SELECT indexname FROM pg_indexes WHERE tablename = '{OLD_TABLE}'
+            LOOP
+                EXECUTE format('ALTER INDEX %I RENAME TO %I',
+                               idx.indexname, 'old_' || idx.indexname);
+            END LOOP;
+        END $$
+    """
+        )
+    )
+
+    bind.execute(
+        sa.text(
+            f"""
+        CREATE TABLE {TABLE} (
+            LIKE {OLD_TABLE} INCLUDING DEFAULTS INCLUDING COMMENTS
+        ) PARTITION BY RANGE (analyzed_at)
+    """
+        )
+    )
+    bind.execute(sa.text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, analyzed_at)"))
+    _create_indexes(bind, TABLE)
+    bind.execute(sa.text(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT"))
+
+    oldest = bind.execute(sa.text(f"SELECT min(analyzed_at) FROM {OLD_TABLE}")).scalar()
+    now = datetime.now(timezone.utc)
+    month = date((oldest or now).year, (oldest or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), months_ahead)
+    while month <= last:
+        upper = _add_months(month, 1)
+        bind.execute(
+            sa.text(
+                f"CREATE TABLE {TABLE}_p{month:%Y_%m} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                f"TO ('{upper.isoformat()} 00:00:00+00')"
+            )
+        )
+        month = upper
+
+    bind.execute(sa.text(f"INSERT INTO {TABLE} SELECT * FROM {OLD_TABLE}"))
+    bind.execute(sa.text(f"DROP TABLE {OLD_TABLE}"))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    convert(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    # Rows of partitions already detached by the retention job are not restored
+    bind.execute(
+        sa.text(
+            f"""
+        CREATE TABLE {OLD_TABLE} (
+            LIKE {TABLE} INCLUDING DEFAULTS INCLUDING COMMENTS
+        )
+    """
+        )
+    )
+    bind.execute(sa.text(f"INSERT INTO {OLD_TABLE} SELECT * FROM {TABLE}"))
+    bind.execute(sa.text(f"DROP TABLE {TABLE} CASCADE"))
+    bind.execute(sa.text(f"ALTER TABLE {OLD_TABLE} RENAME TO {TABLE}"))
+    bind.execute(sa.text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id)"))
+    _create_indexes(bind, TABLE)
@@ -0,0 +1,109 @@
+"""add usage_rollups, analysis_rollups and rollup_watermarks
+
+Revision ID: b8d0f2a4c6e8
+Revises: a7c9e1f3b5d7
+Create Date: 2026-10-18 15:00:00.000000
+
+The tables start empty; the first POST /api/internal/refresh-usage-rollups
+backfills every bucket (no watermark yet). Until then the dashboard reads
+live.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d0f2a4c6e8"
+down_revision: Union[str, None] = "a7c9e1f3b5d7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _bucket_columns():
+    return [
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column(
+            "grain",
+            sa.String(length=10),
+            nullable=False,
+            comment="Bucket size: hour, day",
+        ),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("tenant_id", sa.String(), nullable=False),
+        sa.Column("counselor_id", sa.UUID(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usage_rollups",
+        *_bucket_columns(),
+        sa.Column("sessions", sa.Integer(), nullable=False),
+        sa.Column("duration_seconds", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False),
+        sa.Column("total_tokens", sa.Integer(), nullable=False),
+        sa.Column(
+            "estimated_cost_usd", sa.Numeric(precision=14, scale=6), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_usage_rollups_grain_bucket", "usage_rollups", ["grain", "bucket_start"]
+    )
+    op.create_index(
+        "ix_usage_rollups_counselor_bucket",
+        "usage_rollups",
+        ["counselor_id", "grain", "bucket_start"],
+    )
+
+    op.create_table(
+        "analysis_rollups",
+        *_bucket_columns(),
+        sa.Column("model_name", sa.String(length=100), nullable=True),
+        sa.Column("safety_level", sa.String(length=20), nullable=True),
+        sa.Column("logs", sa.Integer(), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False),
+        sa.Column(
+            "estimated_cost_usd", sa.Numeric(precision=14, scale=6), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_analysis_rollups_grain_bucket",
+        "analysis_rollups",
+        ["grain", "bucket_start"],
+    )
+
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column(
+            "source", sa.String(length=64), nullable=False, comment="Source table name"
+        ),
+        sa.Column(
+            "watermark",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Latest change timestamp folded into the rollups",
+        ),
+        sa.Column(
+            "complete_until",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Buckets before this reflect every row up to the watermark",
+        ),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("source"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rollup_watermarks")
+    op.drop_index("ix_analysis_rollups_grain_bucket", table_name="analysis_rollups")
+    op.drop_table("analysis_rollups")
+    op.drop_index("ix_usage_rollups_counselor_bucket", table_name="usage_rollups")
+    op.drop_index("ix_usage_rollups_grain_bucket", table_name="usage_rollups")
+    op.drop_table("usage_rollups")
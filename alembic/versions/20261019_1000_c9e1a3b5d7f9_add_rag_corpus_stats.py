@@ -0,0 +1,90 @@
+"""add rag_document_stats and rag_category_stats
+
+Revision ID: c9e1a3b5d7f9
+Revises: b8d0f2a4c6e8
+Create Date: 2026-10-19 10:00:00.000000
+
+Both tables are backfilled from chunks / embeddings / documents here, so
+the stats page reads correct counters right after the upgrade. Later
+drift is reported (and repaired) by POST /api/internal/check-rag-corpus-stats.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c9e1a3b5d7f9"
+down_revision: Union[str, None] = "b8d0f2a4c6e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rag_document_stats",
+        sa.Column("doc_id", sa.Integer(), nullable=False),
+        sa.Column("chunk_strategy", sa.String(length=100), nullable=False),
+        sa.Column("chunks_count", sa.Integer(), nullable=False),
+        sa.Column("embeddings_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "text_chars",
+            sa.BigInteger(),
+            nullable=False,
+            comment="Sum of chunk text lengths",
+        ),
+        sa.ForeignKeyConstraint(["doc_id"], ["documents.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("doc_id", "chunk_strategy"),
+    )
+    op.create_table(
+        "rag_category_stats",
+        sa.Column("category", sa.String(length=50), nullable=False),
+        sa.Column("datasources_count", sa.Integer(), nullable=False),
+        sa.Column("documents_count", sa.Integer(), nullable=False),
+        sa.Column("bytes", sa.BigInteger(), nullable=False),
+        sa.Column("chunks_count", sa.Integer(), nullable=False),
+        sa.Column("embeddings_count", sa.Integer(), nullable=False),
+        sa.Column("text_chars", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("category"),
+    )
+    op.create_index("ix_chunks_doc_ordinal", "chunks", ["doc_id", "ordinal", "id"])
+
+    op.execute(
+        """
+        INSERT INTO rag_document_stats
+            (doc_id, chunk_strategy, chunks_count, embeddings_count, text_chars)
+        SELECT c.doc_id, c.chunk_strategy, COUNT(c.id), COUNT(e.id),
+               COALESCE(SUM(LENGTH(c.text)), 0)
+        FROM chunks c
+        LEFT JOIN embeddings e ON e.chunk_id = c.id
+        GROUP BY c.doc_id, c.chunk_strategy
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO rag_category_stats
+            (category, datasources_count, documents_count, bytes,
+             chunks_count, embeddings_count, text_chars)
+        SELECT d.category, COUNT(DISTINCT d.datasource_id), COUNT(d.id),
+               COALESCE(SUM(d.bytes), 0),
+               COALESCE(SUM(s.chunks_count), 0),
+               COALESCE(SUM(s.embeddings_count), 0),
+               COALESCE(SUM(s.text_chars), 0)
+        FROM documents d
+        LEFT JOIN (
+            SELECT doc_id, SUM(chunks_count) AS chunks_count,
+                   SUM(embeddings_count) AS embeddings_count,
+                   SUM(text_chars) AS text_chars
+            FROM rag_document_stats
+            GROUP BY doc_id
+        ) s ON s.doc_id = d.id
+        GROUP BY d.category
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chunks_doc_ordinal", table_name="chunks")
+    op.drop_table("rag_category_stats")
+    op.drop_table("rag_document_stats")
@@ -0,0 +1,78 @@
+"""add counselors.ledger_seq and credit_logs.ledger_seq
+
+Revision ID: d0f2a4c6e8a1
+Revises: c9e1a3b5d7f9
+Create Date: 2026-10-19 11:00:00.000000
+
+The ledger UPDATE on the counselor row bumps counselors.ledger_seq and the
+new CreditLog stores the returned value, so the order of ledger entries per
+counselor follows the row lock instead of created_at (transaction start).
+Existing entries are numbered by (created_at, id).
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d0f2a4c6e8a1"
+down_revision: Union[str, None] = "c9e1a3b5d7f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "counselors",
+        sa.Column(
+            "ledger_seq",
+            sa.BigInteger(),
+            nullable=False,
+            server_default="0",
+            comment="Number of credit ledger entries applied (bumped by each entry)",
+        ),
+    )
+    op.add_column(
+        "credit_logs",
+        sa.Column(
+            "ledger_seq",
+            sa.BigInteger(),
+            nullable=True,
+            comment="Per-counselor ledger order (counselors.ledger_seq after this entry)",
+        ),
+    )
+    op.execute(
+        """
+        UPDATE credit_logs
+        SET ledger_seq = (
+            SELECT r.rn FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY counselor_id ORDER BY created_at, id
+                ) AS rn
+                FROM credit_logs
+                WHERE balance_after IS NOT NULL
+            ) r
+            WHERE r.id = credit_logs.id
+        )
+        WHERE balance_after IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE counselors
+        SET ledger_seq = COALESCE(
+            (SELECT MAX(ledger_seq) FROM credit_logs
+             WHERE credit_logs.counselor_id = counselors.id), 0
+        )
+        """
+    )
+    op.create_index(
+        "ix_credit_logs_counselor_seq", "credit_logs", ["counselor_id", "ledger_seq"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_credit_logs_counselor_seq", table_name="credit_logs")
+    op.drop_column("credit_logs", "ledger_seq")
+    op.drop_column("counselors", "ledger_seq")
@@ -0,0 +1,40 @@
+"""index session_analysis_logs content_blobs references
+
+Revision ID: e1a3c5e7f9b2
+Revises: d0f2a4c6e8a1
+Create Date: 2026-10-19 12:00:00.000000
+
+Blob GC (ContentStore.delete_unreferenced / sweep_orphans) checks each
+candidate blob against the four *_sha256 columns. On the partitioned table
+the indexes are created on every partition.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1a3c5e7f9b2"
+down_revision: Union[str, None] = "d0f2a4c6e8a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+REFERENCE_COLUMNS = (
+    "system_prompt_sha256",
+    "user_prompt_sha256",
+    "rag_documents_sha256",
+    "llm_raw_response_sha256",
+)
+
+
+def upgrade() -> None:
+    for column in REFERENCE_COLUMNS:
+        op.create_index(
+            f"ix_session_analysis_logs_{column}", "session_analysis_logs", [column]
+        )
+
+
+def downgrade() -> None:
+    for column in reversed(REFERENCE_COLUMNS):
+        op.drop_index(
+            f"ix_session_analysis_logs_{column}", table_name="session_analysis_logs"
+        )
@@ -0,0 +1,54 @@
+"""unique bucket keys on usage_rollups and analysis_rollups
+
+Revision ID: f2b4d6e8a0c3
+Revises: e1a3c5e7f9b2
+Create Date: 2026-10-19 13:00:00.000000
+
+Two overlapping refreshes could both insert the same bucket. The rollups
+are derived data: they and the watermarks are cleared here so existing
+duplicates cannot block the unique indexes, and the next
+POST /api/internal/refresh-usage-rollups backfills them (reads stay live
+until then). The unique indexes replace the (grain, bucket_start) ones.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f2b4d6e8a0c3"
+down_revision: Union[str, None] = "e1a3c5e7f9b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("DELETE FROM usage_rollups")
+    op.execute("DELETE FROM analysis_rollups")
+    op.execute("DELETE FROM rollup_watermarks")
+
+    op.drop_index("ix_usage_rollups_grain_bucket", table_name="usage_rollups")
+    op.create_index(
+        "uq_usage_rollups_bucket_key",
+        "usage_rollups",
+        ["grain", "bucket_start", "tenant_id", "counselor_id"],
+        unique=True,
+    )
+    op.drop_index("ix_analysis_rollups_grain_bucket", table_name="analysis_rollups")
+    op.execute(
+        "CREATE UNIQUE INDEX uq_analysis_rollups_bucket_key ON analysis_rollups "
+        "(grain, bucket_start, tenant_id, counselor_id, "
+        "(coalesce(model_name, '')), (coalesce(safety_level, '')))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_analysis_rollups_bucket_key", table_name="analysis_rollups")
+    op.create_index(
+        "ix_analysis_rollups_grain_bucket",
+        "analysis_rollups",
+        ["grain", "bucket_start"],
+    )
+    op.drop_index("uq_usage_rollups_bucket_key", table_name="usage_rollups")
+    op.create_index(
+        "ix_usage_rollups_grain_bucket", "usage_rollups", ["grain", "bucket_start"]
+    )
@@ -0,0 +1,32 @@
+"""add sessions tenant keyset index
+
+Revision ID: a3c5e7f9b1d4
+Revises: f2b4d6e8a0c3
+Create Date: 2026-10-19 14:00:00.000000
+
+ix_sessions_case_sort_time only serves session lists filtered by case. The
+default counselor-wide list (GET /api/v1/sessions) filters sessions by
+tenant and sorts by coalesce(start_time, session_date) DESC, id DESC; with
+this index it walks the tenant's sessions in order and stops after the
+page instead of sorting the counselor's whole session set.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c5e7f9b1d4"
+down_revision: Union[str, None] = "f2b4d6e8a0c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX ix_sessions_tenant_sort_time ON sessions "
+        "(tenant_id, (coalesce(start_time, session_date)) DESC, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_tenant_sort_time", table_name="sessions")
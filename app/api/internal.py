@@ -2,16 +2,19 @@
 Internal API endpoints (not exposed to public)
 """
 import logging
-from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.database import get_db
-from app.models.counselor import Counselor
-from app.services.external import revenuecat_service
+from app.services.billing.credit_ledger import CreditLedger
+from app.services.billing.usage_accumulator import UsageAccumulator
+from app.services.core.account_purge import AccountPurgeEngine
+from app.services.core.content_store import SWEEP_MIN_AGE_SECONDS, ContentStore
+from app.services.core.log_partitions import AnalysisLogPartitionManager
+from app.services.core.usage_rollups import UsageRollupService
+from app.services.rag.corpus_stats import CorpusStatsService
 
 logger = logging.getLogger(__name__)
 
@@ -28,61 +31,205 @@ def purge_deleted_accounts(
     Purge accounts that have been in deletion state for more than 14 days.
     Called by Cloud Scheduler daily.
 
+    Accounts are purged in batches (see AccountPurgeEngine); a run stops
+    starting new batches after ACCOUNT_PURGE_MAX_SECONDS and reports
+    `remaining`, which the next run picks up.
+
     Requires X-Internal-Key header for authentication.
     """
     # Verify internal API key
     if x_internal_key != settings.INTERNAL_API_KEY:
         raise HTTPException(status_code=403, detail="Invalid internal key")
 
-    cutoff = datetime.now(timezone.utc) - timedelta(
-        days=settings.ACCOUNT_DELETION_GRACE_PERIOD_DAYS
-    )
+    report = AccountPurgeEngine(db).run()
 
-    result = db.execute(
-        select(Counselor).where(
-            Counselor.deleted_at.isnot(None),
-            Counselor.deleted_at <= cutoff,
-            Counselor.is_active == False,  # noqa: E712
-            # Only purge accounts where email is NOT already anonymized
-            ~Counselor.email.startswith("deleted_"),
-        )
-    )
-    accounts = result.scalars().all()
+    return {
+        "purged": report.purged,
+        "failed": report.failed,
+        "revenuecat_failed": report.revenuecat_failed,
+        "rows_deleted": report.rows_deleted,
+        "rows_per_second": round(report.rows_per_second, 1),
+        "batches": report.batches,
+        "remaining": report.remaining,
+        "message": (
+            f"Purge complete. {report.purged} accounts anonymized, "
+            f"{report.failed} failed."
+        ),
+    }
+
+
+@router.post("/reconcile-credits")
+def reconcile_credits(
+    fix: bool = False,
+    db: Session = Depends(get_db),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    """
+    Compare cached credit balances with the CreditLog ledger.
+    Called by Cloud Scheduler daily.
+
+    - fix=false: report drift only
+    - fix=true: also reset SessionUsage.credits_deducted to the ledger sum
+      and SessionUsage.recorded_seconds to the recordings total (counselor
+      balance drift is only reported; it needs a manual admin_adjustment entry)
+
+    Requires X-Internal-Key header for authentication.
+    """
+    if x_internal_key != settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid internal key")
+
+    report = CreditLedger(db).reconcile(fix=fix)
+    duration_drifts = UsageAccumulator(db).verify(fix=fix)
+
+    return {
+        "counselors_checked": report.counselors_checked,
+        "sessions_checked": report.sessions_checked,
+        "counselor_drifts": report.counselor_drifts,
+        "session_drifts": report.session_drifts,
+        "duration_drifts": [
+            {
+                "session_id": str(d.session_id),
+                "recorded_seconds": d.recorded_seconds,
+                "recomputed_seconds": d.recomputed_seconds,
+            }
+            for d in duration_drifts
+        ],
+        "fixed": report.fixed or (fix and bool(duration_drifts)),
+    }
+
+
+@router.post("/maintain-analysis-log-partitions")
+def maintain_analysis_log_partitions(
+    archive: bool = True,
+    db: Session = Depends(get_db),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    """
+    Create upcoming monthly partitions of session_analysis_logs and archive
+    months older than ANALYSIS_LOG_RETENTION_MONTHS (gzip JSONL uploaded to
+    GCS_BUCKET and verified; detached + dropped only when
+    ANALYSIS_LOG_ARCHIVE_DROP is on).
+    Called by Cloud Scheduler daily.
+
+    - archive=false: only create partitions
+
+    Requires X-Internal-Key header for authentication.
+    """
+    if x_internal_key != settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid internal key")
+
+    manager = AnalysisLogPartitionManager(db)
+    created = manager.ensure_partitions()
+    archived = manager.archive_expired() if archive else []
+
+    return {
+        "created_partitions": created,
+        "archived": [
+            {
+                "month": a.month.strftime("%Y-%m"),
+                "rows": a.rows,
+                "uri": a.uri,
+                "sha256": a.sha256,
+                "dropped": a.dropped,
+                "detached": a.detached,
+            }
+            for a in archived
+        ],
+    }
 
-    purged = 0
-    failed = 0
 
-    for account in accounts:
-        try:
-            original_email = account.email
-            user_id = str(account.id)
+@router.post("/sweep-content-blobs")
+def sweep_content_blobs(
+    min_age_seconds: int = SWEEP_MIN_AGE_SECONDS,
+    db: Session = Depends(get_db),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    """
+    Delete content_blobs rows that no session_analysis_logs row references
+    (left behind by archived partitions and deleted logs).
+    Called by Cloud Scheduler daily, after maintain-analysis-log-partitions.
+
+    - min_age_seconds: blobs younger than this are kept (their log may still
+      be in flight)
+
+    Requires X-Internal-Key header for authentication.
+    """
+    if x_internal_key != settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid internal key")
 
-            # Anonymize PII
-            timestamp = int(datetime.now(timezone.utc).timestamp())
-            account.email = f"deleted_{timestamp}_{account.email}"
-            account.username = None
-            account.full_name = None
-            account.phone = None
+    stats = ContentStore(db).sweep_orphans(min_age_seconds=min_age_seconds)
 
-            db.commit()
+    return {
+        "scanned": stats.scanned,
+        "deleted": stats.deleted,
+        "freed_bytes": stats.freed_bytes,
+    }
+
+
+@router.post("/refresh-usage-rollups")
+def refresh_usage_rollups(
+    reconcile: bool = False,
+    db: Session = Depends(get_db),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    """
+    Fold new and changed SessionUsage / SessionAnalysisLog rows into the
+    dashboard rollups (hourly + daily) from each source's watermark.
+    Called by Cloud Scheduler every few minutes.
 
-            # RevenueCat delete (fire and forget)
-            rc_success = revenuecat_service.delete_customer(original_email, user_id)
-            if rc_success:
-                logger.info("RevenueCat purged for user_id=%s", user_id)
-            else:
-                logger.warning("RevenueCat purge failed for user_id=%s", user_id)
+    - reconcile=true: also rebuild every bucket of the last
+      USAGE_ROLLUP_RECONCILE_DAYS days (picks up deleted rows; run nightly)
 
-            purged += 1
-            logger.info("Purged account: %s (id=%s)", original_email, user_id)
+    Requires X-Internal-Key header for authentication.
+    """
+    if x_internal_key != settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid internal key")
+
+    reports = UsageRollupService(db).refresh(
+        reconcile_days=settings.USAGE_ROLLUP_RECONCILE_DAYS if reconcile else None
+    )
+
+    return {
+        "sources": [
+            {
+                "source": r.source,
+                "hours_rebuilt": r.hours_rebuilt,
+                "days_rebuilt": r.days_rebuilt,
+                "rows_written": r.rows_written,
+                "watermark": r.watermark.isoformat() if r.watermark else None,
+            }
+            for r in reports
+        ],
+    }
+
+
+@router.post("/check-rag-corpus-stats")
+def check_rag_corpus_stats(
+    fix: bool = False,
+    db: Session = Depends(get_db),
+    x_internal_key: str = Header(..., alias="X-Internal-Key"),
+):
+    """
+    Compare the materialized RAG corpus counters (rag_document_stats,
+    rag_category_stats) with documents / chunks / embeddings.
+    Called by Cloud Scheduler nightly.
+
+    - fix=false: report drift only
+    - fix=true: also rewrite every drifted counter row from the source rows
+
+    Requires X-Internal-Key header for authentication.
+    """
+    if x_internal_key != settings.INTERNAL_API_KEY:
+        raise HTTPException(status_code=403, detail="Invalid internal key")
 
-        except Exception as e:
-            db.rollback()
-            failed += 1
-            logger.error("Failed to purge account id=%s: %s", str(account.id), str(e))
+    report = CorpusStatsService(db).check(fix=fix)
+    if report.fixed:
+        db.commit()
 
     return {
-        "purged": purged,
-        "failed": failed,
-        "message": f"Purge complete. {purged} accounts anonymized, {failed} failed.",
+        "documents_checked": report.documents_checked,
+        "categories_checked": report.categories_checked,
+        "document_drifts": report.document_drifts,
+        "category_drifts": report.category_drifts,
+        "fixed": report.fixed,
     }
@@ -1,13 +1,22 @@
 """API endpoints for database statistics"""
 
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import text
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_analytics_db, get_db
+from app.core.exceptions import BadRequestError
+from app.models.document import Chunk, Document
+from app.services.rag.corpus_stats import CorpusStatsService
+from app.utils.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_after,
+)
 
 router = APIRouter(prefix="/api/rag/stats", tags=["rag-stats"])
 
@@ -28,148 +37,193 @@ class DocumentStats(BaseModel):
     created_at: str
 
 
+class CategoryStats(BaseModel):
+    category: str
+    datasources: int
+    documents: int
+    bytes: int
+    chunks: int
+    embeddings: int
+    text_chars: int
+
+
 class DatabaseStats(BaseModel):
     total_datasources: int
     total_documents: int
     total_chunks: int
     total_embeddings: int
     total_bytes: int
-    documents: List[DocumentStats]
+    categories: List[CategoryStats]
+    documents: List[DocumentStats]  # One page, see next_cursor
+    next_cursor: Optional[str] = None
+
+
+def parse_strategy(strategy_name: str) -> tuple[int, int]:
+    """Parse chunk_strategy like 'rec_400_80' to (chunk_size, overlap)"""
+    if strategy_name == "no_chunks":
+        return (0, 0)
+    try:
+        parts = strategy_name.split("_")
+        if len(parts) >= 3:
+            return (int(parts[1]), int(parts[2]))
+    except (ValueError, IndexError):
+        pass
+    return (0, 0)
 
 
 @router.get("/", response_model=DatabaseStats)
-def get_database_stats(db: Session = Depends(get_db)):
+def get_database_stats(
+    limit: int = Query(100, ge=1, le=500, description="Documents per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_analytics_db),
+):
     """
     Get database statistics including counts and document details
 
+    Totals come from the materialized corpus counters (CorpusStatsService),
+    so the cost does not grow with the number of chunks; documents are
+    paged newest first.
+
     Returns:
         DatabaseStats with all statistics
     """
-
-    # Get total counts
-    datasources_count = db.execute(text("SELECT COUNT(*) FROM datasources")).scalar()
-    documents_count = db.execute(text("SELECT COUNT(*) FROM documents")).scalar()
-    chunks_count = db.execute(text("SELECT COUNT(*) FROM chunks")).scalar()
-    embeddings_count = db.execute(text("SELECT COUNT(*) FROM embeddings")).scalar()
-    total_bytes = db.execute(
-        text("SELECT COALESCE(SUM(bytes), 0) FROM documents")
-    ).scalar()
-
-    # Get document details grouped by chunk strategy
-    query = text(
-        """
-        SELECT
-            d.id,
-            d.title,
-            d.category,
-            d.pages,
-            d.bytes,
-            d.text_length,
-            d.created_at,
-            COALESCE(c.chunk_strategy, 'no_chunks') as chunk_strategy,
-            COUNT(c.id) as chunks_count,
-            COUNT(e.id) as embeddings_count,
-            COALESCE(SUM(LENGTH(c.text)), 0) as total_text_chars
-        FROM documents d
-        LEFT JOIN chunks c ON d.id = c.doc_id
-        LEFT JOIN embeddings e ON c.id = e.chunk_id
-        GROUP BY d.id, d.title, d.category, d.pages, d.bytes, d.text_length, d.created_at, c.chunk_strategy
-        ORDER BY d.created_at DESC, c.chunk_strategy
-    """
-    )
-
-    result = db.execute(query)
-    rows = result.fetchall()
-
-    def parse_strategy(strategy_name: str) -> tuple[int, int]:
-        """Parse chunk_strategy like 'rec_400_80' to (chunk_size, overlap)"""
-        if strategy_name == "no_chunks":
-            return (0, 0)
-        try:
-            parts = strategy_name.split("_")
-            if len(parts) >= 3:
-                return (int(parts[1]), int(parts[2]))
-        except (ValueError, IndexError):
-            pass
-        return (0, 0)
-
-    documents = [
-        DocumentStats(
-            id=row.id,
-            title=row.title,
-            category=row.category or "general",
-            pages=row.pages or 0,
-            bytes=row.bytes or 0,
-            chunk_strategy=row.chunk_strategy,
-            chunk_size=parse_strategy(row.chunk_strategy)[0],
-            overlap=parse_strategy(row.chunk_strategy)[1],
-            chunks_count=row.chunks_count or 0,
-            embeddings_count=row.embeddings_count or 0,
-            text_length=row.text_length or 0,
-            total_text_chars=row.total_text_chars or 0,
-            created_at=str(row.created_at),
+    stats = CorpusStatsService(db)
+    categories = stats.categories()
+    totals = stats.totals(categories)
+    try:
+        rows, next_cursor = stats.document_page(limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise BadRequestError(detail=str(e), instance="/api/rag/stats/") from e
+
+    documents = []
+    for row in rows:
+        strategy = row.chunk_strategy or "no_chunks"
+        chunk_size, overlap = parse_strategy(strategy)
+        documents.append(
+            DocumentStats(
+                id=row.id,
+                title=row.title,
+                category=row.category or "general",
+                pages=row.pages or 0,
+                bytes=row.bytes or 0,
+                chunk_strategy=strategy,
+                chunk_size=chunk_size,
+                overlap=overlap,
+                chunks_count=row.chunks_count or 0,
+                embeddings_count=row.embeddings_count or 0,
+                text_length=row.text_length or 0,
+                total_text_chars=row.text_chars or 0,
+                created_at=str(row.created_at),
+            )
         )
-        for row in rows
-    ]
 
     return DatabaseStats(
-        total_datasources=datasources_count or 0,
-        total_documents=documents_count or 0,
-        total_chunks=chunks_count or 0,
-        total_embeddings=embeddings_count or 0,
-        total_bytes=total_bytes or 0,
+        total_datasources=totals["datasources_count"],
+        total_documents=totals["documents_count"],
+        total_chunks=totals["chunks_count"],
+        total_embeddings=totals["embeddings_count"],
+        total_bytes=totals["bytes"],
+        categories=[
+            CategoryStats(
+                category=row.category,
+                datasources=row.datasources_count,
+                documents=row.documents_count,
+                bytes=row.bytes,
+                chunks=row.chunks_count,
+                embeddings=row.embeddings_count,
+                text_chars=row.text_chars,
+            )
+            for row in categories
+        ],
         documents=documents,
+        next_cursor=next_cursor,
     )
 
 
 class ChunkDetail(BaseModel):
     id: int
     ordinal: int
+    chunk_strategy: str
     text: str
     text_length: int
     document_title: str
 
 
-@router.get("/chunks/{doc_id}", response_model=List[ChunkDetail])
-def get_document_chunks(doc_id: int, db: Session = Depends(get_db)):
+class ChunkPage(BaseModel):
+    document_id: int
+    document_title: str
+    total: int  # Chunks of the document (for chunk_strategy, if given)
+    items: List[ChunkDetail]
+    next_cursor: Optional[str] = None
+
+
+@router.get("/chunks/{doc_id}", response_model=ChunkPage)
+def get_document_chunks(
+    doc_id: int,
+    chunk_strategy: Optional[str] = Query(
+        None, description="Only chunks of this strategy"
+    ),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_analytics_db),
+):
     """
-    Get all chunks for a specific document
+    Get one page of chunks for a specific document, in ordinal order
 
     Args:
         doc_id: Document ID
+        chunk_strategy: Optional strategy filter (e.g. "rec_400_80")
+        limit: Page size
+        cursor: Cursor from the previous page
 
     Returns:
-        List of chunks with details
+        ChunkPage with the chunks and the cursor of the next page
     """
+    title = db.execute(select(Document.title).where(Document.id == doc_id)).scalar()
+    if title is None:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
 
-    query = text(
-        """
-        SELECT
-            c.id,
-            c.ordinal,
-            c.text,
-            LENGTH(c.text) as text_length,
-            d.title as document_title
-        FROM chunks c
-        JOIN documents d ON c.doc_id = d.id
-        WHERE c.doc_id = :doc_id
-        ORDER BY c.ordinal
-    """
+    query = select(Chunk.id, Chunk.ordinal, Chunk.chunk_strategy, Chunk.text).where(
+        Chunk.doc_id == doc_id
     )
-
-    result = db.execute(query, {"doc_id": doc_id})
-    rows = result.fetchall()
-
-    return [
-        ChunkDetail(
-            id=row.id,
-            ordinal=row.ordinal,
-            text=row.text,
-            text_length=row.text_length,
-            document_title=row.document_title,
+    if chunk_strategy:
+        query = query.where(Chunk.chunk_strategy == chunk_strategy)
+    if cursor:
+        try:
+            cursor_ordinal, cursor_id = decode_cursor(cursor, types=(int, int))
+        except InvalidCursorError as e:
+            raise BadRequestError(
+                detail=str(e), instance=f"/api/rag/stats/chunks/{doc_id}"
+            ) from e
+        query = query.where(
+            keyset_after(
+                [Chunk.ordinal, Chunk.id], [cursor_ordinal, cursor_id], descending=False
+            )
         )
-        for row in rows
-    ]
+    rows = db.execute(query.order_by(Chunk.ordinal, Chunk.id).limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].ordinal, rows[-1].id)
+
+    return ChunkPage(
+        document_id=doc_id,
+        document_title=title,
+        total=CorpusStatsService(db).document_chunk_count(doc_id, chunk_strategy),
+        items=[
+            ChunkDetail(
+                id=row.id,
+                ordinal=row.ordinal,
+                chunk_strategy=row.chunk_strategy,
+                text=row.text,
+                text_length=len(row.text),
+                document_title=title,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
 
 
 @router.delete("/documents/{doc_id}")
@@ -188,24 +242,14 @@ def delete_document(doc_id: int, db: Session = Depends(get_db)):
     Returns:
         Success message with deletion counts
     """
+    document = db.get(Document, doc_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document {doc_id} not found")
 
-    # Get chunk count before deletion
-    chunks_result = db.execute(
-        text("SELECT COUNT(*) FROM chunks WHERE doc_id = :doc_id"), {"doc_id": doc_id}
-    )
-    chunks_count = chunks_result.scalar() or 0
-
-    # Get embeddings count before deletion
-    embeddings_result = db.execute(
-        text(
-            """
-            SELECT COUNT(*) FROM embeddings
-            WHERE chunk_id IN (SELECT id FROM chunks WHERE doc_id = :doc_id)
-        """
-        ),
-        {"doc_id": doc_id},
-    )
-    embeddings_count = embeddings_result.scalar() or 0
+    # Uncount before deleting (same transaction as the deletes)
+    stats = CorpusStatsService(db)
+    removed = stats.chunks_removed(document)
+    stats.document_removed(document)
 
     # Delete embeddings first (FK constraint)
     db.execute(
@@ -231,7 +275,7 @@ def delete_document(doc_id: int, db: Session = Depends(get_db)):
         "message": f"成功刪除文檔 ID {doc_id}",
         "deleted": {
             "document": 1,
-            "chunks": chunks_count,
-            "embeddings": embeddings_count,
+            "chunks": removed["chunks"],
+            "embeddings": removed["embeddings"],
         },
     }
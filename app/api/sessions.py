@@ -5,10 +5,11 @@ import asyncio
 import logging
 import time
 from datetime import datetime, timezone
-from typing import Optional, Union
+from typing import Literal, Optional, Set, Union
 from uuid import UUID
 
 from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session as DBSession
 
 from app.api.session_analysis import _log_analysis_background
@@ -23,10 +24,13 @@ from app.core.exceptions import (
 from app.middleware.usage_limit import check_usage_limit
 from app.models.case import Case
 from app.models.client import Client
-from app.models.counselor import BillingMode, Counselor
+from app.models.counselor import Counselor
 from app.models.report import Report
 from app.models.session import Session
-from app.repositories.session_repository import SessionRepository
+from app.repositories.session_repository import (
+    SESSION_LIST_LARGE_FIELDS,
+    SessionRepository,
+)
 from app.schemas.report import ReportResponse
 from app.schemas.session import (
     AppendRecordingRequest,
@@ -42,19 +46,35 @@ from app.schemas.session import (
     SessionTimelineResponse,
     SessionUpdateRequest,
 )
-from app.services.analysis.emotion_service import EmotionAnalysisService
+from app.services.analysis.emotion_engine import emotion_engine
 from app.services.core.recording_service import RecordingService
 from app.services.core.reflection_service import ReflectionService
 from app.services.core.session_service import SessionService
 from app.services.core.timeline_service import TimelineService
+from app.utils.pagination import InvalidCursorError
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/sessions", tags=["Sessions"])
 
 
 def _build_session_response(
-    session: Session, client: Client, case: Case, has_report: bool
+    session: Session,
+    client: Client,
+    case: Case,
+    has_report: bool,
+    include_fields: Optional[Set[str]] = None,
 ) -> SessionResponse:
+    """Build SessionResponse; `include_fields` limits which large fields are read.
+
+    None means all fields (detail endpoints). List endpoints pass the projected
+    set so deferred columns are never touched.
+    """
+
+    def _large(name: str):
+        if include_fields is None or name in include_fields:
+            return getattr(session, name)
+        return None
+
     return SessionResponse(
         id=session.id,
         client_id=client.id,
@@ -66,12 +86,12 @@ def _build_session_response(
         name=session.name,
         start_time=session.start_time,
         end_time=session.end_time,
-        transcript_text=session.transcript_text,
+        transcript_text=_large("transcript_text"),
         summary=session.summary,
         duration_minutes=session.duration_minutes,
         notes=session.notes,
         reflection=session.reflection,
-        recordings=session.recordings,
+        recordings=_large("recordings"),
         # Island Parents - 練習情境
         scenario=session.scenario,
         scenario_description=session.scenario_description,
@@ -106,21 +126,15 @@ def create_session(
     db: DBSession = Depends(get_db),
 ) -> SessionResponse:
     """創建逐字稿記錄（不生成報告）"""
-    # Check usage limits before creating session
-    check_usage_limit(current_user)
+    # Check usage limits before creating session. For subscription mode the
+    # session duration is added to monthly usage atomically by the same check,
+    # in this request's transaction (rolled back if creation fails)
+    check_usage_limit(current_user, db, minutes=session_data.duration_minutes)
 
     service = SessionService(db)
     repo = SessionRepository(db)
     instance = str(request.url.path)
     try:
-        # Track usage for subscription mode BEFORE creating session
-        # This ensures the usage update is part of the same transaction
-        if current_user.billing_mode == BillingMode.SUBSCRIPTION and session_data.duration_minutes is not None:
-            # Increment monthly usage by session duration
-            current_user.monthly_minutes_used = (
-                current_user.monthly_minutes_used or 0
-            ) + session_data.duration_minutes
-
         session = service.create_session(session_data, current_user, tenant_id)
 
         case = repo.get_case_by_id(session.case_id, tenant_id)
@@ -135,6 +149,7 @@ def create_session(
 
 @router.get("", response_model=SessionListResponse)
 def list_sessions(
+    request: Request,
     client_id: Optional[UUID] = Query(None, description="Filter by client"),
     case_id: Optional[UUID] = Query(None, description="Filter by case"),
     session_mode: Optional[str] = Query(
@@ -143,6 +158,16 @@ def list_sessions(
     search: Optional[str] = Query(None, description="Search by client name or code"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from previous page's next_cursor"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated large fields to include: transcript_text,recordings",
+    ),
+    count: Literal["exact", "estimated", "none"] = Query(
+        "exact", description="Total count mode: exact / estimated / none"
+    ),
     current_user: Counselor = Depends(get_current_user),
     tenant_id: str = Depends(get_tenant_id),
     db: DBSession = Depends(get_db),
@@ -154,47 +179,77 @@ def list_sessions(
     - case_id: 依案例（Case）篩選
     - session_mode: 依模式篩選 (practice=對話練習, emergency=親子溝通)
     - search: 依孩子名稱或代碼搜尋
+
+    分頁與欄位：
+    - cursor: 帶入上一頁的 next_cursor 取得下一頁（優先於 skip）
+    - fields: 預設不回傳 transcript_text / recordings，需要時以逗號列出
+    - count: exact（預設）/ estimated（PostgreSQL 估計值）/ none（不計算）
     """
+    instance = str(request.url.path)
+    include_fields = {f.strip() for f in (fields or "").split(",") if f.strip()}
+    unknown = include_fields - set(SESSION_LIST_LARGE_FIELDS)
+    if unknown:
+        raise BadRequestError(
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            instance=instance,
+        )
+
     service = SessionService(db)
-    session_data, total = service.list_sessions(
-        counselor=current_user,
-        tenant_id=tenant_id,
-        client_id=client_id,
-        case_id=case_id,
-        mode=session_mode,
-        search=search,
-        skip=skip,
-        limit=limit,
-    )
+    try:
+        session_data, total, next_cursor = service.list_sessions(
+            counselor=current_user,
+            tenant_id=tenant_id,
+            client_id=client_id,
+            case_id=case_id,
+            mode=session_mode,
+            search=search,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            include_fields=include_fields,
+            count_mode=count,
+        )
+    except InvalidCursorError as e:
+        raise BadRequestError(detail=str(e), instance=instance)
+
     items = [
-        _build_session_response(session, client, case, has_report)
+        _build_session_response(session, client, case, has_report, include_fields)
         for session, case, client, has_report in session_data
     ]
-    return SessionListResponse(total=total, items=items)
+    return SessionListResponse(total=total, items=items, next_cursor=next_cursor)
 
 
 @router.get("/timeline", response_model=SessionTimelineResponse)
 def get_session_timeline(
     client_id: UUID = Query(..., description="個案 UUID"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=200, description="Page size (omit for full timeline)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from previous page's next_cursor"
+    ),
     request: Request = None,
     current_user: Counselor = Depends(get_current_user),
     tenant_id: str = Depends(get_tenant_id),
     db: DBSession = Depends(get_db),
 ) -> SessionTimelineResponse:
-    """取得個案的會談歷程時間線"""
+    """取得個案的會談歷程時間線（依日期由舊到新，可用 limit + cursor 分頁）"""
     service = TimelineService(db)
     instance = str(request.url.path) if request else "/api/v1/sessions/timeline"
     try:
-        client, timeline_items = service.get_session_timeline(
-            client_id, current_user.id, tenant_id
+        client, timeline_items, total, next_cursor = service.get_session_timeline(
+            client_id, current_user.id, tenant_id, limit=limit, cursor=cursor
         )
         return SessionTimelineResponse(
             client_id=client.id,
             client_name=client.name,
             client_code=client.code,
-            total_sessions=len(timeline_items),
+            total_sessions=total,
             sessions=timeline_items,
+            next_cursor=next_cursor,
         )
+    except InvalidCursorError as e:
+        raise BadRequestError(detail=str(e), instance=instance)
     except ValueError as e:
         _handle_value_error(e, instance)
 
@@ -473,6 +528,43 @@ def get_session_report(
 # =============================================================================
 
 
+def _emotion_result_data(
+    request: EmotionFeedbackRequest, result: dict, latency_ms: int
+) -> dict:
+    return {
+        "analysis_type": "emotion_feedback",
+        "level": result["level"],
+        "hint": result["hint"],
+        "context_preview": request.context[:100],
+        "target": request.target,
+        "_metadata": {
+            "latency_ms": latency_ms,
+            "model_name": result["token_usage"].get(
+                "model_name", "models/gemini-flash-lite-latest"
+            ),
+            "provider": result["token_usage"].get("provider", "gemini"),
+            "path": result["path"],
+        },
+    }
+
+
+async def _log_emotion_background_call(
+    call: asyncio.Future, request: EmotionFeedbackRequest, log_kwargs: dict
+) -> None:
+    """Background task: log an emotion LLM call that finished after the lexicon answered"""
+    start_time = time.time()
+    result = await emotion_engine.background_result(call)
+    if result is None or not result.get("token_usage", {}).get("total_tokens"):
+        return
+    latency_ms = int((time.time() - start_time) * 1000)
+    await run_in_threadpool(
+        _log_analysis_background,
+        result_data=_emotion_result_data(request, result, latency_ms),
+        token_usage_data=result["token_usage"],
+        **log_kwargs,
+    )
+
+
 @router.post(
     "/{session_id}/emotion-feedback",
     response_model=EmotionFeedbackResponse,
@@ -498,7 +590,9 @@ async def analyze_emotion_feedback(
 
     **Performance:**
     - Response time: <3 seconds
-    - Model: Gemini Flash Lite Latest
+    - Model: Gemini Flash Lite Latest (shared warm client)
+    - Identical context windows within a short TTL reuse the previous result
+    - If the model misses the deadline, a local lexicon classifier answers
 
     **Request:**
     - `context`: Conversation context (可能包含多輪對話)
@@ -574,37 +668,34 @@ async def analyze_emotion_feedback(
     try:
         start_time = time.time()
 
-        emotion_service = EmotionAnalysisService()
-        result = await emotion_service.analyze_emotion(
+        result = await emotion_engine.analyze(
             context=request.context, target=request.target
         )
 
         latency_ms = int((time.time() - start_time) * 1000)
 
+        background_call = result.pop("background_call", None)
+        log_kwargs = {
+            "session_id": session_id,
+            "counselor_id": current_user.id,
+            "tenant_id": tenant_id,
+            "transcript_segment": request.context[:500],  # First 500 chars
+            "analysis_type": "emotion_feedback",
+        }
+
         # Log to DB and BigQuery in background (after response sent)
         background_tasks.add_task(
             _log_analysis_background,
-            session_id=session_id,
-            counselor_id=current_user.id,
-            tenant_id=tenant_id,
-            transcript_segment=request.context[:500],  # First 500 chars
-            result_data={
-                "analysis_type": "emotion_feedback",
-                "level": result["level"],
-                "hint": result["hint"],
-                "context_preview": request.context[:100],
-                "target": request.target,
-                "_metadata": {
-                    "latency_ms": latency_ms,
-                    "model_name": result["token_usage"].get(
-                        "model_name", "models/gemini-flash-lite-latest"
-                    ),
-                    "provider": result["token_usage"].get("provider", "gemini"),
-                },
-            },
+            result_data=_emotion_result_data(request, result, latency_ms),
             token_usage_data=result["token_usage"],
-            analysis_type="emotion_feedback",
+            **log_kwargs,
         )
+        if background_call is not None:
+            # The lexicon answered; the LLM call this request started is
+            # billed (as its own log row) once it finishes
+            background_tasks.add_task(
+                _log_emotion_background_call, background_call, request, log_kwargs
+            )
 
         return EmotionFeedbackResponse(level=result["level"], hint=result["hint"])
 
@@ -51,8 +51,6 @@ def save_analysis_log_and_gbq(
         result_data: Analysis results with _metadata
         db: Database session (injected from endpoint)
     """
-    import asyncio
-
     from app.services.external.gbq_service import gbq_service
 
     try:
@@ -145,16 +143,10 @@ def save_analysis_log_and_gbq(
             "gemini_cache_ttl": metadata.get("gemini_cache_ttl"),
         }
 
-        # Run async GBQ write in event loop
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        loop.run_until_complete(gbq_service.write_analysis_log(gbq_data))
+        # Queue for the batched GBQ writer (flushed by size / age)
+        gbq_service.enqueue_analysis_log(gbq_data)
         logger.info(
-            f"Background task completed: saved to PostgreSQL and GBQ for session {session_id}"
+            f"Background task completed: saved to PostgreSQL and queued GBQ row for session {session_id}"
         )
 
     except Exception as e:
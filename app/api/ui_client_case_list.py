@@ -3,7 +3,7 @@ UI-Driven API for Client-Case List
 客戶個案列表 - 結合 Client + Case + Session 資料，優化前端顯示
 Refactored: Business logic moved to ClientCaseService, schemas to ui_client_case.py
 """
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -23,6 +23,7 @@ from app.schemas.ui_client_case import (
     validate_client_case_by_tenant,
 )
 from app.services.clients.client_case_service import ClientCaseService
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/api/v1/ui", tags=["UI APIs"])
 
@@ -157,18 +158,29 @@ def create_client_and_case(
 def get_client_case_list(
     skip: int = Query(0, ge=0, description="跳過筆數"),
     limit: int = Query(100, ge=1, le=500, description="每頁筆數"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor"),
+    search: Optional[str] = Query(None, description="依客戶姓名或代碼搜尋"),
+    case_status: Optional[int] = Query(
+        None, ge=0, le=2, description="依個案狀態篩選（0/1/2）"
+    ),
     current_user: Counselor = Depends(get_current_user),
     tenant_id: str = Depends(get_tenant_id),
     db: Session = Depends(get_db),
 ) -> ClientCaseListResponse:
-    """List all client-cases with session stats"""
+    """List all client-cases with session stats (最近會談在前)"""
     service = ClientCaseService(db)
-    items_data, total = service.list_client_cases(
-        tenant_id=tenant_id,
-        counselor_id=current_user.id,
-        skip=skip,
-        limit=limit,
-    )
+    try:
+        items_data, total, next_cursor = service.list_client_cases(
+            tenant_id=tenant_id,
+            counselor_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            search=search,
+            case_status=case_status,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # Convert dict items to Pydantic models
     items = [ClientCaseListItem(**item) for item in items_data]
@@ -178,6 +190,7 @@ def get_client_case_list(
         total=total,
         skip=skip,
         limit=limit,
+        next_cursor=next_cursor,
     )
 
 
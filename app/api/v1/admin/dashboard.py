@@ -2,28 +2,64 @@
 Admin Dashboard API - AI Monitoring Dashboard
 Provides analytics for AI usage, costs, tokens, and user activity
 """
-import csv
-import io
+import inspect
 import logging
+import time
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional, Type
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from sqlalchemy import and_, desc, func, or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError, create_model
+from sqlalchemy import desc, func, select
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.database import get_analytics_db
+from app.core.deps import get_current_analytics_user
+from app.core.exceptions import UnprocessableEntityError
+from app.core.pricing_engine import pricing_engine
 from app.models.counselor import Counselor, CounselorRole
 from app.models.session_analysis_log import SessionAnalysisLog
 from app.models.session_usage import SessionUsage
+from app.schemas.admin_dashboard import DashboardSnapshotRequest, DashboardWidgetSpec
+from app.services.analysis.emotion_engine import emotion_engine
+from app.services.core.cost_aggregation import CostAggregation, Period
+from app.services.core.csv_export import DATASETS, CsvExportEngine
+from app.services.core.dashboard_cache import dashboard_cache
+from app.services.core.usage_rollups import (
+    ANALYSIS,
+    DAY,
+    HOUR,
+    USAGE,
+    RollupFact,
+    UsageRollupService,
+)
+from app.services.core.user_segments import SegmentationPolicy, UserSegmentation
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/admin/dashboard", tags=["admin-dashboard"])
 
 
-def require_admin(current_user: Counselor = Depends(get_current_user)) -> Counselor:
+# Set for the duration of a snapshot (see get_snapshot): every widget sees
+# the same "now" and identical aggregates are computed once
+_snapshot_now: ContextVar[Optional[datetime]] = ContextVar(
+    "dashboard_snapshot_now", default=None
+)
+_snapshot_rows: ContextVar[Optional[Dict]] = ContextVar(
+    "dashboard_snapshot_rows", default=None
+)
+
+
+def _now() -> datetime:
+    return _snapshot_now.get() or datetime.now(timezone.utc)
+
+
+def require_admin(
+    current_user: Counselor = Depends(get_current_analytics_user),
+) -> Counselor:
     """Verify current user is admin"""
     if current_user.role != CounselorRole.ADMIN:
         raise HTTPException(
@@ -35,7 +71,7 @@ def require_admin(current_user: Counselor = Depends(get_current_user)) -> Counse
 
 def get_time_filter(time_range: Literal["day", "week", "month"]) -> datetime:
     """Get datetime filter based on time range"""
-    now = datetime.now(timezone.utc)
+    now = _now()
     if time_range == "day":
         return now - timedelta(days=1)
     elif time_range == "week":
@@ -49,12 +85,61 @@ def get_time_filter(time_range: Literal["day", "week", "month"]) -> datetime:
         )
 
 
+def _period(time_range: str) -> str:
+    """Trend bucket size: hourly for a day, daily otherwise"""
+    return HOUR if time_range == "day" else DAY
+
+
+def _period_label(period: datetime, time_range: str, day_format: str) -> str:
+    return period.strftime("%H:%M" if time_range == "day" else day_format)
+
+
+def _model_costs(
+    rows: List[Dict], unknown: Optional[str] = None
+) -> Dict[Optional[str], Dict]:
+    """Per-model rollup rows -> tokens and cost per display name"""
+    models: Dict[Optional[str], Dict] = {}
+    for row in rows:
+        price = pricing_engine.price(row["model_name"])
+        name = price.display_name if price else unknown
+        entry = models.setdefault(
+            name, {"input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+        )
+        entry["input_tokens"] += int(row["prompt_tokens"])
+        entry["output_tokens"] += int(row["completion_tokens"])
+        if price:
+            entry["cost"] += price.cost(row["prompt_tokens"], row["completion_tokens"])
+    return models
+
+
+def _total(rows: List[Dict], measure: str) -> float:
+    return sum(float(row[measure]) for row in rows)
+
+
+def _aggregate(
+    db: Session, fact: RollupFact, start: datetime, end=None, **options
+) -> List[Dict]:
+    """UsageRollupService.aggregate() behind the tiered dashboard cache"""
+    shared = _snapshot_rows.get()
+    if shared is None:
+        return dashboard_cache.aggregate(
+            UsageRollupService(db), fact, start, end, **options
+        )
+    key = (fact.name, start, end, repr(sorted(options.items())))
+    if key not in shared:
+        shared[key] = dashboard_cache.aggregate(
+            UsageRollupService(db), fact, start, end, **options
+        )
+    # Widgets may reshape their rows: hand out copies
+    return [dict(row) for row in shared[key]]
+
+
 @router.get("/summary")
 def get_summary(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get summary statistics for dashboard
@@ -69,42 +154,22 @@ def get_summary(
     # Calculate ElevenLabs cost from duration (not from estimated_cost_usd which contains total cost)
     ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND = 0.40 / 3600.0  # noqa: N806 - Constant in function
 
-    elevenlabs_query = select(
-        func.coalesce(func.sum(SessionUsage.duration_seconds * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND), 0).label("elevenlabs_cost")
-    ).select_from(SessionUsage).where(SessionUsage.created_at >= start_time)
-
-    if tenant_id:
-        elevenlabs_query = elevenlabs_query.where(SessionUsage.tenant_id == tenant_id)
-
-    elevenlabs_result = db.execute(elevenlabs_query).first()
-    elevenlabs_cost = float(elevenlabs_result.elevenlabs_cost) if elevenlabs_result else 0.0
-
-    # 2. Gemini cost from SessionAnalysisLog.estimated_cost_usd
-    gemini_query = select(
-        func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0).label("gemini_cost")
-    ).select_from(SessionAnalysisLog).where(SessionAnalysisLog.analyzed_at >= start_time)
-
-    if tenant_id:
-        gemini_query = gemini_query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    gemini_result = db.execute(gemini_query).first()
-    gemini_cost = float(gemini_result.gemini_cost) if gemini_result else 0.0
-
-    # 3. Session counts and active users
-    stats_query = select(
-        func.count(func.distinct(SessionUsage.session_id)).label("total_sessions"),
-        func.count(func.distinct(SessionUsage.counselor_id)).label("active_users"),
-    ).select_from(SessionUsage).where(SessionUsage.created_at >= start_time)
-
-    if tenant_id:
-        stats_query = stats_query.where(SessionUsage.tenant_id == tenant_id)
+    usage = _aggregate(db, USAGE, start_time, by=("counselor_id",), tenant_id=tenant_id)
+    elevenlabs_cost = (
+        _total(usage, "duration_seconds") * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
+    )
 
-    result = db.execute(stats_query).first()
+    # Gemini cost from SessionAnalysisLog.estimated_cost_usd
+    gemini_cost = _total(
+        _aggregate(db, ANALYSIS, start_time, tenant_id=tenant_id),
+        "estimated_cost_usd",
+    )
 
+    # Session counts and active users (one usage row per session)
     return {
         "total_cost_usd": round(elevenlabs_cost + gemini_cost, 4),
-        "total_sessions": int(result.total_sessions) if result else 0,
-        "active_users": int(result.active_users) if result else 0,
+        "total_sessions": int(_total(usage, "sessions")),
+        "active_users": len({row["counselor_id"] for row in usage if row["sessions"]}),
     }
 
 
@@ -114,7 +179,7 @@ def get_cost_trend(
     tenant_id: Optional[str] = Query(None),
     model: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get cost trend over time
@@ -125,7 +190,19 @@ def get_cost_trend(
     """
     start_time = get_time_filter(time_range)
 
-    # Determine date truncation based on time range
+    if not model:
+        rows = _aggregate(
+            db, USAGE, start_time, period=_period(time_range), tenant_id=tenant_id
+        )
+        return {
+            "labels": [
+                _period_label(r["period"], time_range, "%Y-%m-%d") for r in rows
+            ],
+            "data": [float(r["estimated_cost_usd"]) for r in rows],
+        }
+
+    # Model filter: sessions with at least one analysis on that model,
+    # aggregated live (semi-join, so each session is counted once)
     if time_range == "day":
         date_trunc = func.date_trunc("hour", SessionUsage.created_at)
     else:
@@ -139,6 +216,13 @@ def get_cost_trend(
         )
         .select_from(SessionUsage)
         .where(SessionUsage.created_at >= start_time)
+        .where(
+            SessionUsage.session_id.in_(
+                select(SessionAnalysisLog.session_id).where(
+                    SessionAnalysisLog.model_name == model
+                )
+            )
+        )
         .group_by("period")
         .order_by("period")
     )
@@ -146,14 +230,6 @@ def get_cost_trend(
     if tenant_id:
         query = query.where(SessionUsage.tenant_id == tenant_id)
 
-    # If model filter is specified, join with analysis logs
-    if model:
-        query = (
-            query
-            .join(SessionAnalysisLog, SessionUsage.session_id == SessionAnalysisLog.session_id)
-            .where(SessionAnalysisLog.model_name == model)
-        )
-
     results = db.execute(query).all()
 
     labels = []
@@ -176,7 +252,7 @@ def get_token_trend(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get token usage trend over time
@@ -189,50 +265,15 @@ def get_token_trend(
     """
     start_time = get_time_filter(time_range)
 
-    # Determine date truncation based on time range
-    if time_range == "day":
-        date_trunc = func.date_trunc("hour", SessionUsage.created_at)
-    else:
-        date_trunc = func.date_trunc("day", SessionUsage.created_at)
-
-    # Build query
-    query = (
-        select(
-            date_trunc.label("period"),
-            func.coalesce(func.sum(SessionUsage.total_prompt_tokens), 0).label("prompt_tokens"),
-            func.coalesce(func.sum(SessionUsage.total_completion_tokens), 0).label("completion_tokens"),
-            func.coalesce(func.sum(SessionUsage.total_tokens), 0).label("total_tokens"),
-        )
-        .select_from(SessionUsage)
-        .where(SessionUsage.created_at >= start_time)
-        .group_by("period")
-        .order_by("period")
+    rows = _aggregate(
+        db, USAGE, start_time, period=_period(time_range), tenant_id=tenant_id
     )
 
-    if tenant_id:
-        query = query.where(SessionUsage.tenant_id == tenant_id)
-
-    results = db.execute(query).all()
-
-    labels = []
-    prompt_tokens = []
-    completion_tokens = []
-    total_tokens = []
-
-    for row in results:
-        if time_range == "day":
-            labels.append(row.period.strftime("%H:%M"))
-        else:
-            labels.append(row.period.strftime("%Y-%m-%d"))
-        prompt_tokens.append(int(row.prompt_tokens))
-        completion_tokens.append(int(row.completion_tokens))
-        total_tokens.append(int(row.total_tokens))
-
     return {
-        "labels": labels,
-        "prompt_tokens": prompt_tokens,
-        "completion_tokens": completion_tokens,
-        "total_tokens": total_tokens,
+        "labels": [_period_label(r["period"], time_range, "%Y-%m-%d") for r in rows],
+        "prompt_tokens": [int(r["prompt_tokens"]) for r in rows],
+        "completion_tokens": [int(r["completion_tokens"]) for r in rows],
+        "total_tokens": [int(r["total_tokens"]) for r in rows],
     }
 
 
@@ -241,7 +282,7 @@ def get_cost_breakdown(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get cost breakdown by service
@@ -260,111 +301,59 @@ def get_cost_breakdown(
             "total_cost": 56.78
         }
     """
-    from sqlalchemy import case
-
-    from app.core.pricing import (
-        ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND,
-        calculate_gemini_cost,
-    )
+    from app.core.pricing import ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
 
     start_time = get_time_filter(time_range)
 
-    # BUG FIX 1: Standardize model names using CASE WHEN to avoid duplicates
-    # Group by display_name instead of raw model_name
-    model_query = (
-        select(
-            case(
-                (SessionAnalysisLog.model_name.like("%flash-lite%"), "Gemini Flash Lite"),
-                (SessionAnalysisLog.model_name.like("%1.5-flash%"), "Gemini Flash 1.5"),
-                (SessionAnalysisLog.model_name.like("%gemini-3%"), "Gemini Flash 3"),
-                else_="Other"
-            ).label("display_name"),
-            func.coalesce(func.sum(SessionAnalysisLog.prompt_tokens), 0).label("input_tokens"),
-            func.coalesce(func.sum(SessionAnalysisLog.completion_tokens), 0).label("output_tokens"),
-        )
-        .select_from(SessionAnalysisLog)
-        .where(SessionAnalysisLog.analyzed_at >= start_time)
-        .where(SessionAnalysisLog.model_name.isnot(None))
-        .group_by("display_name")
+    # Tokens per raw model name, standardized to display names with the
+    # pricing engine (canonical lookup, so "models/gemini-*" and "gemini-*"
+    # group together) and priced per model
+    model_rows = _aggregate(
+        db,
+        ANALYSIS,
+        start_time,
+        by=("model_name",),
+        tenant_id=tenant_id,
+        not_null=("model_name",),
     )
 
-    if tenant_id:
-        model_query = model_query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    model_results = db.execute(model_query).all()
-
-    # Map display names to pricing
-    display_name_pricing = {
-        "Gemini Flash Lite": {
-            "input_price": 0.075,
-            "output_price": 0.30,
-        },
-        "Gemini Flash 1.5": {
-            "input_price": 0.50,
-            "output_price": 3.00,
-        },
-        "Gemini Flash 3": {
-            "input_price": 0.50,
-            "output_price": 3.00,
-        },
-    }
-
     # Calculate costs by service
     services = []
     total_cost = 0.0
 
     # Process AI models
-    for row in model_results:
-        display_name = row.display_name
-        input_tokens = int(row.input_tokens)
-        output_tokens = int(row.output_tokens)
-
+    for name, entry in _model_costs(model_rows, unknown="Other").items():
         # Skip "Other" category
-        if display_name == "Other":
+        if name == "Other":
             logger.warning("Skipping unknown model category: Other")
             continue
 
-        # Get pricing info
-        pricing = display_name_pricing.get(display_name)
-        if not pricing:
-            logger.warning(f"Unknown display name in cost breakdown: {display_name}")
-            continue
-
-        # Calculate cost
-        cost = calculate_gemini_cost(
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            input_price_per_1m=pricing["input_price"],
-            output_price_per_1m=pricing["output_price"],
+        cost = entry["cost"]
+        services.append(
+            {
+                "name": name,
+                "cost": round(cost, 4),
+                "percentage": 0,  # Will calculate later
+                "usage": f"{(entry['input_tokens'] + entry['output_tokens']) / 1_000_000:.2f}M tokens",
+            }
         )
-
-        services.append({
-            "name": display_name,
-            "cost": round(cost, 4),
-            "percentage": 0,  # Will calculate later
-            "usage": f"{(input_tokens + output_tokens) / 1_000_000:.2f}M tokens"
-        })
         total_cost += cost
 
     # Get ElevenLabs STT costs (from SessionUsage duration)
-    duration_query = select(
-        func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("total_seconds")
-    ).select_from(SessionUsage).where(SessionUsage.created_at >= start_time)
-
-    if tenant_id:
-        duration_query = duration_query.where(SessionUsage.tenant_id == tenant_id)
-
-    duration_result = db.execute(duration_query).first()
-    total_seconds = float(duration_result.total_seconds) if duration_result else 0.0
+    total_seconds = _total(
+        _aggregate(db, USAGE, start_time, tenant_id=tenant_id), "duration_seconds"
+    )
 
     elevenlabs_cost = total_seconds * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
     if elevenlabs_cost > 0:
-        services.append({
-            "name": "ElevenLabs STT",
-            "cost": round(elevenlabs_cost, 4),
-            "percentage": 0,  # Will calculate later
-            "usage": f"{total_seconds / 3600:.1f} hours"
-        })
+        services.append(
+            {
+                "name": "ElevenLabs STT",
+                "cost": round(elevenlabs_cost, 4),
+                "percentage": 0,  # Will calculate later
+                "usage": f"{total_seconds / 3600:.1f} hours",
+            }
+        )
         total_cost += elevenlabs_cost
 
     # Calculate percentages
@@ -375,10 +364,7 @@ def get_cost_breakdown(
     # Sort by cost descending
     services.sort(key=lambda x: x["cost"], reverse=True)
 
-    return {
-        "services": services,
-        "total_cost": round(total_cost, 4)
-    }
+    return {"services": services, "total_cost": round(total_cost, 4)}
 
 
 @router.get("/session-trend")
@@ -386,7 +372,7 @@ def get_session_trend(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get daily session count trend
@@ -400,46 +386,14 @@ def get_session_trend(
     """
     start_time = get_time_filter(time_range)
 
-    # Determine date truncation
-    if time_range == "day":
-        date_trunc = func.date_trunc("hour", SessionUsage.created_at)
-    else:
-        date_trunc = func.date_trunc("day", SessionUsage.created_at)
-
-    # Build query
-    query = (
-        select(
-            date_trunc.label("period"),
-            func.count(func.distinct(SessionUsage.session_id)).label("sessions"),
-            func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("total_seconds"),
-        )
-        .select_from(SessionUsage)
-        .where(SessionUsage.created_at >= start_time)
-        .group_by("period")
-        .order_by("period")
+    rows = _aggregate(
+        db, USAGE, start_time, period=_period(time_range), tenant_id=tenant_id
     )
 
-    if tenant_id:
-        query = query.where(SessionUsage.tenant_id == tenant_id)
-
-    results = db.execute(query).all()
-
-    labels = []
-    sessions = []
-    duration_hours = []
-
-    for row in results:
-        if time_range == "day":
-            labels.append(row.period.strftime("%H:%M"))
-        else:
-            labels.append(row.period.strftime("%m/%d"))
-        sessions.append(int(row.sessions))
-        duration_hours.append(round(float(row.total_seconds) / 3600, 2))
-
     return {
-        "labels": labels,
-        "sessions": sessions,
-        "duration_hours": duration_hours,
+        "labels": [_period_label(r["period"], time_range, "%m/%d") for r in rows],
+        "sessions": [int(r["sessions"]) for r in rows],
+        "duration_hours": [round(float(r["duration_seconds"]) / 3600, 2) for r in rows],
     }
 
 
@@ -448,7 +402,7 @@ def get_model_distribution(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get model usage distribution by cost (not token count)
@@ -463,62 +417,36 @@ def get_model_distribution(
             "tokens": [1234567, 567890, ...]
         }
     """
-    from app.core.pricing import (
-        MODEL_PRICING_MAP,
-        calculate_gemini_cost,
-    )
-
     start_time = get_time_filter(time_range)
 
-    # Normalize model name in SQL to group "gemini-*" and "models/gemini-*" together
-    normalized_model = func.replace(SessionAnalysisLog.model_name, "models/", "").label("normalized_model")
-
-    # Build query
-    query = (
-        select(
-            normalized_model,
-            func.coalesce(func.sum(SessionAnalysisLog.prompt_tokens), 0).label("input_tokens"),
-            func.coalesce(func.sum(SessionAnalysisLog.completion_tokens), 0).label("output_tokens"),
-        )
-        .select_from(SessionAnalysisLog)
-        .where(SessionAnalysisLog.analyzed_at >= start_time)
-        .where(SessionAnalysisLog.model_name.isnot(None))
-        .group_by(normalized_model)
-        .order_by(desc("input_tokens"))
+    # Display name and cost come from the pricing engine, so "gemini-*" and
+    # "models/gemini-*" are grouped and priced together; unknown models get
+    # no display name and are skipped
+    model_rows = _aggregate(
+        db,
+        ANALYSIS,
+        start_time,
+        by=("model_name",),
+        tenant_id=tenant_id,
+        not_null=("model_name",),
+    )
+    models = sorted(
+        _model_costs(model_rows).items(),
+        key=lambda item: item[1]["input_tokens"],
+        reverse=True,
     )
-
-    if tenant_id:
-        query = query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    results = db.execute(query).all()
 
     labels = []
     costs = []
     tokens = []
 
-    for row in results:
-        normalized_model = row.normalized_model
-        input_tokens = int(row.input_tokens)
-        output_tokens = int(row.output_tokens)
-        total_tokens = input_tokens + output_tokens
-
-        # Get pricing info (model name is already normalized by SQL)
-        pricing = MODEL_PRICING_MAP.get(normalized_model)
-        if not pricing:
-            logger.warning(f"Unknown model in distribution: {normalized_model}")
+    for name, entry in models:
+        if name is None:
+            logger.warning("Unknown model(s) in distribution")
             continue
-
-        # Calculate cost
-        cost = calculate_gemini_cost(
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            input_price_per_1m=pricing["input_price"],
-            output_price_per_1m=pricing["output_price"],
-        )
-
-        labels.append(pricing["display_name"])
-        costs.append(round(cost, 4))
-        tokens.append(total_tokens)
+        labels.append(name)
+        costs.append(round(entry["cost"], 4))
+        tokens.append(entry["input_tokens"] + entry["output_tokens"])
 
     return {
         "labels": labels,
@@ -532,7 +460,7 @@ def get_daily_active_users(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get daily active users trend
@@ -544,33 +472,24 @@ def get_daily_active_users(
         }
     """
     start_time = get_time_filter(time_range)
-    end_time = datetime.now(timezone.utc)
-
-    # Determine date truncation based on time range
-    if time_range == "day":
-        date_trunc = func.date_trunc("hour", SessionUsage.created_at)
-    else:
-        date_trunc = func.date_trunc("day", SessionUsage.created_at)
-
-    # Build query - Count unique users per period
-    query = (
-        select(
-            date_trunc.label("period"),
-            func.count(func.distinct(SessionUsage.counselor_id)).label("user_count")
-        )
-        .select_from(SessionUsage)
-        .where(SessionUsage.created_at >= start_time)
-        .group_by("period")
-        .order_by("period")
+    end_time = _now()
+
+    # Unique users per period: rows are per (period, counselor)
+    rows = _aggregate(
+        db,
+        USAGE,
+        start_time,
+        end_time,
+        by=("counselor_id",),
+        period=_period(time_range),
+        tenant_id=tenant_id,
     )
 
-    if tenant_id:
-        query = query.where(SessionUsage.tenant_id == tenant_id)
-
-    results = db.execute(query).all()
-
     # BUG FIX 4: Fill missing dates/hours with zeros
-    data_dict = {row.period: int(row.user_count) for row in results}
+    data_dict: Dict[datetime, int] = {}
+    for row in rows:
+        if row["sessions"]:
+            data_dict[row["period"]] = data_dict.get(row["period"], 0) + 1
 
     labels = []
     data = []
@@ -601,7 +520,7 @@ def get_safety_distribution(
     time_range: Literal["day", "week", "month"] = Query("day"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict[str, int]:
     """
     Get safety level distribution
@@ -611,25 +530,17 @@ def get_safety_distribution(
     """
     start_time = get_time_filter(time_range)
 
-    # Build query
-    query = (
-        select(
-            SessionAnalysisLog.safety_level,
-            func.count(SessionAnalysisLog.id).label("count"),
-        )
-        .select_from(SessionAnalysisLog)
-        .where(SessionAnalysisLog.analyzed_at >= start_time)
-        .where(SessionAnalysisLog.safety_level.isnot(None))
-        .group_by(SessionAnalysisLog.safety_level)
-        .order_by(desc("count"))
+    rows = _aggregate(
+        db,
+        ANALYSIS,
+        start_time,
+        by=("safety_level",),
+        tenant_id=tenant_id,
+        not_null=("safety_level",),
     )
+    rows.sort(key=lambda r: r["logs"], reverse=True)
 
-    if tenant_id:
-        query = query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    results = db.execute(query).all()
-
-    return {row.safety_level: int(row.count) for row in results}
+    return {row["safety_level"]: int(row["logs"]) for row in rows}
 
 
 @router.get("/top-users")
@@ -638,7 +549,7 @@ def get_top_users(
     tenant_id: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> List[Dict]:
     """
     Get top users by usage
@@ -653,67 +564,16 @@ def get_top_users(
         - total_cost_usd
         - total_minutes
     """
-    from sqlalchemy import case, or_
-
     start_time = get_time_filter(time_range)
 
-    # Build query with separate token counts per model
+    # Usage and analysis logs summed in separate CTEs, then joined per
+    # counselor (no per-analysis repetition of usage rows)
     query = (
-        select(
-            Counselor.email,
-            # Gemini Flash tokens (includes both Flash 1.5 and Flash 3)
-            func.coalesce(
-                func.sum(
-                    case(
-                        (SessionAnalysisLog.model_name.in_(["gemini-1.5-flash-latest", "gemini-3-flash-preview"]),
-                         SessionAnalysisLog.prompt_tokens + SessionAnalysisLog.completion_tokens),
-                        else_=0
-                    )
-                ), 0
-            ).label("gemini_flash_tokens"),
-
-            # Gemini Lite tokens (from SessionAnalysisLog where model contains 'flash-lite')
-            func.coalesce(
-                func.sum(
-                    case(
-                        (SessionAnalysisLog.model_name.like("%flash-lite%"),
-                         SessionAnalysisLog.prompt_tokens + SessionAnalysisLog.completion_tokens),
-                        else_=0
-                    )
-                ), 0
-            ).label("gemini_lite_tokens"),
-
-            # ElevenLabs duration in hours (from SessionUsage)
-            func.coalesce(
-                func.sum(SessionUsage.duration_seconds) / 3600.0, 0
-            ).label("elevenlabs_hours"),
-
-            func.count(func.distinct(SessionUsage.session_id)).label("total_sessions"),
-            # Calculate total cost: ElevenLabs (from duration) + Gemini (from estimated_cost_usd)
-            (
-                func.coalesce(func.sum(SessionUsage.duration_seconds * 0.40 / 3600.0), 0) +
-                func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0)
-            ).label("total_cost_usd"),
-            func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("total_seconds"),
-        )
-        .select_from(SessionUsage)
-        .join(Counselor, SessionUsage.counselor_id == Counselor.id)
-        .outerjoin(SessionAnalysisLog, SessionUsage.session_id == SessionAnalysisLog.session_id)
-        .where(SessionUsage.created_at >= start_time)
-        .where(
-            or_(
-                SessionAnalysisLog.id.is_(None),  # Allow NULL from outerjoin
-                SessionAnalysisLog.analyzed_at >= start_time  # Filter non-NULL records
-            )
-        )
-        .group_by(Counselor.email)
-        .order_by(desc("total_cost_usd"))
+        CostAggregation(tenant_id)
+        .by_counselor(start_time)
+        .order_by(desc("total_cost_usd"), Counselor.email)
         .limit(limit)
     )
-
-    if tenant_id:
-        query = query.where(SessionUsage.tenant_id == tenant_id)
-
     results = db.execute(query).all()
 
     return [
@@ -721,10 +581,10 @@ def get_top_users(
             "email": row.email,
             "gemini_flash_tokens": int(row.gemini_flash_tokens),
             "gemini_lite_tokens": int(row.gemini_lite_tokens),
-            "elevenlabs_hours": round(float(row.elevenlabs_hours), 1),
-            "total_sessions": int(row.total_sessions),
+            "elevenlabs_hours": round(float(row.duration_seconds) / 3600, 1),
+            "total_sessions": int(row.sessions),
             "total_cost_usd": float(row.total_cost_usd),
-            "total_minutes": round(float(row.total_seconds) / 60, 2),
+            "total_minutes": round(float(row.duration_seconds) / 60, 2),
         }
         for row in results
     ]
@@ -735,7 +595,7 @@ def get_user_daily_usage(
     counselor_id: UUID = Query(...),
     time_range: Literal["day", "week", "month"] = Query("month"),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> List[Dict]:
     """
     Get daily usage for a specific user
@@ -750,37 +610,17 @@ def get_user_daily_usage(
     """
     start_time = get_time_filter(time_range)
 
-    # Build query
-    query = (
-        select(
-            func.date_trunc("day", SessionUsage.created_at).label("date"),
-            func.count(func.distinct(SessionUsage.session_id)).label("sessions"),
-            func.coalesce(func.sum(SessionUsage.total_tokens), 0).label("tokens"),
-            func.coalesce(func.sum(SessionUsage.estimated_cost_usd), 0).label("cost_usd"),
-            func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("seconds"),
-        )
-        .select_from(SessionUsage)
-        .where(
-            and_(
-                SessionUsage.counselor_id == counselor_id,
-                SessionUsage.created_at >= start_time,
-            )
-        )
-        .group_by("date")
-        .order_by("date")
-    )
-
-    results = db.execute(query).all()
+    rows = _aggregate(db, USAGE, start_time, period=DAY, counselor_id=counselor_id)
 
     return [
         {
-            "date": row.date.strftime("%Y-%m-%d"),
-            "sessions": int(row.sessions),
-            "tokens": int(row.tokens),
-            "cost_usd": float(row.cost_usd),
-            "minutes": round(float(row.seconds) / 60, 2),
+            "date": row["period"].strftime("%Y-%m-%d"),
+            "sessions": int(row["sessions"]),
+            "tokens": int(row["total_tokens"]),
+            "cost_usd": float(row["estimated_cost_usd"]),
+            "minutes": round(float(row["duration_seconds"]) / 60, 2),
         }
-        for row in results
+        for row in rows
     ]
 
 
@@ -789,7 +629,7 @@ def get_overall_stats(
     time_range: Literal["day", "week", "month"] = Query("month"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get overall statistics
@@ -805,55 +645,32 @@ def get_overall_stats(
 
     # BUG FIX 3: Use cost instead of tokens
     # Get daily statistics with cost from both sources
-    query = (
-        select(
-            func.date_trunc("day", SessionUsage.created_at).label("date"),
-            func.coalesce(func.sum(SessionUsage.estimated_cost_usd), 0).label("elevenlabs_cost"),
-            func.count(func.distinct(SessionUsage.session_id)).label("sessions"),
-        )
-        .select_from(SessionUsage)
-        .where(SessionUsage.created_at >= start_time)
-        .group_by("date")
-        .order_by("date")
-    )
-
-    if tenant_id:
-        query = query.where(SessionUsage.tenant_id == tenant_id)
-
-    usage_results = db.execute(query).all()
+    usage_results = _aggregate(db, USAGE, start_time, period=DAY, tenant_id=tenant_id)
 
     # Get Gemini costs by day
-    gemini_query = (
-        select(
-            func.date_trunc("day", SessionAnalysisLog.analyzed_at).label("date"),
-            func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0).label("gemini_cost"),
-        )
-        .select_from(SessionAnalysisLog)
-        .where(SessionAnalysisLog.analyzed_at >= start_time)
-        .group_by("date")
-        .order_by("date")
+    gemini_results = _aggregate(
+        db, ANALYSIS, start_time, period=DAY, tenant_id=tenant_id
     )
 
-    if tenant_id:
-        gemini_query = gemini_query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    gemini_results = db.execute(gemini_query).all()
-
     # Merge results by date
-    gemini_costs_by_date = {row.date: float(row.gemini_cost) for row in gemini_results}
+    gemini_costs_by_date = {
+        row["period"]: float(row["estimated_cost_usd"]) for row in gemini_results
+    }
 
     daily_data = []
     for row in usage_results:
-        date = row.date
-        elevenlabs_cost = float(row.elevenlabs_cost)
+        date = row["period"]
+        elevenlabs_cost = float(row["estimated_cost_usd"])
         gemini_cost = gemini_costs_by_date.get(date, 0.0)
         total_cost = elevenlabs_cost + gemini_cost
 
-        daily_data.append({
-            "date": date,
-            "cost": total_cost,
-            "sessions": int(row.sessions),
-        })
+        daily_data.append(
+            {
+                "date": date,
+                "cost": total_cost,
+                "sessions": int(row["sessions"]),
+            }
+        )
 
     if not daily_data:
         return {
@@ -885,7 +702,9 @@ def get_overall_stats(
         first_week_avg = sum(d["cost"] for d in first_week) / 7
         last_week_avg = sum(d["cost"] for d in last_week) / 7
         if first_week_avg > 0:
-            monthly_growth_pct = ((last_week_avg - first_week_avg) / first_week_avg) * 100
+            monthly_growth_pct = (
+                (last_week_avg - first_week_avg) / first_week_avg
+            ) * 100
 
     return {
         "avg_cost_per_day": round(avg_cost_per_day, 4),
@@ -902,7 +721,7 @@ def get_cost_per_user(
     tenant_id: Optional[str] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> List[Dict]:
     """
     Get cost per user with anomaly detection
@@ -917,62 +736,45 @@ def get_cost_per_user(
 
     start_time = get_time_filter(time_range)
 
-    # Calculate total costs from both sources
-    query = (
-        select(
-            Counselor.email,
-            Counselor.full_name,
-            # Total cost = ElevenLabs + Gemini
-            (
-                func.coalesce(func.sum(SessionUsage.estimated_cost_usd), 0)
-            ).label("total_cost"),
-            func.count(func.distinct(SessionUsage.session_id)).label("sessions"),
-            func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("total_seconds"),
-        )
-        .select_from(SessionUsage)
-        .join(Counselor, SessionUsage.counselor_id == Counselor.id)
-        .where(SessionUsage.created_at >= start_time)
-        .group_by(Counselor.email, Counselor.full_name)
-        .order_by(desc("total_cost"))
-        .limit(limit)
-    )
-
-    if tenant_id:
-        query = query.where(SessionUsage.tenant_id == tenant_id)
-
-    results = db.execute(query).all()
+    # Usage totals per counselor, highest cost first
+    usage_rows = sorted(
+        _aggregate(db, USAGE, start_time, by=("counselor_id",), tenant_id=tenant_id),
+        # Costs are stored with 6 decimals; ties break on the counselor id
+        key=lambda r: (-round(r["estimated_cost_usd"], 6), str(r["counselor_id"])),
+    )[:limit]
+    counselors = {
+        row.id: row
+        for row in db.execute(
+            select(Counselor.id, Counselor.email, Counselor.full_name).where(
+                Counselor.id.in_([r["counselor_id"] for r in usage_rows])
+            )
+        ).all()
+    }
+    results = [r for r in usage_rows if r["counselor_id"] in counselors]
 
     # Add Gemini costs separately (from SessionAnalysisLog)
-    gemini_query = (
-        select(
-            Counselor.email,
-            func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0).label("gemini_cost")
+    gemini_costs = {
+        row["counselor_id"]: float(row["estimated_cost_usd"])
+        for row in _aggregate(
+            db, ANALYSIS, start_time, by=("counselor_id",), tenant_id=tenant_id
         )
-        .select_from(SessionAnalysisLog)
-        .join(Counselor, SessionAnalysisLog.counselor_id == Counselor.id)
-        .where(SessionAnalysisLog.analyzed_at >= start_time)
-        .group_by(Counselor.email)
-    )
-
-    if tenant_id:
-        gemini_query = gemini_query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    gemini_results = db.execute(gemini_query).all()
-    gemini_costs = {row.email: float(row.gemini_cost) for row in gemini_results}
+    }
 
     # Calculate platform average for comparison
-    total_cost = sum(float(row.total_cost) for row in results)
-    total_sessions = sum(int(row.sessions) for row in results)
-    platform_avg_cost_per_session = total_cost / total_sessions if total_sessions > 0 else 0
+    total_cost = _total(results, "estimated_cost_usd")
+    total_sessions = int(_total(results, "sessions"))
+    platform_avg_cost_per_session = (
+        total_cost / total_sessions if total_sessions > 0 else 0
+    )
 
     # Classify users and suggest actions
     user_list = []
     for row in results:
-        email = row.email
-        elevenlabs_cost = float(row.total_cost)
-        gemini_cost = gemini_costs.get(email, 0.0)
+        counselor = counselors[row["counselor_id"]]
+        elevenlabs_cost = float(row["estimated_cost_usd"])
+        gemini_cost = gemini_costs.get(row["counselor_id"], 0.0)
         total_cost = elevenlabs_cost + gemini_cost
-        sessions = int(row.sessions)
+        sessions = int(row["sessions"])
         cost_per_session = total_cost / sessions if sessions > 0 else 0
 
         # Anomaly detection
@@ -988,16 +790,18 @@ def get_cost_per_user(
             status = "high_cost"
             suggested_action = "Contact for premium upgrade"
 
-        user_list.append({
-            "email": email,
-            "full_name": row.full_name,
-            "total_cost_usd": round(total_cost, 2),
-            "sessions": sessions,
-            "cost_per_session": round(cost_per_session, 2),
-            "total_minutes": round(float(row.total_seconds) / 60, 1),
-            "status": status,
-            "suggested_action": suggested_action,
-        })
+        user_list.append(
+            {
+                "email": counselor.email,
+                "full_name": counselor.full_name,
+                "total_cost_usd": round(total_cost, 2),
+                "sessions": sessions,
+                "cost_per_session": round(cost_per_session, 2),
+                "total_minutes": round(float(row["duration_seconds"]) / 60, 1),
+                "status": status,
+                "suggested_action": suggested_action,
+            }
+        )
 
     return user_list
 
@@ -1006,177 +810,41 @@ def get_cost_per_user(
 def get_user_segments(
     time_range: Literal["day", "week", "month"] = Query("month"),
     tenant_id: Optional[str] = Query(None),
+    top_k: Optional[int] = Query(
+        None, ge=0, le=100, description="Members listed per segment"
+    ),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Get user segmentation: Power Users, Active, At-Risk, Churned
 
+    Segments are assigned in the database (see UserSegmentation); thresholds
+    come from USER_SEGMENT_* settings.
+
     Returns:
     - power_users: Top 10% by session count
     - active_users: Used in last 7 days
     - at_risk_users: No activity in 7+ days (but active in last 30)
     - churned_users: No activity in 30+ days
     """
-    from sqlalchemy import or_
-
-    now = datetime.now(timezone.utc)
+    now = _now()
     start_time = get_time_filter(time_range)
+    policy = SegmentationPolicy.from_settings(top_k=top_k)
 
-    # Get all users with activity
-    base_query = (
-        select(
-            Counselor.id,
-            Counselor.email,
-            Counselor.created_at,
-            func.count(func.distinct(SessionUsage.session_id)).label("sessions"),
-            func.max(SessionUsage.created_at).label("last_activity"),
-            # Calculate total cost: ElevenLabs (from duration) + Gemini (from estimated_cost_usd)
-            (
-                func.coalesce(func.sum(SessionUsage.duration_seconds * 0.40 / 3600.0), 0) +
-                func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0)
-            ).label("total_cost"),
-            # Total duration in seconds
-            func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("total_duration_seconds"),
-            # Days used (count distinct days with activity)
-            func.count(func.distinct(func.date_trunc("day", SessionUsage.created_at))).label("days_used"),
-        )
-        .select_from(Counselor)
-        .outerjoin(SessionUsage, Counselor.id == SessionUsage.counselor_id)
-        .outerjoin(SessionAnalysisLog, SessionUsage.session_id == SessionAnalysisLog.session_id)
-        .where(Counselor.created_at < now - timedelta(days=7))  # Only users older than 7 days
-        .where(
-            or_(
-                SessionUsage.id.is_(None),  # Allow users with no sessions
-                SessionUsage.created_at >= start_time  # Filter sessions by time range
-            )
-        )
-        .where(
-            or_(
-                SessionAnalysisLog.id.is_(None),  # Allow NULL from outerjoin
-                SessionAnalysisLog.analyzed_at >= start_time  # Filter non-NULL records
-            )
-        )
-        .group_by(Counselor.id, Counselor.email, Counselor.created_at)
+    return dashboard_cache.memoize(
+        "user-segments",
+        [time_range, tenant_id, policy.as_dict()],
+        lambda: UserSegmentation(policy, tenant_id).summary(db, start_time, now),
     )
 
-    if tenant_id:
-        base_query = base_query.where(Counselor.tenant_id == tenant_id)
-
-    all_users = db.execute(base_query).all()
-
-    # Segment users
-    power_users = []
-    active_users = []
-    at_risk_users = []
-    churned_users = []
-
-    # Calculate 90th percentile for power users
-    session_counts = [int(u.sessions) for u in all_users if u.sessions > 0]
-    p90_threshold = sorted(session_counts)[int(len(session_counts) * 0.9)] if session_counts else 0
-
-    for user in all_users:
-        sessions = int(user.sessions)
-        last_activity = user.last_activity
-        total_cost = float(user.total_cost)
-        total_duration_minutes = round(float(user.total_duration_seconds) / 60, 1)
-        days_used = int(user.days_used)
-
-        # No activity at all
-        if last_activity is None:
-            churned_users.append({
-                "email": user.email,
-                "sessions": 0,
-                "last_activity": None,
-                "total_cost_usd": 0,
-                "total_duration_minutes": 0,
-                "days_used": 0,
-            })
-            continue
-
-        days_inactive = (now - last_activity).days
-
-        # Power users (top 10%)
-        if sessions >= p90_threshold and sessions > 0:
-            power_users.append({
-                "email": user.email,
-                "sessions": sessions,
-                "last_activity": last_activity.strftime("%Y-%m-%d %H:%M"),
-                "total_cost_usd": round(total_cost, 2),
-                "total_duration_minutes": total_duration_minutes,
-                "days_used": days_used,
-            })
-        # At-risk users (7-30 days inactive)
-        elif 7 <= days_inactive < 30:
-            at_risk_users.append({
-                "email": user.email,
-                "sessions": sessions,
-                "last_activity": last_activity.strftime("%Y-%m-%d %H:%M"),
-                "days_inactive": days_inactive,
-                "total_duration_minutes": total_duration_minutes,
-                "days_used": days_used,
-            })
-        # Churned users (30+ days inactive)
-        elif days_inactive >= 30:
-            churned_users.append({
-                "email": user.email,
-                "sessions": sessions,
-                "last_activity": last_activity.strftime("%Y-%m-%d %H:%M"),
-                "days_inactive": days_inactive,
-                "total_duration_minutes": total_duration_minutes,
-                "days_used": days_used,
-            })
-        # Active users (< 7 days inactive)
-        else:
-            active_users.append({
-                "email": user.email,
-                "sessions": sessions,
-                "last_activity": last_activity.strftime("%Y-%m-%d %H:%M"),
-                "total_cost_usd": round(total_cost, 2),
-                "total_duration_minutes": total_duration_minutes,
-                "days_used": days_used,
-            })
-
-    # Calculate averages
-    avg_sessions_power = sum(u["sessions"] for u in power_users) / len(power_users) if power_users else 0
-    avg_cost_power = sum(u["total_cost_usd"] for u in power_users) / len(power_users) if power_users else 0
-    avg_sessions_active = sum(u["sessions"] for u in active_users) / len(active_users) if active_users else 0
-    avg_cost_active = sum(u["total_cost_usd"] for u in active_users) / len(active_users) if active_users else 0
-
-    return {
-        "power_users": {
-            "count": len(power_users),
-            "avg_sessions": round(avg_sessions_power, 1),
-            "avg_cost_usd": round(avg_cost_power, 2),
-            "suggested_action": "Upsell to premium tier",
-            "users": power_users[:10],  # Top 10 for display
-        },
-        "active_users": {
-            "count": len(active_users),
-            "avg_sessions": round(avg_sessions_active, 1),
-            "avg_cost_usd": round(avg_cost_active, 2),
-            "suggested_action": "Maintain engagement",
-            "users": active_users[:10],
-        },
-        "at_risk_users": {
-            "count": len(at_risk_users),
-            "suggested_action": "Send re-engagement email",
-            "users": at_risk_users[:10],
-        },
-        "churned_users": {
-            "count": len(churned_users),
-            "suggested_action": "Archive or remove",
-            "users": churned_users[:10],
-        },
-    }
-
 
 @router.get("/cost-prediction")
 def get_cost_prediction(
     time_range: Literal["month"] = Query("month"),
     tenant_id: Optional[str] = Query(None),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
 ) -> Dict:
     """
     Predict next month's cost based on current trend
@@ -1188,7 +856,7 @@ def get_cost_prediction(
     - predicted_month_cost: Linear projection
     - daily_average: Average cost per day
     """
-    now = datetime.now(timezone.utc)
+    now = _now()
     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
     # Calculate days in month
@@ -1201,68 +869,27 @@ def get_cost_prediction(
     days_elapsed = (now - month_start).days + 1
     days_remaining = days_in_month - days_elapsed
 
-    # Get current month cost (ElevenLabs)
-    elevenlabs_query = select(
-        func.coalesce(func.sum(SessionUsage.estimated_cost_usd), 0).label("cost")
-    ).select_from(SessionUsage).where(SessionUsage.created_at >= month_start)
-
-    if tenant_id:
-        elevenlabs_query = elevenlabs_query.where(SessionUsage.tenant_id == tenant_id)
-
-    elevenlabs_result = db.execute(elevenlabs_query).first()
-    elevenlabs_cost = float(elevenlabs_result.cost) if elevenlabs_result else 0.0
-
-    # Get current month cost (Gemini)
-    gemini_query = select(
-        func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0).label("cost")
-    ).select_from(SessionAnalysisLog).where(SessionAnalysisLog.analyzed_at >= month_start)
-
-    if tenant_id:
-        gemini_query = gemini_query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    gemini_result = db.execute(gemini_query).first()
-    gemini_cost = float(gemini_result.cost) if gemini_result else 0.0
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
 
-    current_month_cost = elevenlabs_cost + gemini_cost
+    # Current and last month, both fact tables, in one grouped query
+    costs = {
+        row.period: float(row.usage_cost_usd) + float(row.analysis_cost_usd)
+        for row in db.execute(
+            CostAggregation(tenant_id).by_period(
+                [
+                    Period("current", month_start),
+                    Period("last", last_month_start, month_start),
+                ]
+            )
+        ).all()
+    }
+    current_month_cost = costs["current"]
+    last_month_cost = costs["last"]
 
     # Simple linear projection
     daily_average = current_month_cost / days_elapsed if days_elapsed > 0 else 0
     predicted_month_cost = daily_average * days_in_month
 
-    # Calculate growth vs last month
-    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
-
-    last_month_query = select(
-        func.coalesce(func.sum(SessionUsage.estimated_cost_usd), 0).label("cost")
-    ).select_from(SessionUsage).where(
-        and_(
-            SessionUsage.created_at >= last_month_start,
-            SessionUsage.created_at < month_start
-        )
-    )
-
-    if tenant_id:
-        last_month_query = last_month_query.where(SessionUsage.tenant_id == tenant_id)
-
-    last_month_result = db.execute(last_month_query).first()
-    last_month_cost = float(last_month_result.cost) if last_month_result else 0.0
-
-    # Add Gemini cost for last month
-    gemini_last_query = select(
-        func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0).label("cost")
-    ).select_from(SessionAnalysisLog).where(
-        and_(
-            SessionAnalysisLog.analyzed_at >= last_month_start,
-            SessionAnalysisLog.analyzed_at < month_start
-        )
-    )
-
-    if tenant_id:
-        gemini_last_query = gemini_last_query.where(SessionAnalysisLog.tenant_id == tenant_id)
-
-    gemini_last_result = db.execute(gemini_last_query).first()
-    last_month_cost += float(gemini_last_result.cost) if gemini_last_result else 0.0
-
     growth_pct = 0.0
     if last_month_cost > 0:
         growth_pct = ((predicted_month_cost - last_month_cost) / last_month_cost) * 100
@@ -1278,145 +905,205 @@ def get_cost_prediction(
     }
 
 
+@router.get("/cache-stats")
+def get_cache_stats(
+    current_user: Counselor = Depends(require_admin),
+) -> Dict:
+    """
+    Dashboard cache backend and hit/miss counters (this process)
+
+    Returns:
+        - backend: MemoryCacheBackend, RedisCacheBackend or none
+        - closed_hits / closed_misses: Closed hour/day buckets
+        - current_hits / current_misses: Current-hour entries
+        - shared: Requests that waited on an identical in-flight computation
+        - hit_rate: Hits / lookups over both tiers
+    """
+    return dashboard_cache.stats_dict()
+
+
+@router.get("/emotion-engine-stats")
+def get_emotion_engine_stats(
+    current_user: Counselor = Depends(require_admin),
+) -> Dict:
+    """
+    Emotion-feedback engine path counters and latency (this process)
+
+    Returns:
+        - requests: Emotion-feedback requests answered
+        - paths: Requests per winning path (llm, llm_hedge, llm_shared, cache,
+          lexicon_deadline, lexicon_predicted, lexicon_error)
+        - fallback_rate: Share answered by the local lexicon
+        - latency_ms: p50 / p90 / p99 end-to-end latency
+        - llm_p90_ms: p90 of recent LLM calls (None until enough samples)
+    """
+    return emotion_engine.stats.snapshot()
+
+
 @router.get("/export-csv")
 def export_csv(
     time_range: Literal["day", "week", "month"] = Query("month"),
-    data_type: Literal["users", "sessions"] = Query("users"),
+    data_type: Literal["users", "sessions", "analysis_logs", "credit_logs"] = Query(
+        "users"
+    ),
+    gzip: bool = Query(False, description="Compress the download (.csv.gz)"),
     current_user: Counselor = Depends(require_admin),
-    db: Session = Depends(get_db),
-) -> Response:
+    db: Session = Depends(get_analytics_db),
+) -> StreamingResponse:
     """
-    Export data as CSV
+    Export data as CSV (streamed)
 
     Args:
-        data_type: "users" for user summary, "sessions" for session details
+        data_type: "users" for user summary, "sessions" for session details,
+            "analysis_logs" for analysis log details, "credit_logs" for
+            credit transactions
+        gzip: Send a gzip-compressed file instead of plain CSV
     """
     start_time = get_time_filter(time_range)
+    engine = CsvExportEngine(db.get_bind())
+    filename = (
+        f"{data_type}_{time_range}_{datetime.now(timezone.utc).strftime('%Y%m%d')}.csv"
+    )
+    if gzip:
+        filename += ".gz"
+
+    return StreamingResponse(
+        engine.stream(DATASETS[data_type], start_time, gzip=gzip),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}",
+        },
+    )
 
-    # Create CSV in memory
-    output = io.StringIO()
-
-    if data_type == "users":
-        # Export user summary with separate token columns
-        from sqlalchemy import case
-
-        query = (
-            select(
-                Counselor.email,
-                Counselor.full_name,
-                Counselor.tenant_id,
-                # Gemini Flash tokens (includes both Flash 1.5 and Flash 3)
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (SessionAnalysisLog.model_name.in_(["gemini-1.5-flash-latest", "gemini-3-flash-preview"]),
-                             SessionAnalysisLog.prompt_tokens + SessionAnalysisLog.completion_tokens),
-                            else_=0
-                        )
-                    ), 0
-                ).label("gemini_flash_tokens"),
-                # Gemini Lite tokens
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (SessionAnalysisLog.model_name.like("%flash-lite%"),
-                             SessionAnalysisLog.prompt_tokens + SessionAnalysisLog.completion_tokens),
-                            else_=0
-                        )
-                    ), 0
-                ).label("gemini_lite_tokens"),
-                # ElevenLabs hours
-                func.coalesce(
-                    func.sum(SessionUsage.duration_seconds) / 3600.0, 0
-                ).label("elevenlabs_hours"),
-                func.count(func.distinct(SessionUsage.session_id)).label("total_sessions"),
-                # Calculate total cost: ElevenLabs (from duration) + Gemini (from estimated_cost_usd)
-                (
-                    func.coalesce(func.sum(SessionUsage.duration_seconds * 0.40 / 3600.0), 0) +
-                    func.coalesce(func.sum(SessionAnalysisLog.estimated_cost_usd), 0)
-                ).label("total_cost_usd"),
-                func.coalesce(func.sum(SessionUsage.duration_seconds), 0).label("total_seconds"),
+
+# ============================================================================
+# Snapshot: several widgets in one request
+# ============================================================================
+
+SNAPSHOT_WIDGETS: Dict[str, Callable[..., Any]] = {
+    "summary": get_summary,
+    "cost-trend": get_cost_trend,
+    "token-trend": get_token_trend,
+    "cost-breakdown": get_cost_breakdown,
+    "session-trend": get_session_trend,
+    "model-distribution": get_model_distribution,
+    "daily-active-users": get_daily_active_users,
+    "safety-distribution": get_safety_distribution,
+    "top-users": get_top_users,
+    "user-daily-usage": get_user_daily_usage,
+    "overall-stats": get_overall_stats,
+    "cost-per-user": get_cost_per_user,
+    "user-segments": get_user_segments,
+    "cost-prediction": get_cost_prediction,
+}
+
+
+def _params_model(name: str, endpoint: Callable[..., Any]) -> Type[BaseModel]:
+    """The endpoint's query parameters (types, defaults, bounds) as a model"""
+    fields = {
+        param.name: (param.annotation, param.default)
+        for param in inspect.signature(endpoint).parameters.values()
+        if param.name not in ("current_user", "db")
+    }
+    return create_model(f"{name}-params", __config__={"extra": "forbid"}, **fields)
+
+
+_SNAPSHOT_PARAMS = {
+    name: _params_model(name, fn) for name, fn in SNAPSHOT_WIDGETS.items()
+}
+
+
+def _validate_widgets(specs: List[DashboardWidgetSpec]) -> List[tuple]:
+    """(key, endpoint, params) per spec; one 422 listing every invalid spec"""
+    errors, widgets, keys = [], [], set()
+    for spec in specs:
+        key = spec.response_key
+        if key in keys:
+            errors.append(
+                {"widget": key, "field": "key", "message": "Duplicate widget key"}
             )
-            .select_from(SessionUsage)
-            .join(Counselor, SessionUsage.counselor_id == Counselor.id)
-            .outerjoin(SessionAnalysisLog, SessionUsage.session_id == SessionAnalysisLog.session_id)
-            .where(SessionUsage.created_at >= start_time)
-            .where(
-                or_(
-                    SessionAnalysisLog.id.is_(None),  # Allow NULL from outerjoin
-                    SessionAnalysisLog.analyzed_at >= start_time  # Filter non-NULL records
-                )
+            continue
+        keys.add(key)
+        model = _SNAPSHOT_PARAMS.get(spec.widget)
+        if model is None:
+            errors.append(
+                {
+                    "widget": key,
+                    "field": "widget",
+                    "message": f"Unknown widget '{spec.widget}'",
+                }
             )
-            .group_by(Counselor.email, Counselor.full_name, Counselor.tenant_id)
-            .order_by(desc("total_cost_usd"))
+            continue
+        try:
+            params = model(**spec.params)
+        except ValidationError as e:
+            errors += [
+                {
+                    "widget": key,
+                    "field": " -> ".join(
+                        ["params", *(str(loc) for loc in error["loc"])]
+                    ),
+                    "message": error["msg"],
+                }
+                for error in e.errors()
+            ]
+            continue
+        widgets.append((key, SNAPSHOT_WIDGETS[spec.widget], dict(params)))
+    if errors:
+        raise UnprocessableEntityError(
+            detail=f"Invalid snapshot widgets: {len(errors)} error(s)", errors=errors
         )
+    return widgets
 
-        results = db.execute(query).all()
 
-        writer = csv.DictWriter(
-            output,
-            fieldnames=["email", "full_name", "tenant_id", "gemini_flash_tokens", "gemini_lite_tokens", "elevenlabs_hours", "total_sessions", "total_cost_usd", "total_minutes"],
-        )
-        writer.writeheader()
-
-        for row in results:
-            writer.writerow({
-                "email": row.email,
-                "full_name": row.full_name,
-                "tenant_id": row.tenant_id,
-                "gemini_flash_tokens": int(row.gemini_flash_tokens),
-                "gemini_lite_tokens": int(row.gemini_lite_tokens),
-                "elevenlabs_hours": f"{row.elevenlabs_hours:.1f}",
-                "total_sessions": int(row.total_sessions),
-                "total_cost_usd": f"{row.total_cost_usd:.2f}",
-                "total_minutes": round(float(row.total_seconds) / 60, 2),
-            })
-
-    else:  # sessions
-        # Export session details
-        query = (
-            select(
-                SessionUsage.created_at,
-                Counselor.email,
-                SessionUsage.tenant_id,
-                SessionUsage.total_tokens,
-                SessionUsage.estimated_cost_usd,
-                SessionUsage.duration_seconds,
-                SessionUsage.status,
-            )
-            .select_from(SessionUsage)
-            .join(Counselor, SessionUsage.counselor_id == Counselor.id)
-            .where(SessionUsage.created_at >= start_time)
-            .order_by(desc(SessionUsage.created_at))
-        )
+@router.post("/snapshot")
+def get_snapshot(
+    request: DashboardSnapshotRequest,
+    current_user: Counselor = Depends(require_admin),
+    db: Session = Depends(get_analytics_db),
+) -> Dict:
+    """
+    Compute several dashboard widgets in one request
 
-        results = db.execute(query).all()
+    Every widget runs on this request's session (one admin check, one
+    pooled connection, one transaction) at the same pinned time, so
+    identical rollup aggregates requested by several widgets are computed
+    once. A widget that fails with an HTTP error (e.g. 404) reports it in
+    its entry; the others are still returned.
 
-        writer = csv.DictWriter(
-            output,
-            fieldnames=["timestamp", "email", "tenant_id", "tokens", "cost_usd", "duration_minutes", "status"],
-        )
-        writer.writeheader()
-
-        for row in results:
-            writer.writerow({
-                "timestamp": row.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "email": row.email,
-                "tenant_id": row.tenant_id,
-                "tokens": int(row.total_tokens or 0),
-                "cost_usd": float(row.estimated_cost_usd or 0),
-                "duration_minutes": round(float(row.duration_seconds or 0) / 60, 2),
-                "status": row.status,
-            })
-
-    # Return CSV response
-    csv_content = output.getvalue()
-    filename = f"{data_type}_{time_range}_{datetime.now(timezone.utc).strftime('%Y%m%d')}.csv"
-
-    return Response(
-        content=csv_content,
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}",
-        },
-    )
+    Body:
+        {"widgets": [{"widget": "summary", "params": {"time_range": "week"}},
+                     {"widget": "cost-trend", "key": "trend", "params": {...}}]}
+
+    Returns:
+        - generated_at: The pinned time (ISO 8601)
+        - widgets: {key: {"data": <endpoint response>, "elapsed_ms": float}}
+          or {key: {"error": {"status_code", "detail"}, "elapsed_ms"}}
+        - elapsed_ms: Total time
+    """
+    widgets = _validate_widgets(request.widgets)
+    now = datetime.now(timezone.utc)
+    now_token = _snapshot_now.set(now)
+    rows_token = _snapshot_rows.set({})
+    started = time.perf_counter()
+    results: Dict[str, Dict] = {}
+    try:
+        for key, endpoint, params in widgets:
+            widget_started = time.perf_counter()
+            try:
+                entry = {"data": endpoint(**params, current_user=current_user, db=db)}
+            except HTTPException as e:
+                entry = {"error": {"status_code": e.status_code, "detail": e.detail}}
+            entry["elapsed_ms"] = round(
+                (time.perf_counter() - widget_started) * 1000, 1
+            )
+            results[key] = entry
+    finally:
+        _snapshot_rows.reset(rows_token)
+        _snapshot_now.reset(now_token)
+
+    return {
+        "generated_at": now.isoformat(),
+        "widgets": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -26,6 +26,7 @@ from app.schemas.admin_counselor import (
     CounselorListResponse,
     CounselorUpdateRequest,
 )
+from app.services.billing.usage_gate import usage_gate
 from app.services.external.email_sender import email_sender
 
 logger = logging.getLogger(__name__)
@@ -251,8 +252,14 @@ async def list_counselors(
         query = query.where(
             or_(
                 Counselor.email.ilike(search_pattern),
-                and_(Counselor.username.isnot(None), Counselor.username.ilike(search_pattern)),
-                and_(Counselor.full_name.isnot(None), Counselor.full_name.ilike(search_pattern)),
+                and_(
+                    Counselor.username.isnot(None),
+                    Counselor.username.ilike(search_pattern),
+                ),
+                and_(
+                    Counselor.full_name.isnot(None),
+                    Counselor.full_name.ilike(search_pattern),
+                ),
             )
         )
 
@@ -273,8 +280,14 @@ async def list_counselors(
         count_query = count_query.where(
             or_(
                 Counselor.email.ilike(search_pattern),
-                and_(Counselor.username.isnot(None), Counselor.username.ilike(search_pattern)),
-                and_(Counselor.full_name.isnot(None), Counselor.full_name.ilike(search_pattern)),
+                and_(
+                    Counselor.username.isnot(None),
+                    Counselor.username.ilike(search_pattern),
+                ),
+                and_(
+                    Counselor.full_name.isnot(None),
+                    Counselor.full_name.ilike(search_pattern),
+                ),
             )
         )
     total = db.execute(count_query).scalar()
@@ -355,6 +368,8 @@ async def update_counselor(
 
     counselor.updated_at = datetime.now(timezone.utc)
     db.commit()
+    # Limits may have changed: next usage check goes to the database
+    usage_gate.invalidate(counselor.id)
     db.refresh(counselor)
 
     return counselor
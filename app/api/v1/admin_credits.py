@@ -1,28 +1,44 @@
 """
 Admin Credit Management API Endpoints
 """
-from typing import List, Optional
+from datetime import datetime
+from typing import Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core.deps import get_db
+from app.core.exceptions import BadRequestError
 from app.models.counselor import Counselor, CounselorRole
-from app.models.credit_log import CreditLog
 from app.models.credit_rate import CreditRate
 from app.schemas.credit import (
     AdminAddCreditsRequest,
     AdminAddCreditsResponse,
     CounselorCreditInfo,
+    CounselorCreditListItem,
+    CounselorCreditListResponse,
+    CreditLogListItem,
+    CreditLogListResponse,
     CreditLogResponse,
     CreditRateCreate,
+    CreditRateListResponse,
     CreditRateResponse,
 )
+from app.services.billing.admin_credit_listing import (
+    CREDIT_LOG_DEFAULT_FIELDS,
+    CREDIT_LOG_FIELDS,
+    MEMBER_DEFAULT_FIELDS,
+    MEMBER_FIELDS,
+    AdminCreditListing,
+    parse_fields,
+)
+from app.services.billing.rate_cache import rate_cache
 from app.services.core.credit_billing import CreditBillingService
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/admin/credits", tags=["admin-credits"])
 
@@ -147,41 +163,74 @@ def resolve_tenant_id(
     return requested_tenant_id
 
 
-@router.get("/members", response_model=List[CounselorCreditInfo])
-async def list_members_with_credits(
+@router.get(
+    "/members",
+    response_model=CounselorCreditListResponse,
+    response_model_exclude_unset=True,
+)
+def list_members_with_credits(
+    request: Request,
     tenant_id: Optional[str] = Query(None, description="Filter by tenant ID"),
+    search: Optional[str] = Query(None, description="Email or name contains"),
+    billing_mode: Optional[str] = Query(None, description="prepaid / subscription"),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    min_balance: Optional[float] = Query(None, description="available_credits >="),
+    max_balance: Optional[float] = Query(None, description="available_credits <="),
+    sort: Literal["balance", "activity", "email"] = Query("email"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from previous page's next_cursor"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return (id is always included): "
+        + ",".join(MEMBER_FIELDS),
+    ),
+    count: Literal["exact", "estimated", "none"] = Query(
+        "exact", description="Total count mode: exact / estimated / none"
+    ),
     db: Session = Depends(get_db),
     current_admin: Optional[Counselor] = Depends(require_admin),
 ):
     """
-    List all counselors with credit information.
+    List counselors with credit information (one page).
     Admin only. Filtered by tenant if authorized.
+
+    - sort: balance（available_credits）/ activity（最近一筆點數異動）/ email
+    - cursor: 帶入上一頁的 next_cursor 取得下一頁
+    - fields: 只回傳指定欄位（預設為原本的會員點數欄位）
     """
+    instance = str(request.url.path)
     target_tenant_id = resolve_tenant_id(current_admin, tenant_id)
+    try:
+        selected = parse_fields(fields, MEMBER_FIELDS, MEMBER_DEFAULT_FIELDS)
+        items, total, next_cursor = AdminCreditListing(db).list_members(
+            target_tenant_id,
+            search=search,
+            billing_mode=billing_mode,
+            is_active=is_active,
+            min_balance=min_balance,
+            max_balance=max_balance,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            cursor=cursor,
+            fields=selected,
+            count_mode=count,
+        )
+    except ValueError as e:  # unknown fields / InvalidCursorError
+        raise BadRequestError(detail=str(e), instance=instance)
 
-    # Automatically filter by admin's tenant_id
-    counselors = (
-        db.query(Counselor).filter(Counselor.tenant_id == target_tenant_id).all()
+    return CounselorCreditListResponse(
+        total=total,
+        items=[CounselorCreditListItem(**item) for item in items],
+        next_cursor=next_cursor,
     )
 
-    return [
-        CounselorCreditInfo(
-            id=c.id,
-            email=c.email,
-            full_name=c.full_name,
-            phone=c.phone,
-            tenant_id=c.tenant_id,
-            total_credits=c.total_credits,
-            credits_used=c.credits_used,
-            available_credits=c.available_credits,
-            subscription_expires_at=c.subscription_expires_at,
-        )
-        for c in counselors
-    ]
-
 
 @router.get("/members/{counselor_id}", response_model=CounselorCreditInfo)
-async def get_member_credit_info(
+def get_member_credit_info(
     counselor_id: UUID,
     db: Session = Depends(get_db),
     current_admin: Optional[Counselor] = Depends(require_admin),
@@ -191,34 +240,18 @@ async def get_member_credit_info(
     Admin only. Automatically filtered by admin's tenant.
     """
     # Verify counselor belongs to admin's tenant
-    counselor = (
-        db.query(Counselor)
-        .filter(
-            Counselor.id == counselor_id, Counselor.tenant_id == current_admin.tenant_id
-        )
-        .first()
-    )
+    member = AdminCreditListing(db).get_member(current_admin.tenant_id, counselor_id)
 
-    if not counselor:
+    if not member:
         raise HTTPException(
             status_code=404, detail="Counselor not found in your tenant"
         )
 
-    return CounselorCreditInfo(
-        id=counselor.id,
-        email=counselor.email,
-        full_name=counselor.full_name,
-        phone=counselor.phone,
-        tenant_id=counselor.tenant_id,
-        total_credits=counselor.total_credits,
-        credits_used=counselor.credits_used,
-        available_credits=counselor.available_credits,
-        subscription_expires_at=counselor.subscription_expires_at,
-    )
+    return CounselorCreditInfo(**member)
 
 
 @router.post("/members/{counselor_id}/add", response_model=AdminAddCreditsResponse)
-async def add_credits_to_member(
+def add_credits_to_member(
     counselor_id: UUID,
     request: AdminAddCreditsRequest,
     db: Session = Depends(get_db),
@@ -271,44 +304,77 @@ async def add_credits_to_member(
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("/logs", response_model=List[CreditLogResponse])
-async def get_credit_logs(
+@router.get(
+    "/logs",
+    response_model=CreditLogListResponse,
+    response_model_exclude_unset=True,
+)
+def get_credit_logs(
+    request: Request,
     counselor_id: Optional[UUID] = Query(None, description="Filter by counselor ID"),
     tenant_id: Optional[str] = Query(None, description="Filter by tenant ID"),
     transaction_type: Optional[str] = Query(
         None, description="Filter by transaction type"
     ),
-    limit: int = Query(100, le=1000, description="Maximum number of logs to return"),
-    offset: int = Query(0, description="Number of logs to skip"),
+    resource_type: Optional[str] = Query(None, description="Filter by resource type"),
+    created_from: Optional[datetime] = Query(None, description="created_at >="),
+    created_to: Optional[datetime] = Query(None, description="created_at <"),
+    limit: int = Query(
+        100, ge=1, le=1000, description="Maximum number of logs to return"
+    ),
+    offset: int = Query(
+        0, ge=0, description="Number of logs to skip (ignored when cursor is given)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from previous page's next_cursor"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return (id is always included): "
+        + ",".join(CREDIT_LOG_FIELDS),
+    ),
+    count: Literal["exact", "estimated", "none"] = Query(
+        "none", description="Total count mode: exact / estimated / none"
+    ),
     db: Session = Depends(get_db),
     current_admin: Optional[Counselor] = Depends(require_admin),
 ):
     """
-    Get credit transaction history.
+    Get credit transaction history (newest first, one page).
     Admin only. Filtered by tenant if authorized.
 
-    Supports filtering by counselor_id and transaction_type.
+    Supports filtering by counselor_id, transaction_type, resource_type and
+    a created_at range; cursor (keyset) pagination takes precedence over offset.
     """
+    instance = str(request.url.path)
     target_tenant_id = resolve_tenant_id(current_admin, tenant_id)
+    try:
+        selected = parse_fields(fields, CREDIT_LOG_FIELDS, CREDIT_LOG_DEFAULT_FIELDS)
+        items, total, next_cursor = AdminCreditListing(db).list_logs(
+            target_tenant_id,
+            counselor_id=counselor_id,
+            transaction_type=transaction_type,
+            resource_type=resource_type,
+            created_from=created_from,
+            created_to=created_to,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            fields=selected,
+            count_mode=count,
+        )
+    except ValueError as e:  # unknown fields / InvalidCursorError
+        raise BadRequestError(detail=str(e), instance=instance)
 
-    # Join with Counselor to filter by tenant_id
-    query = (
-        db.query(CreditLog)
-        .join(Counselor, CreditLog.counselor_id == Counselor.id)
-        .filter(Counselor.tenant_id == target_tenant_id)
+    return CreditLogListResponse(
+        total=total,
+        items=[CreditLogListItem(**item) for item in items],
+        next_cursor=next_cursor,
     )
 
-    if counselor_id:
-        query = query.filter(CreditLog.counselor_id == counselor_id)
-    if transaction_type:
-        query = query.filter(CreditLog.transaction_type == transaction_type)
-
-    logs = query.order_by(CreditLog.created_at.desc()).offset(offset).limit(limit).all()
-    return [CreditLogResponse.model_validate(log) for log in logs]
-
 
 @router.post("/rates", response_model=CreditRateResponse)
-async def create_billing_rate(
+def create_billing_rate(
     request: CreditRateCreate,
     db: Session = Depends(get_db),
     current_admin: Optional[Counselor] = Depends(require_admin),
@@ -353,20 +419,26 @@ async def create_billing_rate(
 
     db.add(new_rate)
     db.commit()
+    rate_cache.invalidate(db)
     db.refresh(new_rate)
 
     return CreditRateResponse.model_validate(new_rate)
 
 
-@router.get("/rates", response_model=List[CreditRateResponse])
-async def list_billing_rates(
+@router.get("/rates", response_model=CreditRateListResponse)
+def list_billing_rates(
+    request: Request,
     rule_name: Optional[str] = Query(None, description="Filter by rule name"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from previous page's next_cursor"
+    ),
     db: Session = Depends(get_db),
     current_admin: Optional[Counselor] = Depends(require_admin),
 ):
     """
-    List billing rates.
+    List billing rates (by rule name, newest version first; one page).
     Admin only. Automatically filtered by admin's tenant.
 
     Supports filtering by rule_name and is_active.
@@ -374,13 +446,14 @@ async def list_billing_rates(
     # Note: CreditRate is global (not tenant-specific) in current schema
     # This endpoint remains unchanged but renamed parameter for consistency
     # If tenant-specific rates are needed, CreditRate model needs tenant_id column
+    try:
+        rates, next_cursor = AdminCreditListing(db).list_rates(
+            rule_name=rule_name, is_active=is_active, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError as e:
+        raise BadRequestError(detail=str(e), instance=str(request.url.path))
 
-    query = db.query(CreditRate)
-
-    if rule_name:
-        query = query.filter(CreditRate.rule_name == rule_name)
-    if is_active is not None:
-        query = query.filter(CreditRate.is_active == is_active)
-
-    rates = query.order_by(CreditRate.rule_name, CreditRate.version.desc()).all()
-    return [CreditRateResponse.model_validate(rate) for rate in rates]
+    return CreditRateListResponse(
+        items=[CreditRateResponse.model_validate(rate) for rate in rates],
+        next_cursor=next_cursor,
+    )
@@ -5,12 +5,14 @@ from datetime import datetime, timezone
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session as DBSession
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.deps import get_current_user
+from app.core.exceptions import BadRequestError
 from app.models.counselor import Counselor
 from app.models.session import Session as SessionModel
 from app.models.session_analysis_log import SessionAnalysisLog
@@ -23,7 +25,15 @@ from app.schemas.session_usage import (
     SessionUsageResponse,
     SessionUsageUpdate,
 )
+from app.services.analysis.analysis_log_service import (
+    ANALYSIS_LOG_LARGE_FIELDS,
+    AnalysisLogService,
+)
+from app.services.billing.credit_ledger import DuplicateLedgerEntryError
+from app.services.billing.usage_gate import usage_gate
+from app.services.core.content_store import ContentStore
 from app.services.core.credit_billing import CreditBillingService
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(tags=["Session Usage"])
 
@@ -49,6 +59,13 @@ def _get_session_or_404(
     return session
 
 
+def _log_response(
+    log: SessionAnalysisLog, resolved: dict
+) -> SessionAnalysisLogResponse:
+    response = SessionAnalysisLogResponse.model_validate(log)
+    return response.model_copy(update={"rag_documents": resolved["rag_documents"]})
+
+
 @router.post(
     "/api/v1/sessions/{session_id}/analysis-logs",
     response_model=SessionAnalysisLogResponse,
@@ -81,12 +98,14 @@ def create_analysis_log(
         token_usage=request.token_usage or {},
         analyzed_at=datetime.now(timezone.utc),
     )
+    if settings.ANALYSIS_LOG_STORAGE_MODE == "lean":
+        ContentStore(db).externalize(log)
 
     db.add(log)
     db.commit()
     db.refresh(log)
 
-    return SessionAnalysisLogResponse.model_validate(log)
+    return _log_response(log, ContentStore(db).resolve_logs([log])[0])
 
 
 @router.get(
@@ -95,61 +114,59 @@ def create_analysis_log(
 )
 def list_analysis_logs(
     session_id: UUID,
+    request: Request,
     safety_level: Optional[str] = Query(None, description="Filter by safety level"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from previous page's next_cursor"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated large fields to include: "
+        "system_prompt,user_prompt,llm_raw_response",
+    ),
     current_user: Counselor = Depends(get_current_user),
     db: DBSession = Depends(get_db),
 ) -> SessionAnalysisLogListResponse:
-    """List analysis logs for a session"""
-    tenant_id = current_user.tenant_id
-
-    # Verify session exists and belongs to counselor (with ownership check)
-    from sqlalchemy import select
-
-    from app.models.case import Case
-    from app.models.client import Client
+    """
+    List analysis logs for a session (newest first)
+
+    - cursor: 帶入上一頁的 next_cursor 取得下一頁
+    - fields: 預設不回傳 prompts / LLM 原始回應，需要時以逗號列出
+    """
+    instance = str(request.url.path)
+    include_fields = {f.strip() for f in (fields or "").split(",") if f.strip()}
+    unknown = include_fields - set(ANALYSIS_LOG_LARGE_FIELDS)
+    if unknown:
+        raise BadRequestError(
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+            instance=instance,
+        )
 
-    result = db.execute(
-        select(SessionModel, Client, Case)
-        .join(Case, SessionModel.case_id == Case.id)
-        .join(Client, Case.client_id == Client.id)
-        .where(
-            SessionModel.id == session_id,
-            Client.counselor_id == current_user.id,
-            Client.tenant_id == tenant_id,
-            SessionModel.deleted_at.is_(None),
-            Case.deleted_at.is_(None),
-            Client.deleted_at.is_(None),
+    try:
+        result = AnalysisLogService(db).list_session_logs(
+            session_id,
+            current_user,
+            current_user.tenant_id,
+            safety_level=safety_level,
+            limit=limit,
+            cursor=cursor,
+            include_fields=include_fields,
         )
-    )
-    row = result.first()
-    if not row:
+    except InvalidCursorError as e:
+        raise BadRequestError(detail=str(e), instance=instance)
+
+    if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Session {session_id} not found or access denied",
         )
 
-    # Build query
-    query = db.query(SessionAnalysisLog).filter(
-        SessionAnalysisLog.session_id == session_id,
-        SessionAnalysisLog.tenant_id == tenant_id,
-    )
-
-    # Apply safety level filter if provided
-    if safety_level:
-        query = query.filter(SessionAnalysisLog.safety_level == safety_level)
-
-    # Order by analyzed_at DESC
-    query = query.order_by(SessionAnalysisLog.analyzed_at.desc())
-
-    # Get total count
-    total = query.count()
-
-    # Get items
-    items = query.all()
-
+    items, total, next_cursor = result
     return SessionAnalysisLogListResponse(
         total=total,
-        items=[SessionAnalysisLogResponse.model_validate(log) for log in items],
+        items=[SessionAnalysisLogResponse(**item) for item in items],
+        next_cursor=next_cursor,
     )
 
 
@@ -340,14 +357,16 @@ def create_session_usage(
 
             from app.models.counselor import BillingMode
 
-            counselor = db.query(Counselor).filter(Counselor.id == current_user.id).first()
+            counselor = (
+                db.query(Counselor).filter(Counselor.id == current_user.id).first()
+            )
             if counselor and counselor.billing_mode == BillingMode.SUBSCRIPTION:
                 if duration_seconds:
                     # Calculate minutes with ceiling rounding
                     minutes_used = math.ceil(duration_seconds / 60.0)
 
-                    # Accumulate to monthly_minutes_used
-                    counselor.monthly_minutes_used = (counselor.monthly_minutes_used or 0) + minutes_used
+                    # Accumulate to monthly_minutes_used (atomic, refreshes usage gate)
+                    usage_gate.add_minutes(db, counselor, minutes_used)
 
         db.commit()
         db.refresh(usage)
@@ -448,17 +467,26 @@ def update_session_usage(
 
         # Deduct credits from counselor (prepaid mode)
         billing_service = CreditBillingService(db)
-        billing_service.add_credits(
-            counselor_id=current_user.id,
-            credits_delta=-credits_to_deduct,  # Negative for usage
-            transaction_type="usage",
-            resource_type="session",
-            resource_id=str(session_id),
-            raw_data={
-                "pricing_rule": pricing_rule,
-                "credits_deducted": credits_to_deduct,
-            },
-        )
+        try:
+            billing_service.add_credits(
+                counselor_id=current_user.id,
+                credits_delta=-credits_to_deduct,  # Negative for usage
+                transaction_type="usage",
+                resource_type="session",
+                resource_id=str(session_id),
+                raw_data={
+                    "pricing_rule": pricing_rule,
+                    "credits_deducted": credits_to_deduct,
+                },
+                # A retried completion must not charge twice
+                idempotency_key=f"session_usage:{usage.id}:completed",
+            )
+        except DuplicateLedgerEntryError:
+            # A concurrent / retried completion already charged this usage:
+            # drop our changes and return what that request stored
+            db.rollback()
+            db.refresh(usage)
+            return SessionUsageResponse.model_validate(usage)
 
         # Accumulate usage time for subscription counselors
         # ONLY if transitioning TO completed (not if already completed)
@@ -476,8 +504,8 @@ def update_session_usage(
                 # Calculate minutes with ceiling rounding
                 minutes_used = math.ceil(usage.duration_seconds / 60.0)
 
-                # Accumulate to monthly_minutes_used
-                counselor.monthly_minutes_used = (counselor.monthly_minutes_used or 0) + minutes_used
+                # Accumulate to monthly_minutes_used (atomic, refreshes usage gate)
+                usage_gate.add_minutes(db, counselor, minutes_used)
 
     if request.credits_consumed is not None:
         usage.credits_consumed = request.credits_consumed
@@ -26,9 +26,29 @@ class Settings(BaseSettings):
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 0
 
+    # Analytical reads (admin dashboard, RAG stats): separate pool, optional replica
+    ANALYTICS_DATABASE_URL: Optional[str] = None  # Defaults to DATABASE_URL
+    ANALYTICS_DATABASE_POOL_SIZE: int = 5
+    ANALYTICS_DATABASE_MAX_OVERFLOW: int = 0
+    ANALYTICS_DATABASE_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a connection
+    ANALYTICS_STATEMENT_TIMEOUT_MS: int = 15000  # PostgreSQL only; 0 = no limit
+
     # Redis
     REDIS_URL: Optional[str] = None
 
+    # Session timeline cache (per-process, invalidated on commit)
+    TIMELINE_CACHE_TTL_SECONDS: int = 60  # Bounds staleness across instances
+    TIMELINE_CACHE_MAX_CLIENTS: int = 2000
+
+    # Emotion feedback fast path (see app/services/analysis/emotion_engine.py)
+    EMOTION_DEADLINE_SECONDS: float = 2.5  # Lexicon answers after this
+    EMOTION_CACHE_TTL_SECONDS: float = 30.0  # Dedup identical context windows
+    EMOTION_CACHE_MAX_ENTRIES: int = 5000
+    EMOTION_HEDGE_ENABLED: bool = False  # Fire a 2nd LLM request after p90 delay
+    EMOTION_HEDGE_DEFAULT_DELAY_SECONDS: float = 1.2  # Until p90 has enough samples
+    EMOTION_LLM_TIMEOUT_SECONDS: float = 10.0  # Hard cap per LLM call
+    EMOTION_PROBE_INTERVAL_SECONDS: float = 5.0  # 1 probe/interval when p90 is slow
+
     # Security
     SECRET_KEY: str = "test-secret-key-CHANGE-IN-PRODUCTION"  # REQUIRED: Must be set in .env (generate with: openssl rand -hex 32)
     ALGORITHM: str = "HS256"
@@ -101,6 +121,56 @@ class Settings(BaseSettings):
     GCS_BUCKET: Optional[str] = None
     GCS_PROJECT: Optional[str] = None
 
+    # Analysis log sink (BigQuery, buffered; see app/services/external/gbq_sink.py)
+    GBQ_SINK_BACKEND: str = "bigquery"  # bigquery | jsonl | sqlite (offline/tests)
+    GBQ_SINK_PATH: Optional[str] = None  # File for jsonl / sqlite backends
+    GBQ_BATCH_SIZE: int = 200  # Flush when this many rows are queued
+    GBQ_FLUSH_INTERVAL_SECONDS: float = 2.0  # ...or when the oldest row is this old
+    GBQ_QUEUE_MAX_SIZE: int = 10000  # Overflow is spooled to the dead letter
+    GBQ_MAX_RETRIES: int = 3
+    GBQ_DEAD_LETTER_PATH: Optional[str] = "logs/gbq_dead_letter.jsonl"
+
+    # SessionAnalysisLog large text storage (see app/services/core/content_store.py)
+    ANALYSIS_LOG_STORAGE_MODE: str = "lean"  # lean (content_blobs) | inline
+    ANALYSIS_LOG_BLOB_MIN_BYTES: int = 256  # Shorter values stay inline
+    # Monthly partitions + retention (see app/services/core/log_partitions.py)
+    ANALYSIS_LOG_PARTITIONS_AHEAD: int = 3  # Months created ahead of time
+    ANALYSIS_LOG_RETENTION_MONTHS: int = 12  # Older months are archived to GCS_BUCKET
+    ANALYSIS_LOG_ARCHIVE_DIR: str = "archives/session_analysis_logs"  # Local staging
+    ANALYSIS_LOG_ARCHIVE_PREFIX: str = "archives/session_analysis_logs"  # Bucket prefix
+    ANALYSIS_LOG_ARCHIVE_DROP: bool = False  # Drop months once verified in the bucket
+
+    # Admin dashboard rollups (see app/services/core/usage_rollups.py)
+    DASHBOARD_READ_FROM_ROLLUPS: bool = True  # False = aggregate live only
+    USAGE_ROLLUP_LATE_ARRIVAL_SECONDS: int = 600  # Re-scan overlap behind the watermark
+    USAGE_ROLLUP_RECONCILE_DAYS: int = 2  # Days fully rebuilt by reconcile runs
+
+    # Admin dashboard response cache (see app/services/core/dashboard_cache.py)
+    DASHBOARD_CACHE_BACKEND: str = "auto"  # auto | memory | redis | none
+    DASHBOARD_CACHE_CURRENT_TTL_SECONDS: int = 30  # Current (open) hour
+    DASHBOARD_CACHE_LOCAL_CLOSED_TTL_SECONDS: int = (
+        900  # Closed buckets, memory backend
+    )
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 20000  # Memory backend LRU bound
+
+    # Admin user segmentation (see app/services/core/user_segments.py)
+    USER_SEGMENT_POWER_PERCENTILE: float = 0.9  # Sessions at/above this rank -> power
+    USER_SEGMENT_AT_RISK_DAYS: int = 7  # Inactive this long -> at risk
+    USER_SEGMENT_CHURNED_DAYS: int = 30  # Inactive this long -> churned
+    USER_SEGMENT_MIN_ACCOUNT_AGE_DAYS: int = 7  # Newer accounts are not segmented
+    USER_SEGMENT_TOP_K: int = 10  # Members listed per segment
+
+    # Admin CSV export (rows fetched per server-side cursor batch)
+    CSV_EXPORT_BATCH_SIZE: int = 2000
+
+    # Billing rate cache (credit_rates is re-checked for writes from other processes)
+    CREDIT_RATE_CACHE_CHECK_SECONDS: float = 30.0
+
+    # Usage-limit gate (see app/services/billing/usage_gate.py)
+    USAGE_GATE_TTL_SECONDS: float = 10.0  # Allowance snapshot lifetime
+    USAGE_GATE_CREDIT_MARGIN: float = 60.0  # Decide locally above this balance
+    USAGE_GATE_MINUTE_MARGIN: int = 60  # ...or above this many remaining minutes
+
     # Internal Portal
     INTERNAL_PORTAL_PASSWORD: Optional[
         str
@@ -121,6 +191,12 @@ class Settings(BaseSettings):
     ACCOUNT_DELETION_GRACE_PERIOD_DAYS: int = (
         14  # Days before account is permanently deleted
     )
+    ACCOUNT_PURGE_BATCH_SIZE: int = 100  # Accounts purged per transaction
+    ACCOUNT_PURGE_MAX_SECONDS: float = (
+        240.0  # Stop starting new batches after this (next run resumes)
+    )
+    ACCOUNT_PURGE_REVENUECAT_CONCURRENCY: int = 8  # Parallel RevenueCat deletes
+    ACCOUNT_PURGE_REVENUECAT_RATE: float = 10.0  # RevenueCat deletes per second
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -1,6 +1,7 @@
-from typing import Generator
+from typing import Any, Dict, Generator, Optional
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from .config import settings
@@ -21,6 +22,53 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def create_analytics_engine(
+    url: str,
+    pool_size: int,
+    max_overflow: int = 0,
+    pool_timeout: float = 30,
+    statement_timeout_ms: Optional[int] = None,
+    connect_args: Optional[Dict[str, Any]] = None,
+) -> Engine:
+    """
+    Engine for analytical reads (dashboard scans, reports, stats)
+
+    Own pool, so slow scans cannot take connections from the realtime
+    endpoints; on PostgreSQL every statement is cancelled after
+    statement_timeout_ms (0 / None: no limit).
+    """
+    connect_args = dict(connect_args or {})
+    if statement_timeout_ms and url.startswith("postgresql"):
+        options = connect_args.get("options", "")
+        connect_args[
+            "options"
+        ] = f"{options} -c statement_timeout={int(statement_timeout_ms)}".strip()
+    return create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+# Analytical engine: ANALYTICS_DATABASE_URL (e.g. a read replica) or the
+# primary, always with its own small pool and a statement timeout
+analytics_engine = create_analytics_engine(
+    settings.ANALYTICS_DATABASE_URL or settings.DATABASE_URL,
+    pool_size=settings.ANALYTICS_DATABASE_POOL_SIZE,
+    max_overflow=settings.ANALYTICS_DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.ANALYTICS_DATABASE_POOL_TIMEOUT,
+    statement_timeout_ms=settings.ANALYTICS_STATEMENT_TIMEOUT_MS,
+    connect_args={"sslmode": "require", "connect_timeout": 10},
+)
+
+AnalyticsSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=analytics_engine
+)
+
+
 # Create base class for models (SQLAlchemy 2.0 style)
 class Base(DeclarativeBase):
     pass
@@ -33,3 +81,15 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_analytics_db() -> Generator[Session, None, None]:
+    """
+    Database dependency for read-mostly analytical routers (admin dashboard,
+    RAG stats): analytics engine, possibly a replica that lags the primary
+    """
+    db = AnalyticsSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
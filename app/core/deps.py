@@ -8,7 +8,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_analytics_db, get_db
 from app.core.security import decode_token
 from app.models.counselor import Counselor
 
@@ -33,6 +33,21 @@ def get_current_user(
     Raises:
         HTTPException: 401 if token is invalid or user not found
     """
+    return _authenticate(credentials, db)
+
+
+def get_current_analytics_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_analytics_db),
+) -> Counselor:
+    """
+    get_current_user on the analytics session, for routers using
+    get_analytics_db: the request never holds a realtime pool connection
+    """
+    return _authenticate(credentials, db)
+
+
+def _authenticate(credentials: HTTPAuthorizationCredentials, db: Session) -> Counselor:
     token = credentials.credentials
     payload = decode_token(token)
 
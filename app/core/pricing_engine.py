@@ -0,0 +1,153 @@
+"""
+Pricing Engine - precompiled MODEL_PRICING_MAP for batch and in-database costing
+
+`calculate_cost_for_model()` normalizes the model name and walks the pricing
+dict on every call. The engine compiles the map once into per-token prices
+and offers three ways to price token counts, all with the same semantics
+(canonical name = model name without "models/", unknown models cost None):
+
+- `price()` / `cost()`: one row, memoized raw-name lookup
+- `cost_column()` / `total_cost()`: whole columns at once (each distinct
+  model name is resolved once per batch)
+- `sql_cost()` / `sql_display_name()`: equivalent SQL CASE expressions, so
+  costs can be summed in the database instead of in Python
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from sqlalchemy import case, func
+
+from app.core.pricing import MODEL_PRICING_MAP
+
+MODEL_PREFIX = "models/"
+_MEMO_LIMIT = 4096  # model names are few; bound the memo against junk input
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    model: str
+    display_name: str
+    input_per_token: float
+    output_per_token: float
+
+    def cost(self, input_tokens: Optional[int], output_tokens: Optional[int]) -> float:
+        return (input_tokens or 0) * self.input_per_token + (
+            output_tokens or 0
+        ) * self.output_per_token
+
+
+class PricingEngine:
+    """Compiled model price table (thread-safe, immutable after init)"""
+
+    def __init__(self, pricing_map: Optional[Mapping[str, Dict[str, Any]]] = None):
+        pricing_map = MODEL_PRICING_MAP if pricing_map is None else pricing_map
+        self.prices: Dict[str, ModelPrice] = {
+            model: ModelPrice(
+                model=model,
+                display_name=config["display_name"],
+                input_per_token=config["input_price"] / 1_000_000,
+                output_per_token=config["output_price"] / 1_000_000,
+            )
+            for model, config in pricing_map.items()
+        }
+        self._memo: Dict[Optional[str], Optional[ModelPrice]] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Row / column pricing
+    # ------------------------------------------------------------------
+    @staticmethod
+    def canonical(model_name: str) -> str:
+        """Same normalization as pricing.normalize_model_name()"""
+        return model_name.replace(MODEL_PREFIX, "")
+
+    def price(self, model_name: Optional[str]) -> Optional[ModelPrice]:
+        """Price entry for a raw model name, or None if unknown"""
+        try:
+            return self._memo[model_name]
+        except KeyError:
+            pass
+        price = (
+            None if model_name is None else self.prices.get(self.canonical(model_name))
+        )
+        with self._lock:
+            if len(self._memo) >= _MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[model_name] = price
+        return price
+
+    def cost(
+        self,
+        model_name: Optional[str],
+        input_tokens: Optional[int],
+        output_tokens: Optional[int],
+    ) -> Optional[float]:
+        price = self.price(model_name)
+        return None if price is None else price.cost(input_tokens, output_tokens)
+
+    def cost_column(
+        self,
+        model_names: Sequence[Optional[str]],
+        input_tokens: Sequence[Optional[int]],
+        output_tokens: Sequence[Optional[int]],
+    ) -> List[Optional[float]]:
+        """Price parallel columns; None where the model is unknown"""
+        prices = {name: self.price(name) for name in set(model_names)}
+        return [
+            None
+            if (p := prices[name]) is None
+            else (i or 0) * p.input_per_token + (o or 0) * p.output_per_token
+            for name, i, o in zip(model_names, input_tokens, output_tokens)
+        ]
+
+    def total_cost(
+        self,
+        model_names: Sequence[Optional[str]],
+        input_tokens: Sequence[Optional[int]],
+        output_tokens: Sequence[Optional[int]],
+    ) -> float:
+        """Sum over parallel columns (unknown models count as 0)"""
+        return sum(
+            c
+            for c in self.cost_column(model_names, input_tokens, output_tokens)
+            if c is not None
+        )
+
+    # ------------------------------------------------------------------
+    # SQL
+    # ------------------------------------------------------------------
+    def sql_canonical(self, model_column):
+        return func.replace(model_column, MODEL_PREFIX, "")
+
+    def _sql_lookup(self, model_column, values: Dict[str, Any], else_=None):
+        if not values:
+            return case((model_column.is_(None), else_), else_=else_)
+        return case(values, value=self.sql_canonical(model_column), else_=else_)
+
+    def sql_input_price(self, model_column):
+        return self._sql_lookup(
+            model_column, {m: p.input_per_token for m, p in self.prices.items()}
+        )
+
+    def sql_output_price(self, model_column):
+        return self._sql_lookup(
+            model_column, {m: p.output_per_token for m, p in self.prices.items()}
+        )
+
+    def sql_display_name(self, model_column, else_: Optional[str] = None):
+        """Display name per row; `else_` for unknown models"""
+        return self._sql_lookup(
+            model_column,
+            {m: p.display_name for m, p in self.prices.items()},
+            else_=else_,
+        )
+
+    def sql_cost(self, model_column, input_column, output_column):
+        """Per-row USD cost; NULL for unknown models (ignored by SUM)"""
+        return func.coalesce(input_column, 0) * self.sql_input_price(
+            model_column
+        ) + func.coalesce(output_column, 0) * self.sql_output_price(model_column)
+
+
+pricing_engine = PricingEngine()
@@ -56,6 +56,7 @@ from app.middleware.error_handler import (
     http_exception_handler,
     validation_exception_handler,
 )
+from app.services.external.gbq_service import gbq_service
 from app.utils.tenant import (
     detect_tenant_from_path,
     normalize_tenant_from_url,
@@ -95,6 +96,9 @@ app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, generic_exception_handler)
 
+# Flush buffered analysis logs (BigQuery sink) before the process exits
+app.add_event_handler("shutdown", gbq_service.close)
+
 # Include auth routes
 app.include_router(auth.router, prefix="/api")
 
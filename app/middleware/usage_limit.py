@@ -1,16 +1,28 @@
 """Middleware for enforcing usage limits before session creation."""
+from typing import Optional
+
 from fastapi import HTTPException
+from sqlalchemy.orm import Session
 
 from app.models.counselor import BillingMode, Counselor
+from app.services.billing.usage_gate import usage_gate
 from app.services.billing.usage_tracker import UsageTracker
 
 
-def check_usage_limit(counselor: Counselor) -> None:
+def check_usage_limit(
+    counselor: Counselor,
+    db: Optional[Session] = None,
+    minutes: Optional[int] = None,
+) -> None:
     """
     Check if counselor can create new session based on billing mode and usage.
 
     Args:
         counselor: Counselor model instance
+        db: Database session. When given, the decision goes through the usage
+            gate (cached allowance snapshot, atomic check near the limit)
+        minutes: Minutes to add to monthly usage if admitted (subscription
+            mode, requires db); added atomically in the caller's transaction
 
     Raises:
         HTTPException: 402 if insufficient credits (prepaid mode)
@@ -21,17 +33,15 @@ def check_usage_limit(counselor: Counselor) -> None:
         - Subscription mode: Auto-reset period, check monthly limit
           (RevenueCat manages subscription validity on iOS client side)
     """
+    if db is not None:
+        if not usage_gate.admit(db, counselor, minutes=minutes).allowed:
+            _raise_limit_error(counselor)
+        return
+
     # Prepaid Mode: Check credits
     if counselor.billing_mode == BillingMode.PREPAID:
         if counselor.available_credits <= 0:
-            raise HTTPException(
-                status_code=402,
-                detail={
-                    "code": "INSUFFICIENT_CREDITS",
-                    "message": "額度不足，請儲值後再試",
-                    "available_credits": counselor.available_credits,
-                },
-            )
+            _raise_limit_error(counselor)
         return  # Allow if credits available
 
     # Subscription Mode: Check monthly limit only (RevenueCat manages subscription validity)
@@ -42,15 +52,28 @@ def check_usage_limit(counselor: Counselor) -> None:
 
         # Check if monthly limit exceeded
         if tracker.is_limit_exceeded(counselor):
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "code": "MONTHLY_USAGE_LIMIT_EXCEEDED",
-                    "message": "本月使用額度已用盡，請等待下個計費週期或升級方案",
-                    "monthly_limit": counselor.monthly_usage_limit_minutes,
-                    "monthly_used": counselor.monthly_minutes_used,
-                    "period_start": counselor.usage_period_start.isoformat()
-                    if counselor.usage_period_start
-                    else None,
-                },
-            )
+            _raise_limit_error(counselor)
+
+
+def _raise_limit_error(counselor: Counselor) -> None:
+    if counselor.billing_mode == BillingMode.PREPAID:
+        raise HTTPException(
+            status_code=402,
+            detail={
+                "code": "INSUFFICIENT_CREDITS",
+                "message": "額度不足，請儲值後再試",
+                "available_credits": counselor.available_credits,
+            },
+        )
+    raise HTTPException(
+        status_code=429,
+        detail={
+            "code": "MONTHLY_USAGE_LIMIT_EXCEEDED",
+            "message": "本月使用額度已用盡，請等待下個計費週期或升級方案",
+            "monthly_limit": counselor.monthly_usage_limit_minutes,
+            "monthly_used": counselor.monthly_minutes_used,
+            "period_start": counselor.usage_period_start.isoformat()
+            if counselor.usage_period_start
+            else None,
+        },
+    )
@@ -6,12 +6,20 @@ from .case import Case
 from .chat import ChatLog
 from .client import Client
 from .collection import Collection, CollectionItem
+from .content_blob import ContentBlob
 from .counselor import Counselor
 from .credit_log import CreditLog
 from .credit_rate import CreditRate
 
 # RAG models
-from .document import Chunk, Datasource, Document, Embedding
+from .document import (
+    Chunk,
+    CorpusCategoryStats,
+    Datasource,
+    Document,
+    DocumentChunkStats,
+    Embedding,
+)
 from .evaluation import (
     DocumentQualityMetric,
     EvaluationExperiment,
@@ -27,6 +35,7 @@ from .report import Report
 from .session import Session
 from .session_analysis_log import SessionAnalysisLog
 from .session_usage import SessionUsage
+from .usage_rollup import AnalysisRollup, RollupWatermark, UsageRollup
 
 __all__ = [
     # Console models
@@ -35,7 +44,11 @@ __all__ = [
     "Case",
     "Session",
     "SessionAnalysisLog",
+    "ContentBlob",
     "SessionUsage",
+    "UsageRollup",
+    "AnalysisRollup",
+    "RollupWatermark",
     "CreditLog",
     "CreditRate",
     "Job",
@@ -46,6 +59,8 @@ __all__ = [
     # RAG models
     "Datasource",
     "Document",
+    "DocumentChunkStats",
+    "CorpusCategoryStats",
     "Chunk",
     "Embedding",
     "Collection",
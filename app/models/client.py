@@ -5,6 +5,7 @@ from sqlalchemy import (
     Column,
     Date,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -20,6 +21,19 @@ class Client(Base, BaseModel):
     __tablename__ = "clients"
     __table_args__ = (
         UniqueConstraint("tenant_id", "code", name="uix_tenant_client_code"),
+        # Trigram indexes for ILIKE '%term%' search (requires pg_trgm)
+        Index(
+            "ix_clients_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_clients_code_trgm",
+            "code",
+            postgresql_using="gin",
+            postgresql_ops={"code": "gin_trgm_ops"},
+        ),
     )
 
     # Core identification
@@ -0,0 +1,40 @@
+"""
+ContentBlob Model - Content-addressed, compressed storage for large log text
+"""
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ContentBlob(Base):
+    """
+    Deduplicated large text (prompts, RAG context, raw LLM responses).
+    Keyed by the SHA-256 of the uncompressed UTF-8 content, so identical
+    static prompts repeated across analysis logs are stored once.
+    Immutable: rows are only inserted, never updated.
+    """
+
+    __tablename__ = "content_blobs"
+
+    sha256 = Column(
+        String(64),
+        primary_key=True,
+        comment="SHA-256 hex digest of the uncompressed UTF-8 content",
+    )
+    codec = Column(
+        String(10),
+        nullable=False,
+        comment="Compression codec: zlib, raw",
+    )
+    data = Column(
+        LargeBinary,
+        nullable=False,
+        comment="Content bytes encoded with codec",
+    )
+    size_bytes = Column(
+        Integer,
+        nullable=False,
+        comment="Uncompressed size in bytes",
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,6 +1,7 @@
 import enum
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
@@ -24,6 +25,7 @@ class CounselorRole(str, enum.Enum):
 
 class BillingMode(str, enum.Enum):
     """Billing mode for counselor"""
+
     PREPAID = "prepaid"
     SUBSCRIPTION = "subscription"
 
@@ -52,7 +54,9 @@ class Counselor(Base, BaseModel):
 
     # Status & metadata
     is_active = Column(Boolean, default=True)
-    email_verified = Column(Boolean, default=False, nullable=False, comment="Email verification status")
+    email_verified = Column(
+        Boolean, default=False, nullable=False, comment="Email verification status"
+    )
     last_login = Column(DateTime(timezone=True))
 
     # Credit system fields (universal payment mechanism)
@@ -63,6 +67,13 @@ class Counselor(Base, BaseModel):
         nullable=False,
         comment="Available credits (current balance). Updated incrementally on each billing operation.",
     )
+    ledger_seq = Column(
+        BigInteger,
+        default=0,
+        server_default="0",
+        nullable=False,
+        comment="Number of credit ledger entries applied (bumped by each entry)",
+    )
     subscription_expires_at = Column(
         DateTime(timezone=True), nullable=True, comment="Subscription expiry date"
     )
@@ -73,7 +84,7 @@ class Counselor(Base, BaseModel):
         server_default="subscription",
         nullable=False,
         index=True,
-        comment="Billing mode: prepaid (credit-based) or subscription (time-limited)"
+        comment="Billing mode: prepaid (credit-based) or subscription (time-limited)",
     )
 
     # Subscription-specific usage tracking fields
@@ -81,18 +92,18 @@ class Counselor(Base, BaseModel):
         Integer,
         default=360,
         nullable=True,
-        comment="Monthly usage limit in minutes (subscription mode only), 6 hours = 360 min"
+        comment="Monthly usage limit in minutes (subscription mode only), 6 hours = 360 min",
     )
     monthly_minutes_used = Column(
         Integer,
         default=0,
         nullable=True,
-        comment="Minutes used in current billing period (subscription mode only)"
+        comment="Minutes used in current billing period (subscription mode only)",
     )
     usage_period_start = Column(
         DateTime(timezone=True),
         nullable=True,
-        comment="Start of current 30-day usage period (subscription mode only)"
+        comment="Start of current 30-day usage period (subscription mode only)",
     )
 
     def __init__(self, **kwargs):
@@ -100,14 +111,16 @@ class Counselor(Base, BaseModel):
         from datetime import datetime, timezone
 
         # Set Python-level defaults for fields that need them
-        if 'billing_mode' not in kwargs:
-            kwargs['billing_mode'] = BillingMode.SUBSCRIPTION.value  # Use .value for SQLAlchemy
-        if 'monthly_usage_limit_minutes' not in kwargs:
-            kwargs['monthly_usage_limit_minutes'] = 360
-        if 'monthly_minutes_used' not in kwargs:
-            kwargs['monthly_minutes_used'] = 0
-        if 'usage_period_start' not in kwargs:
-            kwargs['usage_period_start'] = datetime.now(timezone.utc)
+        if "billing_mode" not in kwargs:
+            kwargs[
+                "billing_mode"
+            ] = BillingMode.SUBSCRIPTION.value  # Use .value for SQLAlchemy
+        if "monthly_usage_limit_minutes" not in kwargs:
+            kwargs["monthly_usage_limit_minutes"] = 360
+        if "monthly_minutes_used" not in kwargs:
+            kwargs["monthly_minutes_used"] = 0
+        if "usage_period_start" not in kwargs:
+            kwargs["usage_period_start"] = datetime.now(timezone.utc)
 
         super().__init__(**kwargs)
 
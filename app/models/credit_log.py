@@ -1,7 +1,7 @@
 """
 Credit Log Model - Transaction history for credit system
 """
-from sqlalchemy import JSON, Column, Float, ForeignKey, Index, String
+from sqlalchemy import JSON, BigInteger, Column, Float, ForeignKey, Index, String
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -64,6 +64,22 @@ class CreditLog(Base, BaseModel):
         nullable=True,
         comment="Detailed calculation breakdown",
     )
+    idempotency_key = Column(
+        String(200),
+        nullable=True,
+        unique=True,
+        comment="Dedup key, e.g. session:<id>:minutes:<from>-<to>. NULL = not deduplicated.",
+    )
+    balance_after = Column(
+        Float,
+        nullable=True,
+        comment="Counselor available_credits right after this entry (used by reconciliation)",
+    )
+    ledger_seq = Column(
+        BigInteger,
+        nullable=True,
+        comment="Per-counselor ledger order (counselors.ledger_seq after this entry)",
+    )
 
     # Relationships
     counselor = relationship("Counselor", back_populates="credit_logs")
@@ -72,4 +88,5 @@ class CreditLog(Base, BaseModel):
         Index("ix_credit_logs_counselor_type", "counselor_id", "transaction_type"),
         Index("ix_credit_logs_created_at", "created_at"),
         Index("ix_credit_logs_resource", "resource_type", "resource_id"),
+        Index("ix_credit_logs_counselor_seq", "counselor_id", "ledger_seq"),
     )
@@ -2,7 +2,18 @@
 
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -87,6 +98,11 @@ class Chunk(Base):
         "Embedding", back_populates="chunk", uselist=False, cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        # Chunk browsing pages through one document in ordinal order
+        Index("ix_chunks_doc_ordinal", "doc_id", "ordinal", "id"),
+    )
+
 
 class Embedding(Base):
     """Vector embeddings for chunks (OpenAI text-embedding-3-small)"""
@@ -107,3 +123,43 @@ class Embedding(Base):
 
     # Relationships
     chunk = relationship("Chunk", back_populates="embedding")
+
+
+class DocumentChunkStats(Base):
+    """
+    Chunk / embedding counters of one document and chunk strategy.
+    Maintained by CorpusStatsService (app/services/rag/corpus_stats.py) in
+    the same transaction as the chunks themselves.
+    """
+
+    __tablename__ = "rag_document_stats"
+
+    doc_id = Column(
+        Integer,
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    chunk_strategy = Column(String(100), primary_key=True)
+    chunks_count = Column(Integer, nullable=False, default=0)
+    embeddings_count = Column(Integer, nullable=False, default=0)
+    text_chars = Column(
+        BigInteger, nullable=False, default=0, comment="Sum of chunk text lengths"
+    )
+
+
+class CorpusCategoryStats(Base):
+    """
+    Corpus counters per document category; corpus totals are the sum over
+    the (few) category rows. Datasources are counted under the category of
+    the documents that use them.
+    """
+
+    __tablename__ = "rag_category_stats"
+
+    category = Column(String(50), primary_key=True)
+    datasources_count = Column(Integer, nullable=False, default=0)
+    documents_count = Column(Integer, nullable=False, default=0)
+    bytes = Column(BigInteger, nullable=False, default=0)
+    chunks_count = Column(Integer, nullable=False, default=0)
+    embeddings_count = Column(Integer, nullable=False, default=0)
+    text_chars = Column(BigInteger, nullable=False, default=0)
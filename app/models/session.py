@@ -1,6 +1,16 @@
 import uuid
 
-from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -73,3 +83,22 @@ class Session(Base, BaseModel):
     jobs = relationship("Job", back_populates="session")
     reports = relationship("Report", back_populates="session")
     # Note: CreditLog uses polymorphic association (resource_type/resource_id), not direct FK
+
+
+# Keyset pagination indexes for session lists:
+# ORDER BY coalesce(start_time, session_date) DESC, id DESC
+# - per case (case_id filter)
+# - per tenant (the default counselor-wide list walks this one in order and
+#   stops after the page, joining each row to its case/client)
+Index(
+    "ix_sessions_case_sort_time",
+    Session.case_id,
+    func.coalesce(Session.start_time, Session.session_date).desc(),
+    Session.id.desc(),
+)
+Index(
+    "ix_sessions_tenant_sort_time",
+    Session.tenant_id,
+    func.coalesce(Session.start_time, Session.session_date).desc(),
+    Session.id.desc(),
+)
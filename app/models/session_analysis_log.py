@@ -291,6 +291,33 @@ class SessionAnalysisLog(Base, BaseModel):
         comment="Matched suggestions from expert pool",
     )
 
+    # Lean storage: SHA-256 references into content_blobs. When set, the
+    # matching inline column above is NULL (see ContentStore)
+    system_prompt_sha256 = Column(
+        String(64),
+        nullable=True,
+        index=True,
+        comment="content_blobs.sha256 of system_prompt (lean storage)",
+    )
+    user_prompt_sha256 = Column(
+        String(64),
+        nullable=True,
+        index=True,
+        comment="content_blobs.sha256 of user_prompt (lean storage)",
+    )
+    rag_documents_sha256 = Column(
+        String(64),
+        nullable=True,
+        index=True,
+        comment="content_blobs.sha256 of rag_documents JSON (lean storage)",
+    )
+    llm_raw_response_sha256 = Column(
+        String(64),
+        nullable=True,
+        index=True,
+        comment="content_blobs.sha256 of llm_raw_response (lean storage)",
+    )
+
     # Cache metadata
     use_cache = Column(
         Boolean,
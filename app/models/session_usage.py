@@ -184,6 +184,18 @@ class SessionUsage(Base, BaseModel):
         comment="Last billed minutes (for incremental billing with ceiling rounding)",
     )
 
+    # Running recorded duration (maintained incrementally on recording appends)
+    recorded_seconds = Column(
+        Integer,
+        nullable=True,
+        comment="Sum of recordings[].duration_seconds. NULL = not accumulated yet",
+    )
+    recorded_segments = Column(
+        Integer,
+        nullable=True,
+        comment="Number of recording segments folded into recorded_seconds (watermark)",
+    )
+
     # Composite indexes for common query patterns
     __table_args__ = (
         Index("ix_session_usages_counselor_status", "counselor_id", "status"),
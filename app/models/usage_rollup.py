@@ -0,0 +1,110 @@
+"""
+Usage Rollup Models - Pre-aggregated dashboard facts (hourly + daily)
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, Numeric, String, func
+
+from app.core.database import Base
+from app.models.base import GUID
+
+
+class UsageRollup(Base):
+    """
+    SessionUsage aggregated per (grain, bucket, tenant, counselor).
+    One SessionUsage row per session, so `sessions` is a plain row count
+    and stays additive across buckets.
+    Maintained by UsageRollupService (app/services/core/usage_rollups.py).
+    """
+
+    __tablename__ = "usage_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    grain = Column(String(10), nullable=False, comment="Bucket size: hour, day")
+    bucket_start = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Bucket start (UTC) of SessionUsage.created_at",
+    )
+    tenant_id = Column(String, nullable=False)
+    counselor_id = Column(GUID(), nullable=False)
+
+    sessions = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    estimated_cost_usd = Column(Numeric(14, 6), nullable=False, default=0)
+
+    __table_args__ = (
+        # One row per bucket key; also serves the (grain, bucket_start) range reads
+        Index(
+            "uq_usage_rollups_bucket_key",
+            "grain",
+            "bucket_start",
+            "tenant_id",
+            "counselor_id",
+            unique=True,
+        ),
+        Index(
+            "ix_usage_rollups_counselor_bucket", "counselor_id", "grain", "bucket_start"
+        ),
+    )
+
+
+class AnalysisRollup(Base):
+    """
+    SessionAnalysisLog aggregated per (grain, bucket, tenant, counselor,
+    model, safety level). Costs per model are derived from the token sums
+    with the pricing engine at read time.
+    """
+
+    __tablename__ = "analysis_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    grain = Column(String(10), nullable=False, comment="Bucket size: hour, day")
+    bucket_start = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Bucket start (UTC) of SessionAnalysisLog.analyzed_at",
+    )
+    tenant_id = Column(String, nullable=False)
+    counselor_id = Column(GUID(), nullable=False)
+    model_name = Column(String(100), nullable=True)
+    safety_level = Column(String(20), nullable=True)
+
+    logs = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    estimated_cost_usd = Column(Numeric(14, 6), nullable=False, default=0)
+
+
+# One row per bucket key (NULL model / safety level is a key value of its
+# own); also serves the (grain, bucket_start) range reads
+Index(
+    "uq_analysis_rollups_bucket_key",
+    AnalysisRollup.grain,
+    AnalysisRollup.bucket_start,
+    AnalysisRollup.tenant_id,
+    AnalysisRollup.counselor_id,
+    func.coalesce(AnalysisRollup.model_name, ""),
+    func.coalesce(AnalysisRollup.safety_level, ""),
+    unique=True,
+)
+
+
+class RollupWatermark(Base):
+    """Refresh progress of one rollup source table"""
+
+    __tablename__ = "rollup_watermarks"
+
+    source = Column(String(64), primary_key=True, comment="Source table name")
+    watermark = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Latest change timestamp folded into the rollups",
+    )
+    complete_until = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Buckets before this reflect every row up to the watermark",
+    )
+    refreshed_at = Column(DateTime(timezone=True), nullable=True)
@@ -2,17 +2,31 @@
 Session Repository - Data access layer for sessions
 """
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 from uuid import UUID
 
 from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.orm import defer
 
 from app.models.case import Case
 from app.models.client import Client
 from app.models.counselor import Counselor, CounselorRole
 from app.models.report import Report
 from app.models.session import Session
+from app.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_row_count,
+    keyset_after,
+)
+
+# Session columns that can be megabytes per row; only loaded in list views
+# when explicitly requested via `fields=`
+SESSION_LIST_LARGE_FIELDS = ("transcript_text", "recordings")
+
+# Large columns never exposed by the list API
+SESSION_LIST_INTERNAL_FIELDS = ("transcript_sanitized", "analysis_logs")
 
 
 class SessionRepository:
@@ -87,9 +101,16 @@ class SessionRepository:
         search: Optional[str] = None,
         skip: int = 0,
         limit: int = 20,
-    ) -> Tuple[List[Tuple[Session, Case, Client, bool]], int]:
+        cursor: Optional[str] = None,
+        include_fields: Iterable[str] = (),
+        count_mode: str = "exact",
+    ) -> Tuple[List[Tuple[Session, Case, Client, bool]], Optional[int], Optional[str]]:
         """
-        List sessions with filters and pagination.
+        List sessions with filters and keyset or offset pagination.
+
+        Rows are ordered by (coalesce(start_time, session_date), id) descending.
+        When `cursor` is given it replaces `skip`, so deep pages cost the same
+        as the first one.
 
         Args:
             counselor_id: 諮詢師 ID
@@ -98,96 +119,124 @@ class SessionRepository:
             case_id: 依案例（Case）篩選
             mode: 依模式篩選 (practice / emergency)
             search: 依孩子名稱或代碼搜尋
-            skip: 分頁偏移
+            skip: 分頁偏移（未提供 cursor 時使用）
             limit: 每頁筆數
+            cursor: 上一頁回傳的 next_cursor
+            include_fields: 要額外載入的大型欄位（見 SESSION_LIST_LARGE_FIELDS）
+            count_mode: exact / estimated / none
+
+        Returns: (list of (Session, Case, Client, has_report) tuples,
+                  total_count or None, next_cursor or None)
 
-        Returns: (list of (Session, Case, Client, has_report) tuples, total_count)
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
         """
-        # Base query - select Session, Case, Client, and has_report
-        # Use LEFT JOIN with Report and check if report_id is not null
+        sort_time = func.coalesce(Session.start_time, Session.session_date)
+        has_report = select(Report.id).where(Report.session_id == Session.id).exists()
+
+        # Large columns are deferred with raiseload so an accidental access in
+        # the response builder fails loudly instead of issuing N lazy loads
+        include_fields = set(include_fields)
+        deferred = [
+            defer(getattr(Session, name), raiseload=True)
+            for name in SESSION_LIST_LARGE_FIELDS + SESSION_LIST_INTERNAL_FIELDS
+            if name not in include_fields
+        ]
+
+        conditions = self._list_sessions_conditions(
+            counselor_id, tenant_id, client_id, case_id, mode, search
+        )
+
         query = (
-            select(Session, Case, Client, Report.id.label("report_id"))
+            select(Session, Case, Client, has_report.label("has_report"), sort_time)
             .join(Case, Session.case_id == Case.id)
             .join(Client, Case.client_id == Client.id)
-            .outerjoin(Report, Report.session_id == Session.id)
-            .where(
-                Client.counselor_id == counselor_id,
-                Client.tenant_id == tenant_id,
-                Session.deleted_at.is_(None),
-                Case.deleted_at.is_(None),
-                Client.deleted_at.is_(None),
-            )
+            .where(*conditions)
+            .options(*deferred)
         )
 
-        # Apply filters
-        if client_id:
-            query = query.where(Client.id == client_id)
+        if cursor:
+            cursor_time, cursor_id = decode_cursor(cursor, types=(datetime, UUID))
+            query = query.where(
+                keyset_after([sort_time, Session.id], [cursor_time, cursor_id])
+            )
+        elif skip:
+            query = query.offset(skip)
 
-        if case_id:
-            query = query.where(Case.id == case_id)
+        # 最新的在前面；fetch one extra row to know whether a next page exists
+        query = query.order_by(sort_time.desc(), Session.id.desc()).limit(limit + 1)
+        rows = self.db.execute(query).all()
 
-        if mode:
-            query = query.where(Session.session_mode == mode)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_session, *_, last_sort_time = rows[-1]
+            next_cursor = encode_cursor(last_sort_time, last_session.id)
 
-        if search:
-            search_pattern = f"%{search}%"
-            query = query.where(
-                or_(
-                    Client.name.ilike(search_pattern),
-                    Client.code.ilike(search_pattern),
-                )
-            )
+        session_data = [
+            (session, case, client, bool(report_exists))
+            for session, case, client, report_exists, _ in rows
+        ]
 
-        # Count total - use same WHERE clauses but count distinct sessions
-        count_query = (
-            select(func.count(func.distinct(Session.id)))
-            .select_from(Session)
-            .join(Case, Session.case_id == Case.id)
-            .join(Client, Case.client_id == Client.id)
-            .where(
-                Client.counselor_id == counselor_id,
-                Client.tenant_id == tenant_id,
-                Session.deleted_at.is_(None),
-                Case.deleted_at.is_(None),
-                Client.deleted_at.is_(None),
-            )
-        )
+        total = self._count_sessions(conditions, count_mode)
+        return session_data, total, next_cursor
+
+    def _list_sessions_conditions(
+        self,
+        counselor_id: UUID,
+        tenant_id: str,
+        client_id: Optional[UUID],
+        case_id: Optional[UUID],
+        mode: Optional[str],
+        search: Optional[str],
+    ) -> list:
+        """WHERE clauses shared by the session list and its count query"""
+        conditions = [
+            Client.counselor_id == counselor_id,
+            Client.tenant_id == tenant_id,
+            # Same tenant as the client; lets the unfiltered list walk
+            # ix_sessions_tenant_sort_time in sort order
+            Session.tenant_id == tenant_id,
+            Session.deleted_at.is_(None),
+            Case.deleted_at.is_(None),
+            Client.deleted_at.is_(None),
+        ]
         if client_id:
-            count_query = count_query.where(Client.id == client_id)
+            conditions.append(Client.id == client_id)
         if case_id:
-            count_query = count_query.where(Case.id == case_id)
+            conditions.append(Case.id == case_id)
         if mode:
-            count_query = count_query.where(Session.session_mode == mode)
+            conditions.append(Session.session_mode == mode)
         if search:
+            # Served by the pg_trgm GIN indexes on clients.name / clients.code
             search_pattern = f"%{search}%"
-            count_query = count_query.where(
+            conditions.append(
                 or_(
                     Client.name.ilike(search_pattern),
                     Client.code.ilike(search_pattern),
                 )
             )
-        total = self.db.execute(count_query).scalar()
-
-        # Apply pagination and ordering (最新的在前面)
-        query = (
-            query.offset(skip)
-            .limit(limit)
-            .order_by(
-                func.coalesce(Session.start_time, Session.session_date).desc(),
-                Session.created_at.desc(),
-            )
-        )
-
-        result = self.db.execute(query)
-        rows = result.all()
+        return conditions
 
-        # Convert to (Session, Case, Client, has_report) tuples
-        session_data = [
-            (session, case, client, report_id is not None)
-            for session, case, client, report_id in rows
-        ]
+    def _count_sessions(self, conditions: list, count_mode: str) -> Optional[int]:
+        """Count sessions matching conditions: exact, planner estimate, or skip"""
+        if count_mode == "none":
+            return None
 
-        return session_data, total
+        base = (
+            select(Session.id)
+            .join(Case, Session.case_id == Case.id)
+            .join(Client, Case.client_id == Client.id)
+            .where(*conditions)
+        )
+        if count_mode == "estimated":
+            estimate = estimate_row_count(self.db, base)
+            if estimate is not None:
+                return estimate
+
+        # Each session belongs to exactly one case/client, so no DISTINCT needed
+        count_query = select(func.count()).select_from(base.subquery())
+        return self.db.execute(count_query).scalar()
 
     def update(self, session: Session, **kwargs) -> Session:
         """Update a session"""
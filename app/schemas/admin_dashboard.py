@@ -0,0 +1,32 @@
+"""
+Admin Dashboard Pydantic Schemas
+"""
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# ============================================================================
+# Request Schemas
+# ============================================================================
+
+
+class DashboardWidgetSpec(BaseModel):
+    """One widget of a snapshot: a dashboard endpoint and its query params"""
+
+    widget: str = Field(
+        ..., description="Endpoint name, e.g. 'summary' or 'cost-trend'"
+    )
+    key: Optional[str] = Field(
+        None, description="Key in the response (defaults to widget); must be unique"
+    )
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def response_key(self) -> str:
+        return self.key or self.widget
+
+
+class DashboardSnapshotRequest(BaseModel):
+    """Widgets computed together in one request"""
+
+    widgets: List[DashboardWidgetSpec] = Field(..., min_length=1, max_length=30)
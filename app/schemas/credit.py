@@ -2,7 +2,7 @@
 Credit System Pydantic Schemas
 """
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -101,6 +101,65 @@ class CounselorCreditInfo(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CounselorCreditListItem(BaseModel):
+    """Member row of a listing; only id and the requested fields are returned"""
+
+    id: UUID
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    phone: Optional[str] = None
+    tenant_id: Optional[str] = None
+    total_credits: Optional[int] = None
+    credits_used: Optional[int] = None
+    available_credits: Optional[int] = None
+    subscription_expires_at: Optional[datetime] = None
+    billing_mode: Optional[str] = None
+    is_active: Optional[bool] = None
+    last_activity_at: Optional[
+        datetime
+    ] = None  # Latest credit log (or account creation)
+
+
+class CounselorCreditListResponse(BaseModel):
+    """One page of members"""
+
+    total: Optional[int] = None  # count=none 時為 null；count=estimated 時為估計值
+    items: List[CounselorCreditListItem]
+    next_cursor: Optional[str] = None  # 下一頁游標（無下一頁時為 null）
+
+
+class CreditLogListItem(BaseModel):
+    """Credit log row of a listing; only id and the requested fields are returned"""
+
+    id: UUID
+    counselor_id: Optional[UUID] = None
+    credits_delta: Optional[float] = None
+    transaction_type: Optional[str] = None
+    resource_type: Optional[str] = None
+    resource_id: Optional[str] = None
+    raw_data: Optional[Dict[str, Any]] = None
+    rate_snapshot: Optional[Dict[str, Any]] = None
+    calculation_details: Optional[Dict[str, Any]] = None
+    balance_after: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class CreditLogListResponse(BaseModel):
+    """One page of credit logs (newest first)"""
+
+    total: Optional[int] = None  # count=none（預設）時為 null
+    items: List[CreditLogListItem]
+    next_cursor: Optional[str] = None  # 下一頁游標（無下一頁時為 null）
+
+
+class CreditRateListResponse(BaseModel):
+    """One page of billing rates"""
+
+    items: List[CreditRateResponse]
+    next_cursor: Optional[str] = None  # 下一頁游標（無下一頁時為 null）
+
+
 class AdminAddCreditsRequest(BaseModel):
     """Admin request to add/remove credits"""
 
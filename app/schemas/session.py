@@ -468,8 +468,9 @@ class SessionResponse(BaseModel):
 class SessionListResponse(BaseModel):
     """會談記錄列表響應"""
 
-    total: int
+    total: Optional[int] = None  # count=none 時為 null；count=estimated 時為估計值
     items: List[SessionResponse]
+    next_cursor: Optional[str] = None  # 下一頁游標（無下一頁時為 null）
 
 
 # Timeline schemas
@@ -493,6 +494,7 @@ class SessionTimelineResponse(BaseModel):
     client_code: str
     total_sessions: int
     sessions: List[TimelineSessionItem]
+    next_cursor: Optional[str] = None  # 分頁時的下一頁游標（無下一頁時為 null）
 
 
 # Reflection schemas
@@ -666,7 +668,9 @@ class EmotionFeedbackResponse(BaseModel):
 class DeepAnalysisResponse(BaseModel):
     """Deep analysis response for session safety assessment"""
 
-    safety_level: SafetyLevel = Field(..., description="Safety level (green/yellow/red)")
+    safety_level: SafetyLevel = Field(
+        ..., description="Safety level (green/yellow/red)"
+    )
     display_text: str = Field(
         ..., min_length=4, max_length=20, description="Short status display text"
     )
@@ -50,6 +50,10 @@ class SessionAnalysisLogResponse(BaseModel):
     rag_sources: Optional[List[str]]
     token_usage: Optional[Dict[str, Any]]
     analyzed_at: datetime
+    # Only filled when requested via `fields=` on the list endpoint
+    system_prompt: Optional[str] = None
+    user_prompt: Optional[str] = None
+    llm_raw_response: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -59,6 +63,7 @@ class SessionAnalysisLogListResponse(BaseModel):
 
     total: int
     items: List[SessionAnalysisLogResponse]
+    next_cursor: Optional[str] = None  # 下一頁游標（無下一頁時為 null）
 
 
 # SessionUsage Schemas
@@ -253,3 +253,4 @@ class ClientCaseListResponse(BaseModel):
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # 下一頁游標（無下一頁時為 null）
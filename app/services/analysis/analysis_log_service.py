@@ -3,17 +3,43 @@ Analysis Log Service - Handles analysis logs CRUD logic.
 
 Extracted from sessions.py to reduce endpoint complexity.
 """
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm.attributes import flag_modified
 
 from app.models.case import Case
 from app.models.client import Client
 from app.models.counselor import Counselor
 from app.models.session import Session
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.services.core.content_store import LEAN_FIELDS, ContentStore
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+
+# Columns returned by the analysis-log list by default
+ANALYSIS_LOG_SUMMARY_FIELDS = (
+    "id",
+    "session_id",
+    "counselor_id",
+    "tenant_id",
+    "analysis_type",
+    "transcript",
+    "analysis_result",
+    "safety_level",
+    "risk_indicators",
+    "rag_documents",
+    "rag_sources",
+    "token_usage",
+    "analyzed_at",
+)
+
+# Prompt / raw-response columns (often tens of KB per row); only read when
+# requested via `fields=`
+ANALYSIS_LOG_LARGE_FIELDS = ("system_prompt", "user_prompt", "llm_raw_response")
 
 
 class AnalysisLogService:
@@ -78,6 +104,121 @@ class AnalysisLogService:
 
         return log_entries
 
+    def list_session_logs(
+        self,
+        session_id: UUID,
+        current_user: Counselor,
+        tenant_id: str,
+        safety_level: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        include_fields: Iterable[str] = (),
+    ) -> Optional[Tuple[List[Dict[str, Any]], int, Optional[str]]]:
+        """
+        List a session's rows of session_analysis_logs, newest first.
+
+        Keyset-paginated on (analyzed_at, id) and projected in SQL: only the
+        summary columns plus `include_fields` (see ANALYSIS_LOG_LARGE_FIELDS)
+        are selected, so page size does not grow with the session.
+
+        Args:
+            session_id: Session UUID
+            current_user: Authenticated counselor
+            tenant_id: Tenant ID
+            safety_level: Optional safety level filter
+            limit: Items per page
+            cursor: next_cursor from the previous page
+            include_fields: Large fields to add to each item
+
+        Returns:
+            Tuple of (items, total_count, next_cursor), or None if session
+            not found
+
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
+        """
+        if not self._owns_session(session_id, current_user, tenant_id):
+            return None
+
+        fields = list(ANALYSIS_LOG_SUMMARY_FIELDS) + [
+            name for name in ANALYSIS_LOG_LARGE_FIELDS if name in set(include_fields)
+        ]
+        lean_fields = [name for name in fields if name in LEAN_FIELDS]
+        columns = fields + [LEAN_FIELDS[name] for name in lean_fields]
+
+        conditions = [
+            SessionAnalysisLog.session_id == session_id,
+            SessionAnalysisLog.tenant_id == tenant_id,
+        ]
+        if safety_level:
+            conditions.append(SessionAnalysisLog.safety_level == safety_level)
+
+        total = (
+            self.db.execute(
+                select(func.count(SessionAnalysisLog.id)).where(*conditions)
+            ).scalar()
+            or 0
+        )
+
+        # Unselected columns raise instead of lazy-loading row by row
+        query = (
+            select(SessionAnalysisLog)
+            .options(
+                load_only(
+                    *[getattr(SessionAnalysisLog, name) for name in columns],
+                    raiseload=True,
+                )
+            )
+            .where(*conditions)
+        )
+        if cursor:
+            cursor_time, cursor_id = decode_cursor(cursor, types=(datetime, UUID))
+            query = query.where(
+                keyset_after(
+                    [SessionAnalysisLog.analyzed_at, SessionAnalysisLog.id],
+                    [cursor_time, cursor_id],
+                )
+            )
+        query = query.order_by(
+            SessionAnalysisLog.analyzed_at.desc(), SessionAnalysisLog.id.desc()
+        ).limit(limit + 1)
+        logs = list(self.db.execute(query).scalars())
+
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = encode_cursor(logs[-1].analyzed_at, logs[-1].id)
+
+        # Lean rows keep large text in content_blobs (one fetch per page)
+        resolved = ContentStore(self.db).resolve_logs(logs, fields=lean_fields)
+        items = []
+        for log, values in zip(logs, resolved):
+            item = {name: getattr(log, name) for name in fields if name not in values}
+            item.update(values)
+            items.append(item)
+        return items, total, next_cursor
+
+    def _owns_session(
+        self, session_id: UUID, current_user: Counselor, tenant_id: str
+    ) -> bool:
+        """Session exists, is not deleted and belongs to the counselor"""
+        return (
+            self.db.execute(
+                select(Session.id)
+                .join(Case, Session.case_id == Case.id)
+                .join(Client, Case.client_id == Client.id)
+                .where(
+                    Session.id == session_id,
+                    Client.counselor_id == current_user.id,
+                    Client.tenant_id == tenant_id,
+                    Session.deleted_at.is_(None),
+                    Case.deleted_at.is_(None),
+                    Client.deleted_at.is_(None),
+                )
+            ).first()
+            is not None
+        )
+
     def delete_analysis_log(
         self, session_id: UUID, log_index: int, current_user: Counselor, tenant_id: str
     ) -> tuple[bool, Optional[str]]:
@@ -0,0 +1,439 @@
+"""
+Emotion Feedback Engine - deadline-aware fast path for emotion-feedback
+
+Wraps a single, warm EmotionAnalysisService (one GeminiService / model client
+per process) and adds:
+
+1. Dedup: identical (context, target) windows within a short TTL share one
+   result, and concurrent identical requests share one in-flight LLM call
+2. Deadline: if the LLM has not answered by the deadline (or recent p90
+   latency says it will not), a local lexicon classifier answers instead.
+   Every LLM call is capped at `llm_timeout_seconds`, so a hung call fails,
+   leaves the in-flight table and cannot hold later requests. While p90 is
+   over the deadline, at most one probe call per `probe_interval_seconds`
+   goes out (to refresh the latency window and the cache)
+3. Hedging (optional): a second LLM request is fired after the observed p90
+   delay; whichever answers first wins
+4. Stats: counts per winning path and LLM latency percentiles, so the
+   fallback rate and tail latency are measurable
+   (GET /api/v1/admin/dashboard/emotion-engine-stats)
+
+Only the request that made the LLM call reports its token usage; cache hits,
+requests that joined an in-flight call and lexicon answers report zero
+tokens, so analysis logs only bill what was actually spent. When a request
+started a call but the lexicon answered (deadline, probe), the call is
+returned as `background_call`: the caller bills its token usage once it
+finishes.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analysis.emotion_service import EmotionAnalysisService
+
+logger = logging.getLogger(__name__)
+
+# Winning paths (recorded in stats and in the analysis log metadata)
+PATH_CACHE = "cache"
+PATH_LLM = "llm"
+PATH_HEDGE = "llm_hedge"
+PATH_SHARED = "llm_shared"  # joined another request's in-flight LLM call
+PATH_BACKGROUND = "llm_background"  # finished after the lexicon answered
+PATH_LEXICON_DEADLINE = "lexicon_deadline"
+PATH_LEXICON_PREDICTED = "lexicon_predicted"
+PATH_LEXICON_ERROR = "lexicon_error"
+
+LEXICON_MODEL_NAME = "local-lexicon"
+
+
+class EmotionLexiconClassifier:
+    """
+    Local keyword classifier for the target sentence (no network, <1ms).
+
+    Coarser than the LLM; only used when the LLM cannot answer in time.
+    """
+
+    RED_TERMS = (
+        "閉嘴",
+        "滾",
+        "笨",
+        "蠢",
+        "白癡",
+        "廢物",
+        "沒用",
+        "去死",
+        "打死",
+        "討厭你",
+        "丟臉",
+        "不要你",
+        "後悔生",
+        "揍你",
+        "給我滾",
+    )
+    YELLOW_TERMS = (
+        "為什麼",
+        "又",
+        "每次",
+        "總是",
+        "老是",
+        "不用功",
+        "快點",
+        "到底",
+        "說過",
+        "講過",
+        "不准",
+        "不要再",
+        "煩",
+        "不聽話",
+        "怎麼搞",
+        "！",
+    )
+    GREEN_TERMS = (
+        "辛苦",
+        "謝謝",
+        "理解",
+        "沒關係",
+        "願意",
+        "陪你",
+        "一起",
+        "聽你",
+        "感覺",
+        "難過",
+        "抱抱",
+        "愛你",
+        "真好",
+        "很棒",
+        "加油",
+    )
+
+    HINTS = {
+        1: "很好的同理心表達",
+        2: "深呼吸，用平和語氣重述",
+        3: "先停一下，試著同理孩子",
+    }
+
+    def classify(self, context: str, target: str) -> Tuple[int, str]:
+        """Return (level, hint) for the target sentence"""
+        text = target or ""
+        if any(term in text for term in self.RED_TERMS):
+            level = 3
+        elif sum(term in text for term in self.YELLOW_TERMS) >= 1 and not any(
+            term in text for term in self.GREEN_TERMS
+        ):
+            level = 2
+        elif any(term in text for term in self.GREEN_TERMS):
+            level = 1
+        else:
+            # Neutral sentence: no sign of escalation
+            level = 1
+        return level, self.HINTS[level]
+
+
+class EmotionEngineStats:
+    """Thread-safe path counters and rolling LLM latency window"""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._paths: Counter = Counter()
+        self._llm_latencies: Deque[float] = deque(maxlen=window)
+        self._total_latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, path: str, latency_s: float) -> None:
+        with self._lock:
+            self._paths[path] += 1
+            self._total_latencies.append(latency_s)
+
+    def record_llm_latency(self, latency_s: float) -> None:
+        with self._lock:
+            self._llm_latencies.append(latency_s)
+
+    def llm_percentile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """q-quantile of recent LLM latencies (None until enough samples)"""
+        with self._lock:
+            samples = sorted(self._llm_latencies)
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(q * len(samples)))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            paths = dict(self._paths)
+            totals = sorted(self._total_latencies)
+        requests = sum(paths.values())
+        fallbacks = sum(v for k, v in paths.items() if k.startswith("lexicon"))
+
+        def pct(q: float) -> Optional[float]:
+            if not totals:
+                return None
+            return round(totals[min(len(totals) - 1, int(q * len(totals)))] * 1000, 1)
+
+        return {
+            "requests": requests,
+            "paths": paths,
+            "fallback_rate": round(fallbacks / requests, 4) if requests else 0.0,
+            "latency_ms": {"p50": pct(0.5), "p90": pct(0.9), "p99": pct(0.99)},
+            "llm_p90_ms": (
+                round(p90 * 1000, 1)
+                if (p90 := self.llm_percentile(0.9)) is not None
+                else None
+            ),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._paths.clear()
+            self._llm_latencies.clear()
+            self._total_latencies.clear()
+
+
+class EmotionFeedbackEngine:
+    """Deadline-aware emotion analysis with dedup, hedging and lexicon fallback"""
+
+    def __init__(
+        self,
+        service: Optional[EmotionAnalysisService] = None,
+        deadline_seconds: float = settings.EMOTION_DEADLINE_SECONDS,
+        cache_ttl_seconds: float = settings.EMOTION_CACHE_TTL_SECONDS,
+        cache_max_entries: int = settings.EMOTION_CACHE_MAX_ENTRIES,
+        hedge_enabled: bool = settings.EMOTION_HEDGE_ENABLED,
+        hedge_default_delay_seconds: float = settings.EMOTION_HEDGE_DEFAULT_DELAY_SECONDS,
+        llm_timeout_seconds: float = settings.EMOTION_LLM_TIMEOUT_SECONDS,
+        probe_interval_seconds: float = settings.EMOTION_PROBE_INTERVAL_SECONDS,
+    ):
+        self._service = service
+        self.deadline_seconds = deadline_seconds
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_entries = cache_max_entries
+        self.hedge_enabled = hedge_enabled
+        self.hedge_default_delay_seconds = hedge_default_delay_seconds
+        self.llm_timeout_seconds = llm_timeout_seconds
+        self.probe_interval_seconds = probe_interval_seconds
+        self.lexicon = EmotionLexiconClassifier()
+        self.stats = EmotionEngineStats()
+        self._cache: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._last_probe: Optional[float] = None
+
+    @property
+    def service(self) -> EmotionAnalysisService:
+        """Shared service (and model client), created on first use"""
+        if self._service is None:
+            self._service = EmotionAnalysisService()
+        return self._service
+
+    async def analyze(self, context: str, target: str) -> dict:
+        """
+        Analyze emotion within the deadline.
+
+        Returns:
+            Same dict as EmotionAnalysisService.analyze_emotion plus `path`
+            (which path produced the answer) and, when this request started
+            an LLM call the lexicon answered for, `background_call` (see
+            `background_result`). Never raises on LLM timeout or failure - the
+            lexicon answers instead.
+        """
+        start = time.monotonic()
+        key = self._key(context, target)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._finish(self._unbilled(cached, PATH_CACHE), start)
+
+        # Recent LLM tail already exceeds the deadline: answer locally now.
+        # A rate-limited probe keeps the latency window (and cache) fresh
+        # without sending the slow model one call per window
+        p90 = self.stats.llm_percentile(0.9)
+        if p90 is not None and p90 > self.deadline_seconds:
+            result = self._lexicon_result(context, target, PATH_LEXICON_PREDICTED)
+            if key not in self._inflight and self._probe_due(start):
+                result["background_call"], _ = self._shared_llm_call(
+                    key, context, target
+                )
+            return self._finish(result, start)
+
+        future, started = self._shared_llm_call(key, context, target)
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(future), timeout=self.deadline_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Emotion LLM exceeded {self.deadline_seconds}s deadline - using lexicon"
+            )
+            result = self._lexicon_result(context, target, PATH_LEXICON_DEADLINE)
+            if started:
+                result["background_call"] = future
+            return self._finish(result, start)
+        except Exception as e:
+            logger.error(f"Emotion LLM failed - using lexicon: {e}")
+            return self._finish(
+                self._lexicon_result(context, target, PATH_LEXICON_ERROR), start
+            )
+
+        if not started:
+            return self._finish(self._unbilled(result, PATH_SHARED), start)
+        return self._finish(dict(result), start)
+
+    def _probe_due(self, now: float) -> bool:
+        if (
+            self._last_probe is not None
+            and now - self._last_probe < self.probe_interval_seconds
+        ):
+            return False
+        self._last_probe = now
+        return True
+
+    @staticmethod
+    async def background_result(call: asyncio.Future) -> Optional[dict]:
+        """
+        Result of a `background_call` once it finishes (None if it failed).
+
+        The lexicon answered the request that started it, so its token usage
+        is reported by nobody else; requests that joined the call or hit the
+        cache it filled report zero.
+        """
+        try:
+            result = await asyncio.shield(call)
+        except Exception:
+            return None
+        return dict(result, path=PATH_BACKGROUND)
+
+    def _shared_llm_call(
+        self, key: str, context: str, target: str
+    ) -> Tuple[asyncio.Future, bool]:
+        """
+        Single-flight: concurrent identical windows share one LLM call.
+
+        Returns:
+            (future, started) - started is False when an in-flight call was joined
+        """
+        future = self._inflight.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            return future, False
+        future = asyncio.ensure_future(self._llm_with_hedge(context, target))
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._on_llm_done(key, f))
+        return future, True
+
+    def _on_llm_done(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        # Parse-failure fallbacks carry no model answer; do not pin them
+        if result.get("token_usage", {}).get("total_tokens"):
+            self._cache_set(key, {k: v for k, v in result.items() if k != "path"})
+
+    async def _llm_with_hedge(self, context: str, target: str) -> dict:
+        primary = asyncio.ensure_future(self._timed_llm_call(context, target))
+        if not self.hedge_enabled:
+            result = await primary
+            return dict(result, path=PATH_LLM)
+
+        delay = self.stats.llm_percentile(0.9) or self.hedge_default_delay_seconds
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return dict(primary.result(), path=PATH_LLM)
+
+        hedge = asyncio.ensure_future(self._timed_llm_call(context, target))
+        pending = {primary, hedge}
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    path = PATH_LLM if task is primary else PATH_HEDGE
+                    return dict(task.result(), path=path)
+                last_error = task.exception()
+        raise last_error  # both requests failed
+
+    async def _timed_llm_call(self, context: str, target: str) -> dict:
+        start = time.monotonic()
+        try:
+            result = await self.service.analyze_emotion(
+                context=context, target=target, timeout=self.llm_timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            # Counts as a (capped) sample so p90 reflects hung calls too
+            self.stats.record_llm_latency(time.monotonic() - start)
+            logger.warning(
+                f"Emotion LLM call exceeded the {self.llm_timeout_seconds}s hard cap"
+            )
+            raise
+        self.stats.record_llm_latency(time.monotonic() - start)
+        return result
+
+    def _lexicon_result(self, context: str, target: str, path: str) -> dict:
+        level, hint = self.lexicon.classify(context, target)
+        return {
+            "level": level,
+            "hint": hint,
+            "token_usage": {
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "estimated_cost_usd": 0.0,
+                "model_name": LEXICON_MODEL_NAME,
+                "provider": "local",
+            },
+            "path": path,
+        }
+
+    @staticmethod
+    def _unbilled(result: dict, path: str) -> dict:
+        """A reused answer: same model, but no tokens were spent for this request"""
+        usage = result.get("token_usage") or {}
+        return dict(
+            result,
+            path=path,
+            token_usage={
+                **usage,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_tokens": 0,
+                "estimated_cost_usd": 0.0,
+            },
+        )
+
+    def _finish(self, result: dict, start: float) -> dict:
+        self.stats.record(result["path"], time.monotonic() - start)
+        return result
+
+    @staticmethod
+    def _key(context: str, target: str) -> str:
+        raw = f"{context}\x1f{target}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[dict]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _cache_set(self, key: str, result: dict) -> None:
+        self._cache[key] = (time.monotonic() + self.cache_ttl_seconds, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop cached results and stats (tests / admin)"""
+        self._cache.clear()
+        self.stats.reset()
+
+
+emotion_engine = EmotionFeedbackEngine()
@@ -4,7 +4,7 @@ Real-time emotion feedback on parent-child communication
 """
 import asyncio
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 
 from app.services.external.gemini_service import GeminiService
 from app.services.utils.ai_validation import (
@@ -107,7 +107,7 @@ class EmotionAnalysisService:
         return level, hint
 
     async def analyze_emotion(
-        self, context: str, target: str, timeout: float = 2.5
+        self, context: str, target: str, timeout: Optional[float] = 2.5
     ) -> dict:
         """
         Analyze emotion level of target sentence in given context.
@@ -115,7 +115,8 @@ class EmotionAnalysisService:
         Args:
             context: Conversation context
             target: Target sentence to analyze
-            timeout: Timeout in seconds (default: 2.5s to allow 0.5s for processing)
+            timeout: Timeout in seconds (default: 2.5s to allow 0.5s for processing);
+                None disables it (the caller enforces its own deadline)
 
         Returns:
             Dictionary with:
@@ -1,11 +1,18 @@
 """Text Sanitization Service - 脫敏處理"""
 
 import re
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 class SanitizerService:
-    """文字脫敏服務 - 移除或遮蔽敏感資訊"""
+    """文字脫敏服務 - 移除或遮蔽敏感資訊
+
+    All patterns are compiled into one alternation of named groups, so a
+    single scan yields both the sanitized text and the detection report.
+    """
+
+    # Longest trailing run of pattern characters re-scanned on append
+    MAX_INCREMENTAL_TAIL = 4096
 
     def __init__(self) -> None:
         # Patterns for sensitive information
@@ -32,6 +39,20 @@ class SanitizerService:
             "address_number": "[已遮蔽門牌]",
         }
 
+        # Earlier patterns win at the same position (same priority as the
+        # previous pattern-by-pattern substitution). The lookahead skips
+        # positions where no pattern can start (e.g. CJK text) cheaply.
+        self._combined = re.compile(
+            r"(?=[A-Za-z\d._%+\-])(?:"
+            + "|".join(
+                f"(?P<{key}>{pattern.pattern})"
+                for key, pattern in self.patterns.items()
+            )
+            + ")"
+        )
+        # Any character some pattern can consume
+        self._token_char = re.compile(r"[A-Za-z\d._%+\-@\s號]")
+
     def sanitize_text(self, text: str, mask_mode: str = "replace") -> Dict:
         """
         脫敏處理文字
@@ -50,36 +71,98 @@ class SanitizerService:
                 "count": 總共移除的項目數
             }
         """
-        sanitized = text
-        found_items = {}
-        total_count = 0
-
-        for key, pattern in self.patterns.items():
-            matches = pattern.findall(text)
-
-            if matches:
-                found_items[key] = matches
-                total_count += len(matches)
+        return self._scan(text, 0, mask_mode)
+
+    def sanitize_incremental(
+        self,
+        previous_text: Optional[str],
+        previous_sanitized: Optional[str],
+        text: str,
+        mask_mode: str = "replace",
+    ) -> Dict:
+        """
+        增量脫敏：逐字稿只在尾端追加時，只重新掃描尾端
 
-                if mask_mode == "replace":
-                    sanitized = pattern.sub(self.replacements[key], sanitized)
+        `previous_sanitized` 必須是本服務對 `previous_text` 的輸出。從
+        `previous_text` 尾端往回找到最後一個不可能屬於任何 pattern 的字元
+        （例如中文字、全形標點），該位置之後的尾巴連同新內容一起重掃，
+        因此跨段落邊界的號碼 / email 仍會被完整遮蔽。
 
-                elif mask_mode == "mask":
-                    # 部分遮蔽 (保留前後各2字元)
-                    for match in matches:
-                        if len(match) > 4:
-                            masked = match[:2] + "*" * (len(match) - 4) + match[-2:]
-                        else:
-                            masked = "*" * len(match)
-                        sanitized = sanitized.replace(match, masked)
+        無法增量時（非追加、舊資料未脫敏、尾巴過長）退回完整掃描。
 
-                elif mask_mode == "remove":
-                    sanitized = pattern.sub("", sanitized)
+        Returns:
+            與 sanitize_text 相同，但 found_items / count 只涵蓋重掃的範圍
+        """
+        cut = self._incremental_cut(previous_text, previous_sanitized, text)
+        if cut is None:
+            return self._scan(text, 0, mask_mode)
+
+        tail = self._scan(previous_text, cut, mask_mode)["sanitized_text"]
+        if not previous_sanitized.endswith(tail):
+            return self._scan(text, 0, mask_mode)
+
+        result = self._scan(text, cut, mask_mode)
+        prefix = previous_sanitized[: len(previous_sanitized) - len(tail)]
+        result["sanitized_text"] = prefix + result["sanitized_text"]
+        return result
+
+    def _incremental_cut(
+        self,
+        previous_text: Optional[str],
+        previous_sanitized: Optional[str],
+        text: str,
+    ) -> Optional[int]:
+        """Raw offset after which the previous output must be recomputed"""
+        if not previous_text or previous_sanitized is None:
+            return None
+        if not text.startswith(previous_text):
+            return None
+        # Legacy rows stored the raw transcript as "sanitized"
+        if previous_sanitized == previous_text and self._combined.search(previous_text):
+            return None
+
+        # No match can cross a character that no pattern accepts, so the
+        # output before it is final
+        lower = max(0, len(previous_text) - self.MAX_INCREMENTAL_TAIL)
+        for i in range(len(previous_text) - 1, lower - 1, -1):
+            if not self._token_char.match(previous_text, i):
+                return i + 1
+        return None
+
+    def _scan(self, text: str, pos: int, mask_mode: str) -> Dict:
+        """One pass over text[pos:] producing output and detection report
+
+        Scanning with `pos` (rather than slicing) keeps `\b` context from the
+        preceding characters.
+        """
+        pieces = []
+        found_items: Dict[str, List[str]] = {}
+        last = pos
+        for match in self._combined.finditer(text, pos):
+            key = match.lastgroup
+            value = match.group()
+            found_items.setdefault(key, []).append(value)
+            pieces.append(text[last : match.start()])
+            if mask_mode == "replace":
+                pieces.append(self.replacements[key])
+            elif mask_mode == "mask":
+                # 部分遮蔽 (保留前後各2字元)
+                if len(value) > 4:
+                    pieces.append(value[:2] + "*" * (len(value) - 4) + value[-2:])
+                else:
+                    pieces.append("*" * len(value))
+            elif mask_mode != "remove":
+                pieces.append(value)
+            last = match.end()
+        pieces.append(text[last:])
 
         return {
-            "sanitized_text": sanitized,
-            "found_items": found_items,
-            "count": total_count,
+            "sanitized_text": "".join(pieces),
+            # Keep the historical per-pattern key order
+            "found_items": {
+                k: found_items[k] for k in self.patterns if k in found_items
+            },
+            "count": sum(len(v) for v in found_items.values()),
         }
 
     def sanitize_session_transcript(self, transcript: str) -> Tuple[str, Dict]:
@@ -12,16 +12,25 @@ from decimal import Decimal
 from typing import Dict, List
 from uuid import UUID
 
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session as DBSession
 
-from app.models.counselor import Counselor
-from app.models.credit_log import CreditLog
-from app.models.session import Session
+from app.core.config import settings
 from app.models.session_analysis_log import SessionAnalysisLog
 from app.models.session_usage import SessionUsage
+from app.services.billing.credit_ledger import (
+    CounselorNotFoundError,
+    CreditLedger,
+    DuplicateLedgerEntryError,
+    session_billing_key,
+)
+from app.services.billing.usage_accumulator import UsageAccumulator
+from app.services.core.content_store import ContentStore
 
 logger = logging.getLogger(__name__)
 
+PER_MINUTE_RATE = {"unit": "minute", "rate": 1.0, "rounding": "ceil"}
+
 
 class SessionBillingService:
     """Service for session billing and analysis logging"""
@@ -130,7 +139,8 @@ class SessionBillingService:
                 rag_similarity_threshold=metadata.get("rag_similarity_threshold"),
                 rag_search_time_ms=metadata.get("rag_search_time_ms"),
                 # Model metadata
-                provider=token_usage_data.get("provider") or metadata.get("provider", "gemini"),
+                provider=token_usage_data.get("provider")
+                or metadata.get("provider", "gemini"),
                 model_name=token_usage_data.get("model_name")
                 or metadata.get("model_name")
                 or self._get_default_model_name(metadata),
@@ -168,6 +178,9 @@ class SessionBillingService:
                 # Timestamp
                 analyzed_at=end_time or datetime.now(timezone.utc),
             )
+            if settings.ANALYSIS_LOG_STORAGE_MODE == "lean":
+                # Prompts / RAG context / raw response go to content_blobs
+                ContentStore(self.db).externalize(analysis_log)
             self.db.add(analysis_log)
 
             # Get or create SessionUsage (cumulative ledger pattern)
@@ -191,12 +204,11 @@ class SessionBillingService:
             # ElevenLabs Scribe v2 Realtime STT cost (using centralized pricing)
             from app.core.pricing import calculate_elevenlabs_cost
 
-            session_record = (
-                self.db.query(Session).filter(Session.id == session_id).first()
-            )
-            recordings = session_record.recordings if session_record else []
-            duration_seconds = sum(
-                r.get("duration_seconds", 0) for r in (recordings or [])
+            # Billing is based on RECORDING TIME (not elapsed time), so idle or
+            # paused time is not charged. Read from the running total kept on
+            # SessionUsage instead of re-summing every recording segment.
+            duration_seconds, recorded_segments = UsageAccumulator(self.db).totals(
+                session_id, session_usage
             )
             elevenlabs_cost = Decimal(str(calculate_elevenlabs_cost(duration_seconds)))
 
@@ -215,46 +227,37 @@ class SessionBillingService:
             # ============================================================
             # INCREMENTAL BILLING WITH CEILING ROUNDING (1 credit = 1 minute)
             # ============================================================
-
-            # Get counselor for credit deduction
-            counselor = (
-                self.db.query(Counselor).filter(Counselor.id == counselor_id).first()
+            # The counselor balance is changed by one atomic UPDATE in
+            # CreditLedger (no SELECT + Python arithmetic), and it runs last
+            # so the counselor row lock is held only until the commit below.
+            usage_kwargs = dict(
+                session_id=session_id,
+                counselor_id=counselor_id,
+                tenant_id=tenant_id,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=total_tokens,
+                estimated_cost=estimated_cost,
+                duration_seconds=duration_seconds,
+                current_time=current_time,
             )
-
-            if not counselor:
+            try:
+                with self.db.begin_nested():
+                    if session_usage:
+                        # UPDATE existing SessionUsage (subsequent analysis)
+                        self._update_existing_usage(
+                            session_usage=session_usage, **usage_kwargs
+                        )
+                    else:
+                        # CREATE new SessionUsage (first analysis)
+                        self._create_new_usage(
+                            recorded_segments=recorded_segments, **usage_kwargs
+                        )
+            except CounselorNotFoundError:
+                # Billing savepoint rolled back; still save the analysis log
                 logger.error(
                     f"Counselor {counselor_id} not found, cannot deduct credits"
                 )
-                self.db.commit()  # Still save analysis log
-                return
-
-            if session_usage:
-                # UPDATE existing SessionUsage (subsequent analysis)
-                self._update_existing_usage(
-                    session_usage=session_usage,
-                    session_id=session_id,
-                    counselor=counselor,
-                    counselor_id=counselor_id,
-                    tenant_id=tenant_id,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    total_tokens=total_tokens,
-                    estimated_cost=estimated_cost,
-                    current_time=current_time,
-                )
-            else:
-                # CREATE new SessionUsage (first analysis)
-                self._create_new_usage(
-                    session_id=session_id,
-                    counselor=counselor,
-                    counselor_id=counselor_id,
-                    tenant_id=tenant_id,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    total_tokens=total_tokens,
-                    estimated_cost=estimated_cost,
-                    current_time=current_time,
-                )
 
             # Commit all changes
             self.db.commit()
@@ -270,9 +273,9 @@ class SessionBillingService:
         self,
         session_usage: SessionUsage,
         session_id: UUID,
-        counselor: Counselor,
         counselor_id: UUID,
         tenant_id: str,
+        duration_seconds: int,
         prompt_tokens: int,
         completion_tokens: int,
         total_tokens: int,
@@ -280,13 +283,27 @@ class SessionBillingService:
         current_time: datetime,
     ) -> None:
         """Update existing SessionUsage (subsequent analysis)"""
-        # Calculate duration from RECORDING TIME (not elapsed time)
-        # This ensures idle/pause time is NOT charged to user
-        session_record = self.db.query(Session).filter(Session.id == session_id).first()
-
-        # Sum up all recording segment durations
-        recordings = session_record.recordings if session_record else []
-        duration_seconds = sum(r.get("duration_seconds", 0) for r in (recordings or []))
+        # Cumulative metrics are incremented in SQL so concurrent analyses of
+        # the same session cannot overwrite each other's counts
+        self.db.execute(
+            update(SessionUsage)
+            .where(SessionUsage.id == session_usage.id)
+            .values(
+                analysis_count=func.coalesce(SessionUsage.analysis_count, 0) + 1,
+                total_prompt_tokens=func.coalesce(SessionUsage.total_prompt_tokens, 0)
+                + prompt_tokens,
+                total_completion_tokens=func.coalesce(
+                    SessionUsage.total_completion_tokens, 0
+                )
+                + completion_tokens,
+                total_tokens=func.coalesce(SessionUsage.total_tokens, 0) + total_tokens,
+                estimated_cost_usd=func.coalesce(SessionUsage.estimated_cost_usd, 0)
+                + estimated_cost,
+                end_time=current_time,
+                duration_seconds=duration_seconds,
+            )
+            .execution_options(synchronize_session=False)
+        )
 
         if duration_seconds > 0:
             current_minutes = math.ceil(duration_seconds / 60)
@@ -300,25 +317,75 @@ class SessionBillingService:
             )
 
             if new_minutes > 0:
-                # Deduct credits (1 credit = 1 minute)
-                credits_to_deduct = float(new_minutes)
+                self._bill_minutes(
+                    session_usage_id=session_usage.id,
+                    session_id=session_id,
+                    counselor_id=counselor_id,
+                    tenant_id=tenant_id,
+                    duration_seconds=duration_seconds,
+                    already_billed=already_billed,
+                    current_minutes=current_minutes,
+                )
+            else:
+                logger.info(
+                    f"No new minutes to bill for session {session_id} "
+                    f"(current={current_minutes}, already_billed={already_billed})"
+                )
 
-                # 1. Update Counselor (decrement available_credits)
-                counselor.available_credits -= credits_to_deduct
+        # Counters were written in SQL; reload on next access
+        self.db.expire(session_usage)
+        logger.info(f"Updated SessionUsage for session {session_id}")
 
-                # 2. Update SessionUsage (cache)
-                session_usage.credits_deducted = (
-                    session_usage.credits_deducted or Decimal("0.0")
-                ) + Decimal(str(credits_to_deduct))
-                session_usage.last_billed_minutes = current_minutes
+    def _bill_minutes(
+        self,
+        session_usage_id: UUID,
+        session_id: UUID,
+        counselor_id: UUID,
+        tenant_id: str,
+        duration_seconds: int,
+        already_billed: int,
+        current_minutes: int,
+    ) -> None:
+        """Charge the billing window (already_billed, current_minutes] once"""
+        new_minutes = current_minutes - already_billed
+        # Deduct credits (1 credit = 1 minute)
+        credits_to_deduct = float(new_minutes)
 
-                # 3. Write CreditLog (authoritative source)
-                credit_log = CreditLog(
-                    counselor_id=counselor_id,
+        try:
+            with self.db.begin_nested():
+                # 1. Claim the window on SessionUsage (cache). The
+                #    compare-and-set on last_billed_minutes makes a concurrent
+                #    analysis of the same window a no-op instead of a double charge.
+                claimed = self.db.execute(
+                    update(SessionUsage)
+                    .where(
+                        SessionUsage.id == session_usage_id,
+                        func.coalesce(SessionUsage.last_billed_minutes, 0)
+                        == already_billed,
+                    )
+                    .values(
+                        last_billed_minutes=current_minutes,
+                        credits_deducted=func.coalesce(SessionUsage.credits_deducted, 0)
+                        + Decimal(str(credits_to_deduct)),
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not claimed:
+                    logger.info(
+                        f"Billing window {already_billed}-{current_minutes} of session "
+                        f"{session_id} already claimed by a concurrent analysis"
+                    )
+                    return
+
+                # 2. Deduct from Counselor + write CreditLog (authoritative)
+                credit_log = CreditLedger(self.db).deduct(
+                    counselor_id,
+                    credits_to_deduct,
+                    idempotency_key=session_billing_key(
+                        session_id, already_billed, current_minutes
+                    ),
                     resource_type="session",
                     resource_id=str(session_id),
-                    credits_delta=-credits_to_deduct,  # Negative for usage
-                    transaction_type="usage",
                     raw_data={
                         "feature": "session_analysis",
                         "duration_seconds": duration_seconds,
@@ -327,11 +394,7 @@ class SessionBillingService:
                         "analysis_type": "partial_analysis",
                         "tenant_id": tenant_id,
                     },
-                    rate_snapshot={
-                        "unit": "minute",
-                        "rate": 1.0,
-                        "rounding": "ceil",
-                    },
+                    rate_snapshot=PER_MINUTE_RATE,
                     calculation_details={
                         "duration_seconds": duration_seconds,
                         "current_minutes": current_minutes,
@@ -340,48 +403,25 @@ class SessionBillingService:
                         "credits_deducted": credits_to_deduct,
                     },
                 )
-                self.db.add(credit_log)
-
-                logger.info(
-                    f"Deducted {credits_to_deduct} credits for session {session_id}: "
-                    f"counselor.available_credits={counselor.available_credits}"
-                )
-            else:
-                logger.info(
-                    f"No new minutes to bill for session {session_id} "
-                    f"(current={current_minutes}, already_billed={already_billed})"
-                )
-
-        # Update cumulative metrics
-        session_usage.analysis_count = (session_usage.analysis_count or 0) + 1
-        session_usage.total_prompt_tokens = (
-            session_usage.total_prompt_tokens or 0
-        ) + prompt_tokens
-        session_usage.total_completion_tokens = (
-            session_usage.total_completion_tokens or 0
-        ) + completion_tokens
-        session_usage.total_tokens = (session_usage.total_tokens or 0) + total_tokens
-        session_usage.estimated_cost_usd = (
-            session_usage.estimated_cost_usd or Decimal("0.0")
-        ) + estimated_cost
-        session_usage.end_time = current_time
-        session_usage.duration_seconds = (
-            duration_seconds if session_usage.start_time else 0
-        )
+        except DuplicateLedgerEntryError:
+            logger.info(
+                f"Billing window {already_billed}-{current_minutes} of session "
+                f"{session_id} already in the credit ledger, skipping"
+            )
+            return
 
         logger.info(
-            f"Updated SessionUsage for session {session_id}: "
-            f"analysis_count={session_usage.analysis_count}, "
-            f"total_tokens={session_usage.total_tokens}, "
-            f"credits_deducted={session_usage.credits_deducted}"
+            f"Deducted {credits_to_deduct} credits for session {session_id}: "
+            f"counselor.available_credits={credit_log.balance_after}"
         )
 
     def _create_new_usage(
         self,
         session_id: UUID,
-        counselor: Counselor,
         counselor_id: UUID,
         tenant_id: str,
+        duration_seconds: int,
+        recorded_segments: int,
         prompt_tokens: int,
         completion_tokens: int,
         total_tokens: int,
@@ -390,63 +430,86 @@ class SessionBillingService:
     ) -> None:
         """Create new SessionUsage (first analysis)"""
         # First analysis at time T → charge ceil(T/60) minutes
-        duration_seconds = 0  # First analysis starts at 0
+        billed_seconds = 0  # First analysis starts at 0
         current_minutes = 1  # Minimum charge is 1 minute (0:01-1:00 = 1 min)
         credits_to_deduct = 1.0  # 1 credit for first minute
 
-        # 1. Update Counselor
-        counselor.available_credits -= credits_to_deduct
-
-        # 2. Create SessionUsage (cache)
-        session_usage = SessionUsage(
-            session_id=session_id,
-            counselor_id=counselor_id,
-            tenant_id=tenant_id,
-            usage_type="partial_analysis",
-            status="in_progress",
-            start_time=current_time,
-            end_time=current_time,
-            duration_seconds=duration_seconds,
-            analysis_count=1,
-            total_prompt_tokens=prompt_tokens,
-            total_completion_tokens=completion_tokens,
-            total_tokens=total_tokens,
-            estimated_cost_usd=estimated_cost,
-            pricing_rule={"unit": "minute", "rate": 1.0, "rounding": "ceil"},
-            credits_deducted=Decimal(str(credits_to_deduct)),
-            last_billed_minutes=current_minutes,
-        )
-        self.db.add(session_usage)
-
-        # 3. Write CreditLog (authoritative)
-        credit_log = CreditLog(
-            counselor_id=counselor_id,
-            resource_type="session",
-            resource_id=str(session_id),
-            credits_delta=-credits_to_deduct,
-            transaction_type="usage",
-            raw_data={
-                "feature": "session_analysis",
-                "duration_seconds": duration_seconds,
-                "current_minutes": current_minutes,
-                "incremental_minutes": current_minutes,
-                "analysis_type": "partial_analysis",
-                "tenant_id": tenant_id,
-            },
-            rate_snapshot={
-                "unit": "minute",
-                "rate": 1.0,
-                "rounding": "ceil",
-            },
-            calculation_details={
-                "duration_seconds": duration_seconds,
-                "current_minutes": current_minutes,
-                "already_billed_minutes": 0,
-                "new_minutes": current_minutes,
-                "credits_deducted": credits_to_deduct,
-            },
-        )
-        self.db.add(credit_log)
+        try:
+            with self.db.begin_nested():
+                # 1. Create SessionUsage (cache)
+                session_usage = SessionUsage(
+                    session_id=session_id,
+                    counselor_id=counselor_id,
+                    tenant_id=tenant_id,
+                    usage_type="partial_analysis",
+                    status="in_progress",
+                    start_time=current_time,
+                    end_time=current_time,
+                    duration_seconds=billed_seconds,
+                    analysis_count=1,
+                    total_prompt_tokens=prompt_tokens,
+                    total_completion_tokens=completion_tokens,
+                    total_tokens=total_tokens,
+                    estimated_cost_usd=estimated_cost,
+                    pricing_rule=PER_MINUTE_RATE,
+                    credits_deducted=Decimal(str(credits_to_deduct)),
+                    last_billed_minutes=current_minutes,
+                    # Seed the running duration; appends keep it up to date
+                    recorded_seconds=duration_seconds,
+                    recorded_segments=recorded_segments,
+                )
+                self.db.add(session_usage)
+                self.db.flush()
+
+                # 2. Deduct from Counselor + write CreditLog (authoritative)
+                CreditLedger(self.db).deduct(
+                    counselor_id,
+                    credits_to_deduct,
+                    idempotency_key=session_billing_key(session_id, 0, current_minutes),
+                    resource_type="session",
+                    resource_id=str(session_id),
+                    raw_data={
+                        "feature": "session_analysis",
+                        "duration_seconds": billed_seconds,
+                        "current_minutes": current_minutes,
+                        "incremental_minutes": current_minutes,
+                        "analysis_type": "partial_analysis",
+                        "tenant_id": tenant_id,
+                    },
+                    rate_snapshot=PER_MINUTE_RATE,
+                    calculation_details={
+                        "duration_seconds": billed_seconds,
+                        "current_minutes": current_minutes,
+                        "already_billed_minutes": 0,
+                        "new_minutes": current_minutes,
+                        "credits_deducted": credits_to_deduct,
+                    },
+                )
+        except DuplicateLedgerEntryError:
+            # A concurrent first analysis already created the usage row and
+            # charged the first minute: count this one as a subsequent analysis
+            existing = (
+                self.db.query(SessionUsage)
+                .filter(
+                    SessionUsage.session_id == session_id,
+                    SessionUsage.tenant_id == tenant_id,
+                )
+                .first()
+            )
+            if existing:
+                self._update_existing_usage(
+                    session_usage=existing,
+                    session_id=session_id,
+                    counselor_id=counselor_id,
+                    tenant_id=tenant_id,
+                    duration_seconds=duration_seconds,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    total_tokens=total_tokens,
+                    estimated_cost=estimated_cost,
+                    current_time=current_time,
+                )
+            return
 
         logger.info(
             f"Created SessionUsage for session {session_id}: "
@@ -1,4 +1,14 @@
 """Billing services."""
+from app.services.billing.credit_ledger import CreditLedger
+from app.services.billing.rate_cache import RateCache
+from app.services.billing.usage_accumulator import UsageAccumulator
+from app.services.billing.usage_gate import UsageGate
 from app.services.billing.usage_tracker import UsageTracker
 
-__all__ = ["UsageTracker"]
+__all__ = [
+    "CreditLedger",
+    "RateCache",
+    "UsageAccumulator",
+    "UsageGate",
+    "UsageTracker",
+]
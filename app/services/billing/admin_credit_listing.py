@@ -0,0 +1,405 @@
+"""
+Admin credit listings - members, credit logs and billing rates
+
+Pages are keyset-paginated (`app.utils.pagination`): each sort key is paired
+with the primary key, so deep pages cost the same as the first one and a page
+never loads more than `limit + 1` rows.
+
+Member credit totals (`total_credits` / `credits_used`) and the last credit
+activity come from one grouped `credit_logs` query for the counselors on the
+page, instead of loading every counselor's full log through
+`Counselor.credit_logs`. Only the requested columns are selected.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.counselor import Counselor
+from app.models.credit_log import CreditLog
+from app.models.credit_rate import CreditRate
+from app.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_row_count,
+    keyset_after,
+)
+
+# Fields a member listing can project (`id` is always returned)
+MEMBER_FIELDS = (
+    "email",
+    "full_name",
+    "phone",
+    "tenant_id",
+    "total_credits",
+    "credits_used",
+    "available_credits",
+    "subscription_expires_at",
+    "billing_mode",
+    "is_active",
+    "last_activity_at",
+)
+MEMBER_DEFAULT_FIELDS = MEMBER_FIELDS[:8]
+# Computed from credit_logs rather than read from the counselor row
+_MEMBER_AGGREGATE_FIELDS = ("total_credits", "credits_used", "last_activity_at")
+
+CREDIT_LOG_FIELDS = (
+    "counselor_id",
+    "credits_delta",
+    "transaction_type",
+    "resource_type",
+    "resource_id",
+    "raw_data",
+    "rate_snapshot",
+    "calculation_details",
+    "balance_after",
+    "created_at",
+    "updated_at",
+)
+CREDIT_LOG_DEFAULT_FIELDS = (
+    "counselor_id",
+    "credits_delta",
+    "transaction_type",
+    "raw_data",
+    "rate_snapshot",
+    "calculation_details",
+    "created_at",
+    "updated_at",
+)
+
+Page = Tuple[List[Dict[str, Any]], Optional[int], Optional[str]]
+
+
+def _member_columns(fields: Tuple[str, ...]) -> List[Any]:
+    """Counselor columns behind the requested member fields"""
+    columns = [
+        getattr(Counselor, name)
+        for name in fields
+        if name not in _MEMBER_AGGREGATE_FIELDS
+    ]
+    if "last_activity_at" in fields:
+        # Fallback for counselors without credit logs
+        columns.append(Counselor.created_at.label("account_created_at"))
+    return columns
+
+
+def parse_fields(
+    fields: Optional[str], allowed: Iterable[str], default: Iterable[str]
+) -> Tuple[str, ...]:
+    """Comma-separated `fields` query value -> field names (ValueError on unknown)"""
+    if not fields:
+        return tuple(default)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = set(requested) - set(allowed) - {"id"}
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(dict.fromkeys(f for f in requested if f != "id"))
+
+
+class AdminCreditListing:
+    """Paginated, filtered, projected admin credit queries"""
+
+    def __init__(self, db: DBSession):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Members
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _last_activity():
+        """Latest credit log of the counselor, else the account creation time"""
+        latest = (
+            select(func.max(CreditLog.created_at))
+            .where(CreditLog.counselor_id == Counselor.id)
+            .scalar_subquery()
+        )
+        return func.coalesce(latest, Counselor.created_at)
+
+    def list_members(
+        self,
+        tenant_id: str,
+        search: Optional[str] = None,
+        billing_mode: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        min_balance: Optional[float] = None,
+        max_balance: Optional[float] = None,
+        sort: str = "email",
+        descending: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Iterable[str] = MEMBER_DEFAULT_FIELDS,
+        count_mode: str = "exact",
+    ) -> Page:
+        """
+        List a tenant's counselors with credit information
+
+        Args:
+            search: Case-insensitive substring of email or full name
+            sort: balance (available_credits) / activity (last credit log) / email
+            descending: Sort direction (ties broken by id in the same direction)
+            cursor: next_cursor of the previous page
+            fields: Member fields to return besides id (see MEMBER_FIELDS)
+            count_mode: exact / estimated / none
+
+        Returns: (items, total or None, next_cursor or None)
+
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
+        """
+        sort_key = {
+            "balance": Counselor.available_credits,
+            "activity": self._last_activity(),
+            "email": Counselor.email,
+        }[sort]
+        sort_type = {"balance": (int, float), "activity": datetime, "email": str}[sort]
+
+        conditions = [Counselor.tenant_id == tenant_id]
+        if search:
+            pattern = f"%{search}%"
+            conditions.append(
+                or_(Counselor.email.ilike(pattern), Counselor.full_name.ilike(pattern))
+            )
+        if billing_mode:
+            conditions.append(Counselor.billing_mode == billing_mode)
+        if is_active is not None:
+            conditions.append(Counselor.is_active.is_(is_active))
+        if min_balance is not None:
+            conditions.append(Counselor.available_credits >= min_balance)
+        if max_balance is not None:
+            conditions.append(Counselor.available_credits <= max_balance)
+
+        fields = tuple(fields)
+        columns = _member_columns(fields)
+        query = select(Counselor.id, *columns, sort_key.label("sort_key")).where(
+            *conditions
+        )
+        if cursor:
+            cursor_key, cursor_id = decode_cursor(cursor, types=(sort_type, UUID))
+            query = query.where(
+                keyset_after(
+                    [sort_key, Counselor.id], [cursor_key, cursor_id], descending
+                )
+            )
+        order = (
+            [sort_key.desc(), Counselor.id.desc()]
+            if descending
+            else [
+                sort_key.asc(),
+                Counselor.id.asc(),
+            ]
+        )
+        rows = self.db.execute(query.order_by(*order).limit(limit + 1)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].sort_key, rows[-1].id)
+
+        aggregates = self._member_aggregates(
+            [row.id for row in rows],
+            [f for f in fields if f in _MEMBER_AGGREGATE_FIELDS],
+        )
+        items = [
+            self._member_item(row._mapping, fields, aggregates.get(row.id))
+            for row in rows
+        ]
+        total = self._count(select(Counselor.id).where(*conditions), count_mode)
+        return items, total, next_cursor
+
+    def get_member(
+        self,
+        tenant_id: str,
+        counselor_id: UUID,
+        fields: Iterable[str] = MEMBER_DEFAULT_FIELDS,
+    ) -> Optional[Dict[str, Any]]:
+        """One member of the tenant, or None"""
+        fields = tuple(fields)
+        columns = _member_columns(fields)
+        row = self.db.execute(
+            select(Counselor.id, *columns).where(
+                Counselor.id == counselor_id, Counselor.tenant_id == tenant_id
+            )
+        ).first()
+        if row is None:
+            return None
+        aggregates = self._member_aggregates(
+            [row.id], [f for f in fields if f in _MEMBER_AGGREGATE_FIELDS]
+        )
+        return self._member_item(row._mapping, fields, aggregates.get(row.id))
+
+    def _member_aggregates(
+        self, counselor_ids: List[UUID], fields: List[str]
+    ) -> Dict[UUID, Any]:
+        """total_credits / credits_used / last credit log per counselor (one query)"""
+        if not counselor_ids or not fields:
+            return {}
+        rows = self.db.execute(
+            select(
+                CreditLog.counselor_id,
+                func.coalesce(
+                    func.sum(
+                        case((CreditLog.credits_delta > 0, CreditLog.credits_delta))
+                    ),
+                    0,
+                ).label("added"),
+                func.coalesce(
+                    func.sum(
+                        case((CreditLog.credits_delta < 0, CreditLog.credits_delta))
+                    ),
+                    0,
+                ).label("used"),
+                func.max(CreditLog.created_at).label("last_at"),
+            )
+            .where(CreditLog.counselor_id.in_(counselor_ids))
+            .group_by(CreditLog.counselor_id)
+        ).all()
+        return {row.counselor_id: row for row in rows}
+
+    @staticmethod
+    def _member_item(row, fields: Tuple[str, ...], aggregate) -> Dict[str, Any]:
+        item = {"id": row["id"]}
+        for name in fields:
+            if name == "total_credits":
+                item[name] = int(aggregate.added) if aggregate else 0
+            elif name == "credits_used":
+                item[name] = int(abs(aggregate.used)) if aggregate else 0
+            elif name == "last_activity_at":
+                # Same fallback as the activity sort key
+                item[name] = (
+                    aggregate.last_at if aggregate else row["account_created_at"]
+                )
+            elif name == "available_credits":
+                item[name] = int(row[name] or 0)
+            elif name == "billing_mode":
+                mode = row[name]
+                item[name] = getattr(mode, "value", mode)
+            else:
+                item[name] = row[name]
+        return item
+
+    # ------------------------------------------------------------------
+    # Credit logs
+    # ------------------------------------------------------------------
+    def list_logs(
+        self,
+        tenant_id: str,
+        counselor_id: Optional[UUID] = None,
+        transaction_type: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        fields: Iterable[str] = CREDIT_LOG_DEFAULT_FIELDS,
+        count_mode: str = "none",
+    ) -> Page:
+        """
+        List a tenant's credit logs, newest first
+
+        When `cursor` is given it replaces `offset` (keyset pagination on
+        (created_at, id)).
+
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
+        """
+        conditions = [
+            CreditLog.counselor_id.in_(
+                select(Counselor.id).where(Counselor.tenant_id == tenant_id)
+            )
+        ]
+        if counselor_id:
+            conditions.append(CreditLog.counselor_id == counselor_id)
+        if transaction_type:
+            conditions.append(CreditLog.transaction_type == transaction_type)
+        if resource_type:
+            conditions.append(CreditLog.resource_type == resource_type)
+        if created_from:
+            conditions.append(CreditLog.created_at >= created_from)
+        if created_to:
+            conditions.append(CreditLog.created_at < created_to)
+
+        fields = tuple(fields)
+        # created_at is selected for the cursor even when not projected
+        columns = [getattr(CreditLog, name) for name in fields if name != "created_at"]
+        query = select(CreditLog.id, CreditLog.created_at, *columns).where(*conditions)
+        if cursor:
+            cursor_time, cursor_id = decode_cursor(cursor, types=(datetime, UUID))
+            query = query.where(
+                keyset_after(
+                    [CreditLog.created_at, CreditLog.id], [cursor_time, cursor_id]
+                )
+            )
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(CreditLog.created_at.desc(), CreditLog.id.desc())
+        rows = self.db.execute(query.limit(limit + 1)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        items = [
+            {"id": row.id, **{name: row._mapping[name] for name in fields}}
+            for row in rows
+        ]
+        total = self._count(select(CreditLog.id).where(*conditions), count_mode)
+        return items, total, next_cursor
+
+    # ------------------------------------------------------------------
+    # Billing rates
+    # ------------------------------------------------------------------
+    def list_rates(
+        self,
+        rule_name: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[CreditRate], Optional[str]]:
+        """
+        List billing rates by rule name, newest version first
+
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
+        """
+        # (rule_name asc, version desc) as one ascending key for keyset_after
+        sort_key = [CreditRate.rule_name, -CreditRate.version]
+        query = select(CreditRate)
+        if rule_name:
+            query = query.where(CreditRate.rule_name == rule_name)
+        if is_active is not None:
+            query = query.where(CreditRate.is_active.is_(is_active))
+        if cursor:
+            cursor_rule, cursor_version = decode_cursor(cursor, types=(str, int))
+            query = query.where(
+                keyset_after(sort_key, [cursor_rule, -cursor_version], descending=False)
+            )
+        rates = list(
+            self.db.execute(
+                query.order_by(CreditRate.rule_name, CreditRate.version.desc()).limit(
+                    limit + 1
+                )
+            ).scalars()
+        )
+
+        next_cursor = None
+        if len(rates) > limit:
+            rates = rates[:limit]
+            next_cursor = encode_cursor(rates[-1].rule_name, rates[-1].version)
+        return rates, next_cursor
+
+    # ------------------------------------------------------------------
+    def _count(self, base, count_mode: str) -> Optional[int]:
+        """Rows matching `base`: exact, planner estimate, or skip"""
+        if count_mode == "none":
+            return None
+        if count_mode == "estimated":
+            estimate = estimate_row_count(self.db, base)
+            if estimate is not None:
+                return estimate
+        return self.db.execute(
+            select(func.count()).select_from(base.subquery())
+        ).scalar()
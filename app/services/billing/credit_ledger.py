@@ -0,0 +1,247 @@
+"""
+Credit Ledger - atomic credit movements with an append-only CreditLog
+
+Every balance change is one conditional SQL statement
+(`UPDATE counselors SET available_credits = available_credits + :delta
+... RETURNING available_credits`) followed by the CreditLog insert in the same
+savepoint, so concurrent analyses never read-modify-write the balance in
+Python and the counselor row lock is only held until the surrounding commit.
+
+Ordering: the same UPDATE bumps `counselors.ledger_seq` and the CreditLog
+stores the returned value, so entries of one counselor are ordered by the
+row lock (created_at is the transaction start and can be out of order).
+
+Idempotency: entries may carry an `idempotency_key` (unique). Replaying a
+key is a no-op, which lets callers retry a billing window safely.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import String, cast, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.counselor import Counselor
+from app.models.credit_log import CreditLog
+from app.models.session_usage import SessionUsage
+from app.services.billing.usage_gate import usage_gate
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateLedgerEntryError(Exception):
+    """Raised when an idempotency key has already been applied"""
+
+
+class CounselorNotFoundError(ValueError):
+    """Raised when the counselor row to charge does not exist"""
+
+
+def session_billing_key(session_id: UUID, from_minutes: int, to_minutes: int) -> str:
+    """Idempotency key for one billing window of a session"""
+    return f"session:{session_id}:minutes:{from_minutes}-{to_minutes}"
+
+
+@dataclass
+class ReconciliationReport:
+    """Result of CreditLedger.reconcile"""
+
+    counselors_checked: int
+    sessions_checked: int
+    counselor_drifts: List[Dict[str, Any]]
+    session_drifts: List[Dict[str, Any]]
+    fixed: bool
+
+
+class CreditLedger:
+    """Atomic credit deduction / addition backed by CreditLog"""
+
+    def __init__(self, db: DBSession):
+        self.db = db
+
+    def apply(
+        self,
+        counselor_id: UUID,
+        credits_delta: float,
+        transaction_type: str,
+        idempotency_key: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        raw_data: Optional[Dict] = None,
+        rate_snapshot: Optional[Dict] = None,
+        calculation_details: Optional[Dict] = None,
+    ) -> CreditLog:
+        """
+        Atomically change a counselor's balance and append a CreditLog.
+
+        Does not commit; callers should commit right after so the counselor
+        row lock taken by the UPDATE is released quickly.
+
+        Raises:
+            DuplicateLedgerEntryError: If idempotency_key was already applied
+            CounselorNotFoundError: If the counselor does not exist
+        """
+        if idempotency_key and self._key_exists(idempotency_key):
+            raise DuplicateLedgerEntryError(idempotency_key)
+
+        try:
+            with self.db.begin_nested():
+                row = self.db.execute(
+                    update(Counselor)
+                    .where(Counselor.id == counselor_id)
+                    .values(
+                        available_credits=Counselor.available_credits + credits_delta,
+                        ledger_seq=Counselor.ledger_seq + 1,
+                    )
+                    .returning(Counselor.available_credits, Counselor.ledger_seq)
+                ).one_or_none()
+                if row is None:
+                    raise CounselorNotFoundError(f"Counselor not found: {counselor_id}")
+                new_balance, ledger_seq = row
+
+                credit_log = CreditLog(
+                    counselor_id=counselor_id,
+                    resource_type=resource_type,
+                    resource_id=resource_id,
+                    credits_delta=credits_delta,
+                    transaction_type=transaction_type,
+                    idempotency_key=idempotency_key,
+                    balance_after=new_balance,
+                    ledger_seq=ledger_seq,
+                    raw_data=raw_data,
+                    rate_snapshot=rate_snapshot,
+                    calculation_details=calculation_details,
+                )
+                self.db.add(credit_log)
+                # Flush inside the savepoint so a concurrent duplicate key
+                # rolls back the balance change together with the log
+                self.db.flush()
+        except IntegrityError as e:
+            if idempotency_key:
+                raise DuplicateLedgerEntryError(idempotency_key) from e
+            raise
+
+        usage_gate.observe_balance(counselor_id, new_balance, credits_delta)
+        return credit_log
+
+    def deduct(self, counselor_id: UUID, credits: float, **kwargs: Any) -> CreditLog:
+        """Shortcut for a usage entry (negative delta)"""
+        kwargs.setdefault("transaction_type", "usage")
+        return self.apply(counselor_id, -float(credits), **kwargs)
+
+    def _key_exists(self, idempotency_key: str) -> bool:
+        return (
+            self.db.execute(
+                select(CreditLog.id).where(CreditLog.idempotency_key == idempotency_key)
+            ).first()
+            is not None
+        )
+
+    def reconcile(
+        self, counselor_id: Optional[UUID] = None, fix: bool = False
+    ) -> ReconciliationReport:
+        """
+        Compare cached balances with the ledger.
+
+        - Counselor: `available_credits` vs `balance_after` of its latest
+          ledger entry by `ledger_seq` (a mismatch means the balance was written outside the
+          ledger). Reported only.
+        - Session: `SessionUsage.credits_deducted` vs the sum of its usage
+          entries. With fix=True the cache is reset to the ledger sum.
+        """
+        latest = (
+            select(
+                CreditLog.counselor_id,
+                CreditLog.balance_after,
+                func.row_number()
+                .over(
+                    partition_by=CreditLog.counselor_id,
+                    order_by=CreditLog.ledger_seq.desc(),
+                )
+                .label("rn"),
+            )
+            .where(CreditLog.ledger_seq.isnot(None))
+            .subquery()
+        )
+        counselor_query = select(
+            Counselor.id, Counselor.available_credits, latest.c.balance_after
+        ).join(latest, (latest.c.counselor_id == Counselor.id) & (latest.c.rn == 1))
+        if counselor_id is not None:
+            counselor_query = counselor_query.where(Counselor.id == counselor_id)
+        counselor_rows = self.db.execute(counselor_query).all()
+
+        counselor_drifts = [
+            {
+                "counselor_id": str(row.id),
+                "available_credits": row.available_credits,
+                "ledger_balance": row.balance_after,
+                "drift": round(row.available_credits - row.balance_after, 6),
+            }
+            for row in counselor_rows
+            if abs(row.available_credits - row.balance_after) > 1e-6
+        ]
+
+        ledger_sums = (
+            select(
+                CreditLog.resource_id,
+                func.sum(-CreditLog.credits_delta).label("ledger_credits"),
+            )
+            .where(
+                CreditLog.resource_type == "session",
+                CreditLog.transaction_type == "usage",
+            )
+            .group_by(CreditLog.resource_id)
+            .subquery()
+        )
+        session_query = select(
+            SessionUsage.id,
+            SessionUsage.session_id,
+            SessionUsage.credits_deducted,
+            func.coalesce(ledger_sums.c.ledger_credits, 0).label("ledger_credits"),
+        ).outerjoin(
+            ledger_sums,
+            ledger_sums.c.resource_id == cast(SessionUsage.session_id, String),
+        )
+        if counselor_id is not None:
+            session_query = session_query.where(
+                SessionUsage.counselor_id == counselor_id
+            )
+        session_rows = self.db.execute(session_query).all()
+
+        session_drifts = [
+            {
+                "session_usage_id": str(row.id),
+                "session_id": str(row.session_id),
+                "credits_deducted": float(row.credits_deducted or 0),
+                "ledger_credits": float(row.ledger_credits),
+            }
+            for row in session_rows
+            if abs(float(row.credits_deducted or 0) - float(row.ledger_credits)) > 1e-6
+        ]
+
+        if fix and session_drifts:
+            for drift in session_drifts:
+                self.db.execute(
+                    update(SessionUsage)
+                    .where(SessionUsage.id == UUID(drift["session_usage_id"]))
+                    .values(credits_deducted=drift["ledger_credits"])
+                )
+            self.db.commit()
+
+        for drift in counselor_drifts:
+            logger.warning(f"Credit balance drift: {drift}")
+        if session_drifts:
+            logger.warning(
+                f"{len(session_drifts)} SessionUsage.credits_deducted values differ "
+                f"from the ledger (fixed={fix})"
+            )
+
+        return ReconciliationReport(
+            counselors_checked=len(counselor_rows),
+            sessions_checked=len(session_rows),
+            counselor_drifts=counselor_drifts,
+            session_drifts=session_drifts,
+            fixed=fix and bool(session_drifts),
+        )
@@ -0,0 +1,249 @@
+"""
+Rate Cache - in-memory resolution of active CreditRate rules
+
+Rates change only through `POST /api/v1/admin/credits/rates`, yet every
+`calculate_credits()` call used to query `credit_rates`. The cache holds all
+active versions per rule (precompiled) and:
+
+- is invalidated in-process by the admin write path (and by any committed
+  ORM write to CreditRate)
+- re-checks a cheap table stamp (row count, latest timestamps) at most every
+  CREDIT_RATE_CACHE_CHECK_SECONDS, so writes from other processes are picked
+  up without a per-request query
+- keeps one cache per engine (tests and tools with separate databases never
+  share rates)
+
+Tiered rules are compiled into cumulative boundaries and prefix sums, so the
+credit total is a `bisect` instead of a walk over the tiers.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.models.credit_rate import CreditRate
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledTiers:
+    """Tiers as cumulative ranges: tier i covers (starts[i], ends[i]]"""
+
+    starts: Tuple[float, ...]
+    ends: Tuple[float, ...]  # math.inf for the unlimited tier
+    rates: Tuple[float, ...]
+    prefix: Tuple[float, ...]  # credits of all tiers before i (len = n + 1)
+    labels: Tuple[str, ...]
+
+    @classmethod
+    def compile(cls, tiers: List[Dict[str, Any]]) -> "CompiledTiers":
+        # Same semantics as the original loop: each max_seconds is the width
+        # of its tier, a null max_seconds takes the remainder and ends the list
+        starts, ends, rates, prefix, labels = [], [], [], [0], []
+        start = 0
+        for tier in tiers:
+            max_seconds = tier.get("max_seconds")
+            credits_per_second = tier.get("credits_per_second", 1)
+            starts.append(start)
+            rates.append(credits_per_second)
+            if max_seconds is None:
+                ends.append(math.inf)
+                labels.append("unlimited")
+                break
+            ends.append(start + max_seconds)
+            labels.append(f"0-{max_seconds}s")
+            prefix.append(prefix[-1] + max_seconds * credits_per_second)
+            start += max_seconds
+        return cls(
+            tuple(starts), tuple(ends), tuple(rates), tuple(prefix), tuple(labels)
+        )
+
+    def _last_tier(self, duration_seconds: int) -> int:
+        # First tier whose end reaches the duration; clamp when the duration
+        # is longer than every finite tier and there is no unlimited tier
+        return min(bisect.bisect_left(self.ends, duration_seconds), len(self.ends) - 1)
+
+    def total(self, duration_seconds: int) -> float:
+        """Credits for a duration in O(log n)"""
+        if not self.ends:
+            return 0
+        last = self._last_tier(duration_seconds)
+        seconds_in_tier = min(duration_seconds, self.ends[last]) - self.starts[last]
+        return self.prefix[last] + seconds_in_tier * self.rates[last]
+
+    def breakdown(self, duration_seconds: int) -> List[Dict[str, Any]]:
+        """Per-tier audit rows (same shape as calculation_details)"""
+        if not self.ends:
+            return []
+        rows = []
+        for i in range(self._last_tier(duration_seconds) + 1):
+            seconds_in_tier = min(duration_seconds, self.ends[i]) - self.starts[i]
+            rows.append(
+                {
+                    "tier": self.labels[i],
+                    "seconds_in_tier": seconds_in_tier,
+                    "credits_per_second": self.rates[i],
+                    "tier_credits": seconds_in_tier * self.rates[i],
+                }
+            )
+        return rows
+
+
+@dataclass(frozen=True)
+class CompiledRate:
+    """Detached, immutable snapshot of a CreditRate row"""
+
+    rule_name: str
+    calculation_method: str
+    rate_config: Dict[str, Any]
+    version: int
+    effective_from: datetime
+    tiers: Optional[CompiledTiers] = field(default=None, compare=False)
+
+    @classmethod
+    def from_row(cls, rate: CreditRate) -> "CompiledRate":
+        tiers = None
+        if rate.calculation_method == "tiered":
+            tiers = CompiledTiers.compile((rate.rate_config or {}).get("tiers", []))
+        return cls(
+            rule_name=rate.rule_name,
+            calculation_method=rate.calculation_method,
+            rate_config=rate.rate_config,
+            version=rate.version,
+            effective_from=_as_utc(rate.effective_from),
+            tiers=tiers,
+        )
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes for timezone-aware columns
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class _EngineRates:
+    def __init__(self):
+        self.rules: Optional[Dict[str, List[CompiledRate]]] = None
+        self.stamp: Optional[tuple] = None
+        self.checked_at = 0.0
+
+
+class RateCache:
+    """Process-wide cache of active rates, one entry set per engine"""
+
+    def __init__(self, check_seconds: Optional[float] = None):
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._engines: "weakref.WeakKeyDictionary[Any, _EngineRates]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.loads = 0
+
+    @property
+    def _check_interval(self) -> float:
+        if self.check_seconds is not None:
+            return self.check_seconds
+        return settings.CREDIT_RATE_CACHE_CHECK_SECONDS
+
+    def get(self, db: DBSession, rule_name: str) -> Optional[CompiledRate]:
+        """Latest active version of a rule that is already effective"""
+        now = datetime.now(timezone.utc)
+        # Versions are kept newest first
+        for rate in self._rules(db).get(rule_name, ()):
+            if rate.effective_from <= now:
+                return rate
+        return None
+
+    def invalidate(self, db: Optional[DBSession] = None) -> None:
+        """Drop cached rates (for one session's engine, or all)"""
+        with self._lock:
+            if db is None:
+                self._engines.clear()
+            else:
+                self._engines.pop(db.get_bind(), None)
+
+    def _rules(self, db: DBSession) -> Dict[str, List[CompiledRate]]:
+        engine = db.get_bind()
+        with self._lock:
+            entry = self._engines.setdefault(engine, _EngineRates())
+            rules = entry.rules
+            due = time.monotonic() - entry.checked_at >= self._check_interval
+
+        if rules is not None and not due:
+            return rules
+
+        stamp = self._stamp(db)
+        if rules is not None and stamp == entry.stamp:
+            with self._lock:
+                entry.checked_at = time.monotonic()
+            return rules
+
+        rules = self._load(db)
+        with self._lock:
+            entry.rules, entry.stamp = rules, stamp
+            entry.checked_at = time.monotonic()
+            self.loads += 1
+        return rules
+
+    @staticmethod
+    def _stamp(db: DBSession) -> tuple:
+        """Cheap fingerprint of credit_rates that changes on any rate write"""
+        return tuple(
+            db.execute(
+                select(
+                    func.count(CreditRate.id),
+                    func.sum(case((CreditRate.is_active == True, 1), else_=0)),  # noqa: E712
+                    func.max(CreditRate.version),
+                    func.max(CreditRate.created_at),
+                    func.max(CreditRate.updated_at),
+                )
+            ).one()
+        )
+
+    @staticmethod
+    def _load(db: DBSession) -> Dict[str, List[CompiledRate]]:
+        rows = (
+            db.query(CreditRate)
+            .filter(CreditRate.is_active == True)  # noqa: E712
+            .order_by(CreditRate.rule_name, CreditRate.version.desc())
+            .all()
+        )
+        rules: Dict[str, List[CompiledRate]] = {}
+        for row in rows:
+            rules.setdefault(row.rule_name, []).append(CompiledRate.from_row(row))
+        logger.debug(f"Loaded {len(rows)} active credit rates")
+        return rules
+
+
+rate_cache = RateCache()
+
+
+@event.listens_for(DBSession, "after_flush")
+def _mark_rate_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, CreditRate):
+            session.info["credit_rates_changed"] = True
+            return
+
+
+@event.listens_for(DBSession, "after_commit")
+def _invalidate_on_rate_commit(session):
+    """ORM writes to CreditRate drop the cache once they are visible"""
+    if session.info.pop("credit_rates_changed", False):
+        rate_cache.invalidate(session)
+
+
+@event.listens_for(DBSession, "after_rollback")
+def _forget_rate_writes(session):
+    session.info.pop("credit_rates_changed", None)
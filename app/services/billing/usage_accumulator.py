@@ -0,0 +1,179 @@
+"""
+Usage Accumulator - running recorded duration on SessionUsage
+
+Billing used to reload the Session and sum every `recordings[].duration_seconds`
+on each analysis, so its cost grew with session length. Instead,
+`SessionUsage.recorded_seconds` is kept up to date when recordings are written:
+
+- Append (the new list extends the old one): add only the new segments'
+  seconds, guarded by the `recorded_segments` watermark so a replayed flush
+  cannot count the same segments twice.
+- Anything else (rewrite, shrink, watermark mismatch, never accumulated):
+  store the full total of the new list.
+
+Billing then reads one integer. `UsageAccumulator.verify()` compares the
+running totals with a full recompute.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session as DBSession
+
+from app.models.session import Session
+from app.models.session_usage import SessionUsage
+
+logger = logging.getLogger(__name__)
+
+
+def total_recorded_seconds(recordings: Optional[Sequence[Dict[str, Any]]]) -> int:
+    """Full recompute: sum of duration_seconds over all segments"""
+    return int(sum(r.get("duration_seconds") or 0 for r in (recordings or [])))
+
+
+def appended_segments(
+    old: Optional[Sequence[Dict[str, Any]]], new: Optional[Sequence[Dict[str, Any]]]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Segments appended to `old` to get `new`, or None if `new` is not an append.
+
+    Only the boundary segment is compared, so the check is O(new segments).
+    """
+    old = old or []
+    new = new or []
+    if len(new) < len(old):
+        return None
+    if old and new[len(old) - 1] != old[-1]:
+        return None
+    return list(new[len(old) :])
+
+
+@event.listens_for(DBSession, "before_flush")
+def _accumulate_recorded_seconds(db: DBSession, flush_context, instances) -> None:
+    for obj in db.dirty:
+        if not isinstance(obj, Session):
+            continue
+        history = inspect(obj).attrs.recordings.history
+        if not history.added:
+            continue
+        new = history.added[0] or []
+        old = history.deleted[0] if history.deleted else None
+        delta_segments = appended_segments(old, new) if old is not None else None
+        _apply_to_usage(db, obj.id, old, new, delta_segments)
+
+
+def _apply_to_usage(
+    db: DBSession,
+    session_id: UUID,
+    old: Optional[Sequence[Dict[str, Any]]],
+    new: Sequence[Dict[str, Any]],
+    delta_segments: Optional[List[Dict[str, Any]]],
+) -> None:
+    # Core statements on the flush connection (no autoflush recursion)
+    conn = db.connection()
+    usages = SessionUsage.__table__
+    if delta_segments is not None:
+        applied = conn.execute(
+            update(usages)
+            .where(
+                usages.c.session_id == session_id,
+                usages.c.recorded_segments == len(old or []),
+            )
+            .values(
+                recorded_seconds=usages.c.recorded_seconds
+                + total_recorded_seconds(delta_segments),
+                recorded_segments=len(new),
+            )
+        ).rowcount
+        if applied:
+            return
+
+    # Not an append, unknown previous value or watermark mismatch: full total.
+    # Affects no row if the session has no usage yet (seeded on first billing).
+    conn.execute(
+        update(usages)
+        .where(usages.c.session_id == session_id)
+        .values(
+            recorded_seconds=total_recorded_seconds(new),
+            recorded_segments=len(new),
+        )
+    )
+
+
+@dataclass
+class DurationDrift:
+    session_id: UUID
+    recorded_seconds: Optional[int]
+    recomputed_seconds: int
+
+
+class UsageAccumulator:
+    """Read / seed / verify the running recorded duration of SessionUsage"""
+
+    def __init__(self, db: DBSession):
+        self.db = db
+
+    def load_recordings(self, session_id: UUID) -> List[Dict[str, Any]]:
+        """Only the recordings column (not the whole Session row)"""
+        recordings = self.db.execute(
+            select(Session.recordings).where(Session.id == session_id)
+        ).scalar_one_or_none()
+        return list(recordings or [])
+
+    def totals(
+        self, session_id: UUID, usage: Optional[SessionUsage]
+    ) -> Tuple[int, int]:
+        """
+        (recorded_seconds, recorded_segments) for a session.
+
+        O(1) when the usage row is accumulated; otherwise one full recompute
+        (first analysis / legacy rows), which also seeds an existing usage row.
+        """
+        if usage is not None and usage.recorded_seconds is not None:
+            return usage.recorded_seconds, usage.recorded_segments or 0
+
+        recordings = self.load_recordings(session_id)
+        seconds, segments = total_recorded_seconds(recordings), len(recordings)
+        if usage is not None:
+            usage.recorded_seconds = seconds
+            usage.recorded_segments = segments
+        return seconds, segments
+
+    def verify(
+        self, session_ids: Optional[Sequence[UUID]] = None, fix: bool = False
+    ) -> List[DurationDrift]:
+        """
+        Compare recorded_seconds with a full recompute from Session.recordings.
+
+        Rows never accumulated (NULL) are skipped. With fix=True drifted rows
+        are reset to the recomputed total.
+        """
+        query = (
+            select(SessionUsage, Session.recordings)
+            .join(Session, Session.id == SessionUsage.session_id)
+            .where(SessionUsage.recorded_seconds.isnot(None))
+        )
+        if session_ids is not None:
+            query = query.where(SessionUsage.session_id.in_(list(session_ids)))
+
+        drifts = []
+        for usage, recordings in self.db.execute(query).all():
+            expected = total_recorded_seconds(recordings)
+            if usage.recorded_seconds != expected:
+                drifts.append(
+                    DurationDrift(usage.session_id, usage.recorded_seconds, expected)
+                )
+                if fix:
+                    usage.recorded_seconds = expected
+                    usage.recorded_segments = len(recordings or [])
+
+        if drifts:
+            logger.warning(
+                f"{len(drifts)} SessionUsage.recorded_seconds values differ from "
+                f"recordings (fixed={fix})"
+            )
+            if fix:
+                self.db.commit()
+        return drifts
@@ -0,0 +1,312 @@
+"""
+Usage Gate - per-counselor allowance snapshots for usage-limit checks
+
+`check_usage_limit()` used to decide on the Counselor row loaded for the
+request and mutate it in Python (period reset, `monthly_minutes_used += n`),
+so concurrent sessions of one counselor could lose increments and all pass a
+check that only one of them should have passed.
+
+The gate keeps a short-lived snapshot per counselor (remaining credits or
+minutes, period end):
+
+- Well above the limit (remaining > margin, snapshot younger than the TTL,
+  period not over) a check is answered locally, without a query
+- Otherwise the decision is authoritative: the period reset is a conditional
+  UPDATE, and a check that also books minutes is one
+  `UPDATE ... SET used = used + n WHERE used < limit` (check and increment
+  cannot be separated by a concurrent request)
+- Every deduction (ledger balance, minute increment) refreshes the snapshot
+
+A local decision can only admit; every denial comes from the database. The
+margin bounds what other processes can consume within one TTL.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.models.counselor import BillingMode, Counselor
+from app.services.billing.usage_tracker import UsageTracker
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SNAPSHOT = "snapshot"
+SOURCE_DATABASE = "database"
+
+_USAGE_FIELDS = [
+    "billing_mode",
+    "available_credits",
+    "monthly_usage_limit_minutes",
+    "monthly_minutes_used",
+    "usage_period_start",
+]
+
+
+@dataclass
+class Allowance:
+    """What a counselor may still use, as of `taken_at` (monotonic)"""
+
+    billing_mode: str
+    remaining: Optional[float]  # credits (prepaid) or minutes; None = unlimited
+    period_end: Optional[datetime]
+    taken_at: float
+
+
+@dataclass
+class GateDecision:
+    allowed: bool
+    source: str  # snapshot | database
+
+
+def _mode(value) -> str:
+    return value.value if isinstance(value, BillingMode) else str(value)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _minutes_allowance(used, limit, period_start) -> Allowance:
+    period_start = _as_utc(period_start)
+    return Allowance(
+        billing_mode=BillingMode.SUBSCRIPTION.value,
+        remaining=None if limit is None else limit - (used or 0),
+        period_end=(
+            period_start + timedelta(days=UsageTracker.PERIOD_DAYS)
+            if period_start
+            else None
+        ),
+        taken_at=time.monotonic(),
+    )
+
+
+class UsageGate:
+    """Process-wide snapshot store; all methods are thread-safe"""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        credit_margin: Optional[float] = None,
+        minute_margin: Optional[int] = None,
+    ):
+        self.ttl_seconds = (
+            settings.USAGE_GATE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        self.credit_margin = (
+            settings.USAGE_GATE_CREDIT_MARGIN
+            if credit_margin is None
+            else credit_margin
+        )
+        self.minute_margin = (
+            settings.USAGE_GATE_MINUTE_MARGIN
+            if minute_margin is None
+            else minute_margin
+        )
+        self._lock = threading.Lock()
+        self._snapshots: Dict[UUID, Allowance] = {}
+
+    # ------------------------------------------------------------------
+    # Decisions
+    # ------------------------------------------------------------------
+    def admit(
+        self, db: DBSession, counselor: Counselor, minutes: Optional[int] = None
+    ) -> GateDecision:
+        """
+        Decide whether the counselor may start new usage.
+
+        Subscription counselors admitted with `minutes` have them reserved
+        (added to `monthly_minutes_used`) by the same conditional UPDATE, in
+        the caller's transaction; a reservation always goes to the database,
+        the snapshot only decides checks that write nothing.
+        On denial the counselor's usage fields are refreshed from the DB.
+        """
+        mode = _mode(counselor.billing_mode)
+        subscription = mode == BillingMode.SUBSCRIPTION.value
+        if not (subscription and minutes) and self._admit_locally(counselor.id, mode):
+            return GateDecision(allowed=True, source=SOURCE_SNAPSHOT)
+
+        if subscription:
+            allowed = self._reserve_minutes(db, counselor, minutes or 0)
+        else:
+            allowed = self._check_credits(db, counselor)
+        return GateDecision(allowed=allowed, source=SOURCE_DATABASE)
+
+    def _admit_locally(self, counselor_id: UUID, billing_mode: str) -> bool:
+        with self._lock:
+            snapshot = self._snapshots.get(counselor_id)
+        if snapshot is None or snapshot.billing_mode != billing_mode:
+            return False
+        if time.monotonic() - snapshot.taken_at >= self.ttl_seconds:
+            return False
+        if snapshot.remaining is None:
+            return billing_mode == BillingMode.SUBSCRIPTION.value
+        if billing_mode == BillingMode.SUBSCRIPTION.value:
+            if (
+                snapshot.period_end is None
+                or datetime.now(timezone.utc) >= snapshot.period_end
+            ):
+                return False
+            return snapshot.remaining > self.minute_margin
+        return snapshot.remaining > self.credit_margin
+
+    def _reserve_minutes(
+        self, db: DBSession, counselor: Counselor, minutes: int
+    ) -> bool:
+        now = datetime.now(timezone.utc)
+        if not self._period_current(counselor.id, now):
+            self._reset_expired_period(db, counselor.id, now)
+        used = func.coalesce(Counselor.monthly_minutes_used, 0)
+        row = db.execute(
+            update(Counselor)
+            .where(
+                Counselor.id == counselor.id,
+                or_(
+                    Counselor.monthly_usage_limit_minutes.is_(None),
+                    used < Counselor.monthly_usage_limit_minutes,
+                ),
+            )
+            .values(monthly_minutes_used=used + minutes)
+            .returning(
+                Counselor.monthly_minutes_used,
+                Counselor.monthly_usage_limit_minutes,
+                Counselor.usage_period_start,
+            )
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.expire(counselor, _USAGE_FIELDS)
+
+        if row is None:
+            # At or over the limit: refresh for the error payload
+            db.refresh(counselor, _USAGE_FIELDS)
+            self._store(
+                counselor.id,
+                _minutes_allowance(
+                    counselor.monthly_minutes_used,
+                    counselor.monthly_usage_limit_minutes,
+                    counselor.usage_period_start,
+                ),
+                authoritative=True,
+            )
+            return False
+
+        self._store(counselor.id, _minutes_allowance(*row))
+        return True
+
+    def _period_current(self, counselor_id: UUID, now: datetime) -> bool:
+        with self._lock:
+            snapshot = self._snapshots.get(counselor_id)
+        return (
+            snapshot is not None
+            and snapshot.period_end is not None
+            and now < snapshot.period_end
+            and time.monotonic() - snapshot.taken_at < self.ttl_seconds
+        )
+
+    @staticmethod
+    def _reset_expired_period(db: DBSession, counselor_id: UUID, now: datetime) -> None:
+        """Period reset (or first-time init) as one conditional UPDATE"""
+        db.execute(
+            update(Counselor)
+            .where(
+                Counselor.id == counselor_id,
+                or_(
+                    Counselor.usage_period_start.is_(None),
+                    Counselor.usage_period_start
+                    <= now - timedelta(days=UsageTracker.PERIOD_DAYS),
+                ),
+            )
+            .values(monthly_minutes_used=0, usage_period_start=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _check_credits(self, db: DBSession, counselor: Counselor) -> bool:
+        balance = db.execute(
+            select(Counselor.available_credits).where(Counselor.id == counselor.id)
+        ).scalar_one()
+        db.expire(counselor, ["available_credits"])
+        self._store(
+            counselor.id,
+            Allowance(
+                billing_mode=BillingMode.PREPAID.value,
+                remaining=balance,
+                period_end=None,
+                taken_at=time.monotonic(),
+            ),
+            authoritative=True,
+        )
+        return balance > 0
+
+    # ------------------------------------------------------------------
+    # Deductions
+    # ------------------------------------------------------------------
+    def add_minutes(self, db: DBSession, counselor: Counselor, minutes: int) -> None:
+        """Atomically add used minutes (subscription) and refresh the snapshot"""
+        row = db.execute(
+            update(Counselor)
+            .where(Counselor.id == counselor.id)
+            .values(
+                monthly_minutes_used=func.coalesce(Counselor.monthly_minutes_used, 0)
+                + minutes
+            )
+            .returning(
+                Counselor.monthly_minutes_used,
+                Counselor.monthly_usage_limit_minutes,
+                Counselor.usage_period_start,
+            )
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.expire(counselor, ["monthly_minutes_used"])
+        if row is not None:
+            self._store(counselor.id, _minutes_allowance(*row))
+
+    def observe_balance(
+        self, counselor_id: UUID, balance: float, credits_delta: float
+    ) -> None:
+        """Ledger hook: a deduction lowers the snapshot, a top-up drops it"""
+        with self._lock:
+            snapshot = self._snapshots.get(counselor_id)
+            if snapshot is None or snapshot.billing_mode != BillingMode.PREPAID.value:
+                return
+            if credits_delta > 0:
+                self._snapshots.pop(counselor_id, None)
+            else:
+                # Concurrent deductions may report out of order: keep the lowest
+                snapshot.remaining = min(snapshot.remaining, balance)
+
+    def invalidate(self, counselor_id: Optional[UUID] = None) -> None:
+        with self._lock:
+            if counselor_id is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(counselor_id, None)
+
+    def _store(
+        self, counselor_id: UUID, allowance: Allowance, authoritative: bool = False
+    ) -> None:
+        with self._lock:
+            current = self._snapshots.get(counselor_id)
+            if (
+                not authoritative
+                and current is not None
+                and current.billing_mode == allowance.billing_mode
+                and current.period_end == allowance.period_end
+                and current.remaining is not None
+                and allowance.remaining is not None
+                and current.remaining < allowance.remaining
+            ):
+                # Usage only grows within a period: a concurrent request
+                # reporting an older (higher) remaining must not undo a newer one
+                allowance.remaining = current.remaining
+            self._snapshots[counselor_id] = allowance
+
+
+usage_gate = UsageGate()
@@ -20,8 +20,8 @@ from app.services.helpers.client_case_helpers import (
 from app.services.helpers.client_case_query_builder import (
     build_client_case_list_query,
     format_client_case_list_item,
-    sort_items_by_last_session_date,
 )
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
 
 
 class ClientCaseService:
@@ -108,41 +108,66 @@ class ClientCaseService:
         counselor_id: UUID,
         skip: int = 0,
         limit: int = 100,
-    ) -> Tuple[List[Dict[str, Any]], int]:
+        cursor: Optional[str] = None,
+        search: Optional[str] = None,
+        case_status: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
         """
-        List all client-cases with session statistics.
+        List client-cases with session statistics, newest activity first.
+
+        Ordering and pagination run in SQL, so pages are consistent with each
+        other. When `cursor` is given it replaces `skip` (keyset pagination).
 
         Args:
             tenant_id: Tenant ID for multi-tenant isolation
             counselor_id: Counselor ID for counselor-level isolation
-            skip: Pagination offset
+            skip: Pagination offset (ignored when cursor is given)
             limit: Items per page
+            cursor: next_cursor from the previous page
+            search: Optional client name / code substring filter
+            case_status: Optional case status filter (0/1/2)
 
         Returns:
-            Tuple of (items, total_count)
+            Tuple of (items, total_count, next_cursor)
+
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
         """
         # Build query using helper
-        query, count_query = build_client_case_list_query(tenant_id, counselor_id)
+        query, count_query, sort_key = build_client_case_list_query(
+            tenant_id, counselor_id, search=search, case_status=case_status
+        )
 
         # Get total count
         total = self.db.execute(count_query).scalar() or 0
 
-        # Execute with pagination
-        result = self.db.execute(query.offset(skip).limit(limit))
-        rows = result.all()
+        if cursor:
+            cursor_sort_key, cursor_client_id = decode_cursor(
+                cursor, types=(datetime, UUID)
+            )
+            query = query.where(
+                keyset_after([sort_key, Client.id], [cursor_sort_key, cursor_client_id])
+            )
+        elif skip:
+            query = query.offset(skip)
+
+        # Fetch one extra row to know whether a next page exists
+        rows = self.db.execute(query.limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_client, *_, last_sort_key = rows[-1]
+            next_cursor = encode_cursor(last_sort_key, last_client.id)
 
         # Build items using helper
         items = [
             format_client_case_list_item(
                 client, case, total_sessions, last_session_date
             )
-            for client, case, total_sessions, last_session_date in rows
+            for client, case, total_sessions, last_session_date, _ in rows
         ]
 
-        # Sort items using helper
-        items = sort_items_by_last_session_date(items)
-
-        return items, total
+        return items, total, next_cursor
 
     def get_client_case_detail(
         self, case_id: UUID, tenant_id: str, counselor_id: UUID
@@ -8,11 +8,9 @@ from fastapi import HTTPException, status
 from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 
-from app.models.case import Case
 from app.models.client import Client
 from app.models.counselor import Counselor, CounselorRole
-from app.models.report import Report, ReportStatus
-from app.models.session import Session as SessionModel
+from app.services.core.timeline_service import TimelineService
 
 
 class ClientService:
@@ -328,42 +326,12 @@ class ClientService:
                 detail="Client not found",
             )
 
-        # Query all sessions with reports
-        query = (
-            select(SessionModel, Report.id.label("report_id"))
-            .join(Case, SessionModel.case_id == Case.id)
-            .outerjoin(
-                Report,
-                (Report.session_id == SessionModel.id)
-                & (Report.status == ReportStatus.DRAFT),
-            )
-            .where(Case.client_id == client_id, SessionModel.tenant_id == tenant_id)
-            .order_by(SessionModel.session_date.asc())
-        )
-
-        result = self.db.execute(query)
-        rows = result.all()
-
-        # Build timeline data
-        timeline_items = []
-        for session, report_id in rows:
-            # Format time range
-            time_range = None
-            if session.start_time and session.end_time:
-                start = session.start_time.strftime("%H:%M")
-                end = session.end_time.strftime("%H:%M")
-                time_range = f"{start}-{end}"
-
-            timeline_items.append(
-                {
-                    "session_id": session.id,
-                    "session_number": session.session_number,
-                    "date": session.session_date.strftime("%Y-%m-%d"),
-                    "time_range": time_range,
-                    "summary": session.summary,
-                    "has_report": report_id is not None,
-                    "report_id": report_id,
-                }
+        # Narrow projection + per-client cache shared with /sessions/timeline
+        timeline_items = [
+            item.model_dump()
+            for item in TimelineService(self.db).get_timeline_items(
+                client_id, tenant_id
             )
+        ]
 
         return client, timeline_items
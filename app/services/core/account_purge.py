@@ -0,0 +1,288 @@
+"""
+Account Purge - batched purge of accounts past the deletion grace period
+
+`POST /api/internal/purge-deleted-accounts` used to handle one account at a
+time: a synchronous RevenueCat call and a commit per account, inside one HTTP
+request. `AccountPurgeEngine` works in batches of ACCOUNT_PURGE_BATCH_SIZE:
+
+1. Select the next eligible accounts (keyset on id)
+2. Delete their RevenueCat customers concurrently
+   (ACCOUNT_PURGE_REVENUECAT_CONCURRENCY workers, at most
+   ACCOUNT_PURGE_REVENUECAT_RATE calls per second)
+3. In one transaction, delete the dependent rows (jobs, reports, analysis
+   logs, usage, sessions, reminders, cases, clients, refresh tokens) with
+   one set-based DELETE per table, delete the content_blobs their analysis
+   logs referenced that no remaining log uses, and anonymize the counselor
+   rows (the row itself is kept, 去識別化)
+
+Each committed batch is a checkpoint: purged accounts no longer match the
+eligibility filter, so a run that stops (time budget, crash) is resumed by
+the next one. RevenueCat deletes are idempotent, so a batch that failed
+after step 2 is simply retried. Credit logs are kept for billing audits.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, literal, or_, select, union, update
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.models.case import Case
+from app.models.client import Client
+from app.models.counselor import Counselor
+from app.models.job import Job
+from app.models.refresh_token import RefreshToken
+from app.models.reminder import Reminder
+from app.models.report import Report
+from app.models.session import Session
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.content_store import LEAN_FIELDS, ContentStore
+from app.services.external import revenuecat_service
+
+logger = logging.getLogger(__name__)
+
+DeleteCustomer = Callable[[str, str], bool]
+
+
+@dataclass
+class PurgeReport:
+    purged: int = 0
+    failed: int = 0
+    revenuecat_failed: int = 0
+    rows_deleted: int = 0
+    batches: int = 0
+    remaining: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.rows_deleted / self.elapsed_seconds
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart (thread-safe)"""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AccountPurgeEngine:
+    """Purge eligible accounts batch by batch"""
+
+    def __init__(
+        self,
+        db: DBSession,
+        delete_customer: Optional[DeleteCustomer] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+    ):
+        self.db = db
+        # Resolved at call time by default so patching the service module
+        # (tests) still takes effect
+        self._delete_customer = delete_customer
+        self.batch_size = batch_size or settings.ACCOUNT_PURGE_BATCH_SIZE
+        self.concurrency = concurrency or settings.ACCOUNT_PURGE_REVENUECAT_CONCURRENCY
+        self.limiter = RateLimiter(
+            settings.ACCOUNT_PURGE_REVENUECAT_RATE
+            if rate_per_second is None
+            else rate_per_second
+        )
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _eligible(cutoff: datetime) -> list:
+        return [
+            Counselor.deleted_at.isnot(None),
+            Counselor.deleted_at <= cutoff,
+            Counselor.is_active == False,  # noqa: E712
+            # Only purge accounts where email is NOT already anonymized
+            ~Counselor.email.startswith("deleted_"),
+        ]
+
+    def _next_batch(
+        self, cutoff: datetime, after: Optional[UUID]
+    ) -> List[Tuple[UUID, str]]:
+        query = select(Counselor.id, Counselor.email).where(*self._eligible(cutoff))
+        if after is not None:
+            query = query.where(Counselor.id > after)
+        query = query.order_by(Counselor.id).limit(self.batch_size)
+        return [(row.id, row.email) for row in self.db.execute(query)]
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def run(self, max_seconds: Optional[float] = None) -> PurgeReport:
+        """Purge batches until none are left or the time budget is spent"""
+        if max_seconds is None:
+            max_seconds = settings.ACCOUNT_PURGE_MAX_SECONDS
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            days=settings.ACCOUNT_DELETION_GRACE_PERIOD_DAYS
+        )
+        report = PurgeReport()
+        start = time.monotonic()
+        after: Optional[UUID] = None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while time.monotonic() - start < max_seconds:
+                accounts = self._next_batch(cutoff, after)
+                if not accounts:
+                    break
+                after = accounts[-1][0]
+                self._purge_batch(accounts, pool, report)
+                report.batches += 1
+
+        report.elapsed_seconds = time.monotonic() - start
+        report.remaining = (
+            self.db.execute(
+                select(func.count(Counselor.id)).where(*self._eligible(cutoff))
+            ).scalar()
+            or 0
+        )
+        logger.info(
+            "Account purge: %d purged, %d failed, %d rows in %.1fs (%.0f rows/s), "
+            "%d remaining",
+            report.purged,
+            report.failed,
+            report.rows_deleted,
+            report.elapsed_seconds,
+            report.rows_per_second,
+            report.remaining,
+        )
+        return report
+
+    def _purge_batch(
+        self,
+        accounts: Sequence[Tuple[UUID, str]],
+        pool: ThreadPoolExecutor,
+        report: PurgeReport,
+    ) -> None:
+        results = list(pool.map(self._delete_revenuecat, accounts))
+        report.revenuecat_failed += results.count(False)
+
+        try:
+            report.rows_deleted += self._delete_rows([i for i, _ in accounts])
+            self.db.commit()
+            report.purged += len(accounts)
+            return
+        except Exception as e:
+            self.db.rollback()
+            logger.warning("Batch purge failed, retrying per account: %s", e)
+
+        # Isolate the account(s) that make the batch fail
+        for counselor_id, _ in accounts:
+            try:
+                report.rows_deleted += self._delete_rows([counselor_id])
+                self.db.commit()
+                report.purged += 1
+            except Exception as e:
+                self.db.rollback()
+                report.failed += 1
+                logger.error("Failed to purge account id=%s: %s", counselor_id, e)
+
+    def _delete_revenuecat(self, account: Tuple[UUID, str]) -> bool:
+        counselor_id, email = account
+        delete_customer = self._delete_customer or revenuecat_service.delete_customer
+        self.limiter.acquire()
+        try:
+            ok = delete_customer(email, str(counselor_id))
+        except Exception as e:  # a fake or future client may raise
+            logger.warning(
+                "RevenueCat purge raised for user_id=%s: %s", counselor_id, e
+            )
+            ok = False
+        if not ok:
+            logger.warning("RevenueCat purge failed for user_id=%s", counselor_id)
+        return ok
+
+    def _delete_rows(self, counselor_ids: List[UUID]) -> int:
+        """Set-based deletes for one batch (children first), then anonymize"""
+        client_ids = select(Client.id).where(Client.counselor_id.in_(counselor_ids))
+        case_ids = select(Case.id).where(
+            or_(Case.counselor_id.in_(counselor_ids), Case.client_id.in_(client_ids))
+        )
+        session_ids = select(Session.id).where(Session.case_id.in_(case_ids))
+        log_filter = or_(
+            SessionAnalysisLog.session_id.in_(session_ids),
+            SessionAnalysisLog.counselor_id.in_(counselor_ids),
+        )
+        # Blobs are shared between accounts: only those no other log uses go
+        blob_shas = (
+            self.db.execute(
+                union(
+                    *[
+                        select(getattr(SessionAnalysisLog, ref)).where(log_filter)
+                        for ref in LEAN_FIELDS.values()
+                    ]
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        statements = [
+            delete(Job).where(Job.session_id.in_(session_ids)),
+            delete(Report).where(
+                or_(
+                    Report.session_id.in_(session_ids),
+                    Report.client_id.in_(client_ids),
+                    Report.created_by_id.in_(counselor_ids),
+                )
+            ),
+            delete(SessionAnalysisLog).where(log_filter),
+            delete(SessionUsage).where(
+                or_(
+                    SessionUsage.session_id.in_(session_ids),
+                    SessionUsage.counselor_id.in_(counselor_ids),
+                )
+            ),
+            delete(Session).where(Session.case_id.in_(case_ids)),
+            delete(Reminder).where(Reminder.case_id.in_(case_ids)),
+            delete(Case).where(Case.id.in_(case_ids)),
+            delete(Client).where(Client.counselor_id.in_(counselor_ids)),
+            delete(RefreshToken).where(RefreshToken.counselor_id.in_(counselor_ids)),
+        ]
+        deleted: Dict[str, int] = {}
+        for statement in statements:
+            result = self.db.execute(
+                statement.execution_options(synchronize_session=False)
+            )
+            deleted[statement.table.name] = result.rowcount or 0
+        deleted["content_blobs"] = ContentStore(self.db).delete_unreferenced(blob_shas)
+
+        # Anonymize PII; the original email stays embedded for support lookups
+        timestamp = int(datetime.now(timezone.utc).timestamp())
+        self.db.execute(
+            update(Counselor)
+            .where(Counselor.id.in_(counselor_ids))
+            .values(
+                email=literal(f"deleted_{timestamp}_") + Counselor.email,
+                username=None,
+                full_name=None,
+                phone=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        logger.debug("Purged %d accounts: %s", len(counselor_ids), deleted)
+        return sum(deleted.values())
@@ -0,0 +1,379 @@
+"""
+Content Store - content-addressed, compressed storage for analysis log text
+
+Most of a SessionAnalysisLog row is large text that repeats across rows (the
+static system prompt, the prompt template body, RAG context). In lean mode
+those fields are written once to `content_blobs` keyed by SHA-256 (zlib
+compressed) and the log row only keeps the 64-char reference.
+
+- Write: one `INSERT ... ON CONFLICT DO NOTHING` per log (or per batch via
+  `externalize_many()`) for all its blobs
+- Read: `resolve_logs()` fetches every referenced blob of a page in one query
+- Migration: `migrate_inline_rows()` moves existing inline text in batches
+- GC: blobs are shared, so deleting a log never deletes them directly.
+  `delete_unreferenced()` drops given blobs once no log references them
+  (account purge) and `sweep_orphans()` drops every unreferenced blob
+  (POST /api/internal/sweep-content-blobs, after partitions are archived)
+"""
+import hashlib
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Text, and_, cast, delete, exists, null, or_, select, update
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.models.content_blob import ContentBlob
+from app.models.session_analysis_log import SessionAnalysisLog
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = "zlib"
+CODEC_RAW = "raw"
+
+# Inline column -> reference column. rag_documents is JSON, the rest is text.
+LEAN_FIELDS = {
+    "system_prompt": "system_prompt_sha256",
+    "user_prompt": "user_prompt_sha256",
+    "rag_documents": "rag_documents_sha256",
+    "llm_raw_response": "llm_raw_response_sha256",
+}
+JSON_FIELDS = {"rag_documents"}
+
+# A blob is written before the log that references it is committed; younger
+# blobs are never swept so an in-flight write cannot lose its content
+SWEEP_MIN_AGE_SECONDS = 3600
+
+
+def content_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_content(text: str) -> Tuple[str, bytes]:
+    """Compress with zlib unless that does not make it smaller"""
+    raw = text.encode("utf-8")
+    compressed = zlib.compress(raw, 6)
+    if len(compressed) < len(raw):
+        return CODEC_ZLIB, compressed
+    return CODEC_RAW, raw
+
+
+def decode_content(codec: str, data: bytes) -> str:
+    if codec == CODEC_ZLIB:
+        data = zlib.decompress(data)
+    return data.decode("utf-8")
+
+
+def _serialize(field: str, value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if field in JSON_FIELDS:
+        if not value:
+            return None
+        return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return str(value)
+
+
+def _sql_null(field: str) -> Any:
+    """Cleared inline value; None on a JSON column would store JSON 'null'"""
+    return null() if field in JSON_FIELDS else None
+
+
+def _inline_present(field: str):
+    """Condition: the inline column holds a value"""
+    column = getattr(SessionAnalysisLog, field)
+    if field in JSON_FIELDS:
+        # Rows migrated before _sql_null() existed hold JSON 'null'
+        return and_(column.isnot(None), cast(column, Text) != "null")
+    return column.isnot(None)
+
+
+def _unreferenced():
+    """Condition: no SessionAnalysisLog references ContentBlob.sha256"""
+    return and_(
+        *[
+            ~exists().where(getattr(SessionAnalysisLog, ref) == ContentBlob.sha256)
+            for ref in LEAN_FIELDS.values()
+        ]
+    )
+
+
+@dataclass
+class MigrationStats:
+    rows: int = 0
+    distinct_contents: int = 0
+    inline_bytes: int = 0
+
+
+@dataclass
+class SweepStats:
+    scanned: int = 0
+    deleted: int = 0
+    freed_bytes: int = 0
+
+
+class ContentStore:
+    """Read / write content_blobs and (de)hydrate SessionAnalysisLog rows"""
+
+    def __init__(self, db: DBSession, min_bytes: Optional[int] = None):
+        self.db = db
+        self.min_bytes = (
+            settings.ANALYSIS_LOG_BLOB_MIN_BYTES if min_bytes is None else min_bytes
+        )
+
+    # ------------------------------------------------------------------
+    # Blobs
+    # ------------------------------------------------------------------
+    def put_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """Store texts (deduplicated); returns {text: sha256}"""
+        refs: Dict[str, str] = {}
+        rows: Dict[str, Dict[str, Any]] = {}
+        for text in texts:
+            if text in refs:
+                continue
+            sha = content_sha256(text)
+            refs[text] = sha
+            codec, data = encode_content(text)
+            rows[sha] = {
+                "sha256": sha,
+                "codec": codec,
+                "data": data,
+                "size_bytes": len(text.encode("utf-8")),
+            }
+        if rows:
+            self._insert_ignore(list(rows.values()))
+        return refs
+
+    def get_many(self, shas: Iterable[str]) -> Dict[str, str]:
+        """Fetch and decode blobs; returns {sha256: text}"""
+        wanted = {sha for sha in shas if sha}
+        if not wanted:
+            return {}
+        result = self.db.execute(
+            select(ContentBlob.sha256, ContentBlob.codec, ContentBlob.data).where(
+                ContentBlob.sha256.in_(wanted)
+            )
+        )
+        return {sha: decode_content(codec, data) for sha, codec, data in result}
+
+    def delete_unreferenced(self, shas: Iterable[str]) -> int:
+        """
+        Delete those of the given blobs that no log references any more.
+
+        Does not commit, so it runs in the caller's transaction (e.g. right
+        after the referencing logs were deleted). Returns the number deleted.
+        """
+        wanted = {sha for sha in shas if sha}
+        if not wanted:
+            return 0
+        # Pending log deletes must be visible to the NOT EXISTS checks
+        self.db.flush()
+        result = self.db.execute(
+            delete(ContentBlob)
+            .where(ContentBlob.sha256.in_(wanted), _unreferenced())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def sweep_orphans(
+        self,
+        min_age_seconds: int = SWEEP_MIN_AGE_SECONDS,
+        batch_size: int = 1000,
+    ) -> SweepStats:
+        """
+        Delete every blob no log references, one committed keyset batch (on
+        sha256) at a time. Blobs younger than min_age_seconds are kept.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+        stats = SweepStats()
+        last_sha = None
+        while True:
+            query = (
+                select(ContentBlob.sha256)
+                .order_by(ContentBlob.sha256)
+                .limit(batch_size)
+            )
+            if last_sha is not None:
+                query = query.where(ContentBlob.sha256 > last_sha)
+            shas = self.db.execute(query).scalars().all()
+            if not shas:
+                break
+
+            freed = (
+                self.db.execute(
+                    delete(ContentBlob)
+                    .where(
+                        ContentBlob.sha256.in_(shas),
+                        or_(
+                            ContentBlob.created_at.is_(None),
+                            ContentBlob.created_at < cutoff,
+                        ),
+                        _unreferenced(),
+                    )
+                    .returning(ContentBlob.size_bytes)
+                    .execution_options(synchronize_session=False)
+                )
+                .scalars()
+                .all()
+            )
+            self.db.commit()
+
+            stats.scanned += len(shas)
+            stats.deleted += len(freed)
+            stats.freed_bytes += sum(freed)
+            last_sha = shas[-1]
+
+        if stats.deleted:
+            logger.info(
+                f"Swept {stats.deleted} orphan content blobs "
+                f"({stats.freed_bytes} bytes)"
+            )
+        return stats
+
+    def _insert_ignore(self, rows: List[Dict[str, Any]]) -> None:
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:  # pragma: no cover - only PostgreSQL and SQLite are deployed
+            existing = set(
+                self.db.execute(
+                    select(ContentBlob.sha256).where(
+                        ContentBlob.sha256.in_([r["sha256"] for r in rows])
+                    )
+                ).scalars()
+            )
+            self.db.add_all(
+                ContentBlob(**r) for r in rows if r["sha256"] not in existing
+            )
+            return
+
+        # executemany with a fixed statement: compiled once and cached, and
+        # no autoflush so pending logs keep being flushed in one batch
+        with self.db.no_autoflush:
+            self.db.execute(
+                insert(ContentBlob).on_conflict_do_nothing(index_elements=["sha256"]),
+                rows,
+            )
+
+    # ------------------------------------------------------------------
+    # SessionAnalysisLog
+    # ------------------------------------------------------------------
+    def externalize(self, log: SessionAnalysisLog) -> None:
+        """Move large fields of a (new) log into blobs, keeping references"""
+        self.externalize_many([log])
+
+    def externalize_many(self, logs: Sequence[SessionAnalysisLog]) -> None:
+        """Batch form of externalize(): one blob INSERT for all logs"""
+        pending: List[Tuple[SessionAnalysisLog, str, str]] = []
+        for log in logs:
+            for field in LEAN_FIELDS:
+                text = _serialize(field, getattr(log, field))
+                if text is not None and len(text.encode("utf-8")) >= self.min_bytes:
+                    pending.append((log, field, text))
+        if not pending:
+            return
+
+        refs = self.put_many(text for _, _, text in pending)
+        for log, field, text in pending:
+            setattr(log, LEAN_FIELDS[field], refs[text])
+            setattr(log, field, _sql_null(field))
+
+    def resolve_logs(
+        self,
+        logs: Sequence[SessionAnalysisLog],
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Full values of the lean fields for each log (one blob query in total).
+
+        `fields` limits resolution to some lean fields (projected rows do not
+        load the others). Returns one dict per log: {field: value}; inline
+        values pass through.
+        """
+        refs = {
+            field: ref
+            for field, ref in LEAN_FIELDS.items()
+            if fields is None or field in fields
+        }
+        blobs = self.get_many(
+            getattr(log, ref) for log in logs for ref in refs.values()
+        )
+        resolved = []
+        for log in logs:
+            values = {}
+            for field, ref in refs.items():
+                sha = getattr(log, ref)
+                if sha and sha in blobs:
+                    text = blobs[sha]
+                    values[field] = json.loads(text) if field in JSON_FIELDS else text
+                else:
+                    values[field] = getattr(log, field)
+            resolved.append(values)
+        return resolved
+
+    def migrate_inline_rows(
+        self, batch_size: int = 500, max_rows: Optional[int] = None
+    ) -> MigrationStats:
+        """
+        Move inline text of existing rows into blobs, one committed batch at
+        a time (keyset on id, safe to stop and re-run).
+        """
+        stats = MigrationStats()
+        inline_present = or_(*[_inline_present(field) for field in LEAN_FIELDS])
+        last_id = None
+        while max_rows is None or stats.rows < max_rows:
+            query = (
+                select(
+                    SessionAnalysisLog.id,
+                    *[getattr(SessionAnalysisLog, field) for field in LEAN_FIELDS],
+                )
+                .where(inline_present)
+                .order_by(SessionAnalysisLog.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(SessionAnalysisLog.id > last_id)
+            batch = self.db.execute(query).all()
+            if not batch:
+                break
+
+            updates = []
+            texts = []
+            for row in batch:
+                values = {}
+                for field, ref in LEAN_FIELDS.items():
+                    text = _serialize(field, getattr(row, field))
+                    if text is None or len(text.encode("utf-8")) < self.min_bytes:
+                        continue
+                    values[field] = text
+                    stats.inline_bytes += len(text.encode("utf-8"))
+                if values:
+                    updates.append((row.id, values))
+                    texts.extend(values.values())
+
+            refs = self.put_many(texts)
+            for log_id, values in updates:
+                assignments = {}
+                for field, text in values.items():
+                    assignments[field] = _sql_null(field)
+                    assignments[LEAN_FIELDS[field]] = refs[text]
+                self.db.execute(
+                    update(SessionAnalysisLog)
+                    .where(SessionAnalysisLog.id == log_id)
+                    .values(**assignments)
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.commit()
+
+            stats.rows += len(updates)
+            stats.distinct_contents += len(refs)
+            last_id = batch[-1].id
+            logger.info(f"Migrated {stats.rows} analysis log rows to content_blobs")
+
+        return stats
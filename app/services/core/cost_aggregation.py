@@ -0,0 +1,220 @@
+"""
+Cost Aggregation - fan-out-free cost queries over usage and analysis facts
+
+Joining `session_usages` to `session_analysis_logs` on `session_id` before
+summing repeats every usage row once per analysis of its session (duration
+and cost counted N times) and ties each fact to the other's time filter.
+Here each fact table is pre-aggregated in its own CTE at the target grain,
+filtered on its own event column, and the CTEs are joined afterwards, so
+every source row is summed exactly once in a single statement:
+
+- `by_counselor()`: one row per counselor for one range
+  (top-users, user-segments, users CSV export)
+- `by_period()`: totals for several ranges in one grouped query, e.g. the
+  current and the previous month (cost-prediction)
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import and_, case, func, literal, or_, select, union_all
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CTE
+
+from app.core.pricing import ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
+from app.models.counselor import Counselor
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+
+FLASH_MODELS = ["gemini-1.5-flash-latest", "gemini-3-flash-preview"]
+
+
+@dataclass(frozen=True)
+class Period:
+    """Half-open range [start, end); end=None means open-ended"""
+
+    label: str
+    start: datetime
+    end: Optional[datetime] = None
+
+
+class CostAggregation:
+    """Builds the per-fact CTEs and the queries joining them"""
+
+    def __init__(self, tenant_id: Optional[str] = None):
+        self.tenant_id = tenant_id
+
+    # ------------------------------------------------------------------
+    # Fact CTEs (one row per period [and counselor])
+    # ------------------------------------------------------------------
+    def usage_facts(self, periods: Sequence[Period], by_counselor: bool = False) -> CTE:
+        rows = self._tagged(
+            SessionUsage,
+            SessionUsage.created_at,
+            periods,
+            by_counselor,
+            SessionUsage.session_id,
+            SessionUsage.duration_seconds,
+            SessionUsage.estimated_cost_usd,
+            SessionUsage.created_at,
+            func.date(SessionUsage.created_at).label("day"),
+        )
+        keys = self._keys(rows, by_counselor)
+        return (
+            select(
+                *keys,
+                func.count(func.distinct(rows.c.session_id)).label("sessions"),
+                func.coalesce(func.sum(rows.c.duration_seconds), 0).label(
+                    "duration_seconds"
+                ),
+                func.coalesce(func.sum(rows.c.estimated_cost_usd), 0).label(
+                    "usage_cost_usd"
+                ),
+                func.max(rows.c.created_at).label("last_activity"),
+                func.count(func.distinct(rows.c.day)).label("days_used"),
+            )
+            .group_by(*keys)
+            .cte("usage_facts")
+        )
+
+    def analysis_facts(
+        self, periods: Sequence[Period], by_counselor: bool = False
+    ) -> CTE:
+        rows = self._tagged(
+            SessionAnalysisLog,
+            SessionAnalysisLog.analyzed_at,
+            periods,
+            by_counselor,
+            SessionAnalysisLog.model_name,
+            (
+                func.coalesce(SessionAnalysisLog.prompt_tokens, 0)
+                + func.coalesce(SessionAnalysisLog.completion_tokens, 0)
+            ).label("tokens"),
+            SessionAnalysisLog.estimated_cost_usd,
+        )
+        keys = self._keys(rows, by_counselor)
+
+        def tokens_where(condition):
+            return func.coalesce(func.sum(case((condition, rows.c.tokens), else_=0)), 0)
+
+        return (
+            select(
+                *keys,
+                func.count().label("analyses"),
+                tokens_where(rows.c.model_name.in_(FLASH_MODELS)).label(
+                    "gemini_flash_tokens"
+                ),
+                tokens_where(rows.c.model_name.like("%flash-lite%")).label(
+                    "gemini_lite_tokens"
+                ),
+                func.coalesce(func.sum(rows.c.estimated_cost_usd), 0).label(
+                    "analysis_cost_usd"
+                ),
+            )
+            .group_by(*keys)
+            .cte("analysis_facts")
+        )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def by_counselor(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None,
+        active_only: bool = True,
+    ) -> Select:
+        """
+        One row per counselor: Counselor columns + usage and analysis sums
+        and `total_cost_usd` (ElevenLabs from duration + Gemini cost).
+        active_only=False keeps counselors without usage in the range.
+        """
+        period = [Period("range", start, end)]
+        usage = self.usage_facts(period, by_counselor=True)
+        analysis = self.analysis_facts(period, by_counselor=True)
+        duration = func.coalesce(usage.c.duration_seconds, 0)
+        gemini_cost = func.coalesce(analysis.c.analysis_cost_usd, 0)
+        return (
+            select(
+                Counselor.id,
+                Counselor.email,
+                Counselor.full_name,
+                Counselor.tenant_id,
+                Counselor.created_at,
+                func.coalesce(usage.c.sessions, 0).label("sessions"),
+                duration.label("duration_seconds"),
+                usage.c.last_activity,
+                func.coalesce(usage.c.days_used, 0).label("days_used"),
+                func.coalesce(analysis.c.gemini_flash_tokens, 0).label(
+                    "gemini_flash_tokens"
+                ),
+                func.coalesce(analysis.c.gemini_lite_tokens, 0).label(
+                    "gemini_lite_tokens"
+                ),
+                gemini_cost.label("gemini_cost_usd"),
+                (
+                    duration * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
+                    + gemini_cost
+                ).label("total_cost_usd"),
+            )
+            .select_from(Counselor)
+            .join(usage, usage.c.counselor_id == Counselor.id, isouter=not active_only)
+            .outerjoin(analysis, analysis.c.counselor_id == Counselor.id)
+        )
+
+    def by_period(self, periods: Sequence[Period]) -> Select:
+        """
+        One row per period label (including empty periods): usage and
+        analysis sums, `usage_cost_usd` and `analysis_cost_usd`
+        """
+        labels = union_all(
+            *[select(literal(p.label).label("period")) for p in periods]
+        ).cte("periods")
+        usage = self.usage_facts(periods)
+        analysis = self.analysis_facts(periods)
+        return (
+            select(
+                labels.c.period,
+                func.coalesce(usage.c.sessions, 0).label("sessions"),
+                func.coalesce(usage.c.duration_seconds, 0).label("duration_seconds"),
+                func.coalesce(usage.c.usage_cost_usd, 0).label("usage_cost_usd"),
+                func.coalesce(analysis.c.analyses, 0).label("analyses"),
+                func.coalesce(analysis.c.analysis_cost_usd, 0).label(
+                    "analysis_cost_usd"
+                ),
+            )
+            .select_from(labels)
+            .outerjoin(usage, usage.c.period == labels.c.period)
+            .outerjoin(analysis, analysis.c.period == labels.c.period)
+        )
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _tagged(
+        self, model, event, periods: Sequence[Period], by_counselor: bool, *columns
+    ):
+        """Rows of one fact inside the periods, tagged with their period label"""
+        if len(periods) == 1:
+            tag = literal(periods[0].label)
+        else:
+            tag = case(*[(self._within(event, p), p.label) for p in periods])
+        keys = [model.counselor_id] if by_counselor else []
+        query = select(tag.label("period"), *keys, *columns).where(
+            or_(*[self._within(event, p) for p in periods])
+        )
+        if self.tenant_id:
+            query = query.where(model.tenant_id == self.tenant_id)
+        # Grouping happens on the subquery's columns, so the CASE is never
+        # repeated in GROUP BY (bound parameters would differ)
+        return query.subquery()
+
+    @staticmethod
+    def _within(event, period: Period):
+        if period.end is None:
+            return event >= period.start
+        return and_(event >= period.start, event < period.end)
+
+    @staticmethod
+    def _keys(rows, by_counselor: bool) -> List:
+        return [rows.c.period] + ([rows.c.counselor_id] if by_counselor else [])
@@ -2,17 +2,16 @@
 Credit Billing Service - Business logic for credit system
 """
 import math
-from datetime import datetime, timezone
 from typing import Dict, Optional
 from uuid import UUID
 
-from sqlalchemy import desc
 from sqlalchemy.orm import Session
 
 from app.models.counselor import Counselor
 from app.models.credit_log import CreditLog
-from app.models.credit_rate import CreditRate
 from app.schemas.credit import CreditCalculationResult
+from app.services.billing.credit_ledger import CreditLedger
+from app.services.billing.rate_cache import CompiledRate, rate_cache
 
 
 class CreditBillingService:
@@ -21,21 +20,13 @@ class CreditBillingService:
     def __init__(self, db: Session):
         self.db = db
 
-    def get_active_rate(self, rule_name: str) -> Optional[CreditRate]:
+    def get_active_rate(self, rule_name: str) -> Optional[CompiledRate]:
         """
         Get the active rate for a given rule name.
-        Returns the latest version of active rate.
+        Returns the latest version of active rate (served from the in-memory
+        rate cache; no query per call).
         """
-        return (
-            self.db.query(CreditRate)
-            .filter(
-                CreditRate.rule_name == rule_name,
-                CreditRate.is_active == True,  # noqa: E712
-                CreditRate.effective_from <= datetime.now(timezone.utc),
-            )
-            .order_by(desc(CreditRate.version))
-            .first()
-        )
+        return rate_cache.get(self.db, rule_name)
 
     def calculate_credits(
         self, duration_seconds: int, rule_name: str
@@ -86,49 +77,13 @@ class CreditBillingService:
 
         elif calculation_method == "tiered":
             # Tiered pricing: apply different rates for different time ranges
-            tiers = rate_config.get("tiers", [])
-            credits = 0
-            remaining_seconds = duration_seconds
+            # (boundaries precompiled by the rate cache, total via bisect)
+            credits = rate.tiers.total(duration_seconds)
             details = {
                 "method": "tiered",
                 "duration_seconds": duration_seconds,
-                "tier_breakdown": [],
+                "tier_breakdown": rate.tiers.breakdown(duration_seconds),
             }
-
-            for tier in tiers:
-                max_seconds = tier.get("max_seconds")
-                credits_per_second = tier.get("credits_per_second", 1)
-
-                if max_seconds is None:
-                    # Last tier, apply to all remaining
-                    tier_credits = remaining_seconds * credits_per_second
-                    details["tier_breakdown"].append(
-                        {
-                            "tier": "unlimited",
-                            "seconds_in_tier": remaining_seconds,
-                            "credits_per_second": credits_per_second,
-                            "tier_credits": tier_credits,
-                        }
-                    )
-                    credits += tier_credits
-                    break
-                else:
-                    # Apply to this tier only
-                    seconds_in_tier = min(remaining_seconds, max_seconds)
-                    tier_credits = seconds_in_tier * credits_per_second
-                    details["tier_breakdown"].append(
-                        {
-                            "tier": f"0-{max_seconds}s",
-                            "seconds_in_tier": seconds_in_tier,
-                            "credits_per_second": credits_per_second,
-                            "tier_credits": tier_credits,
-                        }
-                    )
-                    credits += tier_credits
-                    remaining_seconds -= seconds_in_tier
-                    if remaining_seconds <= 0:
-                        break
-
             details["total_credits"] = credits
 
         else:
@@ -155,6 +110,7 @@ class CreditBillingService:
         resource_id: Optional[str] = None,
         rate_snapshot: Optional[Dict] = None,
         calculation_details: Optional[Dict] = None,
+        idempotency_key: Optional[str] = None,
     ) -> CreditLog:
         """
         Add or remove credits from a counselor's account.
@@ -168,6 +124,8 @@ class CreditBillingService:
             resource_id: Optional resource ID (UUID as string)
             rate_snapshot: Optional rate configuration snapshot
             calculation_details: Optional calculation breakdown
+            idempotency_key: Optional dedup key (a replay raises
+                DuplicateLedgerEntryError)
 
         Returns:
             Created CreditLog
@@ -175,29 +133,19 @@ class CreditBillingService:
         Raises:
             ValueError: If counselor not found
         """
-        # Get counselor
-        counselor = (
-            self.db.query(Counselor).filter(Counselor.id == counselor_id).first()
-        )
-        if not counselor:
-            raise ValueError(f"Counselor not found: {counselor_id}")
-
-        # Update counselor available_credits (incremental billing)
-        counselor.available_credits += credits_delta
-
-        # Create log entry
-        credit_log = CreditLog(
-            counselor_id=counselor_id,
+        # Atomic UPDATE ... RETURNING + CreditLog (no read-modify-write)
+        # CounselorNotFoundError is a ValueError
+        credit_log = CreditLedger(self.db).apply(
+            counselor_id,
+            credits_delta,
+            transaction_type=transaction_type,
+            idempotency_key=idempotency_key,
             resource_type=resource_type,
             resource_id=resource_id,
-            credits_delta=credits_delta,
-            transaction_type=transaction_type,
             raw_data=raw_data,
             rate_snapshot=rate_snapshot,
             calculation_details=calculation_details,
         )
-
-        self.db.add(credit_log)
         self.db.commit()
         self.db.refresh(credit_log)
 
@@ -0,0 +1,281 @@
+"""
+CSV Export - streamed admin exports (server-side cursor, optional gzip)
+
+Rows are read with `yield_per` (a server-side cursor on PostgreSQL) and
+written to the response one batch at a time, so memory stays flat however
+large the export range is and the first bytes go out after the first batch.
+
+The generator runs after the request's `get_db` session has been closed
+(FastAPI exits dependencies before the body is streamed), so it opens its
+own session on the same engine and closes it when the stream ends or the
+client disconnects.
+
+Datasets:
+- users:         per-counselor usage and cost summary (CostAggregation)
+- sessions:      one row per SessionUsage
+- analysis_logs: one row per SessionAnalysisLog (summary columns only;
+                 prompts / raw responses are never read)
+- credit_logs:   one row per CreditLog transaction
+"""
+import csv
+import io
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from sqlalchemy import desc, select
+from sqlalchemy.engine import Connection, Engine, Row
+from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.sql import Select
+
+from app.core.config import settings
+from app.models.counselor import Counselor
+from app.models.credit_log import CreditLog
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.cost_aggregation import CostAggregation
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    name: str
+    columns: List[str]
+    query: Callable[[datetime], Select]
+    row: Callable[[Row], List[Any]]
+
+
+def _users_query(start_time: datetime) -> Select:
+    return (
+        CostAggregation()
+        .by_counselor(start_time)
+        .order_by(desc("total_cost_usd"), Counselor.email)
+    )
+
+
+def _users_row(row: Row) -> List[Any]:
+    return [
+        row.email,
+        row.full_name,
+        row.tenant_id,
+        int(row.gemini_flash_tokens),
+        int(row.gemini_lite_tokens),
+        f"{float(row.duration_seconds) / 3600:.1f}",
+        int(row.sessions),
+        f"{row.total_cost_usd:.2f}",
+        round(float(row.duration_seconds) / 60, 2),
+    ]
+
+
+def _sessions_query(start_time: datetime) -> Select:
+    return (
+        select(
+            SessionUsage.created_at,
+            Counselor.email,
+            SessionUsage.tenant_id,
+            SessionUsage.total_tokens,
+            SessionUsage.estimated_cost_usd,
+            SessionUsage.duration_seconds,
+            SessionUsage.status,
+        )
+        .select_from(SessionUsage)
+        .join(Counselor, SessionUsage.counselor_id == Counselor.id)
+        .where(SessionUsage.created_at >= start_time)
+        .order_by(desc(SessionUsage.created_at))
+    )
+
+
+def _sessions_row(row: Row) -> List[Any]:
+    return [
+        row.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        row.email,
+        row.tenant_id,
+        int(row.total_tokens or 0),
+        float(row.estimated_cost_usd or 0),
+        round(float(row.duration_seconds or 0) / 60, 2),
+        row.status,
+    ]
+
+
+def _analysis_logs_query(start_time: datetime) -> Select:
+    return (
+        select(
+            SessionAnalysisLog.analyzed_at,
+            Counselor.email,
+            SessionAnalysisLog.tenant_id,
+            SessionAnalysisLog.session_id,
+            SessionAnalysisLog.analysis_type,
+            SessionAnalysisLog.safety_level,
+            SessionAnalysisLog.model_name,
+            SessionAnalysisLog.prompt_tokens,
+            SessionAnalysisLog.completion_tokens,
+            SessionAnalysisLog.estimated_cost_usd,
+            SessionAnalysisLog.duration_ms,
+        )
+        .select_from(SessionAnalysisLog)
+        .join(Counselor, SessionAnalysisLog.counselor_id == Counselor.id)
+        .where(SessionAnalysisLog.analyzed_at >= start_time)
+        .order_by(desc(SessionAnalysisLog.analyzed_at))
+    )
+
+
+def _analysis_logs_row(row: Row) -> List[Any]:
+    return [
+        row.analyzed_at.strftime("%Y-%m-%d %H:%M:%S"),
+        row.email,
+        row.tenant_id,
+        str(row.session_id),
+        row.analysis_type,
+        row.safety_level or "",
+        row.model_name or "",
+        int(row.prompt_tokens or 0),
+        int(row.completion_tokens or 0),
+        float(row.estimated_cost_usd or 0),
+        int(row.duration_ms or 0),
+    ]
+
+
+def _credit_logs_query(start_time: datetime) -> Select:
+    return (
+        select(
+            CreditLog.created_at,
+            Counselor.email,
+            Counselor.tenant_id,
+            CreditLog.transaction_type,
+            CreditLog.credits_delta,
+            CreditLog.balance_after,
+            CreditLog.resource_type,
+            CreditLog.resource_id,
+        )
+        .select_from(CreditLog)
+        .join(Counselor, CreditLog.counselor_id == Counselor.id)
+        .where(CreditLog.created_at >= start_time)
+        .order_by(desc(CreditLog.created_at))
+    )
+
+
+def _credit_logs_row(row: Row) -> List[Any]:
+    return [
+        row.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        row.email,
+        row.tenant_id,
+        row.transaction_type,
+        float(row.credits_delta),
+        "" if row.balance_after is None else float(row.balance_after),
+        row.resource_type or "",
+        row.resource_id or "",
+    ]
+
+
+DATASETS: Dict[str, ExportDataset] = {
+    dataset.name: dataset
+    for dataset in (
+        ExportDataset(
+            "users",
+            [
+                "email",
+                "full_name",
+                "tenant_id",
+                "gemini_flash_tokens",
+                "gemini_lite_tokens",
+                "elevenlabs_hours",
+                "total_sessions",
+                "total_cost_usd",
+                "total_minutes",
+            ],
+            _users_query,
+            _users_row,
+        ),
+        ExportDataset(
+            "sessions",
+            [
+                "timestamp",
+                "email",
+                "tenant_id",
+                "tokens",
+                "cost_usd",
+                "duration_minutes",
+                "status",
+            ],
+            _sessions_query,
+            _sessions_row,
+        ),
+        ExportDataset(
+            "analysis_logs",
+            [
+                "timestamp",
+                "email",
+                "tenant_id",
+                "session_id",
+                "analysis_type",
+                "safety_level",
+                "model_name",
+                "prompt_tokens",
+                "completion_tokens",
+                "cost_usd",
+                "duration_ms",
+            ],
+            _analysis_logs_query,
+            _analysis_logs_row,
+        ),
+        ExportDataset(
+            "credit_logs",
+            [
+                "timestamp",
+                "email",
+                "tenant_id",
+                "transaction_type",
+                "credits_delta",
+                "balance_after",
+                "resource_type",
+                "resource_id",
+            ],
+            _credit_logs_query,
+            _credit_logs_row,
+        ),
+    )
+}
+
+
+class CsvExportEngine:
+    """Stream a dataset as CSV bytes, one `yield_per` batch per chunk"""
+
+    def __init__(
+        self, bind: Union[Engine, Connection], batch_size: Optional[int] = None
+    ):
+        self.bind = bind
+        self.batch_size = batch_size or settings.CSV_EXPORT_BATCH_SIZE
+
+    def stream(
+        self, dataset: ExportDataset, start_time: datetime, gzip: bool = False
+    ) -> Iterator[bytes]:
+        chunks = self._csv_chunks(dataset, start_time)
+        return _gzip(chunks) if gzip else chunks
+
+    def _csv_chunks(
+        self, dataset: ExportDataset, start_time: datetime
+    ) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(dataset.columns)
+        with DBSession(bind=self.bind) as db:
+            result = db.execute(
+                dataset.query(start_time),
+                execution_options={"yield_per": self.batch_size},
+            )
+            for batch in result.partitions():
+                writer.writerows(dataset.row(row) for row in batch)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,579 @@
+"""
+Dashboard Cache - tiered, bucket-level cache for admin dashboard aggregates
+
+Admins reload the dashboard repeatedly and every widget re-aggregates the
+same `time_range` / `tenant_id`. Results are cached per time bucket rather
+than per request (a rolling "last 7 days" window never repeats exactly):
+
+- Closed buckets (hours / days that ended before the current hour) are
+  cached without expiry; a rollup refresh that rebuilds an already-closed
+  hour bumps the version of its day, which retires every cached bucket of
+  that day (late-arriving rows)
+- The current hour is cached for DASHBOARD_CACHE_CURRENT_TTL_SECONDS
+- The partial first hour of a rolling window is always aggregated
+  (at most one hour of rows)
+
+A request is stitched together from these pieces and folded into the
+requested period, so it returns what `UsageRollupService.aggregate()`
+returns. Concurrent requests missing the same buckets share one
+computation (single-flight, per process).
+
+Widgets that cannot be folded from buckets (e.g. user segments, which
+rank counselors over the whole window) cache their whole response with
+`memoize()` for the current-hour TTL, in the same backend.
+
+Backends (DASHBOARD_CACHE_BACKEND): `memory` (per process, LRU),
+`redis` (REDIS_URL, shared across instances; JSON values), `auto` (redis
+when REDIS_URL is set) or `none`. Bucket versions live in the backend, so
+with `memory` an invalidation only reaches the process that ran the
+refresh; closed buckets there expire after
+DASHBOARD_CACHE_LOCAL_CLOSED_TTL_SECONDS instead.
+Backend errors never fail a request: the cache is skipped.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.core.config import settings
+from app.services.core.usage_rollups import (
+    DAY,
+    HOUR,
+    RollupFact,
+    Segment,
+    UsageRollupService,
+    ceil_to,
+    floor_to,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+CURRENT = "current"
+KEY_PREFIX = "dash"
+_UUID_KEYS = ("counselor_id",)
+
+Rows = List[Dict[str, Any]]
+_FROM_SETTINGS = object()
+
+
+class MemoryCacheBackend:
+    """Per-process LRU with per-entry expiry (thread-safe)"""
+
+    def __init__(self, max_entries: int, closed_ttl_seconds: Optional[float]):
+        self.max_entries = max_entries
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Rows]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Rows]:
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, values: Dict[str, Rows], ttl_seconds: Optional[float]) -> None:
+        if ttl_seconds is None:
+            ttl_seconds = self.closed_ttl_seconds
+        expires = time.monotonic() + ttl_seconds if ttl_seconds else float("inf")
+        with self._lock:
+            for key, rows in values.items():
+                self._entries[key] = (expires, rows)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, keys: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(key, 0) for key in keys]
+
+    def bump(self, keys: Sequence[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class RedisCacheBackend:
+    """Shared backend on REDIS_URL; rows are stored as JSON"""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url, socket_timeout=1.0))
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, Rows]:
+        if not keys:
+            return {}
+        values = self.client.mget(list(keys))
+        return {
+            key: _loads(value) for key, value in zip(keys, values) if value is not None
+        }
+
+    def set_many(self, values: Dict[str, Rows], ttl_seconds: Optional[float]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, rows in values.items():
+            pipe.set(key, _dumps(rows), ex=int(ttl_seconds) if ttl_seconds else None)
+        pipe.execute()
+
+    def versions(self, keys: Sequence[str]) -> List[int]:
+        if not keys:
+            return []
+        return [int(value or 0) for value in self.client.mget(list(keys))]
+
+    def bump(self, keys: Sequence[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+        pipe.execute()
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(f"{KEY_PREFIX}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def _dumps(rows: Rows) -> str:
+    return json.dumps(
+        [
+            {k: str(v) if isinstance(v, UUID) else v for k, v in row.items()}
+            for row in rows
+        ]
+    )
+
+
+def _loads(value: Any) -> Rows:
+    rows = json.loads(value)
+    for row in rows:
+        for key in _UUID_KEYS:
+            if row.get(key) is not None:
+                row[key] = UUID(row[key])
+    return rows
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns (result, shared): shared is True for callers that waited"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+
+@dataclass
+class CacheStats:
+    closed_hits: int = 0
+    closed_misses: int = 0
+    current_hits: int = 0
+    current_misses: int = 0
+    response_hits: int = 0  # memoize()
+    response_misses: int = 0
+    shared: int = 0  # single-flight waiters
+    computes: int = 0  # aggregate() calls made on behalf of the cache
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        hits = self.closed_hits + self.current_hits + self.response_hits
+        misses = self.closed_misses + self.current_misses + self.response_misses
+        lookups = hits + misses
+        return {
+            "closed_hits": self.closed_hits,
+            "closed_misses": self.closed_misses,
+            "current_hits": self.current_hits,
+            "current_misses": self.current_misses,
+            "response_hits": self.response_hits,
+            "response_misses": self.response_misses,
+            "shared": self.shared,
+            "computes": self.computes,
+            "errors": self.errors,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _fold(
+    pieces: Iterable[Tuple[Optional[datetime], Rows]],
+    by: Sequence[str],
+    period: Optional[str],
+) -> Rows:
+    """
+    Merge (bucket, rows) pieces into (period, *by) groups, summing every
+    other field. A None bucket means the rows carry their own period.
+    """
+    totals: Dict[tuple, List[Any]] = {}
+    measures: Optional[List[str]] = None
+    for bucket, rows in pieces:
+        if bucket is not None and period:
+            bucket = floor_to(bucket, period)
+        for row in rows:
+            if measures is None:
+                measures = [k for k in row if k != "period" and k not in by]
+            if not period:
+                at = None
+            elif bucket is None:
+                at = floor_to(row["period"], period)
+            else:
+                at = bucket
+            key = (at, *[row[k] for k in by])
+            acc = totals.get(key)
+            if acc is None:
+                totals[key] = [row[m] for m in measures]
+            else:
+                for i, name in enumerate(measures):
+                    acc[i] += row[name]
+    result = [
+        {"period": key[0], **dict(zip(by, key[1:])), **dict(zip(measures, values))}
+        for key, values in totals.items()
+    ]
+    if period:
+        result.sort(key=lambda r: r["period"])
+    return result
+
+
+class DashboardCache:
+    """Bucket-level cache in front of UsageRollupService.aggregate()"""
+
+    def __init__(
+        self,
+        backend: Any = _FROM_SETTINGS,
+        current_ttl_seconds: Optional[float] = None,
+    ):
+        """backend: a cache backend, None (disabled) or DASHBOARD_CACHE_BACKEND"""
+        self._backend = backend
+        self._backend_ready = backend is not _FROM_SETTINGS
+        self.current_ttl_seconds = current_ttl_seconds
+        self.flight = SingleFlight()
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> Any:
+        if not self._backend_ready:
+            with self._lock:
+                if not self._backend_ready:
+                    self._backend = self._create_backend()
+                    self._backend_ready = True
+        return self._backend
+
+    @staticmethod
+    def _create_backend() -> Any:
+        kind = settings.DASHBOARD_CACHE_BACKEND
+        if kind == "auto":
+            kind = "redis" if settings.REDIS_URL else "memory"
+        if kind == "none":
+            return None
+        if kind == "redis":
+            if not settings.REDIS_URL:
+                raise ValueError("DASHBOARD_CACHE_BACKEND=redis requires REDIS_URL")
+            return RedisCacheBackend.from_url(settings.REDIS_URL)
+        return MemoryCacheBackend(
+            max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES,
+            closed_ttl_seconds=settings.DASHBOARD_CACHE_LOCAL_CLOSED_TTL_SECONDS,
+        )
+
+    @property
+    def _current_ttl(self) -> float:
+        if self.current_ttl_seconds is not None:
+            return self.current_ttl_seconds
+        return settings.DASHBOARD_CACHE_CURRENT_TTL_SECONDS
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @staticmethod
+    def plan(
+        start: datetime,
+        end: datetime,
+        now: datetime,
+        period: Optional[str] = None,
+    ) -> List[Segment]:
+        """[start, end) -> live head, closed hour/day buckets, current hour"""
+        first, current = ceil_to(start, HOUR), floor_to(min(end, now), HOUR)
+        # A tail ending in a past hour is a one-off range: aggregate it live
+        tail = CURRENT if end >= floor_to(now, HOUR) else "live"
+        if first >= current:
+            return [Segment("live", start, end)]
+        segments = [Segment("live", start, first)]
+        day_lo, day_hi = ceil_to(first, DAY), floor_to(current, DAY)
+        if period != HOUR and day_lo < day_hi:
+            segments += [
+                Segment(HOUR, first, day_lo),
+                Segment(DAY, day_lo, day_hi),
+                Segment(HOUR, day_hi, current),
+            ]
+        else:
+            segments.append(Segment(HOUR, first, current))
+        segments.append(Segment(tail, current, end))
+        return [s for s in segments if s.lo < s.hi]
+
+    def aggregate(
+        self,
+        service: UsageRollupService,
+        fact: RollupFact,
+        start: datetime,
+        end: Optional[datetime] = None,
+        by: Sequence[str] = (),
+        period: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        counselor_id: Any = None,
+        not_null: Sequence[str] = (),
+    ) -> Rows:
+        """Same rows as `service.aggregate(...)`, assembled from cached buckets"""
+        now = datetime.now(timezone.utc)
+        end = end or now
+        options = dict(
+            by=by, tenant_id=tenant_id, counselor_id=counselor_id, not_null=not_null
+        )
+        backend = self.backend
+        if backend is None:
+            return service.aggregate(fact, start, end, period=period, **options)
+
+        signature = self._signature(fact, by, tenant_id, counselor_id, not_null)
+        pieces: List[Tuple[Optional[datetime], Rows]] = []
+        try:
+            for segment in self.plan(start, end, now, period):
+                if segment.kind == "live":
+                    rows = service.aggregate(
+                        fact, segment.lo, segment.hi, period=period, **options
+                    )
+                    pieces.append((None, rows))
+                elif segment.kind == CURRENT:
+                    pieces.append(
+                        (
+                            segment.lo,
+                            self._current(service, fact, signature, segment, options),
+                        )
+                    )
+                else:
+                    pieces += self._closed(service, fact, signature, segment, options)
+        except Exception as e:  # backend down: answer uncached
+            self.stats.errors += 1
+            logger.warning(f"Dashboard cache unavailable, reading uncached: {e}")
+            return service.aggregate(fact, start, end, period=period, **options)
+        return _fold(pieces, by, period)
+
+    def _closed(
+        self,
+        service: UsageRollupService,
+        fact: RollupFact,
+        signature: str,
+        segment: Segment,
+        options: Dict[str, Any],
+    ) -> List[Tuple[datetime, Rows]]:
+        grain = segment.kind
+        step = timedelta(hours=1) if grain == HOUR else timedelta(days=1)
+        buckets = []
+        bucket = segment.lo
+        while bucket < segment.hi:
+            buckets.append(bucket)
+            bucket += step
+
+        days = sorted({floor_to(b, DAY) for b in buckets})
+        versions = dict(
+            zip(
+                days,
+                self.backend.versions([self._version_key(fact.name, d) for d in days]),
+            )
+        )
+        keys = {
+            b: f"{KEY_PREFIX}:{fact.name}:{signature}:{grain}:{b:%Y%m%d%H}:"
+            f"v{versions[floor_to(b, DAY)]}"
+            for b in buckets
+        }
+        cached = self.backend.get_many(list(keys.values()))
+        missing = [b for b in buckets if keys[b] not in cached]
+        self.stats.closed_hits += len(buckets) - len(missing)
+        self.stats.closed_misses += len(missing)
+
+        if missing:
+            lo, hi = missing[0], missing[-1] + step
+
+            def compute() -> Dict[datetime, Rows]:
+                self.stats.computes += 1
+                per_bucket: Dict[datetime, Rows] = {b: [] for b in missing}
+                for row in service.aggregate(fact, lo, hi, period=grain, **options):
+                    if row["period"] in per_bucket:
+                        per_bucket[row.pop("period")].append(row)
+                return per_bucket
+
+            flight_key = f"{keys[missing[0]]}:{keys[missing[-1]]}"
+            per_bucket, shared = self.flight.do(flight_key, compute)
+            if shared:
+                self.stats.shared += 1
+            else:
+                self.backend.set_many({keys[b]: per_bucket[b] for b in missing}, None)
+            cached.update({keys[b]: per_bucket[b] for b in missing})
+
+        # Stored without the period: it is the bucket of the key
+        return [(b, cached[keys[b]]) for b in buckets]
+
+    def _current(
+        self,
+        service: UsageRollupService,
+        fact: RollupFact,
+        signature: str,
+        segment: Segment,
+        options: Dict[str, Any],
+    ) -> Rows:
+        key = f"{KEY_PREFIX}:{fact.name}:{signature}:current:{segment.lo:%Y%m%d%H}"
+        cached = self.backend.get_many([key])
+        if key in cached:
+            self.stats.current_hits += 1
+            rows = cached[key]
+        else:
+            self.stats.current_misses += 1
+
+            def compute() -> Rows:
+                self.stats.computes += 1
+                rows = service.aggregate(
+                    fact, segment.lo, segment.hi, period=None, **options
+                )
+                for row in rows:
+                    del row["period"]
+                return rows
+
+            rows, shared = self.flight.do(key, compute)
+            if shared:
+                self.stats.shared += 1
+            else:
+                self.backend.set_many({key: rows}, self._current_ttl)
+        return rows
+
+    def memoize(
+        self,
+        name: str,
+        params: Sequence[Any],
+        compute: Callable[[], Any],
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """
+        Whole-response entry for `name` + `params` (JSON-serializable),
+        kept for ttl_seconds (default: the current-hour TTL)
+        """
+        backend = self.backend
+        if backend is None:
+            return compute()
+        raw = json.dumps([name, *params], default=str)
+        key = f"{KEY_PREFIX}:response:{name}:{hashlib.sha1(raw.encode()).hexdigest()[:16]}"
+        try:
+            cached = backend.get_many([key])
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Dashboard cache unavailable, reading uncached: {e}")
+            return compute()
+        if key in cached:
+            self.stats.response_hits += 1
+            return cached[key][0]
+        self.stats.response_misses += 1
+
+        def run() -> Any:
+            self.stats.computes += 1
+            return compute()
+
+        value, shared = self.flight.do(key, run)
+        if shared:
+            self.stats.shared += 1
+            return value
+        try:
+            # Stored as a one-row list: backends hold Rows
+            backend.set_many(
+                {key: [value]},
+                self._current_ttl if ttl_seconds is None else ttl_seconds,
+            )
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Dashboard cache write failed: {e}")
+        return value
+
+    @staticmethod
+    def _signature(fact, by, tenant_id, counselor_id, not_null) -> str:
+        raw = json.dumps(
+            [fact.name, list(by), tenant_id, str(counselor_id or ""), list(not_null)]
+        )
+        return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _version_key(source: str, day: datetime) -> str:
+        return f"{KEY_PREFIX}:ver:{source}:{day:%Y%m%d}"
+
+    # ------------------------------------------------------------------
+    # Invalidation / metrics
+    # ------------------------------------------------------------------
+    def invalidate_days(self, source: str, days: Sequence[datetime]) -> None:
+        """Retire cached closed buckets of these days (rollup rebuilt them)"""
+        backend = self.backend
+        if backend is None or not days:
+            return
+        try:
+            backend.bump([self._version_key(source, d) for d in days])
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"Dashboard cache invalidation failed: {e}")
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+        self.stats = CacheStats()
+
+    def stats_dict(self) -> Dict[str, Any]:
+        backend = self.backend
+        return {
+            "backend": "none" if backend is None else type(backend).__name__,
+            **self.stats.as_dict(),
+        }
+
+
+dashboard_cache = DashboardCache()
@@ -0,0 +1,389 @@
+"""
+Analysis Log Partitions - monthly partition upkeep and retention archival
+
+On PostgreSQL `session_analysis_logs` is RANGE-partitioned by `analyzed_at`
+(one partition per UTC month + DEFAULT, migration a7c9e1f3b5d7), so dashboard
+queries on recent ranges only scan recent partitions.
+
+- `ensure_partitions()`: create the next months' partitions ahead of time
+  (rows that already landed in DEFAULT for that month are moved in)
+- `archive_expired()`: export each month older than the retention window to
+  a gzip JSONL file (lean-storage text resolved, so the archive is
+  self-contained), verify the row count, upload it to the archive bucket
+  (GCSArchiveStore on GCS_BUCKET) and verify the stored size + MD5
+
+The local file is only a staging copy (Cloud Run disks are ephemeral).
+Dropping archived months is opt-in (ANALYSIS_LOG_ARCHIVE_DROP) and refused
+without an archive store; while it is off, months already in the bucket are
+skipped. Dropping detaches and drops the partition; on other dialects
+(SQLite in tests) the table is not partitioned and the rows are deleted.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.services.core.content_store import ContentStore
+
+logger = logging.getLogger(__name__)
+
+TABLE = SessionAnalysisLog.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+EXPORT_BATCH_SIZE = 1000
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def archive_name(month: date) -> str:
+    return f"{partition_name(month)}.jsonl.gz"
+
+
+def _utc(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)  # UUID, Decimal
+
+
+class ArchiveUploadError(Exception):
+    """Raised when an uploaded archive does not match the local file"""
+
+
+class ArchiveStore(ABC):
+    """Durable storage for monthly archive files"""
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        """Whether an archive with this file name is already stored"""
+
+    @abstractmethod
+    def upload(self, path: Path, name: str, md5: str) -> str:
+        """
+        Store the file, then check the stored copy against its size and MD5
+        (base64, as GCS reports it).
+
+        Returns:
+            URI of the stored object
+
+        Raises:
+            ArchiveUploadError: If the stored copy does not match
+        """
+
+
+class GCSArchiveStore(ArchiveStore):
+    """Archive files as objects under `prefix/` in a GCS bucket"""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str,
+        client_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        # Factory keeps the client lazy (no credentials needed until used)
+        self._client_factory = client_factory or _storage_client
+
+    def _blob(self, name: str):
+        key = f"{self.prefix}/{name}" if self.prefix else name
+        return self._client_factory().bucket(self.bucket).blob(key)
+
+    def exists(self, name: str) -> bool:
+        return self._blob(name).exists()
+
+    def upload(self, path: Path, name: str, md5: str) -> str:
+        blob = self._blob(name)
+        blob.upload_from_filename(str(path), content_type="application/gzip")
+        blob.reload()
+        size = path.stat().st_size
+        if blob.size != size or blob.md5_hash != md5:
+            raise ArchiveUploadError(
+                f"gs://{self.bucket}/{blob.name}: stored size={blob.size} "
+                f"md5={blob.md5_hash}, local size={size} md5={md5}"
+            )
+        return f"gs://{self.bucket}/{blob.name}"
+
+
+def _storage_client():
+    from google.cloud import storage
+
+    return storage.Client(project=settings.GCS_PROJECT)
+
+
+def default_archive_store() -> Optional[ArchiveStore]:
+    """GCS store on GCS_BUCKET, or None when no bucket is configured"""
+    if not settings.GCS_BUCKET:
+        return None
+    return GCSArchiveStore(settings.GCS_BUCKET, settings.ANALYSIS_LOG_ARCHIVE_PREFIX)
+
+
+@dataclass
+class ArchivedMonth:
+    month: date
+    rows: int
+    sha256: str
+    uri: Optional[str]
+    dropped: bool
+    detached: bool
+
+
+class AnalysisLogPartitionManager:
+    """Create future partitions and archive expired months"""
+
+    def __init__(self, db: DBSession):
+        self.db = db
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    # ------------------------------------------------------------------
+    # Partitions
+    # ------------------------------------------------------------------
+    def list_partitions(self) -> List[str]:
+        if not self.is_postgres:
+            return []
+        return list(
+            self.db.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :table ORDER BY c.relname"
+                ),
+                {"table": TABLE},
+            ).scalars()
+        )
+
+    def ensure_partitions(self, months_ahead: Optional[int] = None) -> List[str]:
+        """Create partitions from the current month up to N months ahead"""
+        if not self.is_postgres:
+            return []
+        if months_ahead is None:
+            months_ahead = settings.ANALYSIS_LOG_PARTITIONS_AHEAD
+
+        existing = set(self.list_partitions())
+        current = month_start(datetime.now(timezone.utc))
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name not in existing:
+                self._create_partition(month)
+                created.append(name)
+        self.db.commit()
+        if created:
+            logger.info(f"Created analysis log partitions: {created}")
+        return created
+
+    def _create_partition(self, month: date) -> None:
+        # Build detached, move any rows DEFAULT already holds for the month,
+        # then attach: plain CREATE ... PARTITION OF fails when DEFAULT has
+        # matching rows
+        name = partition_name(month)
+        lower, upper = _utc(month), _utc(add_months(month, 1))
+        self.db.execute(
+            text(
+                f"CREATE TABLE {name} "
+                f"(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        self.db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE analyzed_at >= :lower AND analyzed_at < :upper RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ),
+            {"lower": lower, "upper": upper},
+        )
+        self.db.execute(
+            text(
+                f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+    def expired_months(self, retention_months: Optional[int] = None) -> List[date]:
+        """Months from the oldest row up to (excluding) the retention window"""
+        if retention_months is None:
+            retention_months = settings.ANALYSIS_LOG_RETENTION_MONTHS
+        cutoff = add_months(month_start(datetime.now(timezone.utc)), -retention_months)
+        oldest = self.db.execute(
+            select(func.min(SessionAnalysisLog.analyzed_at))
+        ).scalar()
+        if oldest is None:
+            return []
+        months = []
+        month = month_start(oldest)
+        while month < cutoff:
+            months.append(month)
+            month = add_months(month, 1)
+        return months
+
+    def archive_expired(
+        self,
+        retention_months: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        store: Optional[ArchiveStore] = None,
+        drop: Optional[bool] = None,
+    ) -> List[ArchivedMonth]:
+        """
+        Export, upload and (if drop) drop every expired month, oldest first.
+
+        Without drop, months already in the store are skipped; without a
+        store there is nothing durable to archive to, so nothing is done.
+
+        Raises:
+            RuntimeError: If drop is requested without an archive store
+        """
+        if store is None:
+            store = default_archive_store()
+        if drop is None:
+            drop = settings.ANALYSIS_LOG_ARCHIVE_DROP
+        if store is None:
+            if drop:
+                raise RuntimeError(
+                    "Refusing to drop analysis log months without an archive "
+                    "store (set GCS_BUCKET)"
+                )
+            logger.warning(
+                "No archive store configured (GCS_BUCKET), skipping archival"
+            )
+            return []
+
+        directory = Path(archive_dir or settings.ANALYSIS_LOG_ARCHIVE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        archived = []
+        for month in self.expired_months(retention_months):
+            if not drop and store.exists(archive_name(month)):
+                continue
+            archived.append(self.archive_month(month, directory, store, drop))
+        return archived
+
+    def archive_month(
+        self, month: date, directory: Path, store: ArchiveStore, drop: bool
+    ) -> ArchivedMonth:
+        lower, upper = _utc(month), _utc(add_months(month, 1))
+        path = directory / archive_name(month)
+        rows, digest, md5 = self._export(lower, upper, path)
+
+        expected = self.db.execute(
+            select(func.count())
+            .select_from(SessionAnalysisLog)
+            .where(
+                SessionAnalysisLog.analyzed_at >= lower,
+                SessionAnalysisLog.analyzed_at < upper,
+            )
+        ).scalar()
+        if rows != expected:
+            raise RuntimeError(
+                f"Archive of {month:%Y-%m} has {rows} rows, table has {expected}"
+            )
+
+        # Raises before anything is dropped if the stored copy does not match
+        uri = store.upload(path, archive_name(month), md5)
+        path.unlink()
+
+        detached = self._drop_month(month, lower, upper) if drop else False
+        self.db.commit()
+        logger.info(
+            f"Archived {rows} analysis logs of {month:%Y-%m} to {uri} "
+            f"(dropped={drop})"
+        )
+        return ArchivedMonth(
+            month=month,
+            rows=rows,
+            sha256=digest,
+            uri=uri,
+            dropped=drop,
+            detached=detached,
+        )
+
+    def _export(
+        self, lower: datetime, upper: datetime, path: Path
+    ) -> Tuple[int, str, str]:
+        """Write the month to path; returns (rows, sha256 hex, md5 base64)"""
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        rows = 0
+        with gzip.open(tmp, "wt", encoding="utf-8") as out:
+            for record in self._iter_records(lower, upper):
+                out.write(json.dumps(record, ensure_ascii=False, default=_json_default))
+                out.write("\n")
+                rows += 1
+        tmp.replace(path)
+        sha256, md5 = hashlib.sha256(), hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+                md5.update(chunk)
+        return rows, sha256.hexdigest(), base64.b64encode(md5.digest()).decode()
+
+    def _iter_records(
+        self, lower: datetime, upper: datetime
+    ) -> Iterator[Dict[str, Any]]:
+        """Rows of one month with lean-storage text resolved (keyset batches)"""
+        table = SessionAnalysisLog.__table__
+        store = ContentStore(self.db)
+        last: Optional[Tuple[datetime, Any]] = None
+        while True:
+            query = (
+                select(table)
+                .where(table.c.analyzed_at >= lower, table.c.analyzed_at < upper)
+                .order_by(table.c.analyzed_at, table.c.id)
+                .limit(EXPORT_BATCH_SIZE)
+            )
+            if last is not None:
+                query = query.where(
+                    (table.c.analyzed_at > last[0])
+                    | ((table.c.analyzed_at == last[0]) & (table.c.id > last[1]))
+                )
+            batch = self.db.execute(query).all()
+            if not batch:
+                return
+            for row, resolved in zip(batch, store.resolve_logs(batch)):
+                record = dict(row._mapping)
+                record.update(resolved)
+                yield record
+            last = (batch[-1].analyzed_at, batch[-1].id)
+
+    def _drop_month(self, month: date, lower: datetime, upper: datetime) -> bool:
+        name = partition_name(month)
+        if self.is_postgres and name in self.list_partitions():
+            self.db.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+            self.db.execute(text(f"DROP TABLE {name}"))
+            return True
+        # Not partitioned (or the month is still in DEFAULT): delete the rows
+        self.db.execute(
+            delete(SessionAnalysisLog)
+            .where(
+                SessionAnalysisLog.analyzed_at >= lower,
+                SessionAnalysisLog.analyzed_at < upper,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return False
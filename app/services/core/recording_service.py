@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session as DBSession
 from app.models.session import Session
 from app.repositories.session_repository import SessionRepository
 from app.schemas.session import AppendRecordingRequest, RecordingSegment
+from app.services.helpers.session_transcript import sanitize_transcript
 
 
 class RecordingService:
@@ -83,7 +84,7 @@ class RecordingService:
             "duration_seconds": duration_seconds,
             "transcript_text": request.transcript_text,
             "transcript_sanitized": request.transcript_sanitized
-            or request.transcript_text,
+            or sanitize_transcript(request.transcript_text),
         }
 
         # Append to recordings
@@ -94,8 +95,11 @@ class RecordingService:
         full_transcript = self._aggregate_transcript_from_recordings(
             existing_recordings
         )
+        # Appends only re-scan the tail of the previous transcript
+        session.transcript_sanitized = sanitize_transcript(
+            full_transcript, session.transcript_text, session.transcript_sanitized
+        )
         session.transcript_text = full_transcript
-        session.transcript_sanitized = full_transcript
 
         # Update session time range
         session_start, session_end = self._calculate_timerange_from_recordings(
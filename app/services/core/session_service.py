@@ -3,7 +3,7 @@ Session Service - Business logic for session management
 Refactored from app/api/sessions.py to follow Service Layer pattern
 """
 from datetime import datetime, timezone
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 from uuid import UUID
 
 from sqlalchemy import select
@@ -24,6 +24,7 @@ from app.services.helpers.session_transcript import (
     calculate_timerange_from_recordings,
     process_recordings_data,
     process_transcript_data,
+    sanitize_transcript,
 )
 from app.services.helpers.session_validation import parse_date, parse_datetime
 
@@ -83,7 +84,7 @@ class SessionService:
             start_time=start_time,
             end_time=end_time,
             transcript_text=full_transcript,
-            transcript_sanitized=full_transcript,  # TODO: Integrate sanitizer service
+            transcript_sanitized=sanitize_transcript(full_transcript),
             source_type="transcript",
             duration_minutes=request.duration_minutes,
             notes=request.notes,
@@ -174,8 +175,11 @@ class SessionService:
         search: Optional[str] = None,
         skip: int = 0,
         limit: int = 20,
-    ) -> Tuple[List[Tuple], int]:
-        """List sessions with filtering and pagination."""
+        cursor: Optional[str] = None,
+        include_fields: Iterable[str] = (),
+        count_mode: str = "exact",
+    ) -> Tuple[List[Tuple], Optional[int], Optional[str]]:
+        """List sessions with filtering, projection and keyset pagination."""
         return self.session_repo.list_sessions(
             counselor_id=counselor.id,
             tenant_id=tenant_id,
@@ -185,6 +189,9 @@ class SessionService:
             search=search,
             skip=skip,
             limit=limit,
+            cursor=cursor,
+            include_fields=include_fields,
+            count_mode=count_mode,
         )
 
     def update_session(
@@ -232,8 +239,12 @@ class SessionService:
                 full_transcript = aggregate_transcript_from_recordings(
                     request.recordings
                 )
+                session.transcript_sanitized = sanitize_transcript(
+                    full_transcript,
+                    session.transcript_text,
+                    session.transcript_sanitized,
+                )
                 session.transcript_text = full_transcript
-                session.transcript_sanitized = full_transcript
 
                 # Recalculate time range from recordings
                 calc_start, calc_end = calculate_timerange_from_recordings(
@@ -247,8 +258,12 @@ class SessionService:
                     time_changed = False  # Recordings-calculated time doesn't count
 
         elif request.transcript is not None:
+            session.transcript_sanitized = sanitize_transcript(
+                request.transcript,
+                session.transcript_text,
+                session.transcript_sanitized,
+            )
             session.transcript_text = request.transcript
-            session.transcript_sanitized = request.transcript
 
         # Handle name field
         update_dict = request.model_dump(exclude_unset=True)
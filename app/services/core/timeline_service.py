@@ -1,36 +1,187 @@
 """
 Timeline Service - Business logic for session timeline
 Extracted from app/api/sessions.py
+
+Timeline items only need a handful of narrow columns, so they are loaded with
+a column projection (never the transcript / recordings / analysis_logs JSON)
+and cached per client. The cache is invalidated when a transaction that
+touched the client's sessions, cases or reports commits; a short TTL bounds
+staleness across processes.
 """
-from typing import List
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import and_, event, select
 from sqlalchemy.orm import Session as DBSession
 
+from app.core.config import settings
 from app.models.case import Case
 from app.models.client import Client
 from app.models.report import Report, ReportStatus
 from app.models.session import Session
 from app.schemas.session import TimelineSessionItem
+from app.utils.pagination import decode_cursor, encode_cursor
+
+# ((session_date, session_id), item) - sort key kept next to each item so date
+# cursors can be resolved against the cached list with a binary search
+TimelineEntry = Tuple[Tuple[datetime, UUID], TimelineSessionItem]
+
+
+class TimelineCache:
+    """Per-client cache of timeline entries (LRU + TTL, thread-safe)"""
+
+    def __init__(self, ttl_seconds: int, max_clients: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_clients = max_clients
+        self._entries: "OrderedDict[UUID, Tuple[float, List[TimelineEntry]]]" = (
+            OrderedDict()
+        )
+        # Session events only carry case_id, so keep case -> client for cached
+        # clients (and the reverse, to forget them when an entry is dropped)
+        self._case_clients: Dict[UUID, UUID] = {}
+        self._client_cases: Dict[UUID, Set[UUID]] = {}
+        # Bumped on every invalidation; a load that started before an
+        # invalidation must not repopulate the cache with pre-commit data
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, client_id: UUID) -> Optional[List[TimelineEntry]]:
+        with self._lock:
+            entry = self._entries.get(client_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(client_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(client_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(
+        self,
+        client_id: UUID,
+        entries: List[TimelineEntry],
+        case_ids: Set[UUID],
+        generation: int,
+    ) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._drop(client_id)
+            self._entries[client_id] = (time.monotonic() + self.ttl_seconds, entries)
+            self._client_cases[client_id] = set(case_ids)
+            for case_id in case_ids:
+                self._case_clients[case_id] = client_id
+            while len(self._entries) > self.max_clients:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate_client(self, client_id: Optional[UUID]) -> None:
+        if client_id is None:
+            return
+        with self._lock:
+            self._generation += 1
+            self._drop(client_id)
+
+    def invalidate_case(self, case_id: Optional[UUID]) -> None:
+        if case_id is None:
+            return
+        with self._lock:
+            self._generation += 1
+            client_id = self._case_clients.get(case_id)
+            if client_id is not None:
+                self._drop(client_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._case_clients.clear()
+            self._client_cases.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _drop(self, client_id: UUID) -> None:
+        self._entries.pop(client_id, None)
+        for case_id in self._client_cases.pop(client_id, ()):
+            self._case_clients.pop(case_id, None)
+
+
+timeline_cache = TimelineCache(
+    ttl_seconds=settings.TIMELINE_CACHE_TTL_SECONDS,
+    max_clients=settings.TIMELINE_CACHE_MAX_CLIENTS,
+)
+
+_PENDING_KEY = "timeline_cache_pending"
+
+
+@event.listens_for(DBSession, "after_flush")
+def _collect_timeline_changes(db: DBSession, flush_context) -> None:
+    """Remember which clients/cases a flush touched (applied on commit)"""
+    pending = db.info.setdefault(_PENDING_KEY, set())
+    for obj in chain(db.new, db.dirty, db.deleted):
+        if isinstance(obj, Session):
+            pending.add(("case", obj.case_id))
+        elif isinstance(obj, Report):
+            pending.add(("client", obj.client_id))
+        elif isinstance(obj, Case):
+            pending.add(("client", obj.client_id))
+            pending.add(("case", obj.id))
+
+
+@event.listens_for(DBSession, "after_commit")
+def _apply_timeline_invalidation(db: DBSession) -> None:
+    for kind, key in db.info.pop(_PENDING_KEY, ()):
+        if kind == "case":
+            timeline_cache.invalidate_case(key)
+        else:
+            timeline_cache.invalidate_client(key)
+
+
+@event.listens_for(DBSession, "after_rollback")
+def _discard_timeline_changes(db: DBSession) -> None:
+    db.info.pop(_PENDING_KEY, None)
 
 
 class TimelineService:
     """Service for managing session timeline"""
 
-    def __init__(self, db: DBSession):
+    def __init__(self, db: DBSession, cache: TimelineCache = timeline_cache):
         self.db = db
+        self.cache = cache
 
     def get_session_timeline(
         self,
         client_id: UUID,
         counselor_id: UUID,
         tenant_id: str,
-    ) -> tuple[Client, List[TimelineSessionItem]]:
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> Tuple[Client, List[TimelineSessionItem], int, Optional[str]]:
         """
-        Get session timeline for a client.
+        Get session timeline for a client, oldest first.
+
+        Args:
+            limit: Page size (None returns the whole timeline)
+            cursor: next_cursor from the previous page
 
-        Returns: (client, timeline_items)
+        Returns: (client, timeline_items, total_sessions, next_cursor)
+
+        Raises:
+            ValueError: If client not found
+            InvalidCursorError: If cursor cannot be decoded
         """
         # Verify client exists and belongs to counselor
         client_result = self.db.execute(
@@ -45,42 +196,120 @@ class TimelineService:
         if not client:
             raise ValueError("Client not found")
 
-        # Query all sessions with reports
+        entries = self._get_entries(client_id, tenant_id)
+        page, next_cursor = self._paginate(entries, limit, cursor)
+        return client, page, len(entries), next_cursor
+
+    def get_timeline_items(
+        self, client_id: UUID, tenant_id: str
+    ) -> List[TimelineSessionItem]:
+        """All timeline items for a client (cached). Caller must authorize."""
+        return [item for _, item in self._get_entries(client_id, tenant_id)]
+
+    def _get_entries(self, client_id: UUID, tenant_id: str) -> List[TimelineEntry]:
+        entries = self.cache.get(client_id)
+        if entries is None:
+            generation = self.cache.generation
+            entries, case_ids = self._load_timeline_entries(client_id, tenant_id)
+            self.cache.set(client_id, entries, case_ids, generation)
+        return entries
+
+    def _load_timeline_entries(
+        self, client_id: UUID, tenant_id: str
+    ) -> Tuple[List[TimelineEntry], Set[UUID]]:
+        """Query only the columns the timeline renders"""
+        draft_report_id = (
+            select(Report.id)
+            .where(
+                Report.session_id == Session.id,
+                Report.status == ReportStatus.DRAFT,
+            )
+            .limit(1)
+            .scalar_subquery()
+        )
+        # Outer join from Case so every case of the client is known (including
+        # ones without sessions yet): a session created later in any of them
+        # must invalidate this entry
         query = (
-            select(Session, Report.id.label("report_id"))
-            .join(Case, Session.case_id == Case.id)
+            select(
+                Case.id.label("case_id"),
+                Session.id,
+                Session.session_number,
+                Session.session_date,
+                Session.start_time,
+                Session.end_time,
+                Session.summary,
+                draft_report_id.label("report_id"),
+            )
+            .select_from(Case)
             .outerjoin(
-                Report,
-                (Report.session_id == Session.id)
-                & (Report.status == ReportStatus.DRAFT),
+                Session,
+                and_(
+                    Session.case_id == Case.id,
+                    Session.tenant_id == tenant_id,
+                    Session.deleted_at.is_(None),
+                ),
             )
-            .where(Case.client_id == client_id, Session.tenant_id == tenant_id)
-            .order_by(Session.session_date.asc())
+            .where(Case.client_id == client_id)
+            .order_by(Session.session_date.asc(), Session.id.asc())
         )
 
-        result = self.db.execute(query)
-        rows = result.all()
+        entries = []
+        case_ids = set()
+        for row in self.db.execute(query).all():
+            case_ids.add(row.case_id)
+            if row.id is None:
+                continue
 
-        # Build timeline items
-        timeline_items = []
-        for session, report_id in rows:
             # Format time range
             time_range = None
-            if session.start_time and session.end_time:
-                start = session.start_time.strftime("%H:%M")
-                end = session.end_time.strftime("%H:%M")
+            if row.start_time and row.end_time:
+                start = row.start_time.strftime("%H:%M")
+                end = row.end_time.strftime("%H:%M")
                 time_range = f"{start}-{end}"
 
-            timeline_items.append(
-                TimelineSessionItem(
-                    session_id=session.id,
-                    session_number=session.session_number,
-                    date=session.session_date.strftime("%Y-%m-%d"),
-                    time_range=time_range,
-                    summary=session.summary,
-                    has_report=report_id is not None,
-                    report_id=report_id,
-                )
+            item = TimelineSessionItem(
+                session_id=row.id,
+                session_number=row.session_number,
+                date=row.session_date.strftime("%Y-%m-%d"),
+                time_range=time_range,
+                summary=row.summary,
+                has_report=row.report_id is not None,
+                report_id=row.report_id,
+            )
+            entries.append(((row.session_date, row.id), item))
+
+        return entries, case_ids
+
+    @staticmethod
+    def _paginate(
+        entries: List[TimelineEntry],
+        limit: Optional[int],
+        cursor: Optional[str],
+    ) -> Tuple[List[TimelineSessionItem], Optional[str]]:
+        """Slice the ordered timeline after a (session_date, id) cursor"""
+        start = 0
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor, types=(datetime, UUID))
+            start = bisect_right(
+                entries, _comparable((cursor_date, cursor_id)), key=_entry_key
             )
 
-        return client, timeline_items
+        end = len(entries) if limit is None else start + limit
+        page = [item for _, item in entries[start:end]]
+        next_cursor = None
+        if end < len(entries) and page:
+            next_cursor = encode_cursor(*entries[end - 1][0])
+        return page, next_cursor
+
+
+def _comparable(sort_key: Tuple[datetime, UUID]) -> Tuple[datetime, str]:
+    """Normalize a sort key so naive (SQLite) and aware (PG) datetimes compare"""
+    session_date, session_id = sort_key
+    if session_date.tzinfo is not None:
+        session_date = session_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return session_date, str(session_id)
+
+
+def _entry_key(entry: TimelineEntry) -> Tuple[datetime, str]:
+    return _comparable(entry[0])
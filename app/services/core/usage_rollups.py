@@ -0,0 +1,447 @@
+"""
+Usage Rollups - incrementally maintained hourly/daily aggregates for the admin dashboard
+
+Dashboard endpoints used to aggregate `session_usages` and
+`session_analysis_logs` live over the whole requested range (up to 30 days),
+a dozen range scans per dashboard load. The rollup tables hold the same sums
+per bucket:
+
+- `usage_rollups`: SessionUsage per (hour|day, tenant, counselor)
+- `analysis_rollups`: SessionAnalysisLog per (hour|day, tenant, counselor,
+  model, safety level)
+
+Maintenance (`refresh()`, POST /api/internal/refresh-usage-rollups):
+
+- Each source keeps a watermark (latest change timestamp already folded in:
+  `coalesce(updated_at, created_at)` for usage rows, which keep changing
+  while a session runs; `created_at` for analysis logs)
+- Hours with rows changed after the watermark (minus
+  USAGE_ROLLUP_LATE_ARRIVAL_SECONDS, for transactions that committed late)
+  are rebuilt from the source, then the days containing them are rebuilt
+  from the hourly rows. Rebuilding a whole bucket is idempotent, so the
+  overlap never double counts
+- `reconcile_days` additionally rebuilds every bucket of the last N days,
+  which picks up deletes (account purge, log archival) and anything the
+  watermark missed
+- Refreshes of one source are serialized with a transaction-scoped
+  advisory lock (PostgreSQL); unique indexes on the bucket keys reject a
+  duplicate bucket if one ever slips through
+
+Reads (`aggregate()`): a range is split into closed buckets served from the
+rollups (daily rows for whole days, hourly rows at the edges) and the parts
+that are not rolled up yet (the partial first hour, everything after
+`complete_until`), which are aggregated live. Results match the live
+queries for every row the last refresh has seen.
+"""
+import logging
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.orm import Session as DBSession
+
+from app.core.config import settings
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.models.usage_rollup import AnalysisRollup, RollupWatermark, UsageRollup
+
+logger = logging.getLogger(__name__)
+
+HOUR = "hour"
+DAY = "day"
+_STEP = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+_SQLITE_FORMAT = {HOUR: "%Y-%m-%d %H:00:00", DAY: "%Y-%m-%d 00:00:00"}
+
+Filter = Callable[[Any], Any]  # model class -> SQL condition
+
+
+@dataclass(frozen=True)
+class RollupFact:
+    """A source table and the rollup table that aggregates it"""
+
+    name: str
+    source: Any
+    rollup: Any
+    event_column: str  # bucketed timestamp
+    keys: Tuple[str, ...]  # grouping columns (same names in both tables)
+    measures: Dict[str, Any] = field(
+        compare=False
+    )  # measure -> aggregate over source rows
+
+    def event(self):
+        return getattr(self.source, self.event_column)
+
+    def changed(self):
+        """Change timestamp used for the watermark"""
+        if self.source is SessionUsage:
+            return func.coalesce(SessionUsage.updated_at, SessionUsage.created_at)
+        return self.source.created_at
+
+
+USAGE = RollupFact(
+    name=SessionUsage.__tablename__,
+    source=SessionUsage,
+    rollup=UsageRollup,
+    event_column="created_at",
+    keys=("tenant_id", "counselor_id"),
+    measures={
+        # session_id is unique: one usage row per session
+        "sessions": func.count(SessionUsage.id),
+        "duration_seconds": func.sum(SessionUsage.duration_seconds),
+        "prompt_tokens": func.sum(SessionUsage.total_prompt_tokens),
+        "completion_tokens": func.sum(SessionUsage.total_completion_tokens),
+        "total_tokens": func.sum(SessionUsage.total_tokens),
+        "estimated_cost_usd": func.sum(SessionUsage.estimated_cost_usd),
+    },
+)
+
+ANALYSIS = RollupFact(
+    name=SessionAnalysisLog.__tablename__,
+    source=SessionAnalysisLog,
+    rollup=AnalysisRollup,
+    event_column="analyzed_at",
+    keys=("tenant_id", "counselor_id", "model_name", "safety_level"),
+    measures={
+        "logs": func.count(SessionAnalysisLog.id),
+        "prompt_tokens": func.sum(SessionAnalysisLog.prompt_tokens),
+        "completion_tokens": func.sum(SessionAnalysisLog.completion_tokens),
+        "estimated_cost_usd": func.sum(SessionAnalysisLog.estimated_cost_usd),
+    },
+)
+
+FACTS = (USAGE, ANALYSIS)
+
+
+def as_utc(value: Any) -> Optional[datetime]:
+    """Bucket / timestamp value from any dialect -> aware UTC datetime"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def floor_to(value: datetime, grain: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if grain == DAY else value
+
+
+def ceil_to(value: datetime, grain: str) -> datetime:
+    floor = floor_to(value, grain)
+    return floor if floor == value else floor + _STEP[grain]
+
+
+def _num(value: Any) -> Any:
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _lock_key(name: str) -> int:
+    """Stable advisory lock key of a rollup source"""
+    return zlib.crc32(f"usage_rollups:{name}".encode())
+
+
+def _ranges(buckets: Sequence[datetime], grain: str) -> List[Tuple[datetime, datetime]]:
+    """Sorted bucket starts -> contiguous [lo, hi) ranges"""
+    ranges: List[Tuple[datetime, datetime]] = []
+    for bucket in buckets:
+        if ranges and ranges[-1][1] == bucket:
+            ranges[-1] = (ranges[-1][0], bucket + _STEP[grain])
+        else:
+            ranges.append((bucket, bucket + _STEP[grain]))
+    return ranges
+
+
+@dataclass
+class FactRefresh:
+    source: str
+    hours_rebuilt: int = 0
+    days_rebuilt: int = 0
+    rows_written: int = 0
+    watermark: Optional[datetime] = None
+    # Days with rebuilt buckets that had already closed (cached dashboard
+    # results for them are dropped)
+    closed_days: List[datetime] = field(default_factory=list)
+
+
+@dataclass
+class Segment:
+    kind: str  # live | hour | day
+    lo: datetime
+    hi: datetime
+
+
+class UsageRollupService:
+    """Maintain and read the dashboard rollups"""
+
+    def __init__(self, db: DBSession):
+        self.db = db
+        self.is_postgres = db.get_bind().dialect.name == "postgresql"
+
+    def bucket(self, column, grain: str):
+        """Portable date_trunc (UTC) of a timestamp column"""
+        if self.is_postgres:
+            return func.date_trunc(grain, func.timezone("UTC", column))
+        return func.strftime(_SQLITE_FORMAT[grain], column)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def refresh(
+        self, reconcile_days: Optional[int] = None, now: Optional[datetime] = None
+    ) -> List[FactRefresh]:
+        """Fold changes since the watermarks into the rollups (one transaction per source)"""
+        now = now or datetime.now(timezone.utc)
+        reports = []
+        from app.services.core.dashboard_cache import dashboard_cache
+
+        for fact in FACTS:
+            report = self._refresh_fact(fact, now, reconcile_days)
+            self.db.commit()
+            dashboard_cache.invalidate_days(fact.name, report.closed_days)
+            reports.append(report)
+        return reports
+
+    def _refresh_fact(
+        self, fact: RollupFact, now: datetime, reconcile_days: Optional[int]
+    ) -> FactRefresh:
+        if self.is_postgres:
+            # Rebuilds are DELETE + INSERT: overlapping refreshes of one source
+            # (Cloud Scheduler retry, manual call) run one after the other.
+            # Held until the commit in refresh(); works before the watermark
+            # row exists, unlike FOR UPDATE
+            self.db.execute(select(func.pg_advisory_xact_lock(_lock_key(fact.name))))
+        # Re-read after the lock: the previous holder may have moved it
+        state = self.db.get(RollupWatermark, fact.name, populate_existing=True)
+        if state is None:
+            state = RollupWatermark(source=fact.name)
+            self.db.add(state)
+        watermark = as_utc(state.watermark)
+
+        changed = fact.changed()
+        hour = self.bucket(fact.event(), HOUR).label("bucket")
+        query = select(hour, func.max(changed).label("changed")).group_by(hour)
+        if watermark is not None:
+            late = timedelta(seconds=settings.USAGE_ROLLUP_LATE_ARRIVAL_SECONDS)
+            query = query.where(changed > watermark - late)
+        rows = self.db.execute(query).all()
+
+        hours = {as_utc(row.bucket) for row in rows if row.bucket is not None}
+        if reconcile_days:
+            current = floor_to(now, DAY) - timedelta(days=reconcile_days)
+            while current <= now:
+                hours.add(current)
+                current += _STEP[HOUR]
+
+        report = FactRefresh(source=fact.name)
+        for lo, hi in _ranges(sorted(hours), HOUR):
+            report.rows_written += self._rebuild(fact, HOUR, lo, hi)
+        days = sorted({floor_to(h, DAY) for h in hours})
+        for lo, hi in _ranges(days, DAY):
+            report.rows_written += self._rebuild(fact, DAY, lo, hi)
+        report.hours_rebuilt, report.days_rebuilt = len(hours), len(days)
+        current = floor_to(now, HOUR)
+        report.closed_days = sorted({floor_to(h, DAY) for h in hours if h < current})
+
+        latest = [as_utc(row.changed) for row in rows if row.changed is not None]
+        if latest and (watermark is None or max(latest) > watermark):
+            state.watermark = max(latest)
+        state.complete_until = floor_to(now, HOUR)
+        state.refreshed_at = now
+        report.watermark = as_utc(state.watermark)
+        logger.info(
+            f"Rollup {fact.name}: rebuilt {report.hours_rebuilt} hours / "
+            f"{report.days_rebuilt} days ({report.rows_written} rows)"
+        )
+        return report
+
+    def _rebuild(self, fact: RollupFact, grain: str, lo: datetime, hi: datetime) -> int:
+        """Replace the rollup rows of [lo, hi) at one grain"""
+        rollup = fact.rollup
+        self.db.execute(
+            delete(rollup)
+            .where(
+                rollup.grain == grain,
+                rollup.bucket_start >= lo,
+                rollup.bucket_start < hi,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        if grain == HOUR:
+            # Hours come from the source table
+            bucket = self.bucket(fact.event(), HOUR).label("bucket")
+            keys = [getattr(fact.source, k) for k in fact.keys]
+            measures = [m.label(name) for name, m in fact.measures.items()]
+            event = fact.event()
+            query = select(bucket, *keys, *measures).where(event >= lo, event < hi)
+        else:
+            # Days are folded from the hourly rollups
+            bucket = self.bucket(rollup.bucket_start, DAY).label("bucket")
+            keys = [getattr(rollup, k) for k in fact.keys]
+            measures = [
+                func.sum(getattr(rollup, name)).label(name) for name in fact.measures
+            ]
+            query = select(bucket, *keys, *measures).where(
+                rollup.grain == HOUR,
+                rollup.bucket_start >= lo,
+                rollup.bucket_start < hi,
+            )
+        rows = self.db.execute(query.group_by(bucket, *keys)).all()
+        if rows:
+            self.db.execute(
+                insert(rollup),
+                [
+                    {
+                        "grain": grain,
+                        "bucket_start": as_utc(row.bucket),
+                        **{k: getattr(row, k) for k in fact.keys},
+                        **{name: getattr(row, name) or 0 for name in fact.measures},
+                    }
+                    for row in rows
+                ],
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def complete_until(self, fact: RollupFact) -> Optional[datetime]:
+        """End of the rolled-up range, or None when reads must stay live"""
+        if not settings.DASHBOARD_READ_FROM_ROLLUPS:
+            return None
+        state = self.db.get(RollupWatermark, fact.name)
+        return as_utc(state.complete_until) if state is not None else None
+
+    @staticmethod
+    def plan(
+        start: datetime,
+        end: datetime,
+        complete_until: Optional[datetime],
+        period: Optional[str] = None,
+    ) -> List[Segment]:
+        """Split [start, end) into live edges and rolled-up buckets"""
+        first = ceil_to(start, HOUR)
+        covered = min(complete_until, floor_to(end, HOUR)) if complete_until else None
+        if covered is None or first >= covered:
+            return [Segment("live", start, end)]
+
+        segments = [Segment("live", start, first)]
+        day_lo, day_hi = ceil_to(first, DAY), floor_to(covered, DAY)
+        if period != HOUR and day_lo < day_hi:
+            segments += [
+                Segment(HOUR, first, day_lo),
+                Segment(DAY, day_lo, day_hi),
+                Segment(HOUR, day_hi, covered),
+            ]
+        else:
+            segments.append(Segment(HOUR, first, covered))
+        segments.append(Segment("live", covered, end))
+        return [s for s in segments if s.lo < s.hi]
+
+    def aggregate(
+        self,
+        fact: RollupFact,
+        start: datetime,
+        end: Optional[datetime] = None,
+        by: Sequence[str] = (),
+        period: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        counselor_id: Any = None,
+        not_null: Sequence[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """
+        Sums of every measure of `fact` over [start, end), grouped by the
+        `by` key columns and, if given, the hour/day `period` (UTC).
+        `not_null` skips rows whose key column is NULL.
+        Rows: {"period": datetime | None, <by>..., <measure>...}
+        """
+        end = end or datetime.now(timezone.utc)
+        conditions: List[Filter] = [
+            (lambda m, column=column: getattr(m, column).isnot(None))
+            for column in not_null
+        ]
+        if tenant_id:
+            conditions.append(lambda m: m.tenant_id == tenant_id)
+        if counselor_id is not None:
+            conditions.append(lambda m: m.counselor_id == counselor_id)
+
+        totals: Dict[tuple, Dict[str, Any]] = {}
+        for segment in self.plan(start, end, self.complete_until(fact), period):
+            for row in self._segment_rows(fact, segment, by, period, conditions):
+                bucket = as_utc(row.bucket) if period else None
+                if period:
+                    bucket = floor_to(bucket, period)
+                key = (bucket, *(getattr(row, k) for k in by))
+                acc = totals.get(key)
+                if acc is None:
+                    totals[key] = {
+                        name: _num(getattr(row, name)) for name in fact.measures
+                    }
+                else:
+                    for name in fact.measures:
+                        acc[name] += _num(getattr(row, name))
+
+        result = [
+            {"period": key[0], **dict(zip(by, key[1:])), **measures}
+            for key, measures in totals.items()
+        ]
+        if period:
+            result.sort(key=lambda r: r["period"])
+        return result
+
+    def _segment_rows(
+        self,
+        fact: RollupFact,
+        segment: Segment,
+        by: Sequence[str],
+        period: Optional[str],
+        conditions: Sequence[Filter],
+    ):
+        if segment.kind == "live":
+            model = fact.source
+            event = fact.event()
+            bucket_column = event
+            measures = [m.label(name) for name, m in fact.measures.items()]
+            where = [event >= segment.lo, event < segment.hi]
+        else:
+            model = fact.rollup
+            bucket_column = model.bucket_start
+            measures = [
+                func.sum(getattr(model, name)).label(name) for name in fact.measures
+            ]
+            where = [
+                model.grain == segment.kind,
+                model.bucket_start >= segment.lo,
+                model.bucket_start < segment.hi,
+            ]
+
+        groups = [getattr(model, k) for k in by]
+        if period:
+            # Rolled-up buckets are already aligned: group on bucket_start and
+            # fold hours into days in Python
+            bucket = (
+                self.bucket(bucket_column, period)
+                if segment.kind == "live"
+                else bucket_column
+            ).label("bucket")
+            groups.insert(0, bucket)
+        query = select(*groups, *measures).where(
+            and_(*where, *(condition(model) for condition in conditions))
+        )
+        if groups:
+            query = query.group_by(*groups)
+        else:
+            # An ungrouped aggregate over no rows is still one (all-zero) row;
+            # callers that add their own bucket (dashboard cache) would turn
+            # it into an empty period
+            query = query.having(func.count() > 0)
+        return self.db.execute(query).all()
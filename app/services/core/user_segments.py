@@ -0,0 +1,198 @@
+"""
+User Segmentation - power / active / at-risk / churned counselors in SQL
+
+The segments used to be assigned in Python after loading one row per
+counselor. Here the percentile threshold, the CASE assigning each
+counselor to a segment, the per-segment aggregates and the top-k members
+of each segment are all computed in one statement; at most
+(segments x top_k) rows come back.
+
+The power threshold is the session count at the nearest rank
+`floor(power_percentile * n)` among counselors with sessions (what the
+endpoint computed in Python), found with `row_number()` / `count()`
+window functions so the same query runs on PostgreSQL and SQLite.
+
+Thresholds come from a `SegmentationPolicy` (USER_SEGMENT_* settings).
+"""
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, case, desc, func, literal, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.selectable import CTE
+
+from app.core.config import settings
+from app.models.counselor import Counselor
+from app.services.core.cost_aggregation import CostAggregation
+from app.services.core.usage_rollups import as_utc
+
+POWER = "power_users"
+ACTIVE = "active_users"
+AT_RISK = "at_risk_users"
+CHURNED = "churned_users"
+SEGMENTS = (POWER, ACTIVE, AT_RISK, CHURNED)
+
+SUGGESTED_ACTIONS = {
+    POWER: "Upsell to premium tier",
+    ACTIVE: "Maintain engagement",
+    AT_RISK: "Send re-engagement email",
+    CHURNED: "Archive or remove",
+}
+
+
+@dataclass(frozen=True)
+class SegmentationPolicy:
+    """Segment thresholds; checked in order power, churned, at risk, active"""
+
+    power_percentile: float = 0.9
+    at_risk_days: int = 7
+    churned_days: int = 30
+    min_account_age_days: int = 7
+    top_k: int = 10
+
+    @classmethod
+    def from_settings(cls, **overrides: Any) -> "SegmentationPolicy":
+        values = dict(
+            power_percentile=settings.USER_SEGMENT_POWER_PERCENTILE,
+            at_risk_days=settings.USER_SEGMENT_AT_RISK_DAYS,
+            churned_days=settings.USER_SEGMENT_CHURNED_DAYS,
+            min_account_age_days=settings.USER_SEGMENT_MIN_ACCOUNT_AGE_DAYS,
+            top_k=settings.USER_SEGMENT_TOP_K,
+        )
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class UserSegmentation:
+    """Builds the segmentation CTE and reads the segment summary"""
+
+    def __init__(
+        self,
+        policy: Optional[SegmentationPolicy] = None,
+        tenant_id: Optional[str] = None,
+    ):
+        self.policy = policy or SegmentationPolicy.from_settings()
+        self.tenant_id = tenant_id
+
+    def segmented(self, start: datetime, now: datetime) -> CTE:
+        """One row per counselor: by_counselor() columns + `segment`"""
+        policy = self.policy
+        query = (
+            CostAggregation(self.tenant_id)
+            .by_counselor(start, active_only=False)
+            .where(
+                Counselor.created_at < now - timedelta(days=policy.min_account_age_days)
+            )
+        )
+        if self.tenant_id:
+            query = query.where(Counselor.tenant_id == self.tenant_id)
+        users = query.cte("segment_users")
+
+        ranked = (
+            select(
+                users.c.sessions,
+                func.row_number().over(order_by=users.c.sessions).label("position"),
+                func.count().over().label("population"),
+            )
+            .where(users.c.sessions > 0)
+            .cte("session_ranks")
+        )
+        # The row at 0-based index floor(p * n); comparisons instead of a
+        # cast because PostgreSQL rounds when casting to integer
+        rank = literal(policy.power_percentile) * ranked.c.population
+        threshold = (
+            select(func.min(ranked.c.sessions))
+            .where(ranked.c.position - 1 <= rank, rank < ranked.c.position)
+            .scalar_subquery()
+        )
+
+        last_activity = users.c.last_activity
+        segment = case(
+            (last_activity.is_(None), CHURNED),
+            (and_(users.c.sessions > 0, users.c.sessions >= threshold), POWER),
+            (last_activity <= now - timedelta(days=policy.churned_days), CHURNED),
+            (last_activity <= now - timedelta(days=policy.at_risk_days), AT_RISK),
+            else_=ACTIVE,
+        )
+        return select(*users.c, segment.label("segment")).cte("segmented_users")
+
+    def summary(self, db: Session, start: datetime, now: datetime) -> Dict[str, Dict]:
+        """The user-segments response: aggregates + top_k members per segment"""
+        segmented = self.segmented(start, now)
+        # One statement: per-segment aggregates ride on every member row as
+        # window functions; one row is kept per segment even when top_k=0
+        by_segment = {"partition_by": segmented.c.segment}
+        ranked = select(
+            segmented.c.segment,
+            segmented.c.email,
+            segmented.c.sessions,
+            segmented.c.duration_seconds,
+            segmented.c.last_activity,
+            segmented.c.days_used,
+            segmented.c.total_cost_usd,
+            func.row_number()
+            .over(
+                order_by=(desc(segmented.c.sessions), segmented.c.email), **by_segment
+            )
+            .label("position"),
+            func.count().over(**by_segment).label("segment_count"),
+            func.avg(segmented.c.sessions).over(**by_segment).label("avg_sessions"),
+            func.avg(segmented.c.total_cost_usd)
+            .over(**by_segment)
+            .label("avg_cost_usd"),
+        ).subquery()
+        rows = db.execute(
+            select(ranked)
+            .where(ranked.c.position <= max(self.policy.top_k, 1))
+            .order_by(ranked.c.segment, ranked.c.position)
+        ).all()
+
+        result = {name: self._empty(name) for name in SEGMENTS}
+        for row in rows:
+            entry = result[row.segment]
+            if row.position == 1:
+                entry["count"] = int(row.segment_count)
+                if "avg_sessions" in entry:
+                    entry["avg_sessions"] = round(float(row.avg_sessions), 1)
+                    entry["avg_cost_usd"] = round(float(row.avg_cost_usd), 2)
+            if row.position <= self.policy.top_k:
+                entry["users"].append(_member(row, now))
+        return result
+
+    @staticmethod
+    def _empty(name: str) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"count": 0}
+        if name in (POWER, ACTIVE):
+            entry.update(avg_sessions=0, avg_cost_usd=0)
+        entry.update(suggested_action=SUGGESTED_ACTIONS[name], users=[])
+        return entry
+
+
+def _member(row: Row, now: datetime) -> Dict[str, Any]:
+    last_activity = as_utc(row.last_activity)
+    if last_activity is None:
+        return {
+            "email": row.email,
+            "sessions": 0,
+            "last_activity": None,
+            "total_cost_usd": 0,
+            "total_duration_minutes": 0,
+            "days_used": 0,
+        }
+    member = {
+        "email": row.email,
+        "sessions": int(row.sessions),
+        "last_activity": last_activity.strftime("%Y-%m-%d %H:%M"),
+    }
+    if row.segment in (POWER, ACTIVE):
+        member["total_cost_usd"] = round(float(row.total_cost_usd), 2)
+    else:
+        member["days_inactive"] = (now - last_activity).days
+    member["total_duration_minutes"] = round(float(row.duration_seconds) / 60, 1)
+    member["days_used"] = int(row.days_used)
+    return member
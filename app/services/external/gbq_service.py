@@ -1,15 +1,28 @@
 """
 BigQuery Service for Realtime Analysis Persistence
 Handles asynchronous writes to BigQuery for analysis results logging.
+Request paths enqueue rows; batches are written by app.services.external.gbq_sink.
 """
+import asyncio
+import json as json_module
 import logging
 import os
+import threading
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 from google.cloud import bigquery
 
+from app.core.config import settings
+from app.services.external.gbq_sink import (
+    AnalysisLogSink,
+    BigQuerySink,
+    BufferedLogWriter,
+    JsonlFileSink,
+    SQLiteSink,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,6 +34,8 @@ class GBQService:
         self.dataset_id = os.getenv("REALTIME_DATASET_ID", "realtime_logs")
         self.table_id = os.getenv("REALTIME_TABLE_ID", "realtime_analysis_logs")
         self._client: Optional[bigquery.Client] = None  # Lazy initialization
+        self._writer: Optional[BufferedLogWriter] = None
+        self._writer_lock = threading.Lock()
 
     @property
     def client(self) -> bigquery.Client:
@@ -33,8 +48,95 @@ class GBQService:
         """Get fully qualified table reference"""
         return f"{self.project_id}.{self.dataset_id}.{self.table_id}"
 
+    def build_row(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map analysis data to a JSON-serializable BigQuery row
+
+        See write_analysis_log for the accepted keys.
+        """
+        # Get timestamps with defaults
+        analyzed_at = data.get("analyzed_at", datetime.now(timezone.utc))
+        created_at = data.get("created_at", datetime.now(timezone.utc))
+
+        # Convert datetime to ISO format string for JSON serialization
+        analyzed_at_str = (
+            analyzed_at.isoformat()
+            if isinstance(analyzed_at, datetime)
+            else analyzed_at
+        )
+        created_at_str = (
+            created_at.isoformat() if isinstance(created_at, datetime) else created_at
+        )
+
+        # Serialize JSON fields (BigQuery JSON type expects JSON strings)
+        def serialize_json(value):
+            """Serialize dict/list to JSON string for BigQuery JSON fields"""
+            if value is None:
+                return None
+            if isinstance(value, (dict, list)):
+                return json_module.dumps(value, ensure_ascii=False)
+            return value
+
+        # Get optional timestamps
+        updated_at = data.get("updated_at")
+        deleted_at = data.get("deleted_at")
+
+        updated_at_str = (
+            (updated_at.isoformat() if isinstance(updated_at, datetime) else updated_at)
+            if updated_at
+            else None
+        )
+
+        deleted_at_str = (
+            (deleted_at.isoformat() if isinstance(deleted_at, datetime) else deleted_at)
+            if deleted_at
+            else None
+        )
+
+        # Prepare row for insertion (aligned with SessionAnalysisLog schema)
+        row = {
+            # Core identifiers
+            "id": data.get("id", str(uuid.uuid4())),
+            "session_id": data.get("session_id"),
+            "counselor_id": data.get("counselor_id"),
+            "tenant_id": data.get("tenant_id", "island_parents"),
+            # Timestamps
+            "created_at": created_at_str,
+            "updated_at": updated_at_str,
+            "deleted_at": deleted_at_str,
+            "analyzed_at": analyzed_at_str,
+            # Analysis metadata
+            "analysis_type": data.get("analysis_type"),
+            "transcript_segment": data.get("transcript_segment"),
+            "result_data": serialize_json(data.get("result_data")),
+            # Safety assessment
+            "safety_level": data.get("safety_level"),
+            "severity": data.get("severity"),
+            "display_text": data.get("display_text"),
+            "action_suggestion": data.get("action_suggestion"),
+            "risk_indicators": serialize_json(data.get("risk_indicators")),
+            # RAG information
+            "rag_documents": serialize_json(data.get("rag_documents")),
+            "rag_sources": serialize_json(data.get("rag_sources")),
+            # Technical metrics
+            "transcript_length": data.get("transcript_length"),
+            "duration_seconds": data.get("duration_seconds"),
+            "model_name": data.get("model_name"),
+            # Token usage
+            "token_usage": serialize_json(data.get("token_usage")),
+            "prompt_tokens": data.get("prompt_tokens"),
+            "completion_tokens": data.get("completion_tokens"),
+            "total_tokens": data.get("total_tokens"),
+            "cached_tokens": data.get("cached_tokens"),
+            # Cost
+            "estimated_cost_usd": data.get("estimated_cost_usd"),
+        }
+        return row
+
     async def write_analysis_log(self, data: Dict[str, Any]) -> bool:
-        """Write session analysis log to BigQuery asynchronously
+        """Write one session analysis log to BigQuery immediately
+
+        Prefer `enqueue_analysis_log` on request paths; this performs a
+        streaming insert per call (run in a worker thread).
 
         Args:
             data: Analysis data containing (aligned with SessionAnalysisLog model):
@@ -88,99 +190,13 @@ class GBQService:
             No exceptions raised - all errors are caught and logged
         """
         try:
-            # Get timestamps with defaults
-            analyzed_at = data.get("analyzed_at", datetime.now(timezone.utc))
-            created_at = data.get("created_at", datetime.now(timezone.utc))
-
-            # Convert datetime to ISO format string for JSON serialization
-            analyzed_at_str = (
-                analyzed_at.isoformat()
-                if isinstance(analyzed_at, datetime)
-                else analyzed_at
-            )
-            created_at_str = (
-                created_at.isoformat()
-                if isinstance(created_at, datetime)
-                else created_at
-            )
-
-            # Serialize JSON fields (BigQuery JSON type expects JSON strings)
-            import json as json_module
-
-            def serialize_json(value):
-                """Serialize dict/list to JSON string for BigQuery JSON fields"""
-                if value is None:
-                    return None
-                if isinstance(value, (dict, list)):
-                    return json_module.dumps(value, ensure_ascii=False)
-                return value
-
-            # Get optional timestamps
-            updated_at = data.get("updated_at")
-            deleted_at = data.get("deleted_at")
-
-            updated_at_str = (
-                (
-                    updated_at.isoformat()
-                    if isinstance(updated_at, datetime)
-                    else updated_at
-                )
-                if updated_at
-                else None
-            )
-
-            deleted_at_str = (
-                (
-                    deleted_at.isoformat()
-                    if isinstance(deleted_at, datetime)
-                    else deleted_at
-                )
-                if deleted_at
-                else None
-            )
-
-            # Prepare row for insertion (aligned with SessionAnalysisLog schema)
-            row = {
-                # Core identifiers
-                "id": data.get("id", str(uuid.uuid4())),
-                "session_id": data.get("session_id"),
-                "counselor_id": data.get("counselor_id"),
-                "tenant_id": data.get("tenant_id", "island_parents"),
-                # Timestamps
-                "created_at": created_at_str,
-                "updated_at": updated_at_str,
-                "deleted_at": deleted_at_str,
-                "analyzed_at": analyzed_at_str,
-                # Analysis metadata
-                "analysis_type": data.get("analysis_type"),
-                "transcript_segment": data.get("transcript_segment"),
-                "result_data": serialize_json(data.get("result_data")),
-                # Safety assessment
-                "safety_level": data.get("safety_level"),
-                "severity": data.get("severity"),
-                "display_text": data.get("display_text"),
-                "action_suggestion": data.get("action_suggestion"),
-                "risk_indicators": serialize_json(data.get("risk_indicators")),
-                # RAG information
-                "rag_documents": serialize_json(data.get("rag_documents")),
-                "rag_sources": serialize_json(data.get("rag_sources")),
-                # Technical metrics
-                "transcript_length": data.get("transcript_length"),
-                "duration_seconds": data.get("duration_seconds"),
-                "model_name": data.get("model_name"),
-                # Token usage
-                "token_usage": serialize_json(data.get("token_usage")),
-                "prompt_tokens": data.get("prompt_tokens"),
-                "completion_tokens": data.get("completion_tokens"),
-                "total_tokens": data.get("total_tokens"),
-                "cached_tokens": data.get("cached_tokens"),
-                # Cost
-                "estimated_cost_usd": data.get("estimated_cost_usd"),
-            }
+            row = self.build_row(data)
 
             # Insert row into BigQuery
             table_ref = self._get_table_ref()
-            errors = self.client.insert_rows_json(table_ref, [row])
+            errors = await asyncio.to_thread(
+                self.client.insert_rows_json, table_ref, [row]
+            )
 
             if errors:
                 logger.error(f"BigQuery insert failed for table {table_ref}: {errors}")
@@ -200,6 +216,56 @@ class GBQService:
             )
             return False
 
+    def enqueue_analysis_log(self, data: Dict[str, Any]) -> bool:
+        """Queue one analysis log for a batched write (non-blocking)
+
+        Rows are written by the configured sink (settings.GBQ_SINK_BACKEND)
+        in batches; failures are retried and then spooled to the dead-letter
+        JSONL file. Never raises.
+
+        Returns:
+            bool: True if queued, False if it could not be queued
+        """
+        try:
+            return self.writer.enqueue(self.build_row(data))
+        except Exception as e:
+            logger.error(f"Failed to enqueue analysis log: {e}", exc_info=True)
+            return False
+
+    @property
+    def writer(self) -> BufferedLogWriter:
+        """Buffered writer for the configured sink (created on first use)"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = BufferedLogWriter(
+                        sink=self._create_sink(),
+                        batch_size=settings.GBQ_BATCH_SIZE,
+                        flush_interval_seconds=settings.GBQ_FLUSH_INTERVAL_SECONDS,
+                        max_queue_size=settings.GBQ_QUEUE_MAX_SIZE,
+                        max_retries=settings.GBQ_MAX_RETRIES,
+                        dead_letter_path=settings.GBQ_DEAD_LETTER_PATH,
+                    )
+        return self._writer
+
+    def _create_sink(self) -> AnalysisLogSink:
+        backend = settings.GBQ_SINK_BACKEND
+        if backend == "jsonl":
+            return JsonlFileSink(settings.GBQ_SINK_PATH or "logs/analysis_logs.jsonl")
+        if backend == "sqlite":
+            return SQLiteSink(settings.GBQ_SINK_PATH or "logs/analysis_logs.db")
+        return BigQuerySink(lambda: self.client, self._get_table_ref())
+
+    def flush(self) -> None:
+        """Write all queued analysis logs now"""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """Flush queued analysis logs and stop the writer (app shutdown)"""
+        if self._writer is not None:
+            self._writer.close()
+
     def ensure_dataset_exists(self) -> bool:
         """Ensure the BigQuery dataset exists
 
@@ -0,0 +1,252 @@
+"""
+Buffered analysis-log sink for BigQuery (and local backends for offline tests)
+
+Request handlers only enqueue a row. A background thread drains the bounded
+queue and writes batches when either `batch_size` rows are waiting or the
+oldest row is `flush_interval_seconds` old. Failed batches are retried with
+backoff and finally spooled to a local JSONL dead-letter file, so a BigQuery
+outage never blocks or fails an analysis request.
+
+Backends:
+- BigQuerySink: batched `insert_rows_json` (streaming insert, deduplicated
+  on the row id so a retried batch does not insert twice)
+- JsonlFileSink: append rows to a JSONL file
+- SQLiteSink: store rows in a local SQLite table (queryable in tests)
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SinkWriteError(Exception):
+    """Raised by a sink when a batch could not be written"""
+
+
+class AnalysisLogSink(ABC):
+    """Backend interface: write a batch of JSON-serializable rows"""
+
+    name = "base"
+
+    @abstractmethod
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Write rows or raise SinkWriteError"""
+
+
+class BigQuerySink(AnalysisLogSink):
+    """Batched streaming inserts into one BigQuery table"""
+
+    name = "bigquery"
+
+    def __init__(self, client_factory: Callable[[], Any], table_ref: str):
+        # Factory keeps the client lazy (no credentials needed until a flush)
+        self._client_factory = client_factory
+        self.table_ref = table_ref
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        # insertId = row id: BigQuery drops duplicates when a batch whose
+        # response was lost is retried
+        errors = self._client_factory().insert_rows_json(
+            self.table_ref, rows, row_ids=[row["id"] for row in rows]
+        )
+        if errors:
+            raise SinkWriteError(
+                f"BigQuery insert failed for {self.table_ref}: {errors}"
+            )
+
+
+class JsonlFileSink(AnalysisLogSink):
+    """Append rows to a local JSONL file (offline development / tests)"""
+
+    name = "jsonl"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        _append_jsonl(self.path, rows)
+
+
+class SQLiteSink(AnalysisLogSink):
+    """Store rows in a local SQLite table `analysis_logs(id, payload)`"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_logs "
+                "(id TEXT, payload TEXT NOT NULL)"
+            )
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        with sqlite3.connect(self.path) as conn:
+            conn.executemany(
+                "INSERT INTO analysis_logs (id, payload) VALUES (?, ?)",
+                [
+                    (row.get("id"), json.dumps(row, ensure_ascii=False, default=str))
+                    for row in rows
+                ],
+            )
+
+    def read_rows(self) -> List[Dict[str, Any]]:
+        with sqlite3.connect(self.path) as conn:
+            return [
+                json.loads(payload)
+                for (payload,) in conn.execute(
+                    "SELECT payload FROM analysis_logs ORDER BY rowid"
+                )
+            ]
+
+
+def _append_jsonl(path: str, rows: List[Dict[str, Any]]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+class BufferedLogWriter:
+    """Bounded in-process queue + background batch writer for a sink"""
+
+    def __init__(
+        self,
+        sink: AnalysisLogSink,
+        batch_size: int = 200,
+        flush_interval_seconds: float = 2.0,
+        max_queue_size: int = 10000,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 0.5,
+        dead_letter_path: Optional[str] = None,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.dead_letter_path = dead_letter_path
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        # Serializes batch writes between the worker and explicit flush()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"enqueued": 0, "written": 0, "dead_lettered": 0, "batches": 0}
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """Queue a row for writing (never blocks)
+
+        Returns:
+            False if the queue was full and the row went to the dead letter
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Analysis log queue full - spooling row to dead letter")
+            self._dead_letter([row])
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    def flush(self) -> None:
+        """Write everything queued so far (blocks until done)"""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the worker and flush remaining rows (call on shutdown)"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout)
+        self.flush()
+        self._stop.clear()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.sink.name}-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            # Fill the batch until it is full or the oldest row is due
+            while len(batch) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=min(remaining, 0.2)))
+                except queue.Empty:
+                    continue
+            self._write_batch(batch)
+
+    def _drain(self, limit: int) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        with self._write_lock:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.sink.write_rows(batch)
+                    self.stats["written"] += len(batch)
+                    self.stats["batches"] += 1
+                    return
+                except Exception as e:
+                    logger.warning(
+                        f"{self.sink.name} sink write failed "
+                        f"(attempt {attempt + 1}/{self.max_retries + 1}, "
+                        f"{len(batch)} rows): {e}"
+                    )
+                    if attempt < self.max_retries:
+                        time.sleep(self.retry_backoff_seconds * (2**attempt))
+            self._dead_letter(batch)
+
+    def _dead_letter(self, rows: List[Dict[str, Any]]) -> None:
+        self.stats["dead_lettered"] += len(rows)
+        if not self.dead_letter_path:
+            logger.error(f"Dropped {len(rows)} analysis log rows (no dead letter path)")
+            return
+        try:
+            _append_jsonl(self.dead_letter_path, rows)
+            logger.error(
+                f"Spooled {len(rows)} analysis log rows to {self.dead_letter_path}"
+            )
+        except OSError as e:
+            logger.error(f"Failed to spool {len(rows)} rows to dead letter: {e}")
@@ -3,10 +3,10 @@ Client-Case Query Builder
 Complex SQLAlchemy query building logic extracted from ClientCaseService
 """
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, or_, select
 
 from app.models.case import Case
 from app.models.client import Client
@@ -17,17 +17,32 @@ from app.services.helpers.client_case_helpers import (
     normalize_case_status,
 )
 
+# Clients without sessions sort after every real date (NULLS LAST, portable)
+NO_SESSION_SENTINEL = datetime(1900, 1, 1, tzinfo=timezone.utc)
 
-def build_client_case_list_query(tenant_id: str, counselor_id: UUID):
+
+def build_client_case_list_query(
+    tenant_id: str,
+    counselor_id: UUID,
+    search: Optional[str] = None,
+    case_status: Optional[int] = None,
+):
     """
     Build complex query for client-case list with session statistics.
 
+    Session count and last session date are aggregated in SQL (restricted to
+    this counselor's cases), and the main query exposes a `sort_key` column
+    so ordering and keyset pagination happen in the database:
+    ORDER BY coalesce(last_session_date, sentinel) DESC, client_id DESC
+
     Args:
         tenant_id: Tenant ID for multi-tenant isolation
         counselor_id: Counselor ID for counselor-level isolation
+        search: Optional client name / code substring filter
+        case_status: Optional case status filter (0/1/2)
 
     Returns:
-        Tuple of (main_query, count_query)
+        Tuple of (main_query, count_query, sort_key)
     """
     # Subquery: first case per client (only for this counselor)
     case_subquery = (
@@ -44,21 +59,46 @@ def build_client_case_list_query(tenant_id: str, counselor_id: UUID):
         .subquery()
     )
 
-    # Subquery: session stats per case
+    # Subquery: session stats per case, only over this counselor's cases
     session_stats_subquery = (
         select(
             SessionModel.case_id,
             func.count(SessionModel.id).label("total_sessions"),
             func.max(SessionModel.session_date).label("last_session_date"),
         )
+        .join(Case, SessionModel.case_id == Case.id)
         .where(
             SessionModel.tenant_id == tenant_id,
             SessionModel.deleted_at.is_(None),
+            Case.counselor_id == counselor_id,
         )
         .group_by(SessionModel.case_id)
         .subquery()
     )
 
+    sort_key = func.coalesce(
+        session_stats_subquery.c.last_session_date, NO_SESSION_SENTINEL
+    )
+
+    conditions = [
+        Client.tenant_id == tenant_id,
+        Client.counselor_id == counselor_id,
+        Client.deleted_at.is_(None),
+    ]
+    if search:
+        search_pattern = f"%{search}%"
+        conditions.append(
+            or_(Client.name.ilike(search_pattern), Client.code.ilike(search_pattern))
+        )
+
+    first_case_join = (
+        (Case.client_id == Client.id)
+        & (Case.created_at == case_subquery.c.first_case_created_at)
+        & (Case.deleted_at.is_(None))
+    )
+    if case_status is not None:
+        first_case_join = first_case_join & (Case.status == case_status)
+
     # Main query: join clients with first case and session stats
     query = (
         select(
@@ -66,35 +106,26 @@ def build_client_case_list_query(tenant_id: str, counselor_id: UUID):
             Case,
             session_stats_subquery.c.total_sessions,
             session_stats_subquery.c.last_session_date,
+            sort_key.label("sort_key"),
         )
         .join(case_subquery, Client.id == case_subquery.c.client_id)
-        .join(
-            Case,
-            (Case.client_id == Client.id)
-            & (Case.created_at == case_subquery.c.first_case_created_at)
-            & (Case.deleted_at.is_(None)),
-        )
+        .join(Case, first_case_join)
         .outerjoin(session_stats_subquery, Case.id == session_stats_subquery.c.case_id)
-        .where(
-            Client.tenant_id == tenant_id,
-            Client.counselor_id == counselor_id,
-            Client.deleted_at.is_(None),
-        )
+        .where(*conditions)
+        .order_by(sort_key.desc(), Client.id.desc())
     )
 
     # Count query
-    count_query = select(func.count()).select_from(
+    count_base = (
         select(Client.id)
         .join(case_subquery, Client.id == case_subquery.c.client_id)
-        .where(
-            Client.tenant_id == tenant_id,
-            Client.counselor_id == counselor_id,
-            Client.deleted_at.is_(None),
-        )
-        .subquery()
+        .where(*conditions)
     )
+    if case_status is not None:
+        count_base = count_base.join(Case, first_case_join)
+    count_query = select(func.count()).select_from(count_base.subquery())
 
-    return query, count_query
+    return query, count_query, sort_key
 
 
 def format_client_case_list_item(
@@ -121,21 +152,3 @@ def format_client_case_list_item(
         "case_created_at": case.created_at,
         "case_updated_at": case.updated_at,
     }
-
-
-def sort_items_by_last_session_date(
-    items: List[Dict[str, Any]],
-) -> List[Dict[str, Any]]:
-    """Sort items by last_session_date (newest first)."""
-    min_datetime = datetime.min.replace(tzinfo=timezone.utc)
-
-    def sort_key(item):
-        dt = item["last_session_date"]
-        if dt is None:
-            return min_datetime
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
-
-    items.sort(key=sort_key, reverse=True)
-    return items
@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from typing import List, Optional, Tuple
 
 from app.schemas.session import SessionCreateRequest
+from app.services.analysis.sanitizer_service import sanitizer_service
 
 
 def process_transcript_data(request: SessionCreateRequest) -> Optional[str]:
@@ -15,6 +16,25 @@ def process_transcript_data(request: SessionCreateRequest) -> Optional[str]:
     return request.transcript
 
 
+def sanitize_transcript(
+    transcript: Optional[str],
+    previous_transcript: Optional[str] = None,
+    previous_sanitized: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Sanitize a transcript for `transcript_sanitized`.
+
+    When the new transcript only appends to `previous_transcript`, only the
+    tail is re-scanned (see SanitizerService.sanitize_incremental).
+    """
+    if not transcript:
+        return transcript
+    result = sanitizer_service.sanitize_incremental(
+        previous_transcript, previous_sanitized, transcript
+    )
+    return result["sanitized_text"]
+
+
 def process_recordings_data(request: SessionCreateRequest) -> List[dict]:
     """Convert recordings to dict format for storage"""
     if not request.recordings:
@@ -0,0 +1,420 @@
+"""
+Corpus Stats - transactionally maintained counters for the RAG corpus
+
+The stats page used to count datasources / documents / chunks / embeddings
+with five COUNT(*) scans and group every chunk and embedding per document
+on each load. The counters now live in two small tables:
+
+- `rag_document_stats`: chunks, embeddings and chunk text length per
+  (document, chunk strategy)
+- `rag_category_stats`: the same plus datasources, documents and bytes per
+  document category; corpus totals are the sum over the category rows
+
+Maintenance happens in the transaction that changes the corpus (ingest,
+reprocess, strategy generation, delete), so a rollback also rolls back the
+counters. Increments are single-statement upserts (`col = col + delta`),
+so concurrent ingests of the same category do not lose updates.
+
+`check()` (POST /api/internal/check-rag-corpus-stats) recomputes both
+tables from the source rows and reports drift; with fix=True the drifted
+rows are rewritten.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.document import (
+    Chunk,
+    CorpusCategoryStats,
+    Document,
+    DocumentChunkStats,
+    Embedding,
+)
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_COUNTERS = ("chunks_count", "embeddings_count", "text_chars")
+CATEGORY_COUNTERS = (
+    "datasources_count",
+    "documents_count",
+    "bytes",
+    *DOCUMENT_COUNTERS,
+)
+_COUNTERS = {
+    DocumentChunkStats: DOCUMENT_COUNTERS,
+    CorpusCategoryStats: CATEGORY_COUNTERS,
+}
+
+
+@dataclass
+class CorpusStatsReport:
+    """Result of CorpusStatsService.check"""
+
+    documents_checked: int
+    categories_checked: int
+    document_drifts: List[Dict[str, Any]]
+    category_drifts: List[Dict[str, Any]]
+    fixed: bool
+
+
+class CorpusStatsService:
+    """Maintain and read the materialized RAG corpus counters"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ------------------------------------------------------------------
+    # Maintenance (call inside the transaction that changes the corpus)
+    # ------------------------------------------------------------------
+
+    def document_added(self, document: Document, new_datasource: bool = True) -> None:
+        """Count a new document (and its datasource, if it was created with it)"""
+        self._increment(
+            CorpusCategoryStats,
+            {"category": document.category or "general"},
+            {
+                "datasources_count": 1 if new_datasource else 0,
+                "documents_count": 1,
+                "bytes": document.bytes or 0,
+            },
+        )
+
+    def chunks_added(
+        self,
+        document: Document,
+        chunk_strategy: str,
+        chunks: int,
+        embeddings: int,
+        text_chars: int,
+    ) -> None:
+        """Count chunks (and their embeddings) added to a document"""
+        if not chunks and not embeddings:
+            return
+        deltas = {
+            "chunks_count": chunks,
+            "embeddings_count": embeddings,
+            "text_chars": text_chars,
+        }
+        self._increment(
+            DocumentChunkStats,
+            {"doc_id": document.id, "chunk_strategy": chunk_strategy},
+            deltas,
+        )
+        self._increment(
+            CorpusCategoryStats, {"category": document.category or "general"}, deltas
+        )
+
+    def chunks_removed(self, document: Document) -> Dict[str, int]:
+        """
+        Uncount every chunk of a document. Call before the chunks are deleted:
+        the amounts subtracted are taken from the rows about to go, so they
+        are exact even if the per-document counters had drifted.
+
+        Returns:
+            {"chunks": n, "embeddings": n} that were counted
+        """
+        row = self.db.execute(
+            select(
+                func.count(Chunk.id).label("chunks"),
+                func.count(Embedding.id).label("embeddings"),
+                func.coalesce(func.sum(func.length(Chunk.text)), 0).label("text_chars"),
+            )
+            .select_from(Chunk)
+            .outerjoin(Embedding, Embedding.chunk_id == Chunk.id)
+            .where(Chunk.doc_id == document.id)
+        ).one()
+        self.db.execute(
+            delete(DocumentChunkStats).where(DocumentChunkStats.doc_id == document.id)
+        )
+        if row.chunks:
+            self._increment(
+                CorpusCategoryStats,
+                {"category": document.category or "general"},
+                {
+                    "chunks_count": -row.chunks,
+                    "embeddings_count": -row.embeddings,
+                    "text_chars": -int(row.text_chars),
+                },
+            )
+        return {"chunks": row.chunks, "embeddings": row.embeddings}
+
+    def document_removed(self, document: Document) -> None:
+        """
+        Uncount a document (after `chunks_removed`, before the delete). Its
+        datasource is uncounted too unless another document still uses it.
+        """
+        datasource_shared = self.db.execute(
+            select(Document.id)
+            .where(
+                Document.datasource_id == document.datasource_id,
+                Document.id != document.id,
+            )
+            .limit(1)
+        ).first()
+        self._increment(
+            CorpusCategoryStats,
+            {"category": document.category or "general"},
+            {
+                "datasources_count": 0 if datasource_shared else -1,
+                "documents_count": -1,
+                "bytes": -(document.bytes or 0),
+            },
+        )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def categories(self) -> List[CorpusCategoryStats]:
+        """All category rows (one per document category, a handful)"""
+        return list(
+            self.db.execute(
+                select(CorpusCategoryStats).order_by(CorpusCategoryStats.category)
+            ).scalars()
+        )
+
+    @staticmethod
+    def totals(categories: List[CorpusCategoryStats]) -> Dict[str, int]:
+        """Corpus totals from the category rows"""
+        return {
+            name: sum(getattr(row, name) or 0 for row in categories)
+            for name in CATEGORY_COUNTERS
+        }
+
+    def document_page(
+        self, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        One page of documents (newest first) with their per-strategy
+        counters; a document without chunks yields one row with
+        chunk_strategy None.
+
+        Returns:
+            (rows, next_cursor)
+
+        Raises:
+            InvalidCursorError: If cursor cannot be decoded
+        """
+        page = select(
+            Document.id,
+            Document.title,
+            Document.category,
+            Document.pages,
+            Document.bytes,
+            Document.text_length,
+            Document.created_at,
+        )
+        if cursor:
+            cursor_time, cursor_id = decode_cursor(cursor, types=(datetime, int))
+            page = page.where(
+                keyset_after(
+                    [Document.created_at, Document.id], [cursor_time, cursor_id]
+                )
+            )
+        page = (
+            page.order_by(Document.created_at.desc(), Document.id.desc())
+            .limit(limit + 1)
+            .subquery()
+        )
+        rows = self.db.execute(
+            select(
+                page,
+                DocumentChunkStats.chunk_strategy,
+                DocumentChunkStats.chunks_count,
+                DocumentChunkStats.embeddings_count,
+                DocumentChunkStats.text_chars,
+            )
+            .outerjoin(DocumentChunkStats, DocumentChunkStats.doc_id == page.c.id)
+            .order_by(
+                page.c.created_at.desc(),
+                page.c.id.desc(),
+                DocumentChunkStats.chunk_strategy,
+            )
+        ).all()
+
+        doc_ids = list(dict.fromkeys(row.id for row in rows))
+        next_cursor = None
+        if len(doc_ids) > limit:
+            rows = [row for row in rows if row.id != doc_ids[limit]]
+            last = rows[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return rows, next_cursor
+
+    def document_chunk_count(
+        self, doc_id: int, chunk_strategy: Optional[str] = None
+    ) -> int:
+        """Chunks of one document (optionally one strategy) from the counters"""
+        query = select(
+            func.coalesce(func.sum(DocumentChunkStats.chunks_count), 0)
+        ).where(DocumentChunkStats.doc_id == doc_id)
+        if chunk_strategy:
+            query = query.where(DocumentChunkStats.chunk_strategy == chunk_strategy)
+        return int(self.db.execute(query).scalar())
+
+    # ------------------------------------------------------------------
+    # Consistency check
+    # ------------------------------------------------------------------
+
+    def check(self, fix: bool = False) -> CorpusStatsReport:
+        """
+        Recompute the counters from documents / chunks / embeddings and
+        compare them with the stored rows. With fix=True every drifted row
+        is rewritten (missing rows inserted, stale rows deleted); the caller
+        commits.
+
+        This is the full scan the counters exist to avoid: run it from the
+        scheduler, not per request.
+        """
+        actual_docs = {
+            (row.doc_id, row.chunk_strategy): {
+                name: int(row._mapping[name]) for name in DOCUMENT_COUNTERS
+            }
+            for row in self.db.execute(
+                select(
+                    Chunk.doc_id,
+                    Chunk.chunk_strategy,
+                    func.count(Chunk.id).label("chunks_count"),
+                    func.count(Embedding.id).label("embeddings_count"),
+                    func.coalesce(func.sum(func.length(Chunk.text)), 0).label(
+                        "text_chars"
+                    ),
+                )
+                .outerjoin(Embedding, Embedding.chunk_id == Chunk.id)
+                .group_by(Chunk.doc_id, Chunk.chunk_strategy)
+            )
+        }
+        stored_docs = {
+            (row.doc_id, row.chunk_strategy): row
+            for row in self.db.execute(select(DocumentChunkStats)).scalars()
+        }
+        document_drifts = self._drifts(
+            actual_docs, stored_docs, DOCUMENT_COUNTERS, ("doc_id", "chunk_strategy")
+        )
+
+        chunk_sums = {}
+        for (doc_id, _), counters in actual_docs.items():
+            sums = chunk_sums.setdefault(doc_id, dict.fromkeys(DOCUMENT_COUNTERS, 0))
+            for name in DOCUMENT_COUNTERS:
+                sums[name] += counters[name]
+        actual_categories: Dict[Tuple[str], Dict[str, int]] = {}
+        datasources: Dict[str, set] = {}
+        documents_checked = 0
+        for doc_id, category, datasource_id, size in self.db.execute(
+            select(
+                Document.id, Document.category, Document.datasource_id, Document.bytes
+            )
+        ):
+            documents_checked += 1
+            category = category or "general"
+            counters = actual_categories.setdefault(
+                (category,), dict.fromkeys(CATEGORY_COUNTERS, 0)
+            )
+            datasources.setdefault(category, set()).add(datasource_id)
+            counters["documents_count"] += 1
+            counters["bytes"] += size or 0
+            for name, value in chunk_sums.get(doc_id, {}).items():
+                counters[name] += value
+        for (category,), counters in actual_categories.items():
+            counters["datasources_count"] = len(datasources[category])
+        stored_categories = {
+            (row.category,): row
+            for row in self.db.execute(select(CorpusCategoryStats)).scalars()
+        }
+        category_drifts = self._drifts(
+            actual_categories, stored_categories, CATEGORY_COUNTERS, ("category",)
+        )
+
+        if fix and (document_drifts or category_drifts):
+            self._rewrite(
+                DocumentChunkStats,
+                actual_docs,
+                stored_docs,
+                document_drifts,
+                ("doc_id", "chunk_strategy"),
+            )
+            self._rewrite(
+                CorpusCategoryStats,
+                actual_categories,
+                stored_categories,
+                category_drifts,
+                ("category",),
+            )
+            self.db.flush()
+            logger.warning(
+                "Repaired RAG corpus stats drift: %d document rows, %d category rows",
+                len(document_drifts),
+                len(category_drifts),
+            )
+
+        return CorpusStatsReport(
+            documents_checked=documents_checked,
+            categories_checked=len(actual_categories),
+            document_drifts=document_drifts,
+            category_drifts=category_drifts,
+            fixed=fix and bool(document_drifts or category_drifts),
+        )
+
+    @staticmethod
+    def _drifts(actual, stored, counters, key_names) -> List[Dict[str, Any]]:
+        drifts = []
+        for key in sorted(set(actual) | set(stored), key=str):
+            expected = actual.get(key, dict.fromkeys(counters, 0))
+            row = stored.get(key)
+            recorded = {
+                name: (getattr(row, name) or 0) if row else 0 for name in counters
+            }
+            if row is None or recorded != expected:
+                drifts.append(
+                    {
+                        **dict(zip(key_names, key)),
+                        "stored": recorded if row is not None else None,
+                        "actual": expected if key in actual else None,
+                    }
+                )
+        return drifts
+
+    def _rewrite(self, model, actual, stored, drifts, key_names) -> None:
+        for drift in drifts:
+            key = tuple(drift[name] for name in key_names)
+            row = stored.get(key)
+            if key not in actual:
+                self.db.delete(row)
+            elif row is None:
+                self.db.add(model(**dict(zip(key_names, key)), **actual[key]))
+            else:
+                for name, value in actual[key].items():
+                    setattr(row, name, value)
+
+    def _increment(self, model, keys: Dict[str, Any], deltas: Dict[str, int]) -> None:
+        """Add deltas to a counter row, creating it if missing (one statement)"""
+        table = model.__table__
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:  # pragma: no cover - only PostgreSQL and SQLite are deployed
+            row = self.db.get(model, tuple(keys.values()))
+            if row is None:
+                self.db.add(model(**keys, **deltas))
+            else:
+                for name, value in deltas.items():
+                    setattr(row, name, getattr(row, name) + value)
+            return
+
+        statement = insert(table).values(
+            **keys, **{name: deltas.get(name, 0) for name in _COUNTERS[model]}
+        )
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={
+                    name: table.c[name] + statement.excluded[name] for name in deltas
+                },
+            )
+        )
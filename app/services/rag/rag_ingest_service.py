@@ -11,6 +11,7 @@ from app.models.document import Chunk, Datasource, Document, Embedding
 from app.services.external.openai_service import OpenAIService
 from app.services.external.storage import StorageService
 from app.services.rag.chunking import ChunkingService
+from app.services.rag.corpus_stats import CorpusStatsService
 from app.services.rag.pdf_service import PDFService
 
 
@@ -115,6 +116,7 @@ class RAGIngestService:
         )
         self.db.add(document)
         self.db.flush()
+        CorpusStatsService(self.db).document_added(document)
 
         return datasource, document
 
@@ -149,6 +151,7 @@ class RAGIngestService:
         )
 
         # Generate embeddings and store
+        text_chars = 0
         for idx, chunk_text in enumerate(chunks):
             # Clean chunk text
             clean_chunk_text = self.clean_text(chunk_text)
@@ -163,6 +166,7 @@ class RAGIngestService:
             )
             self.db.add(chunk)
             self.db.flush()
+            text_chars += len(clean_chunk_text)
 
             # Generate embedding
             embedding_vector = await self.openai_service.create_embedding(
@@ -173,6 +177,10 @@ class RAGIngestService:
             embedding = Embedding(chunk_id=chunk.id, embedding=embedding_vector)
             self.db.add(embedding)
 
+        document = self.db.get(Document, document_id)
+        CorpusStatsService(self.db).chunks_added(
+            document, chunk_strategy, len(chunks), len(chunks), text_chars
+        )
         return len(chunks)
 
     def get_document_by_id(self, doc_id: int) -> Optional[Document]:
@@ -210,9 +218,12 @@ class RAGIngestService:
         Returns:
             Number of chunks deleted
         """
-        result = self.db.execute(select(Chunk).where(Chunk.doc_id == doc_id))
-        old_chunks = result.scalars().all()
-        old_chunks_count = len(old_chunks)
+        document = self.db.get(Document, doc_id)
+        if document is None:
+            return 0
+        old_chunks_count = CorpusStatsService(self.db).chunks_removed(document)[
+            "chunks"
+        ]
 
         self.db.execute(delete(Chunk).where(Chunk.doc_id == doc_id))
         self.db.flush()
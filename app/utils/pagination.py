@@ -0,0 +1,137 @@
+"""
+Keyset pagination helpers
+
+Opaque cursors encode the sort key of the last row on a page so the next page
+can be fetched with a `WHERE (sort_key, id) < (:sort_key, :id)` predicate
+instead of OFFSET. Clients must treat cursors as opaque strings.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple, Type, Union
+from uuid import UUID
+
+from sqlalchemy import ClauseElement, Executable, and_, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session as DBSession
+from sqlalchemy.sql import Select
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor string cannot be decoded"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"u": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "u" in value:
+            return UUID(value["u"])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode sort key values into an opaque URL-safe cursor"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _has_type(value: Any, expected: Union[Type, Tuple[Type, ...]]) -> bool:
+    # bool is an int subclass; a JSON true/false is never a valid int key
+    if isinstance(value, bool):
+        return expected is bool or (isinstance(expected, tuple) and bool in expected)
+    return isinstance(value, expected)
+
+
+def decode_cursor(
+    cursor: str,
+    expected_length: Optional[int] = None,
+    types: Optional[Sequence[Union[Type, Tuple[Type, ...]]]] = None,
+) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor`
+
+    Args:
+        cursor: Cursor string
+        expected_length: Number of values the cursor must hold
+        types: Expected type (or tuple of types) per value; implies the
+            length. Values are bound against typed columns, so a cursor that
+            decodes but carries other types is rejected here, not in the driver
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or has the wrong arity
+            or value types
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(raw, list):
+            raise InvalidCursorError("Invalid cursor")
+        values = [_decode_value(v) for v in raw]
+    except InvalidCursorError:
+        raise
+    except (TypeError, ValueError) as e:
+        # binascii.Error / JSONDecodeError / bad ISO strings are all ValueErrors
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if types is not None:
+        expected_length = len(types)
+    if expected_length is not None and len(values) != expected_length:
+        raise InvalidCursorError("Invalid cursor")
+    if types is not None and not all(
+        _has_type(value, expected) for value, expected in zip(values, types)
+    ):
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def keyset_after(columns: List[Any], values: List[Any], descending: bool = True):
+    """Build the row-value predicate selecting rows after a cursor
+
+    Expanded to OR/AND form because row-value comparison is not portable
+    across all dialects used in tests (SQLite) and production (PostgreSQL).
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper for a SELECT statement"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_row_count(db: DBSession, statement: Select) -> Optional[int]:
+    """Return the planner's row estimate for a statement (PostgreSQL only)
+
+    Returns None on other dialects so callers can fall back to an exact count.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    plan = db.execute(_Explain(statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Move inline prompt / RAG / raw response text of existing SessionAnalysisLog
+rows into content_blobs (lean storage). Batched and resumable.
+
+Usage:
+    python scripts/migrate_analysis_log_blobs.py
+    python scripts/migrate_analysis_log_blobs.py --batch-size 1000 --max-rows 50000
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.services.core.content_store import ContentStore  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-rows", type=int, default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = ContentStore(db).migrate_inline_rows(
+            batch_size=args.batch_size, max_rows=args.max_rows
+        )
+    finally:
+        db.close()
+
+    print(f"✅ Migrated {stats.rows} rows")
+    print(f"   Distinct contents: {stats.distinct_contents}")
+    print(f"   Inline text moved: {stats.inline_bytes / 1_000_000:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 Pytest configuration and fixtures
 """
 import os
+import tempfile
 from typing import AsyncGenerator, Generator
 
 import pytest
@@ -11,6 +12,15 @@ from httpx import ASGITransport, AsyncClient
 # Set test environment
 os.environ["MOCK_MODE"] = "true"
 os.environ["DEBUG"] = "true"
+# Analysis logs go to a local SQLite sink instead of BigQuery
+os.environ.setdefault("GBQ_SINK_BACKEND", "sqlite")
+os.environ.setdefault(
+    "GBQ_SINK_PATH", os.path.join(tempfile.gettempdir(), "test_analysis_logs.db")
+)
+os.environ.setdefault(
+    "GBQ_DEAD_LETTER_PATH",
+    os.path.join(tempfile.gettempdir(), "test_gbq_dead_letter.jsonl"),
+)
 
 
 @pytest.fixture
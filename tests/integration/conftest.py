@@ -11,7 +11,8 @@ from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 from starlette.testclient import TestClient
 
-from app.core.database import Base, get_db
+from app.core.database import Base, get_analytics_db, get_db
+from app.core.security import create_access_token, hash_password
 from app.main import app
 from app.middleware.rate_limit import limiter
 from app.models.agent import Agent, AgentVersion  # noqa: F401
@@ -22,7 +23,10 @@ from app.models.collection import Collection, CollectionItem  # noqa: F401
 
 # Import all models to ensure they're registered with Base.metadata
 # Console models
-from app.models.counselor import Counselor  # noqa: F401
+from app.models.counselor import (
+    BillingMode,
+    Counselor,  # noqa: F401
+)
 
 # RAG models
 from app.models.document import Chunk, Datasource, Document, Embedding  # noqa: F401
@@ -39,8 +43,6 @@ from app.models.refresh_token import RefreshToken  # noqa: F401
 from app.models.reminder import Reminder  # noqa: F401
 from app.models.report import Report  # noqa: F401
 from app.models.session import Session as SessionModel  # noqa: F401
-from app.core.security import create_access_token, hash_password
-from app.models.counselor import BillingMode
 
 
 @pytest.fixture(autouse=True)
@@ -58,6 +60,16 @@ def reset_rate_limiter():
     limiter.reset()
 
 
+@pytest.fixture(autouse=True)
+def reset_dashboard_cache():
+    """Each test has its own database; cached dashboard buckets must not leak."""
+    from app.services.core.dashboard_cache import dashboard_cache
+
+    dashboard_cache.clear()
+    yield
+    dashboard_cache.clear()
+
+
 @pytest.fixture(autouse=True)
 def disable_email_verification(monkeypatch):
     """Disable email verification by default in tests.
@@ -153,6 +165,8 @@ def db_session() -> Generator[Session, None, None]:
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # Analytical routers read the same test database
+    app.dependency_overrides[get_analytics_db] = override_get_db
 
     try:
         yield session
@@ -216,20 +230,24 @@ def test_counselor_prepaid(db_session: Session) -> Counselor:
 @pytest.fixture
 def auth_headers_subscription(test_counselor_subscription: Counselor) -> dict:
     """Create authentication headers for subscription counselor."""
-    token = create_access_token({
-        "sub": test_counselor_subscription.email,
-        "tenant_id": test_counselor_subscription.tenant_id,
-        "role": test_counselor_subscription.role.value,
-    })
+    token = create_access_token(
+        {
+            "sub": test_counselor_subscription.email,
+            "tenant_id": test_counselor_subscription.tenant_id,
+            "role": test_counselor_subscription.role.value,
+        }
+    )
     return {"Authorization": f"Bearer {token}"}
 
 
 @pytest.fixture
 def auth_headers_prepaid(test_counselor_prepaid: Counselor) -> dict:
     """Create authentication headers for prepaid counselor."""
-    token = create_access_token({
-        "sub": test_counselor_prepaid.email,
-        "tenant_id": test_counselor_prepaid.tenant_id,
-        "role": test_counselor_prepaid.role.value,
-    })
+    token = create_access_token(
+        {
+            "sub": test_counselor_prepaid.email,
+            "tenant_id": test_counselor_prepaid.tenant_id,
+            "role": test_counselor_prepaid.role.value,
+        }
+    )
     return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,261 @@
+"""
+Integration tests for AccountPurgeEngine (batched purge, RevenueCat fan-out, resume)
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.case import Case
+from app.models.client import Client
+from app.models.content_blob import ContentBlob
+from app.models.counselor import Counselor
+from app.models.refresh_token import RefreshToken
+from app.models.report import Report
+from app.models.session import Session as SessionModel
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.account_purge import AccountPurgeEngine, RateLimiter
+from app.services.core.content_store import ContentStore
+
+# client, case, session, analysis log, usage, report, refresh token
+ROWS_PER_ACCOUNT = 7
+
+
+class FakeRevenueCat:
+    """Local stand-in for revenuecat_service.delete_customer"""
+
+    def __init__(self, latency: float = 0.0, failing_emails=()):
+        self.latency = latency
+        self.failing_emails = set(failing_emails)
+        self.calls = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def delete_customer(self, email: str, user_id: str) -> bool:
+        with self._lock:
+            self.calls.append((email, user_id))
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self._in_flight -= 1
+        return email not in self.failing_emails
+
+
+def _make_account(db_session: Session, deleted_days_ago=None) -> Counselor:
+    counselor = Counselor(
+        id=uuid4(),
+        email=f"purge-{uuid4().hex[:8]}@test.com",
+        username=f"purge{uuid4().hex[:8]}",
+        full_name="Purge Target",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=deleted_days_ago is None,
+        deleted_at=(
+            None
+            if deleted_days_ago is None
+            else datetime.now(timezone.utc) - timedelta(days=deleted_days_ago)
+        ),
+    )
+    client = Client(
+        id=uuid4(),
+        counselor_id=counselor.id,
+        tenant_id="career",
+        name="案主",
+        code=f"C{uuid4().hex[:6]}",
+        gender="不透露",
+        birth_date=date(1995, 1, 1),
+        phone="0912345678",
+        identity_option="其他",
+        current_status="探索中",
+    )
+    case = Case(
+        id=uuid4(),
+        case_number=f"K{uuid4().hex[:6]}",
+        counselor_id=counselor.id,
+        client_id=client.id,
+        tenant_id="career",
+    )
+    session = SessionModel(
+        id=uuid4(),
+        case_id=case.id,
+        tenant_id="career",
+        session_number=1,
+        session_date=datetime.now(timezone.utc),
+    )
+    db_session.add_all([counselor, client, case, session])
+    db_session.flush()
+    db_session.add_all(
+        [
+            SessionAnalysisLog(
+                session_id=session.id,
+                counselor_id=counselor.id,
+                tenant_id="career",
+                analysis_type="partial_analysis",
+            ),
+            SessionUsage(
+                session_id=session.id,
+                counselor_id=counselor.id,
+                tenant_id="career",
+                status="completed",
+            ),
+            Report(
+                session_id=session.id,
+                client_id=client.id,
+                created_by_id=counselor.id,
+                tenant_id="career",
+            ),
+            RefreshToken(
+                token=uuid4().hex,
+                counselor_id=counselor.id,
+                tenant_id="career",
+                expires_at=datetime.now(timezone.utc) + timedelta(days=7),
+            ),
+        ]
+    )
+    db_session.commit()
+    return counselor
+
+
+def _count(db_session: Session, model, counselor_id) -> int:
+    column = {
+        Client: Client.counselor_id,
+        Case: Case.counselor_id,
+        SessionAnalysisLog: SessionAnalysisLog.counselor_id,
+        SessionUsage: SessionUsage.counselor_id,
+        Report: Report.created_by_id,
+        RefreshToken: RefreshToken.counselor_id,
+    }[model]
+    return db_session.execute(
+        select(func.count()).select_from(model).where(column == counselor_id)
+    ).scalar()
+
+
+class TestAccountPurgeEngine:
+    def test_purges_dependents_in_batches(self, db_session: Session):
+        targets = [_make_account(db_session, deleted_days_ago=20) for _ in range(3)]
+        emails = {c.id: c.email for c in targets}
+        in_grace = _make_account(db_session, deleted_days_ago=3)
+        active = _make_account(db_session)
+        fake = FakeRevenueCat()
+
+        report = AccountPurgeEngine(
+            db_session, delete_customer=fake.delete_customer, batch_size=2
+        ).run()
+
+        assert (report.purged, report.failed, report.batches) == (3, 0, 2)
+        assert report.rows_deleted == 3 * ROWS_PER_ACCOUNT
+        assert report.remaining == 0
+        assert sorted(fake.calls) == sorted(
+            (email, str(cid)) for cid, email in emails.items()
+        )
+
+        db_session.expire_all()
+        for counselor in targets:
+            for model in (
+                Client,
+                Case,
+                SessionAnalysisLog,
+                SessionUsage,
+                Report,
+                RefreshToken,
+            ):
+                assert _count(db_session, model, counselor.id) == 0
+            row = db_session.get(Counselor, counselor.id)
+            assert row.email.endswith(emails[counselor.id])
+            assert row.email.startswith("deleted_")
+            assert row.full_name is None and row.username is None
+        for counselor in (in_grace, active):
+            assert _count(db_session, SessionAnalysisLog, counselor.id) == 1
+            assert _count(db_session, Client, counselor.id) == 1
+        assert (
+            db_session.execute(select(func.count()).select_from(SessionModel)).scalar()
+            == 2
+        )
+
+    def test_deletes_blobs_only_the_purged_account_used(self, db_session: Session):
+        target = _make_account(db_session, deleted_days_ago=20)
+        active = _make_account(db_session)
+        shared_prompt = "共用的系統提示詞。" * 100
+        store = ContentStore(db_session, min_bytes=256)
+        logs = [
+            SessionAnalysisLog(
+                counselor_id=counselor.id,
+                session_id=uuid4(),
+                tenant_id="career",
+                analysis_type="partial_analysis",
+                system_prompt=shared_prompt,
+                llm_raw_response=f"{counselor.id} 的私人回應。" * 50,
+            )
+            for counselor in (target, active)
+        ]
+        store.externalize_many(logs)
+        db_session.add_all(logs)
+        db_session.commit()
+        kept = {logs[1].system_prompt_sha256, logs[1].llm_raw_response_sha256}
+
+        report = AccountPurgeEngine(
+            db_session, delete_customer=FakeRevenueCat().delete_customer
+        ).run()
+
+        assert report.purged == 1
+        # Two analysis logs and the target's private response blob
+        assert report.rows_deleted == ROWS_PER_ACCOUNT + 2
+        assert set(db_session.execute(select(ContentBlob.sha256)).scalars()) == kept
+
+    def test_revenuecat_failures_do_not_block_purge(self, db_session: Session):
+        target = _make_account(db_session, deleted_days_ago=20)
+        fake = FakeRevenueCat(failing_emails={target.email})
+
+        report = AccountPurgeEngine(
+            db_session, delete_customer=fake.delete_customer
+        ).run()
+
+        assert (report.purged, report.revenuecat_failed) == (1, 1)
+
+    def test_revenuecat_calls_run_concurrently(self, db_session: Session):
+        for _ in range(6):
+            _make_account(db_session, deleted_days_ago=20)
+        fake = FakeRevenueCat(latency=0.05)
+
+        report = AccountPurgeEngine(
+            db_session,
+            delete_customer=fake.delete_customer,
+            concurrency=4,
+            rate_per_second=1000,
+        ).run()
+
+        assert report.purged == 6
+        assert fake.max_in_flight > 1
+
+    def test_stopped_run_is_resumed(self, db_session: Session):
+        for _ in range(3):
+            _make_account(db_session, deleted_days_ago=20)
+        fake = FakeRevenueCat(latency=0.1)
+
+        first = AccountPurgeEngine(
+            db_session, delete_customer=fake.delete_customer, batch_size=2
+        ).run(max_seconds=0.05)
+        second = AccountPurgeEngine(
+            db_session, delete_customer=fake.delete_customer, batch_size=2
+        ).run()
+
+        assert (first.purged, first.remaining) == (2, 1)
+        assert (second.purged, second.remaining) == (1, 0)
+        assert len(fake.calls) == 3
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate_per_second=50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+
+    assert time.monotonic() - start >= 5 / 50 * 0.9
@@ -7,6 +7,8 @@ from uuid import uuid4
 
 import pytest
 
+from app.utils.pagination import encode_cursor
+
 
 class TestAdminCreditMembers:
     """Test /api/v1/admin/credits/members endpoints"""
@@ -21,7 +23,7 @@ class TestAdminCreditMembers:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert isinstance(data, list)
         assert len(data) > 0
 
@@ -46,7 +48,7 @@ class TestAdminCreditMembers:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         # All returned members should be from career tenant
         for member in data:
             assert member["tenant_id"] == "career"
@@ -172,7 +174,7 @@ class TestAdminCreditLogs:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert isinstance(data, list)
         assert len(data) > 0
 
@@ -197,7 +199,7 @@ class TestAdminCreditLogs:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         # All logs should belong to specified counselor
         for log in data:
             assert log["counselor_id"] == str(test_counselor_id)
@@ -212,7 +214,7 @@ class TestAdminCreditLogs:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         # All logs should be purchase type
         for log in data:
             assert log["transaction_type"] == "purchase"
@@ -227,7 +229,7 @@ class TestAdminCreditLogs:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert len(data) <= 5
 
     def test_view_credit_logs_unauthorized(self, client, counselor_token):
@@ -287,6 +289,33 @@ class TestAdminBillingRates:
         assert data["version"] == existing_billing_rate["version"] + 1
         assert data["is_active"] is True
 
+    def test_new_rate_version_is_billed_immediately(
+        self, client, admin_token, db_session, existing_billing_rate
+    ):
+        """Creating a rate invalidates the cached rates used for billing"""
+        from app.services.core.credit_billing import CreditBillingService
+
+        billing = CreditBillingService(db_session)
+        assert billing.calculate_credits(1000, "voice_call").credits == 27
+
+        response = client.post(
+            "/api/v1/admin/credits/rates",
+            headers={"Authorization": f"Bearer {admin_token}"},
+            json={
+                "rule_name": "voice_call",
+                "calculation_method": "per_second",
+                "rate_config": {"credits_per_second": 0.05},
+                "effective_from": (
+                    datetime.now(timezone.utc) - timedelta(seconds=1)
+                ).isoformat(),
+            },
+        )
+        assert response.status_code == 200
+
+        result = billing.calculate_credits(1000, "voice_call")
+        assert result.credits == 50
+        assert result.rate_snapshot["version"] == 2
+
     def test_list_billing_rates(self, client, admin_token, billing_rates):
         """Admin can list all billing rates"""
         response = client.get(
@@ -295,7 +324,7 @@ class TestAdminBillingRates:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         assert isinstance(data, list)
         assert len(data) > 0
 
@@ -309,7 +338,7 @@ class TestAdminBillingRates:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         for rate in data:
             assert rate["rule_name"] == "voice_call"
 
@@ -323,7 +352,7 @@ class TestAdminBillingRates:
         )
 
         assert response.status_code == 200
-        data = response.json()
+        data = response.json()["items"]
         for rate in data:
             assert rate["is_active"] is True
 
@@ -405,13 +434,166 @@ class TestCrossTenantSupport:
             headers={"Authorization": f"Bearer {admin_token}"},
         )
 
-        members = response.json()
+        members = response.json()["items"]
         counselor2_data = next(m for m in members if m["id"] == str(counselor2["id"]))
         # Counselor 2 should have no added credits, only default available_credits
         assert counselor2_data["total_credits"] == 0
         assert counselor2_data["available_credits"] == 0
 
 
+class TestAdminCreditListings:
+    """Keyset pagination, sorting, filters and projection of the listings"""
+
+    def _pages(self, client, token, path, params):
+        items, cursor = [], None
+        while True:
+            response = client.get(
+                path,
+                params={**params, **({"cursor": cursor} if cursor else {})},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            assert response.status_code == 200, response.text
+            body = response.json()
+            items += body["items"]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return items, body
+
+    def test_members_sorted_by_balance_across_pages(
+        self, client, admin_token, member_balances
+    ):
+        items, last = self._pages(
+            client,
+            admin_token,
+            "/api/v1/admin/credits/members",
+            {"sort": "balance", "order": "desc", "limit": 2, "search": "balance"},
+        )
+
+        assert [m["available_credits"] for m in items] == [500, 300, 300, 100, 0]
+        assert len({m["id"] for m in items}) == 5
+        assert last["total"] == 5
+
+    def test_members_sorted_by_activity(self, client, admin_token, member_balances):
+        response = client.get(
+            "/api/v1/admin/credits/members",
+            params={
+                "sort": "activity",
+                "order": "desc",
+                "search": "balance",
+                "limit": 1,
+            },
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+
+        body = response.json()
+        # The counselor with the most recent credit log comes first
+        assert body["items"][0]["email"] == "balance1@test.com"
+        assert body["next_cursor"] is not None
+
+    def test_members_activity_pages_fall_back_to_created_at(
+        self, client, admin_token, member_balances
+    ):
+        items, _ = self._pages(
+            client,
+            admin_token,
+            "/api/v1/admin/credits/members",
+            {
+                "sort": "activity",
+                "order": "desc",
+                "search": "balance",
+                "limit": 2,
+                "fields": "email,last_activity_at",
+            },
+        )
+
+        activity = [datetime.fromisoformat(m["last_activity_at"]) for m in items]
+        assert len(items) == 5
+        # Counselors without credit logs report (and sort by) their creation time
+        assert activity == sorted(activity, reverse=True)
+        assert [m["email"] for m in items[2:]] == [
+            "balance4@test.com",
+            "balance2@test.com",
+            "balance0@test.com",
+        ]
+
+    def test_members_filters_and_projection(self, client, admin_token, member_balances):
+        response = client.get(
+            "/api/v1/admin/credits/members",
+            params={
+                "search": "balance",
+                "min_balance": 100,
+                "max_balance": 300,
+                "fields": "email,total_credits,last_activity_at",
+                "count": "none",
+            },
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] is None
+        assert len(body["items"]) == 3
+        for member in body["items"]:
+            assert set(member) == {"id", "email", "total_credits", "last_activity_at"}
+        by_email = {m["email"]: m for m in body["items"]}
+        assert by_email["balance1@test.com"]["total_credits"] == 300
+
+    def test_logs_cursor_pages_cover_every_log_once(
+        self, client, admin_token, member_balances
+    ):
+        items, _ = self._pages(
+            client,
+            admin_token,
+            "/api/v1/admin/credits/logs",
+            {"limit": 2, "fields": "transaction_type,created_at"},
+        )
+
+        assert len(items) == 4
+        assert len({log["id"] for log in items}) == 4
+        assert [log["created_at"] for log in items] == sorted(
+            (log["created_at"] for log in items), reverse=True
+        )
+        assert set(items[0]) == {"id", "transaction_type", "created_at"}
+
+    def test_rates_cursor_pages(self, client, admin_token, billing_rates):
+        items, _ = self._pages(
+            client, admin_token, "/api/v1/admin/credits/rates", {"limit": 1}
+        )
+
+        assert [r["rule_name"] for r in items] == ["text_session", "voice_call"]
+
+    @pytest.mark.parametrize(
+        "path, params",
+        [
+            ("/api/v1/admin/credits/members", {"cursor": "not-a-cursor"}),
+            ("/api/v1/admin/credits/members", {"fields": "email,hashed_password"}),
+            ("/api/v1/admin/credits/logs", {"cursor": "not-a-cursor"}),
+            ("/api/v1/admin/credits/logs", {"fields": "secret"}),
+            ("/api/v1/admin/credits/rates", {"cursor": "not-a-cursor"}),
+            # Decodable cursors carrying the wrong value types
+            (
+                "/api/v1/admin/credits/members",
+                {"sort": "balance", "cursor": encode_cursor("rich", str(uuid4()))},
+            ),
+            (
+                "/api/v1/admin/credits/members",
+                {"sort": "activity", "cursor": encode_cursor(100, uuid4())},
+            ),
+            ("/api/v1/admin/credits/logs", {"cursor": encode_cursor(1, 2)}),
+            (
+                "/api/v1/admin/credits/rates",
+                {"cursor": encode_cursor("voice_call", "2")},
+            ),
+        ],
+    )
+    def test_bad_cursor_or_fields_is_400(self, client, admin_token, path, params):
+        response = client.get(
+            path, params=params, headers={"Authorization": f"Bearer {admin_token}"}
+        )
+
+        assert response.status_code == 400
+
+
 # ============================================================================
 # Fixtures
 # ============================================================================
@@ -605,3 +787,49 @@ def existing_billing_rate(billing_rates):
         "rule_name": billing_rates[0].rule_name,
         "version": billing_rates[0].version,
     }
+
+
+@pytest.fixture
+def member_balances(db_session):
+    """Five career counselors with balances 0-500; credit logs for two of them"""
+    from app.core.security import hash_password
+    from app.models.counselor import Counselor, CounselorRole
+    from app.models.credit_log import CreditLog
+
+    now = datetime.now(timezone.utc)
+    counselors = []
+    for i, balance in enumerate([100, 300, 0, 500, 300]):
+        counselor = Counselor(
+            email=f"balance{i}@test.com",
+            username=f"balance{i}",
+            full_name=f"Balance {i}",
+            hashed_password=hash_password("test123"),
+            tenant_id="career",
+            role=CounselorRole.COUNSELOR,
+            is_active=True,
+            available_credits=balance,
+            created_at=now - timedelta(days=30 - i),
+        )
+        db_session.add(counselor)
+        counselors.append(counselor)
+    db_session.flush()
+
+    for counselor, days_ago in ((counselors[1], 1), (counselors[3], 5)):
+        db_session.add_all(
+            [
+                CreditLog(
+                    counselor_id=counselor.id,
+                    credits_delta=counselor.available_credits,
+                    transaction_type="purchase",
+                    created_at=now - timedelta(days=days_ago + 1),
+                ),
+                CreditLog(
+                    counselor_id=counselor.id,
+                    credits_delta=-10,
+                    transaction_type="usage",
+                    created_at=now - timedelta(days=days_ago),
+                ),
+            ]
+        )
+    db_session.commit()
+    return counselors
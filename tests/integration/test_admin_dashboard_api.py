@@ -16,7 +16,6 @@ from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import inspect
 from sqlalchemy.orm import Session
 
 from app.core.pricing import (
@@ -153,9 +152,10 @@ class TestAdminDashboardAPI:
 
         # Calculate Gemini cost for Flash Lite
         gemini1_cost = (
-            (5000 / 1_000_000) * GEMINI_FLASH_LITE_INPUT_USD_PER_1M_TOKENS +
-            (2000 / 1_000_000) * GEMINI_FLASH_LITE_OUTPUT_USD_PER_1M_TOKENS
-        )
+            5000 / 1_000_000
+        ) * GEMINI_FLASH_LITE_INPUT_USD_PER_1M_TOKENS + (
+            2000 / 1_000_000
+        ) * GEMINI_FLASH_LITE_OUTPUT_USD_PER_1M_TOKENS
 
         session1_analysis = SessionAnalysisLog(
             id=uuid4(),
@@ -191,9 +191,10 @@ class TestAdminDashboardAPI:
 
         # Calculate Gemini cost for Flash 1.5
         gemini2_cost = (
-            (10000 / 1_000_000) * GEMINI_1_5_FLASH_INPUT_USD_PER_1M_TOKENS +
-            (4000 / 1_000_000) * GEMINI_1_5_FLASH_OUTPUT_USD_PER_1M_TOKENS
-        )
+            10000 / 1_000_000
+        ) * GEMINI_1_5_FLASH_INPUT_USD_PER_1M_TOKENS + (
+            4000 / 1_000_000
+        ) * GEMINI_1_5_FLASH_OUTPUT_USD_PER_1M_TOKENS
 
         session2_analysis = SessionAnalysisLog(
             id=uuid4(),
@@ -229,9 +230,10 @@ class TestAdminDashboardAPI:
 
         # Calculate Gemini cost for Flash 1.5
         gemini3_cost = (
-            (15000 / 1_000_000) * GEMINI_1_5_FLASH_INPUT_USD_PER_1M_TOKENS +
-            (6000 / 1_000_000) * GEMINI_1_5_FLASH_OUTPUT_USD_PER_1M_TOKENS
-        )
+            15000 / 1_000_000
+        ) * GEMINI_1_5_FLASH_INPUT_USD_PER_1M_TOKENS + (
+            6000 / 1_000_000
+        ) * GEMINI_1_5_FLASH_OUTPUT_USD_PER_1M_TOKENS
 
         session3_analysis = SessionAnalysisLog(
             id=uuid4(),
@@ -266,10 +268,9 @@ class TestAdminDashboardAPI:
         )
 
         # Calculate Gemini cost for Flash 3
-        gemini4_cost = (
-            (8000 / 1_000_000) * GEMINI_3_FLASH_INPUT_USD_PER_1M_TOKENS +
-            (3000 / 1_000_000) * GEMINI_3_FLASH_OUTPUT_USD_PER_1M_TOKENS
-        )
+        gemini4_cost = (8000 / 1_000_000) * GEMINI_3_FLASH_INPUT_USD_PER_1M_TOKENS + (
+            3000 / 1_000_000
+        ) * GEMINI_3_FLASH_OUTPUT_USD_PER_1M_TOKENS
 
         session4_analysis = SessionAnalysisLog(
             id=uuid4(),
@@ -286,12 +287,18 @@ class TestAdminDashboardAPI:
             analyzed_at=ten_days_ago,
         )
 
-        db_session.add_all([
-            session1_usage, session1_analysis,
-            session2_usage, session2_analysis,
-            session3_usage, session3_analysis,
-            session4_usage, session4_analysis,
-        ])
+        db_session.add_all(
+            [
+                session1_usage,
+                session1_analysis,
+                session2_usage,
+                session2_analysis,
+                session3_usage,
+                session3_analysis,
+                session4_usage,
+                session4_analysis,
+            ]
+        )
         db_session.commit()
 
         return {
@@ -300,28 +307,32 @@ class TestAdminDashboardAPI:
                 "analysis": session1_analysis,
                 "elevenlabs_cost": 600 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND,
                 "gemini_cost": gemini1_cost,
-                "total_cost": (600 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND) + gemini1_cost,
+                "total_cost": (600 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND)
+                + gemini1_cost,
             },
             "session2": {
                 "usage": session2_usage,
                 "analysis": session2_analysis,
                 "elevenlabs_cost": 1200 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND,
                 "gemini_cost": gemini2_cost,
-                "total_cost": (1200 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND) + gemini2_cost,
+                "total_cost": (1200 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND)
+                + gemini2_cost,
             },
             "session3": {
                 "usage": session3_usage,
                 "analysis": session3_analysis,
                 "elevenlabs_cost": 1800 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND,
                 "gemini_cost": gemini3_cost,
-                "total_cost": (1800 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND) + gemini3_cost,
+                "total_cost": (1800 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND)
+                + gemini3_cost,
             },
             "session4": {
                 "usage": session4_usage,
                 "analysis": session4_analysis,
                 "elevenlabs_cost": 900 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND,
                 "gemini_cost": gemini4_cost,
-                "total_cost": (900 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND) + gemini4_cost,
+                "total_cost": (900 * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND)
+                + gemini4_cost,
             },
         }
 
@@ -382,8 +393,8 @@ class TestAdminDashboardAPI:
 
             # Should include sessions 1 + 2
             expected_cost = (
-                test_data["session1"]["total_cost"] +
-                test_data["session2"]["total_cost"]
+                test_data["session1"]["total_cost"]
+                + test_data["session2"]["total_cost"]
             )
             assert abs(data["total_cost_usd"] - expected_cost) < 0.0001
             assert data["total_sessions"] == 2
@@ -402,10 +413,10 @@ class TestAdminDashboardAPI:
 
             # Should include all 4 sessions
             expected_cost = (
-                test_data["session1"]["total_cost"] +
-                test_data["session2"]["total_cost"] +
-                test_data["session3"]["total_cost"] +
-                test_data["session4"]["total_cost"]
+                test_data["session1"]["total_cost"]
+                + test_data["session2"]["total_cost"]
+                + test_data["session3"]["total_cost"]
+                + test_data["session4"]["total_cost"]
             )
             assert abs(data["total_cost_usd"] - expected_cost) < 0.0001
             assert data["total_sessions"] == 4
@@ -452,7 +463,9 @@ class TestAdminDashboardAPI:
             assert data["total_sessions"] == 0
             assert data["active_users"] == 0
 
-    def test_get_summary_tenant_filtering(self, db_session: Session, admin_headers, test_data):
+    def test_get_summary_tenant_filtering(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test summary endpoint with tenant filtering"""
         # Create session for different tenant
         other_admin = Counselor(
@@ -498,7 +511,9 @@ class TestAdminDashboardAPI:
     # 2. GET /cost-trend - Cost Trend Over Time
     # =========================================================================
 
-    def test_get_cost_trend_day_range(self, db_session: Session, admin_headers, test_data):
+    def test_get_cost_trend_day_range(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test cost trend endpoint with day range (hourly breakdown)"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -519,7 +534,9 @@ class TestAdminDashboardAPI:
             if data["labels"]:
                 assert ":" in data["labels"][0]
 
-    def test_get_cost_trend_week_range(self, db_session: Session, admin_headers, test_data):
+    def test_get_cost_trend_week_range(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test cost trend endpoint with week range (daily breakdown)"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -538,7 +555,9 @@ class TestAdminDashboardAPI:
             if data["labels"]:
                 assert "-" in data["labels"][0]
 
-    def test_get_cost_trend_model_filter(self, db_session: Session, admin_headers, test_data):
+    def test_get_cost_trend_model_filter(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test cost trend with model filtering"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -607,7 +626,10 @@ class TestAdminDashboardAPI:
             # Verify services exist
             service_names = [s["name"] for s in data["services"]]
             assert "ElevenLabs STT" in service_names
-            assert "Gemini Flash Lite" in service_names or "Gemini Flash 1.5" in service_names
+            assert (
+                "Gemini Flash Lite" in service_names
+                or "Gemini Flash 1.5" in service_names
+            )
 
             # Verify percentages sum to 100
             total_percentage = sum(s["percentage"] for s in data["services"])
@@ -617,7 +639,9 @@ class TestAdminDashboardAPI:
             total_service_cost = sum(s["cost"] for s in data["services"])
             assert abs(total_service_cost - data["total_cost"]) < 0.0001
 
-    def test_get_cost_breakdown_model_name_standardization(self, admin_headers, test_data):
+    def test_get_cost_breakdown_model_name_standardization(
+        self, admin_headers, test_data
+    ):
         """Test that model names are standardized (no duplicates)"""
         with TestClient(app) as client:
             response = client.get(
@@ -686,14 +710,20 @@ class TestAdminDashboardAPI:
             # Should have 3 models (Flash Lite, Flash 1.5, Flash 3)
             assert len(data["labels"]) >= 3
             # Verify all expected models are present (after normalization)
-            expected_models = {"Gemini Flash Lite", "Gemini Flash 1.5", "Gemini 3 Flash"}
+            expected_models = {
+                "Gemini Flash Lite",
+                "Gemini Flash 1.5",
+                "Gemini 3 Flash",
+            }
             assert set(data["labels"]) == expected_models
 
     # =========================================================================
     # 7. GET /daily-active-users - Daily Active Users Trend
     # =========================================================================
 
-    def test_get_daily_active_users(self, db_session: Session, admin_headers, test_data):
+    def test_get_daily_active_users(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test daily active users endpoint"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -712,7 +742,9 @@ class TestAdminDashboardAPI:
             # Should fill missing dates with zeros
             assert len(data["labels"]) >= 7  # At least 7 days for week range
 
-    def test_get_daily_active_users_fills_missing_hours(self, db_session: Session, admin_headers, test_data):
+    def test_get_daily_active_users_fills_missing_hours(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test that daily active users fills missing hours with zeros (day range)"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -797,10 +829,10 @@ class TestAdminDashboardAPI:
             # Admin user should have total cost from all 4 sessions
             admin_user = data[0]
             expected_cost = (
-                test_data["session1"]["total_cost"] +
-                test_data["session2"]["total_cost"] +
-                test_data["session3"]["total_cost"] +
-                test_data["session4"]["total_cost"]
+                test_data["session1"]["total_cost"]
+                + test_data["session2"]["total_cost"]
+                + test_data["session3"]["total_cost"]
+                + test_data["session4"]["total_cost"]
             )
             assert abs(admin_user["total_cost_usd"] - expected_cost) < 0.01
 
@@ -815,13 +847,11 @@ class TestAdminDashboardAPI:
 
         Uses isolated test user to avoid interference from test_data fixture.
 
-        IMPORTANT: The top_users endpoint uses an OR condition:
-            WHERE SessionUsage.created_at >= start_time
-            AND (SessionAnalysisLog.id IS NULL OR SessionAnalysisLog.analyzed_at >= start_time)
-
-        This means if an analysis log exists but is outside the time range,
-        the entire row is excluded. This is CORRECT behavior to prevent cost
-        miscalculation across time boundaries.
+        IMPORTANT: The top_users endpoint sums each fact in its own CTE
+        (CostAggregation): SessionUsage filtered by created_at and
+        SessionAnalysisLog by analyzed_at, then joined per counselor.
+        An analysis log outside the time range is left out without dropping
+        its session's usage.
         """
         # Create fresh admin user for this test
         test_admin = Counselor(
@@ -890,8 +920,8 @@ class TestAdminDashboardAPI:
                 prompt_tokens=5000,
                 completion_tokens=2000,
                 estimated_cost_usd=(
-                    (5000 / 1_000_000) * GEMINI_FLASH_LITE_INPUT_USD_PER_1M_TOKENS +
-                    (2000 / 1_000_000) * GEMINI_FLASH_LITE_OUTPUT_USD_PER_1M_TOKENS
+                    (5000 / 1_000_000) * GEMINI_FLASH_LITE_INPUT_USD_PER_1M_TOKENS
+                    + (2000 / 1_000_000) * GEMINI_FLASH_LITE_OUTPUT_USD_PER_1M_TOKENS
                 ),
                 analyzed_at=now,  # WITHIN time range
             )
@@ -914,11 +944,14 @@ class TestAdminDashboardAPI:
             assert test_data_user["email"] == "test-time-filter@test.com"
 
             # Total cost = ElevenLabs (session1 + session2) + Gemini (session2 only)
-            expected_elevenlabs = (600 + 1200) * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
+            expected_elevenlabs = (
+                600 + 1200
+            ) * ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND
             expected_gemini = (
-                (5000 / 1_000_000) * GEMINI_FLASH_LITE_INPUT_USD_PER_1M_TOKENS +
-                (2000 / 1_000_000) * GEMINI_FLASH_LITE_OUTPUT_USD_PER_1M_TOKENS
-            )
+                5000 / 1_000_000
+            ) * GEMINI_FLASH_LITE_INPUT_USD_PER_1M_TOKENS + (
+                2000 / 1_000_000
+            ) * GEMINI_FLASH_LITE_OUTPUT_USD_PER_1M_TOKENS
             expected_total = expected_elevenlabs + expected_gemini
 
             assert abs(test_data_user["total_cost_usd"] - expected_total) < 0.01
@@ -930,7 +963,9 @@ class TestAdminDashboardAPI:
     # 10. GET /user-daily-usage - User Daily Usage
     # =========================================================================
 
-    def test_get_user_daily_usage(self, db_session: Session, admin_headers, admin_user: Counselor, test_data):
+    def test_get_user_daily_usage(
+        self, db_session: Session, admin_headers, admin_user: Counselor, test_data
+    ):
         """Test user daily usage endpoint"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -977,7 +1012,9 @@ class TestAdminDashboardAPI:
             assert "peak_value" in data
             assert "monthly_growth_pct" in data
 
-    def test_get_overall_stats_uses_cost_not_tokens(self, db_session: Session, admin_headers, test_data):
+    def test_get_overall_stats_uses_cost_not_tokens(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """Test that overall stats calculates peak by cost, not tokens"""
         if db_session.bind.dialect.name == "sqlite":
             pytest.skip("Requires PostgreSQL (date_trunc function)")
@@ -1029,9 +1066,6 @@ class TestAdminDashboardAPI:
 
     def test_get_user_segments(self, db_session: Session, admin_headers, test_data):
         """Test user segments endpoint"""
-        if db_session.bind.dialect.name == "sqlite":
-            pytest.skip("Requires PostgreSQL (date_trunc function)")
-
         with TestClient(app) as client:
             response = client.get(
                 "/api/v1/admin/dashboard/user-segments?time_range=month",
@@ -1125,7 +1159,24 @@ class TestAdminDashboardAPI:
             # Should return 422 (validation error)
             assert response.status_code == 422
 
-    def test_null_handling_in_cost_breakdown(self, db_session: Session, admin_headers, admin_user: Counselor):
+    def test_emotion_engine_stats(self, admin_headers, regular_headers):
+        """Emotion engine path counters are admin-only"""
+        with TestClient(app) as client:
+            response = client.get(
+                "/api/v1/admin/dashboard/emotion-engine-stats", headers=admin_headers
+            )
+            forbidden = client.get(
+                "/api/v1/admin/dashboard/emotion-engine-stats", headers=regular_headers
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert {"requests", "paths", "fallback_rate", "latency_ms"} <= set(data)
+        assert forbidden.status_code == 403
+
+    def test_null_handling_in_cost_breakdown(
+        self, db_session: Session, admin_headers, admin_user: Counselor
+    ):
         """Test that NULL model names are handled correctly"""
         # Create analysis log with NULL model_name
         analysis = SessionAnalysisLog(
@@ -1149,7 +1200,9 @@ class TestAdminDashboardAPI:
             # Should not crash
             assert response.status_code == 200
 
-    def test_time_filtering_consistency_across_endpoints(self, db_session: Session, admin_headers, test_data):
+    def test_time_filtering_consistency_across_endpoints(
+        self, db_session: Session, admin_headers, test_data
+    ):
         """
         CRITICAL TEST: Verify time filtering is consistent across all endpoints
 
@@ -1179,10 +1232,9 @@ class TestAdminDashboardAPI:
                 "/api/v1/admin/dashboard/overall-stats?time_range=day",
                 headers=admin_headers,
             )
-            stats_data = stats_response.json()
-            # Calculate total from avg * days
-            days = len([d for d in range(1)])  # day range has 1+ days
+            assert stats_response.status_code == 200
 
             # All should match (within rounding errors)
-            assert abs(summary_cost - breakdown_cost) < 0.01, \
-                f"Summary cost {summary_cost} != Breakdown cost {breakdown_cost}"
+            assert (
+                abs(summary_cost - breakdown_cost) < 0.01
+            ), f"Summary cost {summary_cost} != Breakdown cost {breakdown_cost}"
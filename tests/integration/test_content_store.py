@@ -0,0 +1,203 @@
+"""
+Integration tests for content-addressed SessionAnalysisLog storage (lean mode)
+"""
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.main import app
+from app.models.content_blob import ContentBlob
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.services.core.content_store import (
+    ContentStore,
+    content_sha256,
+    decode_content,
+    encode_content,
+)
+
+SYSTEM_PROMPT = "你是一位資深的親子溝通顧問，請根據逐字稿給出建議。" * 40
+RAG_DOCUMENTS = [
+    {"doc_id": 1, "title": "正向教養", "content": "先同理再說明界線。" * 30},
+]
+
+
+def _log(**kwargs) -> SessionAnalysisLog:
+    values = dict(
+        session_id=uuid4(),
+        counselor_id=uuid4(),
+        tenant_id="island_parents",
+        analysis_type="partial_analysis",
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt="短提示",
+        rag_documents=RAG_DOCUMENTS,
+        llm_raw_response='{"safety_level": "green"}',
+    )
+    values.update(kwargs)
+    return SessionAnalysisLog(**values)
+
+
+class TestEncoding:
+    def test_roundtrip_and_compression(self):
+        codec, data = encode_content(SYSTEM_PROMPT)
+        assert codec == "zlib"
+        assert len(data) < len(SYSTEM_PROMPT.encode("utf-8")) / 10
+        assert decode_content(codec, data) == SYSTEM_PROMPT
+
+    def test_incompressible_text_stored_raw(self):
+        assert encode_content("a")[0] == "raw"
+
+
+class TestContentStore:
+    @pytest.fixture
+    def store(self, db_session: Session) -> ContentStore:
+        return ContentStore(db_session, min_bytes=256)
+
+    def test_externalize_deduplicates(self, db_session, store):
+        logs = [_log(), _log()]
+        for log in logs:
+            store.externalize(log)
+            db_session.add(log)
+        db_session.commit()
+
+        assert db_session.query(ContentBlob).count() == 2  # prompt + RAG docs
+        for log in logs:
+            assert log.system_prompt is None
+            assert log.system_prompt_sha256 == content_sha256(SYSTEM_PROMPT)
+            assert log.rag_documents_sha256 is not None
+            # Below min_bytes: stays inline
+            assert log.user_prompt == "短提示"
+            assert log.user_prompt_sha256 is None
+
+    def test_resolve_logs_restores_values(self, db_session, store):
+        log = _log()
+        store.externalize(log)
+        db_session.add(log)
+        db_session.commit()
+
+        [values] = store.resolve_logs([log])
+
+        assert values["system_prompt"] == SYSTEM_PROMPT
+        assert values["rag_documents"] == RAG_DOCUMENTS
+        assert values["user_prompt"] == "短提示"
+        assert values["llm_raw_response"] == '{"safety_level": "green"}'
+
+    def test_migrate_inline_rows(self, db_session, store):
+        legacy = [_log() for _ in range(5)]
+        db_session.add_all(legacy)
+        db_session.commit()
+        originals = {log.id: log.system_prompt for log in legacy}
+
+        stats = store.migrate_inline_rows(batch_size=2)
+
+        assert stats.rows == 5
+        db_session.expire_all()
+        rows = db_session.query(SessionAnalysisLog).all()
+        assert all(row.system_prompt is None for row in rows)
+        assert db_session.query(ContentBlob).count() == 2
+        for row, values in zip(rows, store.resolve_logs(rows)):
+            assert values["system_prompt"] == originals[row.id]
+            assert values["rag_documents"] == RAG_DOCUMENTS
+
+        # Moved JSON is SQL NULL (not JSON 'null'), so a re-run selects nothing
+        assert (
+            db_session.execute(
+                text(
+                    "SELECT COUNT(*) FROM session_analysis_logs WHERE rag_documents IS NULL"
+                )
+            ).scalar()
+            == 5
+        )
+        assert store.migrate_inline_rows().rows == 0
+
+    def test_externalize_stores_sql_null(self, db_session, store):
+        log = _log()
+        store.externalize(log)
+        db_session.add(log)
+        db_session.commit()
+
+        assert (
+            db_session.execute(
+                text("SELECT rag_documents FROM session_analysis_logs")
+            ).scalar()
+            is None
+        )
+
+    def test_legacy_json_null_is_not_reselected(self, db_session, store):
+        log = _log(system_prompt=None, rag_documents=None, llm_raw_response=None)
+        db_session.add(log)
+        db_session.commit()
+        # Written by the old code path: JSON 'null' instead of SQL NULL
+        db_session.execute(
+            text("UPDATE session_analysis_logs SET rag_documents = 'null'")
+        )
+        db_session.commit()
+
+        assert store.migrate_inline_rows().rows == 0
+
+
+class TestContentBlobGC:
+    @pytest.fixture
+    def store(self, db_session: Session) -> ContentStore:
+        return ContentStore(db_session, min_bytes=256)
+
+    def _lean_logs(self, db_session, store, count, **kwargs):
+        logs = [_log(**kwargs) for _ in range(count)]
+        store.externalize_many(logs)
+        db_session.add_all(logs)
+        db_session.commit()
+        return logs
+
+    def test_delete_unreferenced_keeps_shared_blobs(self, db_session, store):
+        shared, other = self._lean_logs(db_session, store, 2)
+        [private] = self._lean_logs(
+            db_session, store, 1, llm_raw_response="私有回應" * 100
+        )
+        shas = [private.system_prompt_sha256, private.llm_raw_response_sha256]
+
+        db_session.delete(private)
+        deleted = store.delete_unreferenced(shas)
+        db_session.commit()
+
+        # The system prompt is still used by the other two logs
+        assert deleted == 1
+        assert {b.sha256 for b in db_session.query(ContentBlob)} == {
+            shared.system_prompt_sha256,
+            shared.rag_documents_sha256,
+        }
+
+    def test_sweep_orphans(self, db_session, store):
+        [kept] = self._lean_logs(db_session, store, 1)
+        store.put_many(["孤兒內容" * 100, "另一個孤兒" * 100])
+        db_session.commit()
+
+        assert store.sweep_orphans(batch_size=1).deleted == 0  # too young
+        stats = store.sweep_orphans(min_age_seconds=-60, batch_size=1)
+
+        assert stats.scanned == 4
+        assert stats.deleted == 2
+        assert stats.freed_bytes > 0
+        assert db_session.query(ContentBlob).count() == 2
+        [values] = store.resolve_logs([kept])
+        assert values["system_prompt"] == SYSTEM_PROMPT
+
+    def test_sweep_endpoint(self, db_session, store):
+        store.put_many(["孤兒內容" * 100])
+        db_session.commit()
+
+        with TestClient(app) as client:
+            forbidden = client.post(
+                "/api/internal/sweep-content-blobs", headers={"X-Internal-Key": "wrong"}
+            )
+            response = client.post(
+                "/api/internal/sweep-content-blobs",
+                params={"min_age_seconds": -60},
+                headers={"X-Internal-Key": settings.INTERNAL_API_KEY},
+            )
+
+        assert forbidden.status_code == 403
+        assert response.json()["deleted"] == 1
+        assert db_session.query(ContentBlob).count() == 0
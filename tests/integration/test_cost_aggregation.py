@@ -0,0 +1,288 @@
+"""
+Integration tests for CostAggregation (fan-out-free cost queries)
+
+Fixture: sessions with 0, 1 and 3 analysis logs, one log outside the
+range and one session in the previous month. Sums are pinned to values
+computed by hand from the fixture rows.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.pricing import ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND as PER_SECOND
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor, CounselorRole
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.cost_aggregation import CostAggregation, Period
+
+DASHBOARD = "/api/v1/admin/dashboard"
+NOW = datetime.now(timezone.utc)
+MONTH_START = NOW.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+LAST_MONTH = (MONTH_START - timedelta(days=1)).replace(day=1)
+
+
+def _counselor(
+    db_session: Session, email: str, role=CounselorRole.COUNSELOR
+) -> Counselor:
+    counselor = Counselor(
+        id=uuid4(),
+        email=email,
+        username=email.split("@")[0],
+        full_name=email,
+        hashed_password="x",
+        tenant_id="career",
+        role=role,
+        is_active=True,
+        created_at=NOW - timedelta(days=60),
+    )
+    db_session.add(counselor)
+    return counselor
+
+
+def _session(db_session, counselor, at, seconds, usage_cost, logs):
+    """One SessionUsage row and its analysis logs: [(model, tokens, cost, at)]"""
+    session_id = uuid4()
+    db_session.add(
+        SessionUsage(
+            id=uuid4(),
+            session_id=session_id,
+            counselor_id=counselor.id,
+            tenant_id=counselor.tenant_id,
+            duration_seconds=seconds,
+            status="completed",
+            estimated_cost_usd=usage_cost,
+            created_at=at,
+        )
+    )
+    for model, tokens, cost, analyzed_at in logs:
+        db_session.add(
+            SessionAnalysisLog(
+                id=uuid4(),
+                session_id=session_id,
+                counselor_id=counselor.id,
+                tenant_id=counselor.tenant_id,
+                analysis_type="quick",
+                model_name=model,
+                prompt_tokens=tokens,
+                completion_tokens=0,
+                estimated_cost_usd=cost,
+                analyzed_at=analyzed_at,
+            )
+        )
+
+
+@pytest.fixture
+def facts(db_session: Session):
+    """
+    alice (this week):
+      - s1: 600 s, no logs
+      - s2: 1200 s, 3 logs (lite 1000 / 0.01, flash 2000 / 0.02, lite 500 / 0.005)
+      - s3: 300 s, 1 flash log 4000 / 0.04 analyzed 40 days ago (out of range)
+    bob (this week): s4: 900 s, 1 lite log 100 / 0.001
+    carol: s5 last month only, 1800 s, usage cost 0.5, 1 log 0.25
+    """
+    alice = _counselor(db_session, "alice@test.com")
+    bob = _counselor(db_session, "bob@test.com")
+    carol = _counselor(db_session, "carol@test.com")
+    recent = NOW - timedelta(minutes=1)
+    _session(db_session, alice, recent, 600, 0.1, [])
+    _session(
+        db_session,
+        alice,
+        recent,
+        1200,
+        0.2,
+        [
+            ("gemini-flash-lite-latest", 1000, 0.01, recent),
+            ("gemini-3-flash-preview", 2000, 0.02, recent),
+            ("gemini-flash-lite-latest", 500, 0.005, recent),
+        ],
+    )
+    _session(
+        db_session,
+        alice,
+        recent,
+        300,
+        0.05,
+        [("gemini-3-flash-preview", 4000, 0.04, NOW - timedelta(days=40))],
+    )
+    _session(
+        db_session,
+        bob,
+        recent,
+        900,
+        0.15,
+        [("gemini-flash-lite-latest", 100, 0.001, recent)],
+    )
+    last_month = LAST_MONTH + timedelta(days=2)
+    _session(
+        db_session,
+        carol,
+        last_month,
+        1800,
+        0.5,
+        [("gemini-3-flash-preview", 10, 0.25, last_month)],
+    )
+    db_session.commit()
+    return {"alice": alice, "bob": bob, "carol": carol}
+
+
+@pytest.fixture
+def admin_headers(db_session: Session) -> dict:
+    admin = _counselor(db_session, "cost-admin@test.com", role=CounselorRole.ADMIN)
+    db_session.commit()
+    token = create_access_token(
+        {"sub": admin.email, "tenant_id": admin.tenant_id, "role": admin.role.value}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _statements(db_session: Session):
+    """Record every SQL statement run on the test engine"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", record)
+    return statements, lambda: event.remove(
+        db_session.get_bind(), "before_cursor_execute", record
+    )
+
+
+class TestByCounselor:
+    def test_each_fact_row_is_summed_once(self, db_session: Session, facts):
+        rows = {
+            row.email: row
+            for row in db_session.execute(
+                CostAggregation("career").by_counselor(NOW - timedelta(days=7))
+            ).all()
+        }
+
+        assert set(rows) == {"alice@test.com", "bob@test.com"}
+        alice = rows["alice@test.com"]
+        assert alice.sessions == 3
+        # 600 + 1200 + 300: s2's three logs do not repeat its duration
+        assert alice.duration_seconds == 2100
+        assert alice.gemini_lite_tokens == 1500
+        # The 40-day-old flash log is outside the range
+        assert alice.gemini_flash_tokens == 2000
+        assert float(alice.gemini_cost_usd) == pytest.approx(0.035)
+        assert float(alice.total_cost_usd) == pytest.approx(2100 * PER_SECOND + 0.035)
+        assert alice.days_used == 1
+
+        bob = rows["bob@test.com"]
+        assert (bob.sessions, bob.duration_seconds, bob.gemini_lite_tokens) == (
+            1,
+            900,
+            100,
+        )
+        assert float(bob.total_cost_usd) == pytest.approx(900 * PER_SECOND + 0.001)
+
+    def test_inactive_counselors_are_kept_on_request(self, db_session: Session, facts):
+        rows = {
+            row.email: row
+            for row in db_session.execute(
+                CostAggregation("career").by_counselor(
+                    NOW - timedelta(days=7), active_only=False
+                )
+            ).all()
+        }
+
+        carol = rows["carol@test.com"]
+        assert (carol.sessions, carol.duration_seconds, carol.total_cost_usd) == (
+            0,
+            0,
+            0,
+        )
+        assert carol.last_activity is None
+
+    def test_tenant_filter_applies_to_both_facts(self, db_session: Session, facts):
+        rows = db_session.execute(
+            CostAggregation("other").by_counselor(NOW - timedelta(days=7))
+        ).all()
+
+        assert rows == []
+
+
+class TestByPeriod:
+    def test_current_and_previous_month_in_one_query(self, db_session: Session, facts):
+        statements, stop = _statements(db_session)
+        try:
+            rows = {
+                row.period: row
+                for row in db_session.execute(
+                    CostAggregation().by_period(
+                        [
+                            Period("current", MONTH_START),
+                            Period("last", LAST_MONTH, MONTH_START),
+                        ]
+                    )
+                ).all()
+            }
+        finally:
+            stop()
+
+        # The 40-day-old log falls in last month or before it
+        old_log = 1 if NOW - timedelta(days=40) >= LAST_MONTH else 0
+        assert len(statements) == 1
+        assert rows["current"].sessions == 4
+        assert float(rows["current"].usage_cost_usd) == pytest.approx(0.5)
+        assert float(rows["current"].analysis_cost_usd) == pytest.approx(0.036)
+        assert rows["last"].sessions == 1
+        assert float(rows["last"].usage_cost_usd) == pytest.approx(0.5)
+        assert rows["last"].analyses == 1 + old_log
+        assert float(rows["last"].analysis_cost_usd) == pytest.approx(
+            0.25 + 0.04 * old_log
+        )
+
+    def test_empty_periods_return_zeros(self, db_session: Session):
+        rows = db_session.execute(
+            CostAggregation().by_period([Period("current", MONTH_START)])
+        ).all()
+
+        assert [(r.period, r.sessions, float(r.usage_cost_usd)) for r in rows] == [
+            ("current", 0, 0.0)
+        ]
+
+
+class TestEndpoints:
+    def test_top_users_is_not_inflated_by_analysis_count(
+        self, db_session: Session, admin_headers, facts
+    ):
+        with TestClient(app) as client:
+            response = client.get(
+                f"{DASHBOARD}/top-users?time_range=week", headers=admin_headers
+            )
+
+        users = {u["email"]: u for u in response.json()}
+        alice = users["alice@test.com"]
+        assert alice["total_minutes"] == 35.0
+        assert alice["total_sessions"] == 3
+        assert alice["total_cost_usd"] == pytest.approx(2100 * PER_SECOND + 0.035)
+        assert list(users)[0] == "alice@test.com"
+
+    def test_cost_prediction_uses_one_query(
+        self, db_session: Session, admin_headers, facts
+    ):
+        with TestClient(app) as client:
+            statements, stop = _statements(db_session)
+            try:
+                response = client.get(
+                    f"{DASHBOARD}/cost-prediction", headers=admin_headers
+                )
+            finally:
+                stop()
+
+        data = response.json()
+        cost_queries = [s for s in statements if "session_usages" in s]
+        assert len(cost_queries) == 1
+        assert data["current_month_cost"] == round(0.5 + 0.036, 2)
+        expected_last = 0.75 + (0.04 if NOW - timedelta(days=40) >= LAST_MONTH else 0)
+        assert data["last_month_cost"] == round(expected_last, 2)
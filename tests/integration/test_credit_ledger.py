@@ -0,0 +1,154 @@
+"""
+Integration tests for CreditLedger (atomic deduction, idempotency, reconciliation)
+"""
+from datetime import timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models.counselor import Counselor
+from app.models.credit_log import CreditLog
+from app.models.session_usage import SessionUsage
+from app.services.billing.credit_ledger import (
+    CounselorNotFoundError,
+    CreditLedger,
+    DuplicateLedgerEntryError,
+    session_billing_key,
+)
+
+
+def _make_counselor(db_session: Session, credits: float = 100.0) -> Counselor:
+    counselor = Counselor(
+        id=uuid4(),
+        email=f"ledger-{uuid4().hex[:8]}@test.com",
+        username=f"ledger{uuid4().hex[:8]}",
+        full_name="Ledger Counselor",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+        available_credits=credits,
+    )
+    db_session.add(counselor)
+    db_session.commit()
+    return counselor
+
+
+def _make_session_usage(db_session: Session, counselor: Counselor) -> SessionUsage:
+    # SQLite does not enforce the sessions FK, a bare id is enough here
+    usage = SessionUsage(
+        session_id=uuid4(),
+        counselor_id=counselor.id,
+        tenant_id="career",
+        usage_type="partial_analysis",
+        status="in_progress",
+        credits_deducted=Decimal("0"),
+        last_billed_minutes=0,
+    )
+    db_session.add(usage)
+    db_session.commit()
+    return usage
+
+
+class TestCreditLedger:
+    def test_apply_updates_balance_and_appends_log(self, db_session: Session):
+        counselor = _make_counselor(db_session, credits=100.0)
+        ledger = CreditLedger(db_session)
+
+        log = ledger.deduct(counselor.id, 3, resource_type="session", resource_id="s1")
+        ledger.apply(counselor.id, 10, transaction_type="purchase")
+        db_session.commit()
+
+        db_session.expire_all()
+        assert db_session.get(Counselor, counselor.id).available_credits == 107.0
+        assert log.credits_delta == -3.0
+        assert log.transaction_type == "usage"
+        assert log.balance_after == 97.0
+
+    def test_idempotency_key_applies_once(self, db_session: Session):
+        counselor = _make_counselor(db_session, credits=100.0)
+        ledger = CreditLedger(db_session)
+        key = session_billing_key(uuid4(), 0, 1)
+
+        ledger.deduct(counselor.id, 1, idempotency_key=key)
+        db_session.commit()
+        with pytest.raises(DuplicateLedgerEntryError):
+            ledger.deduct(counselor.id, 1, idempotency_key=key)
+        db_session.commit()
+
+        db_session.expire_all()
+        assert db_session.get(Counselor, counselor.id).available_credits == 99.0
+        assert db_session.query(CreditLog).filter_by(idempotency_key=key).count() == 1
+
+    def test_unknown_counselor(self, db_session: Session):
+        with pytest.raises(CounselorNotFoundError):
+            CreditLedger(db_session).deduct(uuid4(), 1)
+        assert db_session.query(CreditLog).count() == 0
+
+    def test_reconcile_reports_and_fixes_drift(self, db_session: Session):
+        counselor = _make_counselor(db_session, credits=100.0)
+        usage = _make_session_usage(db_session, counselor)
+        ledger = CreditLedger(db_session)
+        ledger.deduct(
+            counselor.id,
+            2,
+            resource_type="session",
+            resource_id=str(usage.session_id),
+        )
+        db_session.commit()
+
+        # Simulate caches written outside the ledger
+        usage.credits_deducted = Decimal("5")
+        db_session.get(Counselor, counselor.id).available_credits = 90.0
+        db_session.commit()
+
+        report = ledger.reconcile(fix=True)
+
+        assert report.counselor_drifts == [
+            {
+                "counselor_id": str(counselor.id),
+                "available_credits": 90.0,
+                "ledger_balance": 98.0,
+                "drift": -8.0,
+            }
+        ]
+        assert report.session_drifts[0]["ledger_credits"] == 2.0
+        assert report.fixed is True
+        db_session.expire_all()
+        assert db_session.get(SessionUsage, usage.id).credits_deducted == 2
+        assert ledger.reconcile().session_drifts == []
+
+    def test_reconcile_orders_entries_by_ledger_seq(self, db_session: Session):
+        counselor = _make_counselor(db_session, credits=100.0)
+        ledger = CreditLedger(db_session)
+        first = ledger.deduct(counselor.id, 1)
+        db_session.commit()
+        second = ledger.deduct(counselor.id, 2)
+        db_session.commit()
+        # created_at is the transaction start: the entry that committed last
+        # can carry the older timestamp
+        second.created_at = first.created_at - timedelta(seconds=1)
+        db_session.commit()
+
+        assert (first.ledger_seq, second.ledger_seq) == (1, 2)
+        assert db_session.get(Counselor, counselor.id).ledger_seq == 2
+        report = ledger.reconcile(counselor_id=counselor.id)
+        assert report.counselors_checked == 1
+        assert report.counselor_drifts == []
+
+    def test_reconcile_endpoint_requires_internal_key(self, db_session: Session):
+        with TestClient(app) as client:
+            denied = client.post(
+                "/api/internal/reconcile-credits", headers={"X-Internal-Key": "wrong"}
+            )
+            ok = client.post(
+                "/api/internal/reconcile-credits", headers={"X-Internal-Key": ""}
+            )
+
+        assert denied.status_code == 403
+        assert ok.status_code == 200
+        assert ok.json()["counselor_drifts"] == []
@@ -0,0 +1,179 @@
+"""
+Integration tests for the streamed admin CSV export (CsvExportEngine)
+"""
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor, CounselorRole
+from app.models.credit_log import CreditLog
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.csv_export import DATASETS, CsvExportEngine
+
+EXPORT = "/api/v1/admin/dashboard/export-csv"
+
+
+def _counselor(db_session: Session, role=CounselorRole.COUNSELOR) -> Counselor:
+    counselor = Counselor(
+        id=uuid4(),
+        email=f"export-{uuid4().hex[:8]}@test.com",
+        username=f"export{uuid4().hex[:8]}",
+        full_name="Export Tester",
+        hashed_password="x",
+        tenant_id="career",
+        role=role,
+        is_active=True,
+    )
+    db_session.add(counselor)
+    return counselor
+
+
+@pytest.fixture
+def admin_headers(db_session: Session) -> dict:
+    admin = _counselor(db_session, role=CounselorRole.ADMIN)
+    db_session.commit()
+    token = create_access_token(
+        {"sub": admin.email, "tenant_id": admin.tenant_id, "role": admin.role.value}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def export_data(db_session: Session) -> Counselor:
+    """25 sessions with one analysis log and one credit log each (last 25 days)"""
+    counselor = _counselor(db_session)
+    now = datetime.now(timezone.utc)
+    for i in range(25):
+        at = now - timedelta(days=i, minutes=5)
+        session_id = uuid4()
+        db_session.add_all(
+            [
+                SessionUsage(
+                    id=uuid4(),
+                    session_id=session_id,
+                    counselor_id=counselor.id,
+                    tenant_id="career",
+                    duration_seconds=60 * (i + 1),
+                    status="completed",
+                    total_tokens=1000 + i,
+                    estimated_cost_usd=0.01,
+                    created_at=at,
+                ),
+                SessionAnalysisLog(
+                    id=uuid4(),
+                    session_id=session_id,
+                    counselor_id=counselor.id,
+                    tenant_id="career",
+                    analysis_type="quick",
+                    model_name="gemini-flash-lite-latest",
+                    prompt_tokens=500,
+                    completion_tokens=100,
+                    estimated_cost_usd=0.002,
+                    safety_level="green",
+                    system_prompt="x" * 10_000,
+                    analyzed_at=at,
+                ),
+                CreditLog(
+                    id=uuid4(),
+                    counselor_id=counselor.id,
+                    resource_type="session",
+                    resource_id=str(session_id),
+                    credits_delta=-(i + 1),
+                    transaction_type="usage",
+                    balance_after=1000 - i,
+                    created_at=at,
+                ),
+            ]
+        )
+    db_session.commit()
+    return counselor
+
+
+def _rows(body: bytes):
+    return list(csv.reader(io.StringIO(body.decode("utf-8"))))
+
+
+class TestCsvExportEndpoint:
+    @pytest.mark.parametrize(
+        "data_type,expected",
+        [("users", 1), ("sessions", 25), ("analysis_logs", 25), ("credit_logs", 25)],
+    )
+    def test_exports_every_dataset(
+        self, db_session, admin_headers, export_data, data_type, expected
+    ):
+        with TestClient(app) as client:
+            response = client.get(
+                f"{EXPORT}?time_range=month&data_type={data_type}",
+                headers=admin_headers,
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        rows = _rows(response.content)
+        assert rows[0] == DATASETS[data_type].columns
+        assert len(rows) - 1 == expected
+
+    def test_time_range_filters_rows(self, db_session, admin_headers, export_data):
+        with TestClient(app) as client:
+            response = client.get(
+                f"{EXPORT}?time_range=week&data_type=credit_logs", headers=admin_headers
+            )
+
+        rows = _rows(response.content)[1:]
+        assert len(rows) == 7
+        assert {row[3] for row in rows} == {"usage"}
+
+    def test_gzip_matches_plain_export(self, db_session, admin_headers, export_data):
+        with TestClient(app) as client:
+            plain = client.get(
+                f"{EXPORT}?time_range=month&data_type=analysis_logs",
+                headers=admin_headers,
+            )
+            compressed = client.get(
+                f"{EXPORT}?time_range=month&data_type=analysis_logs&gzip=true",
+                headers=admin_headers,
+            )
+
+        assert compressed.headers["content-type"] == "application/gzip"
+        assert compressed.headers["content-disposition"].endswith(".csv.gz")
+        assert gzip.decompress(compressed.content) == plain.content
+
+    def test_unknown_dataset_is_rejected(self, db_session, admin_headers):
+        with TestClient(app) as client:
+            response = client.get(
+                f"{EXPORT}?data_type=counselors", headers=admin_headers
+            )
+
+        assert response.status_code == 422
+
+
+class TestCsvExportEngine:
+    def test_streams_one_chunk_per_batch(self, db_session, export_data):
+        engine = CsvExportEngine(db_session.get_bind(), batch_size=10)
+        start = datetime.now(timezone.utc) - timedelta(days=30)
+
+        chunks = list(engine.stream(DATASETS["sessions"], start))
+
+        # Header rides with the first batch; 25 rows -> 10 + 10 + 5
+        assert len(chunks) == 3
+        assert len(_rows(b"".join(chunks))) == 26
+
+    def test_large_columns_are_not_selected(self):
+        query = DATASETS["analysis_logs"].query(datetime.now(timezone.utc))
+
+        selected = {column.name for column in query.selected_columns}
+        assert not selected & {
+            "system_prompt",
+            "user_prompt",
+            "llm_raw_response",
+            "transcript",
+        }
@@ -0,0 +1,217 @@
+"""
+Integration tests for POST /api/v1/admin/dashboard/snapshot
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.api.v1.admin import dashboard
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor, CounselorRole
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+
+DASHBOARD = "/api/v1/admin/dashboard"
+SNAPSHOT = f"{DASHBOARD}/snapshot"
+
+
+def _counselor(db_session: Session, role=CounselorRole.COUNSELOR) -> Counselor:
+    counselor = Counselor(
+        id=uuid4(),
+        email=f"snapshot-{uuid4().hex[:8]}@test.com",
+        username=f"snapshot{uuid4().hex[:8]}",
+        full_name="Snapshot Tester",
+        hashed_password="x",
+        tenant_id="career",
+        role=role,
+        is_active=True,
+        created_at=datetime.now(timezone.utc) - timedelta(days=60),
+    )
+    db_session.add(counselor)
+    return counselor
+
+
+@pytest.fixture
+def admin_headers(db_session: Session) -> dict:
+    admin = _counselor(db_session, role=CounselorRole.ADMIN)
+    db_session.commit()
+    token = create_access_token(
+        {"sub": admin.email, "tenant_id": admin.tenant_id, "role": admin.role.value}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def usage(db_session: Session) -> Counselor:
+    """Two counselors, sessions over the last 20 days, one analysis log each"""
+    counselors = [_counselor(db_session), _counselor(db_session)]
+    now = datetime.now(timezone.utc)
+    for i in range(20):
+        counselor = counselors[i % 2]
+        at = now - timedelta(days=i, hours=2)
+        session_id = uuid4()
+        db_session.add_all(
+            [
+                SessionUsage(
+                    id=uuid4(),
+                    session_id=session_id,
+                    counselor_id=counselor.id,
+                    tenant_id="career",
+                    duration_seconds=300 + i,
+                    status="completed",
+                    total_tokens=1000,
+                    estimated_cost_usd=0.02,
+                    created_at=at,
+                ),
+                SessionAnalysisLog(
+                    id=uuid4(),
+                    session_id=session_id,
+                    counselor_id=counselor.id,
+                    tenant_id="career",
+                    analysis_type="quick",
+                    model_name="gemini-flash-lite-latest",
+                    prompt_tokens=800,
+                    completion_tokens=200,
+                    estimated_cost_usd=0.001,
+                    safety_level="green",
+                    analyzed_at=at,
+                ),
+            ]
+        )
+    db_session.commit()
+    return counselors[0]
+
+
+WIDGETS = [
+    ("summary", {"time_range": "week"}),
+    ("cost-trend", {"time_range": "month"}),
+    ("cost-breakdown", {"time_range": "month"}),
+    ("top-users", {"time_range": "month", "limit": 5}),
+    ("user-segments", {"time_range": "month"}),
+    ("cost-prediction", {}),
+]
+
+
+class TestSnapshot:
+    def test_matches_individual_endpoints(self, db_session, admin_headers, usage):
+        with TestClient(app) as client:
+            individual = {
+                name: client.get(
+                    f"{DASHBOARD}/{name}", params=params, headers=admin_headers
+                )
+                for name, params in WIDGETS
+            }
+            response = client.post(
+                SNAPSHOT,
+                json={"widgets": [{"widget": n, "params": p} for n, p in WIDGETS]},
+                headers=admin_headers,
+            )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert list(body["widgets"]) == [name for name, _ in WIDGETS]
+        for name, single in individual.items():
+            assert single.status_code == 200
+            assert body["widgets"][name]["data"] == single.json(), name
+            assert body["widgets"][name]["elapsed_ms"] >= 0
+        assert body["elapsed_ms"] >= 0
+
+    def test_identical_aggregates_are_computed_once(
+        self, db_session, admin_headers, usage
+    ):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        def usage_queries(widgets):
+            statements.clear()
+            with TestClient(app) as client:
+                event.listen(db_session.get_bind(), "before_cursor_execute", record)
+                try:
+                    response = client.post(
+                        SNAPSHOT, json={"widgets": widgets}, headers=admin_headers
+                    )
+                finally:
+                    event.remove(db_session.get_bind(), "before_cursor_execute", record)
+            assert response.status_code == 200
+            return len([s for s in statements if "session_usages" in s])
+
+        summary = {"widget": "summary", "params": {"time_range": "week"}}
+        once = usage_queries([summary])
+        # Cache off the table: only the per-snapshot sharing may help
+        dashboard.dashboard_cache.clear()
+        twice = usage_queries([summary, {**summary, "key": "summary-again"}])
+
+        assert once > 0
+        assert twice == once
+
+    def test_widget_http_errors_are_reported_per_widget(
+        self, db_session, admin_headers, usage, monkeypatch
+    ):
+        def missing():
+            raise HTTPException(status_code=404, detail="Not here")
+
+        monkeypatch.setitem(
+            dashboard.SNAPSHOT_WIDGETS, "missing", lambda **_: missing()
+        )
+        monkeypatch.setitem(
+            dashboard._SNAPSHOT_PARAMS,
+            "missing",
+            dashboard._params_model("missing", missing),
+        )
+
+        with TestClient(app) as client:
+            response = client.post(
+                SNAPSHOT,
+                json={"widgets": [{"widget": "missing"}, {"widget": "summary"}]},
+                headers=admin_headers,
+            )
+
+        widgets = response.json()["widgets"]
+        assert widgets["missing"]["error"] == {"status_code": 404, "detail": "Not here"}
+        assert "total_cost_usd" in widgets["summary"]["data"]
+
+    def test_invalid_specs_are_rejected_together(self, db_session, admin_headers):
+        with TestClient(app) as client:
+            response = client.post(
+                SNAPSHOT,
+                json={
+                    "widgets": [
+                        {"widget": "nope"},
+                        {"widget": "top-users", "params": {"limit": 500}},
+                        {"widget": "summary", "params": {"bogus": 1}},
+                        {"widget": "summary", "key": "dup"},
+                        {"widget": "summary", "key": "dup"},
+                    ]
+                },
+                headers=admin_headers,
+            )
+
+        assert response.status_code == 422
+        errors = response.json()["errors"]
+        assert [(e["widget"], e["field"]) for e in errors] == [
+            ("nope", "widget"),
+            ("top-users", "params -> limit"),
+            ("summary", "params -> bogus"),
+            ("dup", "key"),
+        ]
+
+    def test_requires_admin(self, db_session, usage):
+        token = create_access_token(
+            {"sub": usage.email, "tenant_id": usage.tenant_id, "role": usage.role.value}
+        )
+        with TestClient(app) as client:
+            response = client.post(
+                SNAPSHOT,
+                json={"widgets": [{"widget": "summary"}]},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+        assert response.status_code == 403
@@ -0,0 +1,351 @@
+"""
+Integration tests for session_analysis_logs partitions and retention archival
+
+Partition pruning is checked with EXPLAIN on PostgreSQL only; set
+TEST_POSTGRES_URL (an empty, disposable database) to run those tests.
+"""
+import base64
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.database import Base
+from app.main import app
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.services.core.content_store import ContentStore
+from app.services.core.log_partitions import (
+    AnalysisLogPartitionManager,
+    ArchiveStore,
+    ArchiveUploadError,
+    GCSArchiveStore,
+    add_months,
+    archive_name,
+    month_start,
+    partition_name,
+)
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+MIGRATION = next(
+    (Path(__file__).parents[2] / "alembic" / "versions").glob(
+        "*_a7c9e1f3b5d7_partition_session_analysis_logs_by_month.py"
+    )
+)
+LONG_PROMPT = "請根據逐字稿提供親子溝通建議。" * 50
+
+
+def _log(analyzed_at: datetime, **kwargs) -> SessionAnalysisLog:
+    values = dict(
+        session_id=uuid4(),
+        counselor_id=uuid4(),
+        tenant_id="island_parents",
+        analysis_type="partial_analysis",
+        analyzed_at=analyzed_at,
+        system_prompt=LONG_PROMPT,
+        estimated_cost_usd=0.001,
+    )
+    values.update(kwargs)
+    return SessionAnalysisLog(**values)
+
+
+class DirectoryStore(ArchiveStore):
+    """Copies archives into a directory; `corrupt` makes uploads mismatch"""
+
+    def __init__(self, root: Path, corrupt: bool = False):
+        self.root = root
+        self.corrupt = corrupt
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, name):
+        return (self.root / name).exists()
+
+    def upload(self, path, name, md5):
+        shutil.copyfile(path, self.root / name)
+        if self.corrupt:
+            raise ArchiveUploadError(name)
+        return f"file://{self.root / name}"
+
+
+def _months_ago(months: int) -> datetime:
+    month = add_months(month_start(datetime.now(timezone.utc)), -months)
+    return datetime(month.year, month.month, 15, 12, tzinfo=timezone.utc)
+
+
+class TestGCSArchiveStore:
+    def _store(self, blob):
+        client = MagicMock()
+        client.bucket.return_value.blob.return_value = blob
+        return GCSArchiveStore("archive-bucket", "logs/", lambda: client), client
+
+    def test_upload_verifies_size_and_md5(self, tmp_path):
+        path = tmp_path / "a.jsonl.gz"
+        path.write_bytes(b"archive")
+        md5 = base64.b64encode(hashlib.md5(b"archive").digest()).decode()
+        blob = MagicMock(size=7, md5_hash=md5)
+        blob.name = "logs/a.jsonl.gz"
+        store, client = self._store(blob)
+
+        assert (
+            store.upload(path, "a.jsonl.gz", md5)
+            == "gs://archive-bucket/logs/a.jsonl.gz"
+        )
+        client.bucket.return_value.blob.assert_called_with("logs/a.jsonl.gz")
+        blob.upload_from_filename.assert_called_once()
+
+        blob.md5_hash = "different"
+        with pytest.raises(ArchiveUploadError):
+            store.upload(path, "a.jsonl.gz", md5)
+
+
+class TestMonthHelpers:
+    def test_add_months_crosses_years(self):
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_partition_name(self):
+        assert partition_name(date(2026, 3, 1)) == "session_analysis_logs_p2026_03"
+
+
+def _count(db_session: Session) -> int:
+    return db_session.execute(
+        select(func.count()).select_from(SessionAnalysisLog)
+    ).scalar()
+
+
+class TestRetentionArchival:
+    def test_archives_and_deletes_expired_months(self, db_session: Session, tmp_path):
+        store = ContentStore(db_session, min_bytes=256)
+        old = [_log(_months_ago(14)), _log(_months_ago(14)), _log(_months_ago(13))]
+        recent = [_log(_months_ago(1)), _log(_months_ago(0))]
+        for log in old + recent:
+            store.externalize(log)
+        db_session.add_all(old + recent)
+        db_session.commit()
+        archived_ids = {str(log.id) for log in old[:2]}
+
+        manager = AnalysisLogPartitionManager(db_session)
+        store = DirectoryStore(tmp_path / "bucket")
+        archived = manager.archive_expired(
+            retention_months=12, archive_dir=str(tmp_path), store=store, drop=True
+        )
+
+        assert [(a.month, a.rows) for a in archived] == [
+            (month_start(_months_ago(14)), 2),
+            (month_start(_months_ago(13)), 1),
+        ]
+        assert db_session.execute(
+            select(func.count()).select_from(SessionAnalysisLog)
+        ).scalar() == len(recent)
+
+        assert all(a.dropped and a.uri.startswith("file://") for a in archived)
+        # The staging copy is removed once the upload is verified
+        name = archive_name(archived[0].month)
+        assert not (tmp_path / name).exists()
+        assert archived[0].uri.endswith(name)
+        with gzip.open(store.root / name, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        # Lean-storage text is resolved into the archive
+        assert {r["system_prompt"] for r in records} == {LONG_PROMPT}
+        assert {r["id"] for r in records} == archived_ids
+
+        assert (
+            manager.archive_expired(
+                retention_months=12, archive_dir=str(tmp_path), store=store, drop=True
+            )
+            == []
+        )
+
+    def test_drop_is_off_by_default(self, db_session: Session, tmp_path):
+        db_session.add_all([_log(_months_ago(13)), _log(_months_ago(1))])
+        db_session.commit()
+        manager = AnalysisLogPartitionManager(db_session)
+        store = DirectoryStore(tmp_path / "bucket")
+
+        [archived] = manager.archive_expired(
+            retention_months=12, archive_dir=str(tmp_path), store=store
+        )
+
+        assert archived.rows == 1 and not archived.dropped
+        assert _count(db_session) == 2
+        # Already in the bucket: the next run does not export it again
+        assert (
+            manager.archive_expired(
+                retention_months=12, archive_dir=str(tmp_path), store=store
+            )
+            == []
+        )
+
+    def test_refuses_to_drop_without_store(self, db_session: Session, tmp_path):
+        db_session.add(_log(_months_ago(14)))
+        db_session.commit()
+        manager = AnalysisLogPartitionManager(db_session)
+
+        with pytest.raises(RuntimeError):
+            manager.archive_expired(
+                retention_months=12, archive_dir=str(tmp_path), drop=True
+            )
+        assert (
+            manager.archive_expired(retention_months=12, archive_dir=str(tmp_path))
+            == []
+        )
+        assert _count(db_session) == 1
+
+    def test_failed_upload_keeps_rows(self, db_session: Session, tmp_path):
+        db_session.add(_log(_months_ago(14)))
+        db_session.commit()
+        manager = AnalysisLogPartitionManager(db_session)
+
+        with pytest.raises(ArchiveUploadError):
+            manager.archive_expired(
+                retention_months=12,
+                archive_dir=str(tmp_path),
+                store=DirectoryStore(tmp_path / "bucket", corrupt=True),
+                drop=True,
+            )
+        assert _count(db_session) == 1
+
+    def test_non_postgres_has_no_partitions(self, db_session: Session):
+        manager = AnalysisLogPartitionManager(db_session)
+
+        assert manager.ensure_partitions() == []
+        assert manager.list_partitions() == []
+
+    def test_maintenance_endpoint_requires_internal_key(self, db_session: Session):
+        with TestClient(app) as client:
+            denied = client.post(
+                "/api/internal/maintain-analysis-log-partitions",
+                headers={"X-Internal-Key": "wrong"},
+            )
+            ok = client.post(
+                "/api/internal/maintain-analysis-log-partitions?archive=false",
+                headers={"X-Internal-Key": ""},
+            )
+
+        assert denied.status_code == 403
+        assert ok.status_code == 200
+        assert ok.json() == {"created_partitions": [], "archived": []}
+
+
+@pytest.fixture
+def pg_session():
+    if not POSTGRES_URL:
+        pytest.skip("Set TEST_POSTGRES_URL to run partition pruning tests")
+    engine = create_engine(POSTGRES_URL)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    spec = importlib.util.spec_from_file_location("partition_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with engine.begin() as conn:
+        migration.convert(conn)
+
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS session_analysis_logs CASCADE"))
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _scanned_relations(db: Session, statement) -> set:
+    compiled = statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    relations = set()
+
+    def walk(node):
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return relations
+
+
+class TestPartitionPruning:
+    def test_recent_range_scans_only_recent_partitions(self, pg_session):
+        start_time = datetime.now(timezone.utc) - timedelta(days=7)
+        statement = select(
+            func.count(SessionAnalysisLog.id),
+            func.sum(SessionAnalysisLog.estimated_cost_usd),
+        ).where(SessionAnalysisLog.analyzed_at >= start_time)
+
+        scanned = _scanned_relations(pg_session, statement)
+
+        allowed = (
+            {
+                partition_name(month_start(start_time)),
+                partition_name(month_start(datetime.now(timezone.utc))),
+            }
+            | {
+                partition_name(add_months(month_start(datetime.now(timezone.utc)), i))
+                for i in range(1, 4)
+            }
+            | {"session_analysis_logs_default"}
+        )
+        assert scanned and scanned <= allowed
+        assert partition_name(month_start(_months_ago(2))) not in scanned
+
+    def test_month_range_scans_one_partition(self, pg_session):
+        month = month_start(_months_ago(0))
+        lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+        upper_month = add_months(month, 1)
+        upper = datetime(upper_month.year, upper_month.month, 1, tzinfo=timezone.utc)
+        statement = select(func.count(SessionAnalysisLog.id)).where(
+            SessionAnalysisLog.analyzed_at >= lower,
+            SessionAnalysisLog.analyzed_at < upper,
+        )
+
+        assert _scanned_relations(pg_session, statement) == {partition_name(month)}
+
+    def test_ensure_partitions_moves_rows_out_of_default(self, pg_session):
+        far = add_months(month_start(datetime.now(timezone.utc)), 6)
+        pg_session.add(_log(datetime(far.year, far.month, 2, tzinfo=timezone.utc)))
+        pg_session.commit()
+
+        created = AnalysisLogPartitionManager(pg_session).ensure_partitions(
+            months_ahead=6
+        )
+
+        assert partition_name(far) in created
+        in_partition = pg_session.execute(
+            text(f"SELECT count(*) FROM {partition_name(far)}")
+        ).scalar()
+        in_default = pg_session.execute(
+            text("SELECT count(*) FROM session_analysis_logs_default")
+        ).scalar()
+        assert (in_partition, in_default) == (1, 0)
+
+    def test_archive_detaches_partition(self, pg_session, tmp_path):
+        pg_session.add(_log(_months_ago(14)))
+        pg_session.commit()
+        # The migration only pre-creates months from the oldest row; add one
+        # for the old month the same way the job would
+        manager = AnalysisLogPartitionManager(pg_session)
+        manager._create_partition(month_start(_months_ago(14)))
+        pg_session.commit()
+
+        [archived] = manager.archive_expired(
+            retention_months=12,
+            archive_dir=str(tmp_path),
+            store=DirectoryStore(tmp_path / "bucket"),
+            drop=True,
+        )
+
+        assert archived.rows == 1 and archived.detached
+        assert partition_name(archived.month) not in manager.list_partitions()
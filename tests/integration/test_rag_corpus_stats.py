@@ -0,0 +1,252 @@
+"""
+Integration tests for the materialized RAG corpus statistics
+
+Counters are maintained by RAGIngestService / the delete endpoint and read
+by /api/rag/stats; /api/internal/check-rag-corpus-stats repairs drift.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.document import Chunk, CorpusCategoryStats, DocumentChunkStats
+from app.services.rag.corpus_stats import CorpusStatsService
+from app.services.rag.rag_ingest_service import RAGIngestService
+from app.utils.pagination import encode_cursor
+
+STATS = "/api/rag/stats/"
+
+TEXT = " ".join(f"Sentence number {i} about career planning." for i in range(40))
+
+
+def _ingest(db, title, category="general", chunk_size=200, overlap=20):
+    service = RAGIngestService(db)
+    service.openai_service = AsyncMock()
+    service.openai_service.create_embedding.return_value = [0.0] * 1536
+    _, document = service.create_document_records(
+        f"gs://bucket/{title}", title, b"x" * 1000, TEXT, {"pages": 3}, category
+    )
+    asyncio.run(
+        service.generate_chunks_and_embeddings(document.id, TEXT, chunk_size, overlap)
+    )
+    db.commit()
+    return document
+
+
+def _reprocess(db, document, chunk_size, overlap):
+    service = RAGIngestService(db)
+    service.openai_service = AsyncMock()
+    service.openai_service.create_embedding.return_value = [0.0] * 1536
+    service.delete_document_chunks(document.id)
+    asyncio.run(
+        service.generate_chunks_and_embeddings(document.id, TEXT, chunk_size, overlap)
+    )
+    db.commit()
+
+
+@pytest.fixture
+def corpus(db_session):
+    """Two general documents and one parenting document"""
+    documents = [
+        _ingest(db_session, "a.pdf"),
+        _ingest(db_session, "b.pdf"),
+        _ingest(db_session, "c.pdf", category="parenting"),
+    ]
+    # Distinct upload times (server_default has second resolution)
+    now = datetime.now(timezone.utc)
+    for i, document in enumerate(documents):
+        document.created_at = now - timedelta(minutes=i)
+    db_session.commit()
+    return documents
+
+
+def _check(db_session):
+    return CorpusStatsService(db_session).check()
+
+
+class TestCorpusStatsMaintenance:
+    def test_ingest_counts_documents_and_chunks(self, client, db_session, corpus):
+        data = client.get(STATS).json()
+        chunks = db_session.query(Chunk).count()
+
+        assert chunks > 3
+        assert data["total_documents"] == 3
+        assert data["total_datasources"] == 3
+        assert data["total_chunks"] == chunks
+        assert data["total_embeddings"] == chunks
+        assert data["total_bytes"] == 3000
+        assert {c["category"]: c["documents"] for c in data["categories"]} == {
+            "general": 2,
+            "parenting": 1,
+        }
+        row = data["documents"][0]
+        assert row["chunk_strategy"] == "rec_200_20"
+        assert (row["chunk_size"], row["overlap"]) == (200, 20)
+        assert row["chunks_count"] == chunks // 3
+        assert row["total_text_chars"] > 0
+        assert _check(db_session).document_drifts == []
+
+    def test_reprocess_replaces_counters(self, client, db_session, corpus):
+        _reprocess(db_session, corpus[0], chunk_size=400, overlap=40)
+
+        rows = (
+            db_session.execute(
+                select(DocumentChunkStats).where(
+                    DocumentChunkStats.doc_id == corpus[0].id
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert [r.chunk_strategy for r in rows] == ["rec_400_40"]
+        assert (
+            client.get(STATS).json()["total_chunks"] == db_session.query(Chunk).count()
+        )
+        report = _check(db_session)
+        assert report.document_drifts == [] and report.category_drifts == []
+
+    def test_rollback_discards_counters(self, db_session):
+        service = RAGIngestService(db_session)
+        service.create_document_records("gs://b/x", "x.pdf", b"xx", TEXT, {}, "general")
+        db_session.rollback()
+
+        assert CorpusStatsService(db_session).categories() == []
+
+    def test_delete_uncounts_document(self, client, db_session, corpus):
+        response = client.delete(f"{STATS}documents/{corpus[2].id}")
+
+        assert response.status_code == 200
+        assert response.json()["deleted"]["chunks"] > 0
+        data = client.get(STATS).json()
+        assert data["total_documents"] == 2
+        assert data["total_datasources"] == 2
+        assert data["total_chunks"] == db_session.query(Chunk).count()
+        assert {c["category"]: c["chunks"] for c in data["categories"]}[
+            "parenting"
+        ] == 0
+        report = _check(db_session)
+        assert report.document_drifts == [] and report.category_drifts == []
+
+    def test_delete_unknown_document(self, client, db_session):
+        assert client.delete(f"{STATS}documents/999").status_code == 404
+
+
+class TestCorpusStatsPaging:
+    def test_documents_follow_cursor(self, client, corpus):
+        first = client.get(STATS, params={"limit": 2}).json()
+        second = client.get(
+            STATS, params={"limit": 2, "cursor": first["next_cursor"]}
+        ).json()
+
+        assert len(first["documents"]) == 2
+        assert second["next_cursor"] is None
+        ids = [d["id"] for d in first["documents"] + second["documents"]]
+        assert sorted(ids) == sorted(d.id for d in corpus)
+        # Totals never depend on the page
+        assert first["total_documents"] == second["total_documents"] == 3
+
+    def test_invalid_cursor(self, client, corpus):
+        assert client.get(STATS, params={"cursor": "not-a-cursor"}).status_code == 400
+
+    def test_cursor_with_wrong_value_types(self, client, corpus):
+        documents = client.get(
+            STATS, params={"cursor": encode_cursor("yesterday", "1")}
+        )
+        chunks = client.get(
+            f"{STATS}chunks/{corpus[0].id}",
+            params={"cursor": encode_cursor("3", datetime.now(timezone.utc))},
+        )
+
+        assert documents.status_code == chunks.status_code == 400
+
+    def test_chunks_are_paged_in_ordinal_order(self, client, corpus):
+        doc_id, ordinals, cursor = corpus[0].id, [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = client.get(f"{STATS}chunks/{doc_id}", params=params).json()
+            assert len(page["items"]) <= 2
+            ordinals += [c["ordinal"] for c in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        assert page["document_title"] == "a.pdf"
+        assert ordinals == list(range(page["total"]))
+
+    def test_chunks_strategy_filter(self, client, corpus):
+        doc_id = corpus[0].id
+        hit = client.get(
+            f"{STATS}chunks/{doc_id}", params={"chunk_strategy": "rec_200_20"}
+        )
+        miss = client.get(
+            f"{STATS}chunks/{doc_id}", params={"chunk_strategy": "rec_1_1"}
+        )
+
+        assert hit.json()["total"] == len(hit.json()["items"]) > 0
+        assert miss.json() == {
+            "document_id": doc_id,
+            "document_title": "a.pdf",
+            "total": 0,
+            "items": [],
+            "next_cursor": None,
+        }
+
+    def test_chunks_unknown_document(self, client, db_session):
+        assert client.get(f"{STATS}chunks/999").status_code == 404
+
+
+class TestCorpusStatsCheck:
+    def _call(self, client, fix):
+        return client.post(
+            "/api/internal/check-rag-corpus-stats",
+            params={"fix": fix},
+            headers={"X-Internal-Key": settings.INTERNAL_API_KEY},
+        )
+
+    def test_requires_internal_key(self, client, db_session):
+        response = client.post(
+            "/api/internal/check-rag-corpus-stats", headers={"X-Internal-Key": "wrong"}
+        )
+        assert response.status_code == 403
+
+    def test_reports_and_repairs_drift(self, client, db_session, corpus):
+        db_session.execute(
+            update(CorpusCategoryStats)
+            .where(CorpusCategoryStats.category == "general")
+            .values(chunks_count=CorpusCategoryStats.chunks_count + 5)
+        )
+        db_session.execute(
+            update(DocumentChunkStats)
+            .where(DocumentChunkStats.doc_id == corpus[1].id)
+            .values(embeddings_count=0)
+        )
+        db_session.commit()
+
+        report = self._call(client, fix=False).json()
+        assert report["documents_checked"] == 3
+        assert report["fixed"] is False
+        assert [d["doc_id"] for d in report["document_drifts"]] == [corpus[1].id]
+        assert [d["category"] for d in report["category_drifts"]] == ["general"]
+
+        assert self._call(client, fix=True).json()["fixed"] is True
+        clean = self._call(client, fix=False).json()
+        assert clean["document_drifts"] == [] and clean["category_drifts"] == []
+        assert (
+            client.get(STATS).json()["total_chunks"] == db_session.query(Chunk).count()
+        )
+
+    def test_backfills_missing_rows(self, client, db_session, corpus):
+        db_session.query(DocumentChunkStats).delete()
+        db_session.query(CorpusCategoryStats).delete()
+        db_session.commit()
+
+        report = self._call(client, fix=True).json()
+
+        assert len(report["document_drifts"]) == 3
+        assert report["categories_checked"] == 2
+        data = client.get(STATS).json()
+        assert data["total_documents"] == 3
+        assert data["total_chunks"] == db_session.query(Chunk).count()
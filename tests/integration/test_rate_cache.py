@@ -0,0 +1,116 @@
+"""
+Integration tests for the in-memory billing rate cache
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+
+from app.models.credit_rate import CreditRate
+from app.services.billing.rate_cache import RateCache, rate_cache
+from app.services.core.credit_billing import CreditBillingService
+
+
+@pytest.fixture
+def voice_rate(db_session: Session) -> CreditRate:
+    rate = CreditRate(
+        rule_name="voice_call",
+        calculation_method="tiered",
+        rate_config={
+            "tiers": [
+                {"max_seconds": 600, "credits_per_second": 1},
+                {"max_seconds": 1800, "credits_per_second": 0.8},
+                {"max_seconds": None, "credits_per_second": 0.5},
+            ]
+        },
+        version=1,
+        is_active=True,
+        effective_from=datetime.now(timezone.utc) - timedelta(days=1),
+    )
+    db_session.add(rate)
+    db_session.commit()
+    return rate
+
+
+@pytest.fixture
+def statements(db_session: Session):
+    """SQL statements issued on the test engine"""
+    issued = []
+    engine = db_session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        issued.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield issued
+    event.remove(engine, "before_cursor_execute", record)
+
+
+class TestRateCache:
+    def test_repeated_calculations_do_not_query(
+        self, db_session, voice_rate, statements
+    ):
+        billing = CreditBillingService(db_session)
+        first = billing.calculate_credits(3000, "voice_call")
+        statements.clear()
+
+        for _ in range(20):
+            assert billing.calculate_credits(3000, "voice_call") == first
+
+        assert statements == []
+        # 600 * 1 + 1800 * 0.8 + 600 * 0.5
+        assert first.credits == 2340
+        assert len(first.calculation_details["tier_breakdown"]) == 3
+
+    def test_committed_rate_write_invalidates(self, db_session, voice_rate):
+        billing = CreditBillingService(db_session)
+        billing.calculate_credits(60, "voice_call")
+
+        voice_rate.is_active = False
+        db_session.commit()
+
+        with pytest.raises(ValueError, match="No active billing rate"):
+            billing.calculate_credits(60, "voice_call")
+
+    def test_version_check_sees_writes_from_other_processes(
+        self, db_session, voice_rate
+    ):
+        cache = RateCache(check_seconds=0)
+        assert cache.get(db_session, "voice_call").version == 1
+
+        # Core statements bypass the ORM hooks, like another process would
+        db_session.execute(
+            update(CreditRate).values(is_active=False, updated_at=datetime.now())
+        )
+        db_session.execute(
+            insert(CreditRate).values(
+                id=uuid4(),
+                rule_name="voice_call",
+                calculation_method="per_second",
+                rate_config={"credits_per_second": 2},
+                version=2,
+                is_active=True,
+                effective_from=datetime.now(timezone.utc) - timedelta(minutes=1),
+            )
+        )
+        db_session.commit()
+
+        assert cache.get(db_session, "voice_call").version == 2
+        assert cache.loads == 2
+
+    def test_future_version_waits_for_effective_from(self, db_session, voice_rate):
+        db_session.add(
+            CreditRate(
+                rule_name="voice_call",
+                calculation_method="per_second",
+                rate_config={"credits_per_second": 2},
+                version=2,
+                is_active=True,
+                effective_from=datetime.now(timezone.utc) + timedelta(days=1),
+            )
+        )
+        db_session.commit()
+
+        assert rate_cache.get(db_session, "voice_call").version == 1
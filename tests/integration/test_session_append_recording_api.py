@@ -330,6 +330,29 @@ class TestAppendRecordingAPI:
         data = response.json()
         assert data["recording_added"]["transcript_sanitized"] == "測試內容"
 
+    def test_append_sanitizes_session_transcript(
+        self, client, db_session: DBSession, test_session: Session, auth_token: str
+    ):
+        """Session transcript_sanitized is populated (PII masked) on every append"""
+        for text in ("我的手機是 0912345678", "請寄到 wang@example.com 謝謝"):
+            response = client.post(
+                f"/api/v1/sessions/{test_session.id}/recordings/append",
+                json={
+                    "start_time": "2025-01-15 10:00",
+                    "end_time": "2025-01-15 10:30",
+                    "transcript_text": text,
+                },
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+            assert response.status_code == 200
+
+        db_session.refresh(test_session)
+        assert "0912345678" in test_session.transcript_text
+        assert "0912345678" not in test_session.transcript_sanitized
+        assert "wang@example.com" not in test_session.transcript_sanitized
+        assert "[已遮蔽手機號碼]" in test_session.transcript_sanitized
+        assert "[已遮蔽電子郵件]" in test_session.transcript_sanitized
+
     def test_append_to_nonexistent_session_returns_404(self, client, auth_token: str):
         """Test appending to non-existent session returns 404"""
         # Arrange
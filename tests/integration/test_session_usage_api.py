@@ -19,6 +19,8 @@ from app.models.case import Case, CaseStatus
 from app.models.client import Client
 from app.models.counselor import Counselor
 from app.models.session import Session as SessionModel
+from app.services.billing.credit_ledger import CreditLedger
+from app.utils.pagination import encode_cursor
 
 
 class TestSessionAnalysisLogAPI:
@@ -291,6 +293,160 @@ class TestSessionAnalysisLogAPI:
             assert data["rag_documents"][1]["title"] == "衝突管理指南"
             assert len(data["rag_sources"]) == 3
 
+    def test_session_analysis_log_rag_data_stored_once(
+        self, db_session: Session, test_session
+    ):
+        """Identical RAG documents are stored once in content_blobs and listed in full"""
+        from app.models.content_blob import ContentBlob
+
+        session, headers, _ = test_session
+        rag_documents = [
+            {
+                "doc_id": f"doc-{i}",
+                "title": "親子溝通指南",
+                "content": "先同理，再設界線。" * 20,
+            }
+            for i in range(3)
+        ]
+
+        with TestClient(app) as client:
+            for _ in range(2):
+                response = client.post(
+                    f"/api/v1/sessions/{session.id}/analysis-logs",
+                    headers=headers,
+                    json={"analysis_type": "rag_query", "rag_documents": rag_documents},
+                )
+                assert response.status_code == 201
+                assert response.json()["rag_documents"] == rag_documents
+
+            response = client.get(
+                f"/api/v1/sessions/{session.id}/analysis-logs", headers=headers
+            )
+
+        assert [item["rag_documents"] for item in response.json()["items"]] == [
+            rag_documents,
+            rag_documents,
+        ]
+        assert db_session.query(ContentBlob).count() == 1
+
+    def test_list_analysis_logs_cursor_pagination(
+        self, db_session: Session, test_session
+    ):
+        """GET /analysis-logs pages newest first with an opaque cursor"""
+        from app.models.session_analysis_log import SessionAnalysisLog
+
+        session, headers, counselor = test_session
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        # Two logs share a timestamp: the id tie-break must keep them apart
+        times = [
+            base,
+            base + timedelta(minutes=1),
+            base + timedelta(minutes=1),
+            base + timedelta(minutes=2),
+            base + timedelta(minutes=3),
+        ]
+        for i, analyzed_at in enumerate(times):
+            db_session.add(
+                SessionAnalysisLog(
+                    session_id=session.id,
+                    counselor_id=counselor.id,
+                    tenant_id="career",
+                    analysis_type="partial_analysis",
+                    transcript=f"片段 {i}",
+                    analyzed_at=analyzed_at,
+                )
+            )
+        db_session.commit()
+
+        seen, cursor = [], None
+        with TestClient(app) as client:
+            while True:
+                params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+                response = client.get(
+                    f"/api/v1/sessions/{session.id}/analysis-logs",
+                    headers=headers,
+                    params=params,
+                )
+                assert response.status_code == 200
+                data = response.json()
+                assert data["total"] == 5
+                assert len(data["items"]) <= 2
+                seen.extend(data["items"])
+                cursor = data["next_cursor"]
+                if cursor is None:
+                    break
+
+            bad = client.get(
+                f"/api/v1/sessions/{session.id}/analysis-logs?cursor=not-a-cursor",
+                headers=headers,
+            )
+            bad_types = client.get(
+                f"/api/v1/sessions/{session.id}/analysis-logs",
+                params={"cursor": encode_cursor("yesterday", 1)},
+                headers=headers,
+            )
+
+        assert len({item["id"] for item in seen}) == 5
+        analyzed = [item["analyzed_at"] for item in seen]
+        assert analyzed == sorted(analyzed, reverse=True)
+        assert bad.status_code == 400
+        assert bad_types.status_code == 400
+
+    def test_list_analysis_logs_field_projection(
+        self, db_session: Session, test_session
+    ):
+        """Prompts and raw responses are neither selected nor returned unless requested"""
+        from sqlalchemy import event
+
+        from app.models.session_analysis_log import SessionAnalysisLog
+        from app.services.core.content_store import ContentStore
+
+        session, headers, counselor = test_session
+        prompt = "你是一位親子溝通顧問。" * 100
+        log = SessionAnalysisLog(
+            session_id=session.id,
+            counselor_id=counselor.id,
+            tenant_id="career",
+            analysis_type="partial_analysis",
+            safety_level="green",
+            system_prompt=prompt,
+            llm_raw_response='{"safety_level": "green"}',
+            analyzed_at=datetime.now(timezone.utc),
+        )
+        ContentStore(db_session, min_bytes=256).externalize(log)
+        db_session.add(log)
+        db_session.commit()
+
+        statements = []
+        engine = db_session.get_bind()
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        url = f"/api/v1/sessions/{session.id}/analysis-logs"
+        with TestClient(app) as client:
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                summary = client.get(url, headers=headers).json()["items"][0]
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+            full = client.get(
+                url,
+                headers=headers,
+                params={"fields": "system_prompt,llm_raw_response"},
+            ).json()["items"][0]
+            unknown = client.get(url, headers=headers, params={"fields": "speakers"})
+
+        log_selects = [s for s in statements if "FROM session_analysis_logs" in s]
+        assert log_selects
+        assert not any("system_prompt" in s for s in log_selects)
+        assert summary["system_prompt"] is None
+        assert summary["safety_level"] == "green"
+        assert full["system_prompt"] == prompt
+        assert full["llm_raw_response"] == '{"safety_level": "green"}'
+        assert full["user_prompt"] is None
+        assert unknown.status_code == 400
+
     def test_session_analysis_log_token_metrics(
         self, db_session: Session, test_session
     ):
@@ -803,6 +959,52 @@ class TestSessionUsageAPI:
             db_session.refresh(counselor)
             assert counselor.available_credits == initial_available - 10.0
 
+    def test_session_usage_concurrent_completion_charges_once(
+        self, db_session: Session, test_session
+    ):
+        """A completion that loses the race to the ledger returns 200, not 500"""
+        session, headers, counselor = test_session
+
+        with TestClient(app) as client:
+            start_time = datetime.now(timezone.utc)
+            response = client.post(
+                f"/api/v1/sessions/{session.id}/usage",
+                headers=headers,
+                json={
+                    "usage_type": "voice_call",
+                    "status": "in_progress",
+                    "start_time": start_time.isoformat(),
+                    "pricing_rule": {"unit": "minute", "rate": 1.0},
+                },
+            )
+            usage_id = response.json()["id"]
+
+            # The other completion request already wrote its ledger entry
+            CreditLedger(db_session).deduct(
+                counselor.id,
+                5.0,
+                resource_type="session",
+                resource_id=str(session.id),
+                idempotency_key=f"session_usage:{usage_id}:completed",
+            )
+            db_session.commit()
+            db_session.refresh(counselor)
+            balance = counselor.available_credits
+
+            response = client.patch(
+                f"/api/v1/sessions/{session.id}/usage/{usage_id}",
+                headers=headers,
+                json={
+                    "status": "completed",
+                    "end_time": (start_time + timedelta(minutes=5)).isoformat(),
+                },
+            )
+
+            assert response.status_code == 200
+            assert response.json()["id"] == usage_id
+            db_session.refresh(counselor)
+            assert counselor.available_credits == balance
+
 
 class TestSessionUsageIntegration:
     """Integration tests combining SessionAnalysisLog and SessionUsage"""
@@ -15,6 +15,7 @@ from app.models.case import Case, CaseStatus
 from app.models.client import Client
 from app.models.counselor import Counselor
 from app.models.session import Session as SessionModel
+from app.utils.pagination import encode_cursor
 
 
 class TestSessionsAPI:
@@ -390,6 +391,70 @@ class TestSessionsAPI:
             assert "sessions" in data
             assert len(data["sessions"]) == 3
 
+    def test_get_client_timeline_paginated(
+        self, db_session: Session, auth_headers, test_case_obj
+    ):
+        """Test timeline limit + cursor pages through sessions oldest first"""
+        for i in range(5):
+            db_session.add(
+                SessionModel(
+                    id=uuid4(),
+                    case_id=test_case_obj.id,
+                    tenant_id="career",
+                    session_number=i + 1,
+                    session_date=datetime(2025, 2, i + 1, tzinfo=timezone.utc),
+                )
+            )
+        db_session.commit()
+
+        numbers = []
+        with TestClient(app) as client:
+            cursor = None
+            for _ in range(5):
+                url = (
+                    f"/api/v1/sessions/timeline?client_id={test_case_obj.client_id}"
+                    "&limit=2"
+                )
+                if cursor:
+                    url += f"&cursor={cursor}"
+                response = client.get(url, headers=auth_headers)
+                assert response.status_code == 200
+                data = response.json()
+                assert data["total_sessions"] == 5
+                numbers.extend(s["session_number"] for s in data["sessions"])
+                cursor = data["next_cursor"]
+                if not cursor:
+                    break
+
+        assert numbers == [1, 2, 3, 4, 5]
+
+    def test_timeline_cache_invalidated_on_session_changes(
+        self, db_session: Session, auth_headers, test_case_obj
+    ):
+        """Test cached timeline reflects session create, update and delete"""
+        url = f"/api/v1/sessions/timeline?client_id={test_case_obj.client_id}"
+        with TestClient(app) as client:
+            assert client.get(url, headers=auth_headers).json()["sessions"] == []
+
+            created = client.post(
+                "/api/v1/sessions",
+                headers=auth_headers,
+                json={"case_id": str(test_case_obj.id), "session_date": "2025-01-15"},
+            ).json()
+            sessions = client.get(url, headers=auth_headers).json()["sessions"]
+            assert [s["session_id"] for s in sessions] == [created["id"]]
+
+            client.patch(
+                f"/api/v1/sessions/{created['id']}",
+                headers=auth_headers,
+                json={"session_date": "2025-01-20"},
+            )
+            sessions = client.get(url, headers=auth_headers).json()["sessions"]
+            assert sessions[0]["date"] == "2025-01-20"
+
+            client.delete(f"/api/v1/sessions/{created['id']}", headers=auth_headers)
+            assert client.get(url, headers=auth_headers).json()["sessions"] == []
+
     def test_get_reflection_success(
         self, db_session: Session, auth_headers, test_case_obj
     ):
@@ -484,6 +549,109 @@ class TestSessionsAPI:
             data = response.json()
             assert len(data["items"]) <= 2
 
+    def test_keyset_pagination_walks_all_sessions_once(
+        self, db_session: Session, auth_headers, test_case_obj
+    ):
+        """Test cursor pagination returns every session exactly once, newest first"""
+        # Two sessions share a timestamp to exercise the id tie-breaker
+        same_time = datetime(2025, 3, 1, 10, 0, tzinfo=timezone.utc)
+        expected_ids = []
+        for i in range(7):
+            session = SessionModel(
+                id=uuid4(),
+                case_id=test_case_obj.id,
+                tenant_id="career",
+                session_number=i + 1,
+                session_date=same_time
+                if i < 2
+                else datetime(2025, 3, i + 1, 9, 0, tzinfo=timezone.utc),
+            )
+            db_session.add(session)
+            expected_ids.append(str(session.id))
+        db_session.commit()
+
+        seen = []
+        with TestClient(app) as client:
+            cursor = None
+            for _ in range(10):
+                url = "/api/v1/sessions?limit=3&count=none"
+                if cursor:
+                    url += f"&cursor={cursor}"
+                response = client.get(url, headers=auth_headers)
+                assert response.status_code == 200
+                data = response.json()
+                assert data["total"] is None
+                seen.extend(item["id"] for item in data["items"])
+                cursor = data["next_cursor"]
+                if not cursor:
+                    break
+
+            # Offset and keyset pages agree on ordering
+            response = client.get("/api/v1/sessions?limit=100", headers=auth_headers)
+            offset_ids = [item["id"] for item in response.json()["items"]]
+
+        assert len(seen) == len(set(seen)) == 7
+        assert set(seen) == set(expected_ids)
+        assert seen == offset_ids
+
+    def test_list_sessions_projection(
+        self, db_session: Session, auth_headers, test_case_obj
+    ):
+        """Test large fields are omitted by default and returned on request"""
+        session = SessionModel(
+            id=uuid4(),
+            case_id=test_case_obj.id,
+            tenant_id="career",
+            session_number=1,
+            session_date=datetime.now(timezone.utc),
+            transcript_text="很長的逐字稿",
+            recordings=[],
+        )
+        db_session.add(session)
+        db_session.commit()
+
+        with TestClient(app) as client:
+            response = client.get("/api/v1/sessions", headers=auth_headers)
+            assert response.status_code == 200
+            item = response.json()["items"][0]
+            assert item["transcript_text"] is None
+            assert item["recordings"] is None
+
+            response = client.get(
+                "/api/v1/sessions?fields=transcript_text,recordings",
+                headers=auth_headers,
+            )
+            assert response.status_code == 200
+            item = response.json()["items"][0]
+            assert item["transcript_text"] == "很長的逐字稿"
+            assert item["recordings"] == []
+
+            response = client.get(
+                "/api/v1/sessions?fields=analysis_logs", headers=auth_headers
+            )
+            assert response.status_code == 400
+
+    def test_list_sessions_invalid_cursor(self, db_session: Session, auth_headers):
+        """Test malformed cursor returns 400"""
+        with TestClient(app) as client:
+            response = client.get(
+                "/api/v1/sessions?cursor=not-a-cursor", headers=auth_headers
+            )
+            assert response.status_code == 400
+
+    def test_list_sessions_cursor_with_wrong_types(
+        self, db_session: Session, auth_headers
+    ):
+        """Test a cursor that decodes but holds non-datetime/UUID values is 400"""
+        with TestClient(app) as client:
+            for values in [(1, 2), ("yesterday", "abc"), (None, None)]:
+                response = client.get(
+                    "/api/v1/sessions",
+                    params={"cursor": encode_cursor(*values)},
+                    headers=auth_headers,
+                )
+                assert response.status_code == 400
+
 
 class TestSessionNameField:
     """TDD tests for Session name field feature (RED phase - will fail initially)"""
@@ -767,3 +935,40 @@ class TestSessionNameField:
 
             assert session2_data is not None
             assert session2_data.get("name") is None
+
+
+class TestSessionListPlan:
+    """The counselor-wide list pages walk an index in sort order"""
+
+    def _plan(self, db_session: Session, **options) -> str:
+        from sqlalchemy import event
+
+        from app.repositories.session_repository import SessionRepository
+
+        engine = db_session.get_bind()
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            SessionRepository(db_session).list_sessions(
+                counselor_id=uuid4(), tenant_id="career", count_mode="none", **options
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        statement, parameters = next(s for s in statements if "ORDER BY" in s[0])
+        rows = db_session.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        )
+        return "\n".join(row[-1] for row in rows)
+
+    @pytest.mark.parametrize("deep", [False, True])
+    def test_list_without_case_uses_tenant_sort_index(self, db_session: Session, deep):
+        cursor = encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), uuid4())
+        plan = self._plan(db_session, **({"cursor": cursor} if deep else {}))
+
+        assert "ix_sessions_tenant_sort_time" in plan, plan
+        # No sort of the counselor's whole session set
+        assert "TEMP B-TREE FOR ORDER BY" not in plan, plan
@@ -2,7 +2,7 @@
 Integration tests for UI Client-Case CRUD APIs
 TDD - Write tests first, then implement
 """
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 from uuid import uuid4
 
 import pytest
@@ -14,6 +14,8 @@ from app.main import app
 from app.models.case import Case, CaseStatus
 from app.models.client import Client
 from app.models.counselor import Counselor
+from app.models.session import Session as SessionModel
+from app.utils.pagination import encode_cursor
 
 
 class TestUIClientCaseAPI:
@@ -175,6 +177,99 @@ class TestUIClientCaseAPI:
         data = response.json()
         assert len(data["items"]) <= 3
 
+    def test_list_client_cases_ordering_across_pages(
+        self,
+        test_client: TestClient,
+        db_session: Session,
+        counselor: Counselor,
+        auth_headers,
+    ):
+        """Ordering by last session date is global, not per page"""
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        expected = []
+        # Insert in an order unrelated to last session date
+        for i, day_offset in enumerate([3, None, 7, 1, 5, None, 6, 2]):
+            client = Client(
+                id=uuid4(),
+                counselor_id=counselor.id,
+                tenant_id="career",
+                name=f"排序客戶{i}",
+                code=f"ORD{i:03d}",
+                email=f"order{i}@example.com",
+                gender="女",
+                birth_date=date(1990, 1, 1),
+                phone=f"09000000{i:02d}",
+                identity_option="在職者",
+                current_status="穩定就業",
+            )
+            db_session.add(client)
+            db_session.flush()
+            case = Case(
+                id=uuid4(),
+                case_number=f"ORDCASE{i:03d}",
+                counselor_id=counselor.id,
+                client_id=client.id,
+                tenant_id="career",
+                status=CaseStatus.IN_PROGRESS,
+            )
+            db_session.add(case)
+            db_session.flush()
+            if day_offset is not None:
+                db_session.add(
+                    SessionModel(
+                        id=uuid4(),
+                        case_id=case.id,
+                        tenant_id="career",
+                        session_number=1,
+                        session_date=base + timedelta(days=day_offset),
+                    )
+                )
+            expected.append((day_offset if day_offset is not None else -1, client.id))
+        db_session.commit()
+        expected_ids = [
+            str(client_id) for _, client_id in sorted(expected, reverse=True)
+        ]
+
+        # Walk with cursors
+        seen = []
+        cursor = None
+        while True:
+            url = "/api/v1/ui/client-case-list?limit=3"
+            if cursor:
+                url += f"&cursor={cursor}"
+            response = test_client.get(url, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total"] == 8
+            seen.extend(item["client_id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert seen == expected_ids
+
+        # Offset pages agree with the cursor walk
+        second_page = test_client.get(
+            "/api/v1/ui/client-case-list?skip=3&limit=3", headers=auth_headers
+        ).json()
+        assert [item["client_id"] for item in second_page["items"]] == seen[3:6]
+
+    def test_list_client_cases_invalid_cursor(
+        self, test_client: TestClient, counselor: Counselor, auth_headers
+    ):
+        """Malformed cursor returns 400"""
+        response = test_client.get(
+            "/api/v1/ui/client-case-list?cursor=not-a-cursor", headers=auth_headers
+        )
+        assert response.status_code == 400
+
+        # Decodes, but not a (datetime, UUID) sort key
+        response = test_client.get(
+            "/api/v1/ui/client-case-list",
+            params={"cursor": encode_cursor(1, "abc")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
     # ==================== UI-4: Create Client-Case ====================
     def test_create_client_case_success(
         self, test_client: TestClient, counselor: Counselor, auth_headers
@@ -0,0 +1,157 @@
+"""
+Integration tests for the incremental SessionUsage.recorded_seconds accumulator
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.case import Case, CaseStatus
+from app.models.client import Client
+from app.models.counselor import Counselor
+from app.models.session import Session as SessionModel
+from app.models.session_usage import SessionUsage
+from app.services.billing.usage_accumulator import (
+    UsageAccumulator,
+    _apply_to_usage,
+    appended_segments,
+)
+
+
+def _segment(number: int, seconds: int) -> dict:
+    return {"segment_number": number, "duration_seconds": seconds}
+
+
+@pytest.fixture
+def session_with_usage(db_session: Session):
+    counselor = Counselor(
+        id=uuid4(),
+        email="accumulator@test.com",
+        username="accumulator",
+        full_name="Accumulator",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+    )
+    client = Client(
+        id=uuid4(),
+        counselor_id=counselor.id,
+        tenant_id="career",
+        name="累計測試客戶",
+        code="ACC001",
+        gender="不透露",
+        birth_date=datetime(1990, 1, 1).date(),
+        phone="0912345678",
+        identity_option="其他",
+        current_status="進行中",
+    )
+    case = Case(
+        id=uuid4(),
+        case_number="ACASE001",
+        counselor_id=counselor.id,
+        client_id=client.id,
+        tenant_id="career",
+        status=CaseStatus.IN_PROGRESS,
+    )
+    session = SessionModel(
+        id=uuid4(),
+        case_id=case.id,
+        tenant_id="career",
+        session_number=1,
+        session_date=datetime.now(timezone.utc),
+        recordings=[_segment(1, 30)],
+    )
+    usage = SessionUsage(
+        session_id=session.id,
+        counselor_id=counselor.id,
+        tenant_id="career",
+        status="in_progress",
+        credits_deducted=Decimal("1"),
+        last_billed_minutes=1,
+        recorded_seconds=30,
+        recorded_segments=1,
+    )
+    db_session.add_all([counselor, client, case, session, usage])
+    db_session.commit()
+    return session, usage
+
+
+def _usage(db_session: Session, session_id) -> SessionUsage:
+    db_session.expire_all()
+    return db_session.query(SessionUsage).filter_by(session_id=session_id).one()
+
+
+class TestAppendedSegments:
+    def test_append(self):
+        old = [_segment(1, 30)]
+        assert appended_segments(old, old + [_segment(2, 45)]) == [_segment(2, 45)]
+
+    def test_rewrite_or_shrink_is_not_an_append(self):
+        old = [_segment(1, 30), _segment(2, 45)]
+        assert appended_segments(old, [_segment(1, 30)]) is None
+        assert appended_segments(old, [_segment(1, 30), _segment(2, 50)]) is None
+
+
+class TestUsageAccumulator:
+    def test_append_adds_only_new_segments(self, db_session, session_with_usage):
+        session, _ = session_with_usage
+
+        session.recordings = list(session.recordings) + [_segment(2, 45)]
+        db_session.commit()
+        session.recordings = list(session.recordings) + [_segment(3, 20)]
+        db_session.commit()
+
+        usage = _usage(db_session, session.id)
+        assert usage.recorded_seconds == 95
+        assert usage.recorded_segments == 3
+
+    def test_rewrite_falls_back_to_full_total(self, db_session, session_with_usage):
+        session, _ = session_with_usage
+        session.recordings = list(session.recordings) + [_segment(2, 45)]
+        db_session.commit()
+
+        session.recordings = [_segment(1, 10)]
+        db_session.commit()
+
+        usage = _usage(db_session, session.id)
+        assert usage.recorded_seconds == 10
+        assert usage.recorded_segments == 1
+
+    def test_replayed_delta_is_not_counted_twice(self, db_session, session_with_usage):
+        session, _ = session_with_usage
+        old = [_segment(1, 30)]
+        new = old + [_segment(2, 45)]
+
+        for _ in range(2):
+            _apply_to_usage(db_session, session.id, old, new, [_segment(2, 45)])
+        db_session.commit()
+
+        assert _usage(db_session, session.id).recorded_seconds == 75
+
+    def test_totals_seed_unaccumulated_usage(self, db_session, session_with_usage):
+        session, usage = session_with_usage
+        usage.recorded_seconds = None
+        usage.recorded_segments = None
+        db_session.commit()
+
+        totals = UsageAccumulator(db_session).totals(session.id, usage)
+        db_session.commit()
+
+        assert totals == (30, 1)
+        assert _usage(db_session, session.id).recorded_seconds == 30
+
+    def test_verify_detects_and_fixes_drift(self, db_session, session_with_usage):
+        session, usage = session_with_usage
+        usage.recorded_seconds = 999
+        db_session.commit()
+
+        accumulator = UsageAccumulator(db_session)
+        drifts = accumulator.verify(fix=True)
+
+        assert [(d.recorded_seconds, d.recomputed_seconds) for d in drifts] == [
+            (999, 30)
+        ]
+        assert accumulator.verify() == []
@@ -0,0 +1,136 @@
+"""
+Integration tests for the usage-limit gate (allowance snapshots)
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.counselor import BillingMode, Counselor
+from app.services.billing.credit_ledger import CreditLedger
+from app.services.billing.usage_gate import (
+    SOURCE_DATABASE,
+    SOURCE_SNAPSHOT,
+    UsageGate,
+)
+
+
+def _counselor(db_session: Session, **kwargs) -> Counselor:
+    values = dict(
+        id=uuid4(),
+        email=f"{uuid4().hex[:8]}@gate.test",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+        billing_mode=BillingMode.SUBSCRIPTION,
+        monthly_usage_limit_minutes=360,
+        monthly_minutes_used=0,
+        usage_period_start=datetime.now(timezone.utc),
+    )
+    values.update(kwargs)
+    counselor = Counselor(**values)
+    db_session.add(counselor)
+    db_session.commit()
+    return counselor
+
+
+@pytest.fixture
+def gate() -> UsageGate:
+    return UsageGate(ttl_seconds=60, credit_margin=50, minute_margin=60)
+
+
+@pytest.fixture
+def statements(db_session: Session):
+    issued = []
+    engine = db_session.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        issued.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield issued
+    event.remove(engine, "before_cursor_execute", record)
+
+
+class TestSubscriptionGate:
+    def test_far_below_limit_decides_from_snapshot(self, db_session, gate, statements):
+        counselor = _counselor(db_session, monthly_minutes_used=10)
+
+        assert gate.admit(db_session, counselor).source == SOURCE_DATABASE
+        db_session.commit()
+        db_session.refresh(counselor)  # loaded by get_current_user per request
+        statements.clear()
+
+        decision = gate.admit(db_session, counselor)
+
+        assert decision.allowed and decision.source == SOURCE_SNAPSHOT
+        assert statements == []
+
+    def test_near_limit_reserves_atomically(self, db_session, gate):
+        counselor = _counselor(db_session, monthly_minutes_used=330)
+
+        first = gate.admit(db_session, counselor, minutes=45)
+        db_session.commit()
+        second = gate.admit(db_session, counselor, minutes=45)
+
+        assert first.allowed and first.source == SOURCE_DATABASE
+        # Same rule as before: admitted while used < limit
+        assert not second.allowed and second.source == SOURCE_DATABASE
+        assert counselor.monthly_minutes_used == 375
+
+    def test_reservations_always_count_minutes(self, db_session, gate):
+        counselor = _counselor(db_session, monthly_minutes_used=0)
+
+        for _ in range(4):
+            decision = gate.admit(db_session, counselor, minutes=60)
+            assert decision.allowed and decision.source == SOURCE_DATABASE
+            db_session.commit()
+
+        assert counselor.monthly_minutes_used == 240
+        # 120 minutes left: plain checks are still answered from the snapshot
+        assert gate.admit(db_session, counselor).source == SOURCE_SNAPSHOT
+        gate.admit(db_session, counselor, minutes=60)
+        db_session.commit()
+        # 60 left is within the margin
+        assert gate.admit(db_session, counselor).source == SOURCE_DATABASE
+
+    def test_expired_period_is_reset(self, db_session, gate):
+        counselor = _counselor(
+            db_session,
+            monthly_minutes_used=360,
+            usage_period_start=datetime.now(timezone.utc) - timedelta(days=31),
+        )
+
+        decision = gate.admit(db_session, counselor, minutes=30)
+        db_session.commit()
+
+        assert decision.allowed
+        assert counselor.monthly_minutes_used == 30
+
+
+class TestPrepaidGate:
+    def test_ledger_deductions_update_snapshot(self, db_session, gate, monkeypatch):
+        import app.services.billing.credit_ledger as ledger_module
+
+        monkeypatch.setattr(ledger_module, "usage_gate", gate)
+        counselor = _counselor(
+            db_session, billing_mode=BillingMode.PREPAID, available_credits=100.0
+        )
+        gate.admit(db_session, counselor)
+        assert gate.admit(db_session, counselor).source == SOURCE_SNAPSHOT
+
+        CreditLedger(db_session).deduct(counselor.id, 60)
+        db_session.commit()
+
+        # 40 credits left is within the margin: checked against the database
+        assert gate.admit(db_session, counselor).source == SOURCE_DATABASE
+
+    def test_empty_balance_denied(self, db_session, gate):
+        counselor = _counselor(
+            db_session, billing_mode=BillingMode.PREPAID, available_credits=0.0
+        )
+
+        assert not gate.admit(db_session, counselor).allowed
@@ -0,0 +1,550 @@
+"""
+Integration tests for the dashboard usage rollups (UsageRollupService)
+
+Parity: the core dashboard endpoints are pinned to values computed in plain
+Python from the raw fixture rows, with and without the rollups; the other
+rollup-backed endpoints must return the same with and without them.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor, CounselorRole
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.models.usage_rollup import AnalysisRollup, RollupWatermark, UsageRollup
+from app.services.core.usage_rollups import (
+    ANALYSIS,
+    DAY,
+    HOUR,
+    USAGE,
+    UsageRollupService,
+)
+
+DASHBOARD = "/api/v1/admin/dashboard"
+MODELS = [
+    "models/gemini-flash-lite-latest",
+    "gemini-1.5-flash-latest",
+    "gemini-3-flash-preview",
+    "some-unknown-model",
+    None,
+]
+SAFETY = ["green", "yellow", "red", None]
+# Hours ago; kept away from the exact day/week/month window edges
+OFFSETS = [
+    0.2,
+    0.9,
+    3.5,
+    11.2,
+    23.4,
+    25.1,
+    49.7,
+    72.3,
+    100.6,
+    166.5,
+    170.2,
+    300.1,
+    500.4,
+    715.3,
+    800.0,
+]
+
+
+def _counselor(
+    db_session: Session, tenant_id: str, role=CounselorRole.COUNSELOR
+) -> Counselor:
+    counselor = Counselor(
+        id=uuid4(),
+        email=f"rollup-{uuid4().hex[:8]}@test.com",
+        username=f"rollup{uuid4().hex[:8]}",
+        full_name="Rollup Tester",
+        hashed_password="x",
+        tenant_id=tenant_id,
+        role=role,
+        is_active=True,
+    )
+    db_session.add(counselor)
+    return counselor
+
+
+def _add_session(db_session: Session, counselor: Counselor, hours_ago: float, i: int):
+    at = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    session_id = uuid4()
+    db_session.add(
+        SessionUsage(
+            id=uuid4(),
+            session_id=session_id,
+            counselor_id=counselor.id,
+            tenant_id=counselor.tenant_id,
+            duration_seconds=60 * (i + 1),
+            status="completed",
+            total_prompt_tokens=1000 * (i + 1),
+            total_completion_tokens=300 * (i + 1),
+            total_tokens=1300 * (i + 1),
+            estimated_cost_usd=0.01 * (i + 1),
+            created_at=at,
+        )
+    )
+    for j in range(2):
+        db_session.add(
+            SessionAnalysisLog(
+                id=uuid4(),
+                session_id=session_id,
+                counselor_id=counselor.id,
+                tenant_id=counselor.tenant_id,
+                analysis_type="quick",
+                model_name=MODELS[(i + j) % len(MODELS)],
+                prompt_tokens=500 * (i + j + 1),
+                completion_tokens=100 * (i + j + 1),
+                total_tokens=600 * (i + j + 1),
+                # Multiples of 0.002: sums never land on a rounding half-step
+                estimated_cost_usd=0.002 * (i + j + 1),
+                safety_level=SAFETY[(i + j) % len(SAFETY)],
+                analyzed_at=at + timedelta(minutes=j),
+            )
+        )
+
+
+@pytest.fixture
+def admin_headers(db_session: Session) -> dict:
+    admin = _counselor(db_session, "career", role=CounselorRole.ADMIN)
+    db_session.commit()
+    token = create_access_token(
+        {"sub": admin.email, "tenant_id": admin.tenant_id, "role": admin.role.value}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def usage_data(db_session: Session):
+    counselors = [
+        _counselor(db_session, "career"),
+        _counselor(db_session, "career"),
+        _counselor(db_session, "island_parents"),
+    ]
+    db_session.flush()
+    for i, hours_ago in enumerate(OFFSETS):
+        _add_session(db_session, counselors[i % len(counselors)], hours_ago, i)
+    db_session.commit()
+    return counselors
+
+
+def _requests(counselors):
+    paths = []
+    for time_range in ("day", "week", "month"):
+        for tenant in ("", "&tenant_id=career"):
+            query = f"?time_range={time_range}{tenant}"
+            paths += [
+                f"/summary{query}",
+                f"/cost-trend{query}",
+                f"/token-trend{query}",
+                f"/session-trend{query}",
+                f"/cost-breakdown{query}",
+                f"/model-distribution{query}",
+                f"/daily-active-users{query}",
+                f"/safety-distribution{query}",
+                f"/overall-stats{query}",
+                f"/cost-per-user{query}",
+            ]
+        paths.append(
+            f"/user-daily-usage?time_range={time_range}&counselor_id={counselors[0].id}"
+        )
+    return paths
+
+
+def _responses(client: TestClient, headers: dict, paths, monkeypatch, rollups: bool):
+    monkeypatch.setattr(settings, "DASHBOARD_READ_FROM_ROLLUPS", rollups)
+    responses = {}
+    for path in paths:
+        response = client.get(DASHBOARD + path, headers=headers)
+        assert response.status_code == 200, (path, response.text)
+        responses[path] = response.json()
+    return responses
+
+
+def _same(expected, actual) -> bool:
+    """Equal up to float rounding of the summation order"""
+    if isinstance(expected, float) or isinstance(actual, float):
+        return actual == pytest.approx(expected, rel=1e-9, abs=1e-9)
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(
+            _same(expected[k], actual[k]) for k in expected
+        )
+    if isinstance(expected, list):
+        return len(expected) == len(actual) and all(
+            _same(e, a) for e, a in zip(expected, actual)
+        )
+    return expected == actual
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _series(rows, at, fmt, hourly, **measures):
+    """Rows -> trend response: one entry per non-empty hour/day, oldest first"""
+    buckets = defaultdict(lambda: defaultdict(float))
+    for row in rows:
+        period = at(row).replace(minute=0, second=0, microsecond=0)
+        if not hourly:
+            period = period.replace(hour=0)
+        for name, value in measures.items():
+            buckets[period][name] += value(row)
+    periods = sorted(buckets)
+    series = {"labels": [p.strftime("%H:%M" if hourly else fmt) for p in periods]}
+    for name in measures:
+        series[name] = [buckets[p][name] for p in periods]
+    return series
+
+
+def _expected(db_session: Session, counselors):
+    """Core endpoint responses computed from the raw rows, without SQL aggregation"""
+    now = datetime.now(timezone.utc)
+    usages = db_session.execute(select(SessionUsage)).scalars().all()
+    logs = db_session.execute(select(SessionAnalysisLog)).scalars().all()
+    expected = {}
+    for time_range, days in (("day", 1), ("week", 7), ("month", 30)):
+        start, hourly = now - timedelta(days=days), time_range == "day"
+        for tenant in (None, "career"):
+            query = f"?time_range={time_range}" + (
+                f"&tenant_id={tenant}" if tenant else ""
+            )
+            usage = [
+                u
+                for u in usages
+                if _utc(u.created_at) >= start and tenant in (None, u.tenant_id)
+            ]
+            analysis = [
+                a
+                for a in logs
+                if _utc(a.analyzed_at) >= start and tenant in (None, a.tenant_id)
+            ]
+            created = lambda u: _utc(u.created_at)  # noqa: E731
+
+            expected[f"/summary{query}"] = {
+                "total_cost_usd": round(
+                    sum(u.duration_seconds for u in usage) * 0.40 / 3600
+                    + sum(float(a.estimated_cost_usd) for a in analysis),
+                    4,
+                ),
+                "total_sessions": len(usage),
+                "active_users": len({u.counselor_id for u in usage}),
+            }
+            expected[f"/cost-trend{query}"] = _series(
+                usage,
+                created,
+                "%Y-%m-%d",
+                hourly,
+                data=lambda u: float(u.estimated_cost_usd),
+            )
+            expected[f"/token-trend{query}"] = _series(
+                usage,
+                created,
+                "%Y-%m-%d",
+                hourly,
+                prompt_tokens=lambda u: u.total_prompt_tokens,
+                completion_tokens=lambda u: u.total_completion_tokens,
+                total_tokens=lambda u: u.total_tokens,
+            )
+            trend = _series(
+                usage,
+                created,
+                "%m/%d",
+                hourly,
+                sessions=lambda u: 1,
+                duration_hours=lambda u: u.duration_seconds,
+            )
+            trend["duration_hours"] = [
+                round(s / 3600, 2) for s in trend["duration_hours"]
+            ]
+            expected[f"/session-trend{query}"] = trend
+            expected[f"/safety-distribution{query}"] = dict(
+                Counter(a.safety_level for a in analysis if a.safety_level)
+            )
+
+        mine = [
+            u
+            for u in usages
+            if _utc(u.created_at) >= start and u.counselor_id == counselors[0].id
+        ]
+        daily = _series(
+            mine,
+            lambda u: _utc(u.created_at),
+            "%Y-%m-%d",
+            False,
+            sessions=lambda u: 1,
+            tokens=lambda u: u.total_tokens,
+            cost_usd=lambda u: float(u.estimated_cost_usd),
+            minutes=lambda u: u.duration_seconds,
+        )
+        expected[
+            f"/user-daily-usage?time_range={time_range}&counselor_id={counselors[0].id}"
+        ] = [
+            {
+                "date": label,
+                "sessions": sessions,
+                "tokens": tokens,
+                "cost_usd": cost,
+                "minutes": round(seconds / 60, 2),
+            }
+            for label, sessions, tokens, cost, seconds in zip(
+                daily["labels"],
+                daily["sessions"],
+                daily["tokens"],
+                daily["cost_usd"],
+                daily["minutes"],
+            )
+        ]
+    return expected
+
+
+def _assert_parity(db_session, admin_headers, counselors, monkeypatch):
+    paths = _requests(counselors)
+    expected = _expected(db_session, counselors)
+    assert set(expected) <= set(paths)
+    with TestClient(app) as client:
+        live = _responses(client, admin_headers, paths, monkeypatch, rollups=False)
+        rolled = _responses(client, admin_headers, paths, monkeypatch, rollups=True)
+    for path in paths:
+        if path in expected:
+            assert _same(expected[path], live[path]), (path, expected[path], live[path])
+            assert _same(expected[path], rolled[path]), (
+                path,
+                expected[path],
+                rolled[path],
+            )
+        else:
+            assert _same(live[path], rolled[path]), (path, live[path], rolled[path])
+
+
+class TestRollupRefresh:
+    def test_first_refresh_backfills_hours_and_days(
+        self, db_session: Session, usage_data
+    ):
+        reports = UsageRollupService(db_session).refresh()
+
+        assert [r.source for r in reports] == [
+            "session_usages",
+            "session_analysis_logs",
+        ]
+        usage_rows = db_session.execute(
+            select(func.sum(UsageRollup.sessions)).where(UsageRollup.grain == HOUR)
+        ).scalar()
+        daily_rows = db_session.execute(
+            select(func.sum(UsageRollup.sessions)).where(UsageRollup.grain == DAY)
+        ).scalar()
+        log_rows = db_session.execute(
+            select(func.sum(AnalysisRollup.logs)).where(AnalysisRollup.grain == HOUR)
+        ).scalar()
+        assert usage_rows == daily_rows == len(OFFSETS)
+        assert log_rows == 2 * len(OFFSETS)
+
+        state = db_session.get(RollupWatermark, "session_usages")
+        assert state.watermark is not None
+        assert state.complete_until is not None
+
+    def test_refresh_is_idempotent(self, db_session: Session, usage_data):
+        service = UsageRollupService(db_session)
+        service.refresh()
+        before = db_session.execute(
+            select(func.count(UsageRollup.id), func.sum(UsageRollup.duration_seconds))
+        ).one()
+        # Nothing changed: only the late-arrival overlap is re-scanned
+        service.refresh()
+        service.refresh(reconcile_days=40)
+        after = db_session.execute(
+            select(func.count(UsageRollup.id), func.sum(UsageRollup.duration_seconds))
+        ).one()
+        assert tuple(before) == tuple(after)
+
+    def test_bucket_keys_are_unique(self, db_session: Session, usage_data):
+        UsageRollupService(db_session).refresh()
+        row = db_session.execute(
+            select(AnalysisRollup).where(AnalysisRollup.model_name.is_(None)).limit(1)
+        ).scalar_one()
+        duplicate = {
+            "grain": row.grain,
+            "bucket_start": row.bucket_start,
+            "tenant_id": row.tenant_id,
+            "counselor_id": row.counselor_id,
+            "model_name": None,
+            "safety_level": row.safety_level,
+            "logs": 1,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "estimated_cost_usd": 0,
+        }
+
+        # A NULL model is one key value, not a way around the index
+        with pytest.raises(IntegrityError):
+            db_session.execute(insert(AnalysisRollup), [duplicate])
+        db_session.rollback()
+
+    def test_empty_range_has_no_rows(self, db_session: Session, usage_data):
+        start = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        assert (
+            UsageRollupService(db_session).aggregate(
+                USAGE, start, start + timedelta(hours=1)
+            )
+            == []
+        )
+
+    def test_plan_splits_live_edges_and_rolled_buckets(self):
+        start = datetime(2026, 10, 1, 10, 30, tzinfo=timezone.utc)
+        end = datetime(2026, 10, 5, 14, 20, tzinfo=timezone.utc)
+        complete = datetime(2026, 10, 5, 12, 0, tzinfo=timezone.utc)
+
+        segments = [
+            (s.kind, s.lo.strftime("%d %H:%M"), s.hi.strftime("%d %H:%M"))
+            for s in UsageRollupService.plan(start, end, complete, DAY)
+        ]
+        assert segments == [
+            ("live", "01 10:30", "01 11:00"),
+            ("hour", "01 11:00", "02 00:00"),
+            ("day", "02 00:00", "05 00:00"),
+            ("hour", "05 00:00", "05 12:00"),
+            ("live", "05 12:00", "05 14:20"),
+        ]
+        # Hourly trends never use daily rows; no refresh yet means all live
+        assert {
+            s.kind for s in UsageRollupService.plan(start, end, complete, HOUR)
+        } == {
+            "live",
+            "hour",
+        }
+        assert [s.kind for s in UsageRollupService.plan(start, end, None)] == ["live"]
+
+
+class TestRollupParity:
+    def test_endpoints_match_live_queries(
+        self, db_session: Session, admin_headers, usage_data, monkeypatch
+    ):
+        UsageRollupService(db_session).refresh()
+        _assert_parity(db_session, admin_headers, usage_data, monkeypatch)
+
+    def test_live_reads_match_raw_rows(
+        self, db_session: Session, usage_data, monkeypatch
+    ):
+        """The reference (live) path agrees with a plain sum over the rows"""
+        monkeypatch.setattr(settings, "DASHBOARD_READ_FROM_ROLLUPS", False)
+        start = datetime.now(timezone.utc) - timedelta(days=7)
+        rows = UsageRollupService(db_session).aggregate(
+            USAGE, start, by=("counselor_id",), period=DAY
+        )
+        expected = [
+            (60 * (i + 1)) for i, hours_ago in enumerate(OFFSETS) if hours_ago < 7 * 24
+        ]
+        assert sum(r["duration_seconds"] for r in rows) == sum(expected)
+        assert sum(r["sessions"] for r in rows) == len(expected)
+
+    def test_late_rows_are_reconciled_by_next_refresh(
+        self, db_session: Session, admin_headers, usage_data, monkeypatch
+    ):
+        service = UsageRollupService(db_session)
+        service.refresh()
+
+        # An analysis of a three-day-old session arriving now (analyzed_at in
+        # an already rolled-up hour), and a usage row updated after the refresh
+        usage = db_session.execute(
+            select(SessionUsage).order_by(SessionUsage.created_at).limit(1)
+        ).scalar_one()
+        usage.duration_seconds += 600
+        old_session = db_session.execute(
+            select(SessionUsage).where(SessionUsage.duration_seconds == 60 * 8)
+        ).scalar_one()
+        db_session.add(
+            SessionAnalysisLog(
+                id=uuid4(),
+                session_id=old_session.session_id,
+                counselor_id=old_session.counselor_id,
+                tenant_id=old_session.tenant_id,
+                analysis_type="quick",
+                model_name="gemini-3-flash-preview",
+                prompt_tokens=7000,
+                completion_tokens=900,
+                total_tokens=7900,
+                estimated_cost_usd=0.05,
+                safety_level="red",
+                analyzed_at=old_session.created_at + timedelta(minutes=30),
+            )
+        )
+        db_session.commit()
+
+        monkeypatch.setattr(settings, "DASHBOARD_READ_FROM_ROLLUPS", True)
+        stale = service.aggregate(
+            ANALYSIS, datetime.now(timezone.utc) - timedelta(days=7)
+        )
+        assert stale[0]["logs"] == 2 * sum(1 for h in OFFSETS if h < 7 * 24)
+
+        service.refresh()
+        _assert_parity(db_session, admin_headers, usage_data, monkeypatch)
+
+    def test_reconcile_picks_up_deleted_rows(
+        self, db_session: Session, admin_headers, usage_data, monkeypatch
+    ):
+        service = UsageRollupService(db_session)
+        service.refresh()
+        victim = db_session.execute(
+            select(SessionUsage).where(SessionUsage.duration_seconds == 60 * 5)
+        ).scalar_one()
+        db_session.delete(victim)
+        db_session.commit()
+
+        # Deletes leave no change timestamp: only a reconcile run sees them
+        service.refresh(reconcile_days=40)
+        _assert_parity(db_session, admin_headers, usage_data, monkeypatch)
+
+
+class TestRefreshEndpoint:
+    def test_requires_internal_key(self, db_session: Session):
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/internal/refresh-usage-rollups",
+                headers={"X-Internal-Key": "wrong-key"},
+            )
+        assert response.status_code == 403
+
+    def test_refreshes_all_sources(self, db_session: Session, usage_data):
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/internal/refresh-usage-rollups?reconcile=true",
+                headers={"X-Internal-Key": settings.INTERNAL_API_KEY},
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert [s["source"] for s in data["sources"]] == [
+            "session_usages",
+            "session_analysis_logs",
+        ]
+        assert all(s["rows_written"] > 0 for s in data["sources"])
+
+
+class TestDashboardCacheEndpoint:
+    def test_repeated_load_is_served_from_cache(
+        self, db_session: Session, admin_headers, usage_data
+    ):
+        UsageRollupService(db_session).refresh()
+        with TestClient(app) as client:
+            first = client.get(
+                f"{DASHBOARD}/session-trend?time_range=week", headers=admin_headers
+            )
+            second = client.get(
+                f"{DASHBOARD}/session-trend?time_range=week", headers=admin_headers
+            )
+            stats = client.get(f"{DASHBOARD}/cache-stats", headers=admin_headers)
+
+        assert first.json() == second.json()
+        data = stats.json()
+        assert data["backend"] == "MemoryCacheBackend"
+        assert data["closed_hits"] == data["closed_misses"] > 0
+        assert data["current_hits"] == 1
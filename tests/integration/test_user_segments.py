@@ -0,0 +1,238 @@
+"""
+Integration tests for UserSegmentation (segments assigned in SQL)
+
+Fixture (accounts 60 days old):
+- u00..u09: 1..10 sessions one hour ago
+- risk: 2 sessions 10 days ago
+- gone: no sessions
+- new: 5 sessions, account 2 days old (not segmented)
+
+Counselors with sessions: [1, 2, 2, 3, ..., 10] -> n = 11, the 90th
+percentile is the value at index floor(0.9 * 11) = 9, i.e. 9 sessions.
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.pricing import ELEVENLABS_SCRIBE_V2_REALTIME_USD_PER_SECOND as PER_SECOND
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor, CounselorRole
+from app.models.session_usage import SessionUsage
+from app.services.core.cost_aggregation import CostAggregation
+from app.services.core.dashboard_cache import dashboard_cache
+from app.services.core.usage_rollups import as_utc
+from app.services.core.user_segments import (
+    ACTIVE,
+    AT_RISK,
+    CHURNED,
+    POWER,
+    SegmentationPolicy,
+    UserSegmentation,
+)
+
+SEGMENTS_URL = "/api/v1/admin/dashboard/user-segments"
+NOW = datetime.now(timezone.utc)
+
+
+def _counselor(
+    db_session: Session, name: str, age_days=60, role=CounselorRole.COUNSELOR
+):
+    counselor = Counselor(
+        id=uuid4(),
+        email=f"{name}@segments.test",
+        username=f"segments-{name}",
+        full_name=name,
+        hashed_password="x",
+        tenant_id="career",
+        role=role,
+        is_active=True,
+        created_at=NOW - timedelta(days=age_days),
+    )
+    db_session.add(counselor)
+    return counselor
+
+
+def _sessions(db_session: Session, counselor: Counselor, count: int, at: datetime):
+    for _ in range(count):
+        db_session.add(
+            SessionUsage(
+                id=uuid4(),
+                session_id=uuid4(),
+                counselor_id=counselor.id,
+                tenant_id=counselor.tenant_id,
+                duration_seconds=600,
+                status="completed",
+                estimated_cost_usd=0.1,
+                created_at=at,
+            )
+        )
+
+
+@pytest.fixture
+def counselors(db_session: Session):
+    for i in range(10):
+        _sessions(
+            db_session,
+            _counselor(db_session, f"u{i:02d}"),
+            i + 1,
+            NOW - timedelta(hours=1),
+        )
+    _sessions(db_session, _counselor(db_session, "risk"), 2, NOW - timedelta(days=10))
+    _counselor(db_session, "gone")
+    _sessions(
+        db_session,
+        _counselor(db_session, "new", age_days=2),
+        5,
+        NOW - timedelta(hours=1),
+    )
+    db_session.commit()
+
+
+@pytest.fixture
+def admin_headers(db_session: Session) -> dict:
+    admin = _counselor(db_session, "admin", age_days=0, role=CounselorRole.ADMIN)
+    db_session.commit()
+    token = create_access_token(
+        {"sub": admin.email, "tenant_id": admin.tenant_id, "role": admin.role.value}
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _python_segments(db_session: Session, start: datetime):
+    """The previous in-Python assignment, as a reference"""
+    users = db_session.execute(
+        CostAggregation()
+        .by_counselor(start, active_only=False)
+        .where(Counselor.created_at < NOW - timedelta(days=7))
+    ).all()
+    counts = sorted(int(u.sessions) for u in users if u.sessions > 0)
+    p90 = counts[int(len(counts) * 0.9)] if counts else 0
+    segments = {POWER: set(), ACTIVE: set(), AT_RISK: set(), CHURNED: set()}
+    for user in users:
+        last_activity = as_utc(user.last_activity)
+        if last_activity is None:
+            segments[CHURNED].add(user.email)
+            continue
+        days_inactive = (NOW - last_activity).days
+        if user.sessions >= p90 and user.sessions > 0:
+            segments[POWER].add(user.email)
+        elif 7 <= days_inactive < 30:
+            segments[AT_RISK].add(user.email)
+        elif days_inactive >= 30:
+            segments[CHURNED].add(user.email)
+        else:
+            segments[ACTIVE].add(user.email)
+    return segments
+
+
+def _emails(segment):
+    return {user["email"].split("@")[0] for user in segment["users"]}
+
+
+class TestUserSegmentation:
+    def test_segments_are_assigned_in_sql(self, db_session: Session, counselors):
+        result = UserSegmentation(SegmentationPolicy()).summary(
+            db_session, NOW - timedelta(days=30), NOW
+        )
+
+        assert _emails(result[POWER]) == {"u08", "u09"}
+        assert result[POWER]["count"] == 2
+        assert result[POWER]["avg_sessions"] == 9.5
+        # u08 + u09: (9 + 10) * 600 s, no analysis cost
+        assert result[POWER]["avg_cost_usd"] == round(9.5 * 600 * PER_SECOND, 2)
+        assert result[ACTIVE]["count"] == 8
+        assert result[ACTIVE]["avg_sessions"] == 4.5
+        assert _emails(result[AT_RISK]) == {"risk"}
+        assert result[AT_RISK]["users"][0]["days_inactive"] == 10
+        assert "total_cost_usd" not in result[AT_RISK]["users"][0]
+        assert result[CHURNED]["users"] == [
+            {
+                "email": "gone@segments.test",
+                "sessions": 0,
+                "last_activity": None,
+                "total_cost_usd": 0,
+                "total_duration_minutes": 0,
+                "days_used": 0,
+            }
+        ]
+
+    def test_matches_python_reference(self, db_session: Session, counselors):
+        start = NOW - timedelta(days=30)
+        expected = _python_segments(db_session, start)
+
+        result = UserSegmentation(SegmentationPolicy(top_k=100)).summary(
+            db_session, start, NOW
+        )
+
+        for name, emails in expected.items():
+            assert result[name]["count"] == len(emails)
+            assert {u["email"] for u in result[name]["users"]} == emails
+
+    def test_members_are_top_k_by_sessions(self, db_session: Session, counselors):
+        result = UserSegmentation(SegmentationPolicy(top_k=3)).summary(
+            db_session, NOW - timedelta(days=30), NOW
+        )
+
+        assert [u["email"].split("@")[0] for u in result[ACTIVE]["users"]] == [
+            "u07",
+            "u06",
+            "u05",
+        ]
+        assert result[ACTIVE]["count"] == 8
+
+    def test_policy_thresholds_apply(self, db_session: Session, counselors):
+        policy = SegmentationPolicy(power_percentile=0.5, at_risk_days=14, top_k=0)
+
+        result = UserSegmentation(policy).summary(
+            db_session, NOW - timedelta(days=30), NOW
+        )
+
+        # index floor(0.5 * 11) = 5 -> 5 sessions; risk (10 days) is now active
+        assert result[POWER]["count"] == 6
+        assert result[ACTIVE]["count"] == 5
+        assert result[AT_RISK]["count"] == 0
+        assert all(not segment["users"] for segment in result.values())
+
+    def test_no_counselors(self, db_session: Session):
+        result = UserSegmentation(SegmentationPolicy()).summary(
+            db_session, NOW - timedelta(days=30), NOW
+        )
+
+        assert {name: s["count"] for name, s in result.items()} == {
+            POWER: 0,
+            ACTIVE: 0,
+            AT_RISK: 0,
+            CHURNED: 0,
+        }
+        assert result[POWER]["avg_sessions"] == 0
+
+
+class TestUserSegmentsEndpoint:
+    def test_top_k_parameter_and_cached_response(
+        self, db_session: Session, admin_headers, counselors
+    ):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with TestClient(app) as client:
+            first = client.get(f"{SEGMENTS_URL}?top_k=1", headers=admin_headers)
+            event.listen(db_session.get_bind(), "before_cursor_execute", record)
+            try:
+                second = client.get(f"{SEGMENTS_URL}?top_k=1", headers=admin_headers)
+            finally:
+                event.remove(db_session.get_bind(), "before_cursor_execute", record)
+
+        assert first.status_code == 200
+        assert second.json() == first.json()
+        assert [u["email"] for u in first.json()[POWER]["users"]] == [
+            "u09@segments.test"
+        ]
+        assert not [s for s in statements if "session_usages" in s]
+        assert dashboard_cache.stats.response_hits == 1
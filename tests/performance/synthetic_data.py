@@ -0,0 +1,443 @@
+"""
+Reproducible synthetic data for the admin analytics benchmarks
+
+Populates counselors (each with one client and one case), sessions,
+SessionUsage, SessionAnalysisLog and CreditLog with production-like skew:
+
+- activity per counselor is Zipf-distributed (a few power users, a long
+  tail, ~15% of accounts idle)
+- sessions lean towards recent days and office hours
+- durations and token counts are log-normal; models, analysis types and
+  safety levels follow fixed non-uniform weights
+- every session has one usage row, 1-6 analysis logs and a usage credit
+  log; counselors top up with purchases, with occasional refunds and
+  admin adjustments
+
+The same seed and scale always produce the same rows (ids included), so
+runs against different builds compare like with like. Rows are generated
+and inserted in batches, so 10M rows need no more memory than 10k.
+
+Usage:
+    python -m tests.performance.synthetic_data --rows 1000000 \\
+        --database-url postgresql://localhost/career_bench
+"""
+import argparse
+import bisect
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Engine, create_engine, insert
+
+from app.core.database import Base
+from app.models.case import Case
+from app.models.client import Client
+from app.models.counselor import Counselor
+from app.models.credit_log import CreditLog
+from app.models.session import Session
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+
+ADMIN_EMAIL = "bench-admin@{tenant}.test"
+
+MODELS = [
+    ("gemini-flash-lite-latest", 0.55),
+    ("gemini-3-flash-preview", 0.30),
+    ("gemini-1.5-flash-latest", 0.15),
+]
+ANALYSIS_TYPES = [
+    ("quick_feedback", 0.45),
+    ("keyword_analysis", 0.25),
+    ("emotion_feedback", 0.15),
+    ("partial_analysis", 0.10),
+    ("deep_analyze", 0.05),
+]
+SAFETY_LEVELS = [("green", 0.85), ("yellow", 0.12), ("red", 0.03)]
+# Share of sessions per hour of day (UTC+8 office hours, in UTC)
+HOUR_WEIGHTS = [6, 8, 9, 9, 8, 7, 9, 10, 9, 7, 5, 3, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 4]
+
+# Fact rows per session: usage + credit log + ~1.6 analysis logs (+ session)
+ROWS_PER_SESSION = 4.6
+
+
+@dataclass(frozen=True)
+class SyntheticScale:
+    """How much data to generate; `for_rows` derives it from a row budget"""
+
+    sessions: int
+    counselors: int
+    tenants: Tuple[str, ...] = ("career", "island_parents")
+    days: int = 90
+    zipf_exponent: float = 1.1
+    idle_share: float = 0.15
+    seed: int = 42
+
+    @classmethod
+    def for_rows(cls, rows: int, **overrides) -> "SyntheticScale":
+        """About `rows` fact rows in total, ~60 sessions per active counselor"""
+        sessions = max(int(rows / ROWS_PER_SESSION), 10)
+        return cls(sessions=sessions, counselors=max(sessions // 60, 10), **overrides)
+
+
+@dataclass
+class SyntheticDataset:
+    """What was generated: ids the benchmarks address and row counts"""
+
+    scale: SyntheticScale
+    now: datetime
+    admin_ids: Dict[str, uuid.UUID]
+    counselor_ids: List[uuid.UUID]
+    rows: Dict[str, int]
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+
+class _Weighted:
+    """O(log n) weighted choice over fixed weights"""
+
+    def __init__(self, items: List[Tuple[object, float]]):
+        self.values = [value for value, _ in items]
+        self.cumulative, total = [], 0.0
+        for _, weight in items:
+            total += weight
+            self.cumulative.append(total)
+
+    def pick(self, rng: random.Random):
+        position = bisect.bisect_right(
+            self.cumulative, rng.random() * self.cumulative[-1]
+        )
+        return self.values[min(position, len(self.values) - 1)]
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+class SyntheticDataGenerator:
+    """Generates and inserts one dataset; see the module docstring"""
+
+    def __init__(self, engine: Engine, scale: SyntheticScale, batch_size: int = 10_000):
+        self.engine = engine
+        self.scale = scale
+        self.batch_size = batch_size
+        self.rng = random.Random(scale.seed)
+        # Whole hours, so the same seed gives the same rows within the hour
+        self.now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        self.rows: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+    def generate(self, create_tables: bool = True) -> SyntheticDataset:
+        if create_tables:
+            Base.metadata.create_all(bind=self.engine)
+        admins = self._counselors()
+        self._sessions()
+        self._purchases()
+        return SyntheticDataset(
+            scale=self.scale,
+            now=self.now,
+            admin_ids=admins,
+            counselor_ids=[c["id"] for c in self.counselors],
+            rows=dict(self.rows),
+        )
+
+    def _insert(self, model, rows: List[dict]) -> None:
+        if not rows:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(insert(model), rows)
+        self.rows[model.__tablename__] = self.rows.get(model.__tablename__, 0) + len(
+            rows
+        )
+
+    # ------------------------------------------------------------------
+    # Counselors, clients, cases
+    # ------------------------------------------------------------------
+    def _counselors(self) -> Dict[str, uuid.UUID]:
+        rng, scale = self.rng, self.scale
+        self.counselors: List[dict] = []
+        self.cases: List[dict] = []
+        admins: Dict[str, uuid.UUID] = {}
+        for tenant in scale.tenants:
+            admins[tenant] = _uuid(rng)
+            self.counselors.append(
+                self._counselor(
+                    admins[tenant], ADMIN_EMAIL.format(tenant=tenant), tenant, "admin"
+                )
+            )
+        for i in range(scale.counselors):
+            tenant = (
+                scale.tenants[0] if rng.random() < 0.7 else rng.choice(scale.tenants)
+            )
+            self.counselors.append(
+                self._counselor(
+                    _uuid(rng), f"counselor{i}@{tenant}.bench.test", tenant, "counselor"
+                )
+            )
+
+        clients = []
+        for number, counselor in enumerate(self.counselors, start=1):
+            client_id = _uuid(rng)
+            clients.append(
+                {
+                    "id": client_id,
+                    "code": f"C{number:07d}",
+                    "name": f"Client {number}",
+                    "gender": rng.choice(["男", "女", "其他", "不透露"]),
+                    "birth_date": date(
+                        1960 + rng.randrange(45), 1 + rng.randrange(12), 1
+                    ),
+                    "phone": f"09{rng.randrange(10**8):08d}",
+                    "identity_option": "在職者",
+                    "current_status": "探索中",
+                    "tenant_id": counselor["tenant_id"],
+                    "counselor_id": counselor["id"],
+                    "created_at": counselor["created_at"],
+                }
+            )
+            self.cases.append(
+                {
+                    "id": _uuid(rng),
+                    "case_number": f"CASE-{number:07d}",
+                    "counselor_id": counselor["id"],
+                    "client_id": client_id,
+                    "tenant_id": counselor["tenant_id"],
+                    "status": 1,
+                    "created_at": counselor["created_at"],
+                }
+            )
+
+        for model, rows in (
+            (Counselor, self.counselors),
+            (Client, clients),
+            (Case, self.cases),
+        ):
+            for start in range(0, len(rows), self.batch_size):
+                self._insert(model, rows[start : start + self.batch_size])
+
+        # Zipf weights over a shuffled order of non-admin counselors; the
+        # idle share gets no sessions at all
+        active = list(range(len(scale.tenants), len(self.counselors)))
+        rng.shuffle(active)
+        active = active[: max(1, int(len(active) * (1 - scale.idle_share)))]
+        self.session_owner = _Weighted(
+            [
+                (index, 1 / (rank + 1) ** scale.zipf_exponent)
+                for rank, index in enumerate(active)
+            ]
+        )
+        return admins
+
+    def _counselor(self, counselor_id, email: str, tenant: str, role: str) -> dict:
+        created = self.now - timedelta(days=self.rng.randrange(1, self.scale.days * 2))
+        return {
+            "id": counselor_id,
+            "email": email,
+            "username": email.split("@")[0],
+            "full_name": email.split("@")[0].title(),
+            "hashed_password": "x",
+            "tenant_id": tenant,
+            "role": role,
+            "is_active": self.rng.random() > 0.03,
+            "available_credits": 0.0,
+            "created_at": created,
+        }
+
+    # ------------------------------------------------------------------
+    # Sessions, usage, analysis logs, usage credit logs
+    # ------------------------------------------------------------------
+    def _session_time(self, counselor: dict) -> datetime:
+        rng, days = self.rng, self.scale.days
+        # Activity grows over the window: density rises towards today
+        age_days = int(days * (1 - math.sqrt(rng.random())))
+        day = (self.now - timedelta(days=age_days)).replace(hour=0)
+        if day < counselor["created_at"]:
+            day = counselor["created_at"].replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+        at = day + timedelta(
+            hours=self.hour.pick(rng),
+            minutes=rng.randrange(60),
+            seconds=rng.randrange(60),
+        )
+        return at - timedelta(days=1) if at >= self.now else at
+
+    def _session_batches(self) -> Iterator[Tuple[List[dict], ...]]:
+        rng = self.rng
+        model, analysis_type, safety = (
+            _Weighted(MODELS),
+            _Weighted(ANALYSIS_TYPES),
+            _Weighted(SAFETY_LEVELS),
+        )
+        self.hour = _Weighted(list(enumerate(HOUR_WEIGHTS)))
+        session_numbers = [0] * len(self.counselors)
+        batch: Tuple[List[dict], ...] = ([], [], [], [])
+        for _ in range(self.scale.sessions):
+            index = self.session_owner.pick(rng)
+            counselor, case = self.counselors[index], self.cases[index]
+            session_numbers[index] += 1
+            started = self._session_time(counselor)
+            duration = int(min(max(rng.lognormvariate(7.2, 0.6), 60), 4 * 3600))
+            ended = started + timedelta(seconds=duration)
+            session_id, tenant = _uuid(rng), counselor["tenant_id"]
+            minutes = math.ceil(duration / 60)
+
+            sessions, usage, logs, credits = batch
+            sessions.append(
+                {
+                    "id": session_id,
+                    "case_id": case["id"],
+                    "tenant_id": tenant,
+                    "session_number": session_numbers[index],
+                    "session_date": started,
+                    "start_time": started,
+                    "end_time": ended,
+                    "duration_minutes": minutes,
+                    "created_at": started,
+                }
+            )
+
+            prompt_total = completion_total = 0
+            cost_total = 0.0
+            for _ in range(min(1 + int(rng.expovariate(1.6)), 6)):
+                prompt = int(rng.lognormvariate(8.0, 0.7))
+                completion = max(prompt // rng.randrange(4, 12), 1)
+                cost = prompt * 1e-7 + completion * 4e-7
+                prompt_total, completion_total, cost_total = (
+                    prompt_total + prompt,
+                    completion_total + completion,
+                    cost_total + cost,
+                )
+                logs.append(
+                    {
+                        "id": _uuid(rng),
+                        "session_id": session_id,
+                        "counselor_id": counselor["id"],
+                        "tenant_id": tenant,
+                        "analysis_type": analysis_type.pick(rng),
+                        "model_name": model.pick(rng),
+                        "prompt_tokens": prompt,
+                        "completion_tokens": completion,
+                        "total_tokens": prompt + completion,
+                        "estimated_cost_usd": round(cost, 6),
+                        "safety_level": safety.pick(rng),
+                        "analyzed_at": started
+                        + timedelta(seconds=rng.randrange(duration)),
+                    }
+                )
+
+            usage.append(
+                {
+                    "id": _uuid(rng),
+                    "session_id": session_id,
+                    "counselor_id": counselor["id"],
+                    "tenant_id": tenant,
+                    "usage_type": "voice_call",
+                    "status": "completed",
+                    "start_time": started,
+                    "end_time": ended,
+                    "duration_seconds": duration,
+                    "analysis_count": 0,
+                    "total_prompt_tokens": prompt_total,
+                    "total_completion_tokens": completion_total,
+                    "total_tokens": prompt_total + completion_total,
+                    "estimated_cost_usd": round(cost_total + duration * 2e-5, 6),
+                    "credits_consumed": minutes,
+                    "created_at": started,
+                }
+            )
+            credits.append(
+                {
+                    "id": _uuid(rng),
+                    "counselor_id": counselor["id"],
+                    "resource_type": "session",
+                    "resource_id": str(session_id),
+                    "credits_delta": -float(minutes),
+                    "transaction_type": "usage",
+                    "raw_data": {"duration_seconds": duration},
+                    "created_at": ended,
+                }
+            )
+            if len(sessions) >= self.batch_size:
+                yield batch
+                batch = ([], [], [], [])
+        yield batch
+
+    def _sessions(self) -> None:
+        for sessions, usage, logs, credits in self._session_batches():
+            self._insert(Session, sessions)
+            self._insert(SessionUsage, usage)
+            self._insert(SessionAnalysisLog, logs)
+            self._insert(CreditLog, credits)
+
+    # ------------------------------------------------------------------
+    # Purchases, refunds, admin adjustments
+    # ------------------------------------------------------------------
+    def _purchases(self) -> None:
+        rng, batch = self.rng, []
+        for counselor in self.counselors:
+            span = max((self.now - counselor["created_at"]).days, 1)
+            for _ in range(1 + int(rng.expovariate(0.5))):
+                kind = rng.choices(
+                    ["purchase", "admin_adjustment", "refund"],
+                    weights=[0.9, 0.07, 0.03],
+                )[0]
+                batch.append(
+                    {
+                        "id": _uuid(rng),
+                        "counselor_id": counselor["id"],
+                        "credits_delta": float(rng.choice([100, 300, 600, 1200]))
+                        if kind == "purchase"
+                        else float(rng.randrange(-30, 60)),
+                        "transaction_type": kind,
+                        "created_at": counselor["created_at"]
+                        + timedelta(days=rng.randrange(span)),
+                    }
+                )
+                if len(batch) >= self.batch_size:
+                    self._insert(CreditLog, batch)
+                    batch = []
+        self._insert(CreditLog, batch)
+
+
+def generate(
+    engine: Engine,
+    scale: SyntheticScale,
+    batch_size: int = 10_000,
+    create_tables: bool = True,
+) -> SyntheticDataset:
+    """Populate `engine` with one synthetic dataset"""
+    return SyntheticDataGenerator(engine, scale, batch_size).generate(create_tables)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument(
+        "--rows", type=int, default=100_000, help="Approximate fact rows (10k-10M)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    scale = SyntheticScale.for_rows(args.rows, seed=args.seed, days=args.days)
+    started = time.perf_counter()
+    dataset = generate(create_engine(args.database_url), scale, args.batch_size)
+    print(
+        f"Generated {dataset.total_rows:,} rows in {time.perf_counter() - started:.1f}s "
+        f"({scale.counselors:,} counselors, {scale.sessions:,} sessions, seed {scale.seed})"
+    )
+    for table, count in dataset.rows.items():
+        print(f"   - {table:<24} {count:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Benchmark suite for the admin analytics endpoints (pytest-benchmark)
+
+Every admin dashboard endpoint (including export-csv per dataset and the
+snapshot) and every admin credits listing is called through the app
+against a synthetic dataset (tests/performance/synthetic_data.py). Per
+endpoint it records, next to pytest-benchmark's own stats:
+
+- queries: SQL statements per request
+- p50 / p95 / p99 latency in ms
+
+Dashboard endpoints are measured cold (dashboard cache cleared before
+every round). Results land in `extra_info` (so in --benchmark-json) and
+are printed as one table at the end.
+
+The suite targets a local PostgreSQL (BENCH_DATABASE_URL, a scratch
+database); the data is generated on first use and reused afterwards.
+Without BENCH_DATABASE_URL it runs on a temporary SQLite file, which is
+only good for checking the suite itself. pytest-benchmark is a dev
+dependency: without it the suite errors instead of being skipped.
+
+Usage:
+    createdb career_bench
+    BENCH_DATABASE_URL=postgresql://localhost/career_bench BENCH_ROWS=1000000 \\
+        poetry run pytest tests/performance/test_admin_analytics_benchmark.py -v -s -m slow \\
+        --benchmark-json=bench.json
+"""
+import os
+import statistics
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import get_analytics_db, get_db
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor
+from app.models.session_usage import SessionUsage
+from app.services.core.dashboard_cache import dashboard_cache
+from app.services.core.usage_rollups import UsageRollupService
+from tests.performance.synthetic_data import ADMIN_EMAIL, SyntheticScale, generate
+
+ROWS = int(os.environ.get("BENCH_ROWS", "10000"))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "20"))
+TENANT = "career"
+
+DASHBOARD = "/api/v1/admin/dashboard"
+CREDITS = "/api/v1/admin/credits"
+MONTH = {"time_range": "month"}
+
+# (id, method, path, params); {counselor_id} is filled from the dataset
+ENDPOINTS = [
+    ("summary", "GET", f"{DASHBOARD}/summary", {"time_range": "week"}),
+    ("cost-trend", "GET", f"{DASHBOARD}/cost-trend", MONTH),
+    ("token-trend", "GET", f"{DASHBOARD}/token-trend", MONTH),
+    ("cost-breakdown", "GET", f"{DASHBOARD}/cost-breakdown", MONTH),
+    ("session-trend", "GET", f"{DASHBOARD}/session-trend", MONTH),
+    ("model-distribution", "GET", f"{DASHBOARD}/model-distribution", MONTH),
+    ("daily-active-users", "GET", f"{DASHBOARD}/daily-active-users", MONTH),
+    ("safety-distribution", "GET", f"{DASHBOARD}/safety-distribution", MONTH),
+    ("top-users", "GET", f"{DASHBOARD}/top-users", {**MONTH, "limit": 10}),
+    (
+        "user-daily-usage",
+        "GET",
+        f"{DASHBOARD}/user-daily-usage",
+        {**MONTH, "counselor_id": "{counselor_id}"},
+    ),
+    ("overall-stats", "GET", f"{DASHBOARD}/overall-stats", MONTH),
+    ("cost-per-user", "GET", f"{DASHBOARD}/cost-per-user", MONTH),
+    ("user-segments", "GET", f"{DASHBOARD}/user-segments", MONTH),
+    ("cost-prediction", "GET", f"{DASHBOARD}/cost-prediction", {}),
+    ("cache-stats", "GET", f"{DASHBOARD}/cache-stats", {}),
+    *[
+        (
+            f"export-csv-{data_type}",
+            "GET",
+            f"{DASHBOARD}/export-csv",
+            {"time_range": "week", "data_type": data_type},
+        )
+        for data_type in ("users", "sessions", "analysis_logs", "credit_logs")
+    ],
+    ("snapshot", "POST", f"{DASHBOARD}/snapshot", None),
+    ("credits-members", "GET", f"{CREDITS}/members", {}),
+    ("credits-member", "GET", f"{CREDITS}/members/{{counselor_id}}", {}),
+    ("credits-logs", "GET", f"{CREDITS}/logs", {"limit": 100}),
+    (
+        "credits-logs-deep-page",
+        "GET",
+        f"{CREDITS}/logs",
+        {"limit": 100, "offset": 5000},
+    ),
+    (
+        "credits-logs-counselor",
+        "GET",
+        f"{CREDITS}/logs",
+        {"counselor_id": "{counselor_id}", "limit": 100},
+    ),
+    (
+        "credits-logs-usage",
+        "GET",
+        f"{CREDITS}/logs",
+        {"transaction_type": "usage", "limit": 1000},
+    ),
+    ("credits-rates", "GET", f"{CREDITS}/rates", {}),
+]
+SNAPSHOT_WIDGETS = [
+    "summary",
+    "cost-trend",
+    "token-trend",
+    "cost-breakdown",
+    "session-trend",
+    "model-distribution",
+    "daily-active-users",
+    "safety-distribution",
+    "overall-stats",
+    "cost-per-user",
+    "top-users",
+    "user-segments",
+]
+
+RESULTS = {}
+
+
+@pytest.fixture(scope="module")
+def bench(tmp_path_factory):
+    """Client with both session dependencies on the benchmark database"""
+    url = os.environ.get("BENCH_DATABASE_URL") or (
+        f"sqlite:///{tmp_path_factory.mktemp('bench') / 'analytics.db'}"
+    )
+    engine = create_engine(url)
+    session_factory = sessionmaker(bind=engine)
+    admin_email = ADMIN_EMAIL.format(tenant=TENANT)
+
+    def power_user():
+        # The busiest counselor: the worst case for per-counselor endpoints
+        with session_factory() as db:
+            return db.execute(
+                select(SessionUsage.counselor_id)
+                .where(SessionUsage.tenant_id == TENANT)
+                .group_by(SessionUsage.counselor_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            ).scalar_one()
+
+    existing = None
+    try:
+        with session_factory() as db:
+            existing = db.execute(
+                select(Counselor.id).where(Counselor.email == admin_email)
+            ).scalar_one_or_none()
+    except Exception:  # no tables yet
+        pass
+    if existing is None:
+        started = time.perf_counter()
+        dataset = generate(engine, SyntheticScale.for_rows(ROWS))
+        print(
+            f"\n📊 Generated {dataset.total_rows:,} synthetic rows in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+    with session_factory() as db:
+        UsageRollupService(db).refresh()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_analytics_db] = override_get_db
+    token = create_access_token(
+        {"sub": admin_email, "tenant_id": TENANT, "role": "admin"}
+    )
+    with TestClient(app) as client:
+        yield {
+            "client": client,
+            "engine": engine,
+            "headers": {"Authorization": f"Bearer {token}"},
+            "counselor_id": str(power_user()),
+        }
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_analytics_db, None)
+    engine.dispose()
+    _print_results()
+
+
+def _request(bench, method, path, params):
+    counselor_id = bench["counselor_id"]
+    path = path.format(counselor_id=counselor_id)
+    if method == "POST":
+        body = {
+            "widgets": [{"widget": name, "params": MONTH} for name in SNAPSHOT_WIDGETS]
+        }
+        return lambda: bench["client"].post(path, json=body, headers=bench["headers"])
+    params = {
+        key: value.format(counselor_id=counselor_id)
+        if isinstance(value, str)
+        else value
+        for key, value in params.items()
+    }
+    return lambda: bench["client"].get(path, params=params, headers=bench["headers"])
+
+
+def _print_results():
+    if not RESULTS:
+        return
+    print(
+        f"\n📊 Admin analytics endpoints ({ROWS:,} synthetic rows, {ROUNDS} rounds, cold cache):"
+    )
+    print(
+        f"   {'endpoint':<26} {'queries':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for name, info in RESULTS.items():
+        print(
+            f"   {name:<26} {info['queries']:>7.1f} {info['p50_ms']:>9.1f} "
+            f"{info['p95_ms']:>9.1f} {info['p99_ms']:>9.1f}"
+        )
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    "name, method, path, params", ENDPOINTS, ids=[e[0] for e in ENDPOINTS]
+)
+def test_admin_analytics_endpoint(benchmark, bench, name, method, path, params):
+    call = _request(bench, method, path, params)
+    response = call()
+    assert response.status_code == 200, response.text
+
+    latencies, statements = [], []
+
+    def on_statement(*args):
+        statements.append(1)
+
+    def timed():
+        started = time.perf_counter()
+        response = call()
+        latencies.append((time.perf_counter() - started) * 1000)
+        return response
+
+    event.listen(bench["engine"], "before_cursor_execute", on_statement)
+    try:
+        benchmark.group = (
+            "admin-credits" if path.startswith(CREDITS) else "admin-dashboard"
+        )
+        response = benchmark.pedantic(
+            timed, setup=dashboard_cache.clear, rounds=ROUNDS, iterations=1
+        )
+    finally:
+        event.remove(bench["engine"], "before_cursor_execute", on_statement)
+
+    assert response.status_code == 200
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    info = {
+        "queries": len(statements) / len(latencies),
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+    }
+    benchmark.extra_info.update(info)
+    RESULTS[name] = info
@@ -0,0 +1,152 @@
+"""
+Load test: realtime query latency while the admin dashboard is hammered
+
+A realtime probe (one primary-pool session, a primary-key lookup, close)
+runs continuously while DASHBOARD_WORKERS threads run the per-counselor
+cost aggregation (CostAggregation.by_counselor) in a loop. Compares:
+
+- idle:   no dashboard load
+- shared: dashboard sessions come from the primary pool (before: one
+          `SessionLocal` pool for everything)
+- routed: dashboard sessions come from a separate analytics engine
+          (`create_analytics_engine`, the `get_analytics_db` pool)
+
+The primary pool is sized below the number of dashboard workers, as in
+production where a few slow scans can take every connection. Reports
+probe p50 / p99; routed p99 must stay far below shared p99.
+
+Usage:
+    poetry run pytest tests/performance/test_analytics_pool_isolation.py -v -s -m slow
+"""
+import os
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, create_analytics_engine
+from app.models.counselor import Counselor
+from app.models.session_usage import SessionUsage
+from app.services.core.cost_aggregation import CostAggregation
+
+SESSIONS = int(os.environ.get("POOL_BENCH_SESSIONS", "50000"))
+COUNSELORS = 500
+PRIMARY_POOL = 4
+ANALYTICS_POOL = 2
+DASHBOARD_WORKERS = 8
+PROBE_SECONDS = 4.0
+
+
+@pytest.fixture(scope="module")
+def database_url(tmp_path_factory):
+    url = f"sqlite:///{tmp_path_factory.mktemp('perf') / 'pools.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.now(timezone.utc)
+    counselor_ids = [uuid4() for _ in range(COUNSELORS)]
+    with sessionmaker(bind=engine)() as db:
+        db.execute(
+            insert(Counselor),
+            [
+                {
+                    "id": cid,
+                    "email": f"pool{i}@test.com",
+                    "hashed_password": "x",
+                    "tenant_id": "career",
+                    "role": "counselor",
+                    "is_active": True,
+                }
+                for i, cid in enumerate(counselor_ids)
+            ],
+        )
+        db.execute(
+            insert(SessionUsage),
+            [
+                {
+                    "id": uuid4(),
+                    "session_id": uuid4(),
+                    "counselor_id": counselor_ids[i % COUNSELORS],
+                    "tenant_id": "career",
+                    "duration_seconds": 600,
+                    "status": "completed",
+                    "estimated_cost_usd": 0.05,
+                    "created_at": now - timedelta(minutes=i),
+                }
+                for i in range(SESSIONS)
+            ],
+        )
+        db.commit()
+    engine.dispose()
+    return url, counselor_ids[0]
+
+
+def _run(url, probe_id, mode):
+    primary = create_engine(
+        url, pool_size=PRIMARY_POOL, max_overflow=0, pool_timeout=30
+    )
+    analytics = create_analytics_engine(
+        url, pool_size=ANALYTICS_POOL, pool_timeout=30, statement_timeout_ms=15000
+    )
+    realtime_sessions = sessionmaker(bind=primary)
+    dashboard_sessions = sessionmaker(bind=analytics if mode == "routed" else primary)
+    stop = threading.Event()
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+    scans = []
+
+    def dashboard():
+        while not stop.is_set():
+            with dashboard_sessions() as db:
+                db.execute(CostAggregation().by_counselor(start)).all()
+            scans.append(1)
+
+    workers = [
+        threading.Thread(target=dashboard)
+        for _ in range(DASHBOARD_WORKERS if mode != "idle" else 0)
+    ]
+    for worker in workers:
+        worker.start()
+    time.sleep(0.5 if workers else 0)
+
+    latencies = []
+    deadline = time.perf_counter() + PROBE_SECONDS
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        with realtime_sessions() as db:
+            db.execute(select(Counselor.email).where(Counselor.id == probe_id)).one()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.005)
+
+    stop.set()
+    for worker in workers:
+        worker.join()
+    primary.dispose()
+    analytics.dispose()
+    quantiles = statistics.quantiles(latencies, n=100)
+    return quantiles[49], quantiles[98], len(latencies), len(scans)
+
+
+@pytest.mark.slow
+class TestAnalyticsPoolIsolation:
+    def test_realtime_p99_is_stable_under_dashboard_load(self, database_url):
+        url, probe_id = database_url
+        results = {
+            mode: _run(url, probe_id, mode) for mode in ("idle", "shared", "routed")
+        }
+
+        print(
+            f"\n📊 Realtime probe latency ({SESSIONS:,} sessions, {DASHBOARD_WORKERS} dashboard "
+            f"workers, primary pool {PRIMARY_POOL}, analytics pool {ANALYTICS_POOL}):"
+        )
+        for mode, (p50, p99, probes, scans) in results.items():
+            print(
+                f"   - {mode:<6}: p50 {p50:7.2f} ms, p99 {p99:7.2f} ms "
+                f"({probes} probes, {scans} dashboard scans)"
+            )
+
+        shared_p99, routed_p99 = results["shared"][1], results["routed"][1]
+        assert routed_p99 < shared_p99 / 2
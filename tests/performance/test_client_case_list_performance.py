@@ -0,0 +1,150 @@
+"""
+Performance benchmark for the client-case list
+
+Seeds 10k clients (one case each, up to 3 sessions) for a single counselor and
+measures the first page, a deep OFFSET page and the equivalent keyset page.
+Ordering is done in SQL, so every page must agree with the global order.
+
+Usage:
+    poetry run pytest tests/performance/test_client_case_list_performance.py -v -s -m slow
+"""
+import time
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.case import Case
+from app.models.client import Client
+from app.models.counselor import Counselor
+from app.models.session import Session as SessionModel
+from app.services.clients.client_case_service import ClientCaseService
+
+N_CLIENTS = 10_000
+PAGE_SIZE = 50
+DEEP_OFFSET = 9_000
+
+
+@pytest.fixture(scope="module")
+def seeded_db(tmp_path_factory):
+    """One counselor with 10k client-cases and ~20k sessions"""
+    db_path = tmp_path_factory.mktemp("perf") / "client_case_list.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    counselor = Counselor(
+        id=uuid4(),
+        email="caselist@test.com",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+    )
+    db.add(counselor)
+    db.flush()
+
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    clients, cases, sessions = [], [], []
+    for i in range(N_CLIENTS):
+        client_id, case_id = uuid4(), uuid4()
+        clients.append(
+            {
+                "id": client_id,
+                "counselor_id": counselor.id,
+                "tenant_id": "career",
+                "name": f"客戶{i}",
+                "code": f"CL{i:05d}",
+                "gender": "不透露",
+                "birth_date": date(1990, 1, 1),
+                "phone": "0912345678",
+                "identity_option": "其他",
+                "current_status": "探索中",
+            }
+        )
+        cases.append(
+            {
+                "id": case_id,
+                "case_number": f"CASE{i:05d}",
+                "counselor_id": counselor.id,
+                "client_id": client_id,
+                "tenant_id": "career",
+                "status": 1,
+            }
+        )
+        # Scatter last-session dates so insert order != display order
+        for n in range(i % 4):
+            sessions.append(
+                {
+                    "id": uuid4(),
+                    "case_id": case_id,
+                    "tenant_id": "career",
+                    "session_number": n + 1,
+                    "session_date": base + timedelta(hours=(i * 7919) % 20000 + n),
+                }
+            )
+    db.execute(insert(Client), clients)
+    db.execute(insert(Case), cases)
+    db.execute(insert(SessionModel), sessions)
+    db.commit()
+
+    yield db, counselor
+
+    db.close()
+    engine.dispose()
+
+
+def _best_ms(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+@pytest.mark.slow
+class TestClientCaseListPerformance:
+    """Benchmark SQL-side ordering and keyset pagination at 10k clients"""
+
+    def test_pages_ordered_and_fast(self, seeded_db):
+        db, counselor = seeded_db
+        service = ClientCaseService(db)
+
+        def page(**kwargs):
+            return service.list_client_cases(
+                "career", counselor.id, limit=PAGE_SIZE, **kwargs
+            )
+
+        first_ms = _best_ms(lambda: page())
+
+        # Walk to the deep page with cursors to get its cursor
+        cursor = None
+        walked = []
+        while len(walked) < DEEP_OFFSET:
+            items, total, cursor = page(cursor=cursor)
+            walked.extend(items)
+        assert total == N_CLIENTS
+
+        offset_ms = _best_ms(lambda: page(skip=DEEP_OFFSET))
+        keyset_ms = _best_ms(lambda: page(cursor=cursor))
+        offset_items, _, _ = page(skip=DEEP_OFFSET)
+        keyset_items, _, _ = page(cursor=cursor)
+
+        print(f"\n📊 Client-case list ({N_CLIENTS} clients, {PAGE_SIZE}/page):")
+        print(f"   - first page:          {first_ms:.1f} ms")
+        print(f"   - OFFSET {DEEP_OFFSET}:         {offset_ms:.1f} ms")
+        print(f"   - keyset at {DEEP_OFFSET}:      {keyset_ms:.1f} ms")
+
+        # Global order: dates never increase across page boundaries
+        dates = [
+            item["last_session_date"] or datetime.min for item in walked + keyset_items
+        ]
+        assert dates == sorted(dates, reverse=True)
+        # OFFSET and cursor land on the same rows
+        assert [i["client_id"] for i in offset_items] == [
+            i["client_id"] for i in keyset_items
+        ]
@@ -0,0 +1,150 @@
+"""
+Analysis log storage footprint and write latency: inline vs lean
+
+Synthetic SessionAnalysisLog rows shaped like production (static system
+prompt, templated user prompt, a few recurring RAG documents, a unique LLM
+response) are written both ways to separate SQLite files. The default row
+count keeps CI fast; set ANALYSIS_LOG_BENCH_ROWS=1000000 for the full report —
+both the per-row size and the per-row latency are flat in the row count.
+
+Usage:
+    poetry run pytest tests/performance/test_content_store_performance.py -v -s -m slow
+    ANALYSIS_LOG_BENCH_ROWS=1000000 poetry run pytest ... -v -s -m slow
+"""
+import json
+import os
+import random
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.content_blob import ContentBlob
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.services.core.content_store import ContentStore
+
+ROWS = int(os.environ.get("ANALYSIS_LOG_BENCH_ROWS", "20000"))
+BATCH = 500
+
+SYSTEM_PROMPT = (
+    "你是一位專業的親子溝通顧問。請根據家長與孩子的對話逐字稿，"
+    "判斷安全等級（green / yellow / red），並給出具體、溫和的建議。" * 30
+)
+RAG_POOL = [
+    [
+        {
+            "doc_id": f"doc-{i}-{j}",
+            "title": f"教養指南 {i}-{j}",
+            "content": f"第 {i} 類情境：先同理孩子的感受，再說明界線與後果。" * 15,
+            "score": 0.9 - j * 0.05,
+        }
+        for j in range(3)
+    ]
+    for i in range(50)
+]
+
+
+def _synthetic_logs(rng: random.Random, count: int):
+    for _ in range(count):
+        yield SessionAnalysisLog(
+            session_id=uuid4(),
+            counselor_id=uuid4(),
+            tenant_id="island_parents",
+            analysis_type="partial_analysis",
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt="逐字稿：\n" + "孩子：我不想寫功課。家長：先休息一下吧。" * 8,
+            rag_documents=rng.choice(RAG_POOL),
+            llm_raw_response=json.dumps(
+                {
+                    "safety_level": rng.choice(["green", "yellow", "red"]),
+                    "summary": f"建議 #{rng.randrange(10**9)}：先陪伴，再討論。",
+                },
+                ensure_ascii=False,
+            ),
+        )
+
+
+def _open(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[SessionAnalysisLog.__table__, ContentBlob.__table__],
+    )
+    return engine, sessionmaker(bind=engine)()
+
+
+def _bulk_write(db_path, lean: bool):
+    """ROWS logs in batches (backfill / batched writer path)"""
+    engine, db = _open(db_path)
+    store = ContentStore(db, min_bytes=256)
+    rng = random.Random(42)
+
+    start = time.perf_counter()
+    remaining = ROWS
+    while remaining:
+        logs = list(_synthetic_logs(rng, min(BATCH, remaining)))
+        if lean:
+            store.externalize_many(logs)
+        db.add_all(logs)
+        db.commit()
+        remaining -= len(logs)
+    elapsed = time.perf_counter() - start
+
+    blobs = db.query(ContentBlob).count()
+    db.close()
+    engine.dispose()
+    return os.path.getsize(db_path), elapsed / ROWS * 1000, blobs
+
+
+def _request_write_ms(db_path, lean: bool, count: int = 300) -> float:
+    """One log per commit, like POST /analysis-logs"""
+    engine, db = _open(db_path)
+    store = ContentStore(db, min_bytes=256)
+    logs = list(_synthetic_logs(random.Random(7), count))
+
+    start = time.perf_counter()
+    for log in logs:
+        if lean:
+            store.externalize(log)
+        db.add(log)
+        db.commit()
+    elapsed = time.perf_counter() - start
+
+    db.close()
+    engine.dispose()
+    return elapsed / count * 1000
+
+
+@pytest.mark.slow
+class TestContentStorePerformance:
+    def test_lean_storage_footprint(self, tmp_path):
+        inline_size, inline_ms, _ = _bulk_write(tmp_path / "inline.db", lean=False)
+        lean_size, lean_ms, blobs = _bulk_write(tmp_path / "lean.db", lean=True)
+        inline_req_ms = _request_write_ms(tmp_path / "inline_req.db", lean=False)
+        lean_req_ms = _request_write_ms(tmp_path / "lean_req.db", lean=True)
+
+        scale = 1_000_000 / ROWS
+        print(f"\n📊 Analysis log storage ({ROWS:,} synthetic rows):")
+        print(
+            f"   - inline: {inline_size / 1e6:.1f} MB, "
+            f"bulk {inline_ms:.3f} ms/row, per request {inline_req_ms:.2f} ms"
+        )
+        print(
+            f"   - lean:   {lean_size / 1e6:.1f} MB, "
+            f"bulk {lean_ms:.3f} ms/row, per request {lean_req_ms:.2f} ms "
+            f"({blobs} distinct blobs)"
+        )
+        print(
+            f"   - projected at 1M rows: inline {inline_size * scale / 1e9:.2f} GB, "
+            f"lean {lean_size * scale / 1e9:.2f} GB"
+        )
+
+        # 50 RAG contexts + 2 prompts: the blob table stays tiny while rows grow
+        assert blobs <= len(RAG_POOL) + 2
+        assert lean_size < inline_size / 3
+        # Hashing + compression must not make writes markedly slower
+        assert lean_ms < inline_ms * 2
+        assert lean_req_ms < inline_req_ms * 3
@@ -0,0 +1,159 @@
+"""
+Concurrency stress test for credit deduction
+
+N worker threads each deduct credits M times from the same counselor, with a
+little simulated work (analysis log / usage bookkeeping) inside every billing
+transaction. Compares:
+
+- read-modify-write: SELECT balance, compute in Python, write back
+  (the previous SessionBillingService behaviour) -> lost updates
+- CreditLedger: one UPDATE ... RETURNING issued as the last statement before
+  COMMIT -> exact final balance
+
+"Lock hold" is the time between the statement that must own the counselor row
+(the SELECT for read-modify-write, since correctness needs the row locked from
+read to write; the UPDATE for the ledger) and COMMIT.
+
+Usage:
+    poetry run pytest tests/performance/test_credit_ledger_concurrency.py -v -s -m slow
+"""
+import statistics
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.counselor import Counselor
+from app.models.credit_log import CreditLog
+from app.services.billing.credit_ledger import CreditLedger
+
+N_THREADS = 8
+DEDUCTIONS_PER_THREAD = 25
+INITIAL_CREDITS = 10_000.0
+WORK_SECONDS = 0.002
+
+
+def _make_factory(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 30})
+    Base.metadata.create_all(
+        bind=engine, tables=[Counselor.__table__, CreditLog.__table__]
+    )
+    return sessionmaker(bind=engine)
+
+
+def _seed_counselor(factory) -> object:
+    db = factory()
+    counselor = Counselor(
+        id=uuid4(),
+        email="ledger-perf@test.com",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+        available_credits=INITIAL_CREDITS,
+    )
+    db.add(counselor)
+    db.commit()
+    counselor_id = counselor.id
+    db.close()
+    return counselor_id
+
+
+def _legacy_deduct(factory, counselor_id, hold_times):
+    db = factory()
+    try:
+        start = time.perf_counter()
+        counselor = db.query(Counselor).filter(Counselor.id == counselor_id).first()
+        time.sleep(WORK_SECONDS)  # analysis log + usage bookkeeping
+        counselor.available_credits -= 1.0
+        db.add(
+            CreditLog(
+                counselor_id=counselor_id,
+                credits_delta=-1.0,
+                transaction_type="usage",
+            )
+        )
+        db.commit()
+        hold_times.append(time.perf_counter() - start)
+    finally:
+        db.close()
+
+
+def _ledger_deduct(factory, counselor_id, hold_times):
+    db = factory()
+    try:
+        time.sleep(WORK_SECONDS)  # analysis log + usage bookkeeping
+        start = time.perf_counter()
+        CreditLedger(db).deduct(counselor_id, 1.0)
+        db.commit()
+        hold_times.append(time.perf_counter() - start)
+    finally:
+        db.close()
+
+
+def _run(factory, deduct):
+    counselor_id = _seed_counselor(factory)
+    hold_times, errors = [], []
+
+    def worker():
+        for _ in range(DEDUCTIONS_PER_THREAD):
+            try:
+                deduct(factory, counselor_id, hold_times)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(N_THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    db = factory()
+    balance = db.get(Counselor, counselor_id).available_credits
+    log_count = db.query(CreditLog).count()
+    db.close()
+    return balance, log_count, hold_times, errors, elapsed
+
+
+@pytest.mark.slow
+class TestCreditLedgerConcurrency:
+    """No lost updates and shorter lock hold under concurrent deductions"""
+
+    def test_ledger_vs_read_modify_write(self, tmp_path):
+        total = N_THREADS * DEDUCTIONS_PER_THREAD
+        expected = INITIAL_CREDITS - total
+
+        legacy = _run(_make_factory(tmp_path / "rmw.db"), _legacy_deduct)
+        legacy_balance, legacy_logs, legacy_holds, _, legacy_s = legacy
+        ledger = _run(_make_factory(tmp_path / "ledger.db"), _ledger_deduct)
+        ledger_balance, ledger_logs, ledger_holds, ledger_errors, ledger_s = ledger
+
+        lost = round(legacy_balance - expected)
+        print(f"\n📊 {N_THREADS} threads x {DEDUCTIONS_PER_THREAD} deductions:")
+        print(
+            f"   - read-modify-write: balance={legacy_balance:.0f} "
+            f"(expected {expected:.0f}, lost updates={lost}), "
+            f"logs={legacy_logs}, {legacy_s:.2f}s"
+        )
+        print(
+            f"   - ledger:            balance={ledger_balance:.0f}, "
+            f"logs={ledger_logs}, {ledger_s:.2f}s"
+        )
+        print(
+            "   - lock hold median/p95: "
+            f"rmw {statistics.median(legacy_holds) * 1000:.2f}/"
+            f"{sorted(legacy_holds)[int(len(legacy_holds) * 0.95)] * 1000:.2f} ms, "
+            f"ledger {statistics.median(ledger_holds) * 1000:.2f}/"
+            f"{sorted(ledger_holds)[int(len(ledger_holds) * 0.95)] * 1000:.2f} ms"
+        )
+
+        assert not ledger_errors
+        assert ledger_balance == expected
+        assert ledger_logs == total
+        assert statistics.median(ledger_holds) < statistics.median(legacy_holds)
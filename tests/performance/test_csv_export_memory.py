@@ -0,0 +1,150 @@
+"""
+Memory benchmark for the admin CSV export: buffered vs streamed
+
+- buffered: `db.execute(query).all()` into an `io.StringIO`, then
+  `getvalue()` (the previous export_csv implementation)
+- streamed: `CsvExportEngine.stream()` (`yield_per` batches, chunks
+  consumed as they are produced)
+
+Peak traced Python memory is measured at 1/10 and at the full row count;
+the streamed peak must stay flat while the buffered one grows with rows.
+
+Usage:
+    poetry run pytest tests/performance/test_csv_export_memory.py -v -s -m slow
+    CSV_EXPORT_BENCH_ROWS=200000 poetry run pytest ... -v -s -m slow
+"""
+import csv
+import io
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.counselor import Counselor
+from app.models.session_usage import SessionUsage
+from app.services.core.csv_export import DATASETS, CsvExportEngine
+
+ROWS = int(os.environ.get("CSV_EXPORT_BENCH_ROWS", "1000000"))
+INSERT_BATCH = 50_000
+
+
+def _seed(engine, rows: int, start: datetime):
+    counselor_id = uuid4()
+    with Session(engine) as db:
+        db.execute(
+            insert(Counselor),
+            [
+                {
+                    "id": counselor_id,
+                    "email": "export@test.com",
+                    "hashed_password": "x",
+                    "tenant_id": "career",
+                    "role": "counselor",
+                    "is_active": True,
+                }
+            ],
+        )
+        for offset in range(0, rows, INSERT_BATCH):
+            db.execute(
+                insert(SessionUsage),
+                [
+                    {
+                        "id": uuid4(),
+                        "session_id": uuid4(),
+                        "counselor_id": counselor_id,
+                        "tenant_id": "career",
+                        "duration_seconds": 600,
+                        "status": "completed",
+                        "total_tokens": 7000,
+                        "estimated_cost_usd": 0.0667,
+                        "created_at": start + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + INSERT_BATCH, rows))
+                ],
+            )
+        db.commit()
+
+
+@pytest.fixture(scope="module")
+def export_db(tmp_path_factory):
+    """Two databases: ROWS // 10 and ROWS session rows"""
+    start = datetime.now(timezone.utc) - timedelta(days=20)
+    engines = {}
+    for rows in (ROWS // 10, ROWS):
+        path = tmp_path_factory.mktemp("perf") / f"export_{rows}.db"
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        _seed(engine, rows, start)
+        engines[rows] = engine
+    yield engines, start - timedelta(seconds=1)
+    for engine in engines.values():
+        engine.dispose()
+
+
+def _buffered(engine, start) -> int:
+    dataset = DATASETS["sessions"]
+    output = io.StringIO()
+    with Session(engine) as db:
+        results = db.execute(dataset.query(start)).all()
+    writer = csv.writer(output)
+    writer.writerow(dataset.columns)
+    writer.writerows(dataset.row(row) for row in results)
+    return len(output.getvalue().encode("utf-8"))
+
+
+def _streamed(engine, start) -> int:
+    return sum(
+        len(chunk)
+        for chunk in CsvExportEngine(engine, batch_size=2000).stream(
+            DATASETS["sessions"], start
+        )
+    )
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak / 1024 / 1024, elapsed
+
+
+@pytest.mark.slow
+class TestCsvExportMemory:
+    """Peak memory of the sessions export at two sizes"""
+
+    def test_streamed_peak_is_flat(self, export_db):
+        engines, start = export_db
+        small, large = ROWS // 10, ROWS
+
+        results = {}
+        for rows in (small, large):
+            results[("streamed", rows)] = _measure(_streamed, engines[rows], start)
+        # The buffered path is only measured at the small size at full scale
+        buffered_sizes = (small, large) if ROWS <= 200_000 else (small,)
+        for rows in buffered_sizes:
+            results[("buffered", rows)] = _measure(_buffered, engines[rows], start)
+
+        print(
+            f"\n📊 Sessions CSV export, peak traced memory ({ROWS:,} rows full size):"
+        )
+        for (mode, rows), (size, peak_mb, elapsed) in results.items():
+            print(
+                f"   - {mode:<8} {rows:>9,} rows: {peak_mb:7.1f} MB peak, "
+                f"{size / 1024 / 1024:6.1f} MB CSV, {elapsed:5.1f} s"
+            )
+
+        stream_small = results[("streamed", small)][1]
+        stream_large = results[("streamed", large)][1]
+        # Same output, independent of the row count
+        assert results[("streamed", small)][0] == results[("buffered", small)][0]
+        assert stream_large < stream_small * 1.5 + 1
+        assert stream_small < results[("buffered", small)][1]
@@ -0,0 +1,176 @@
+"""
+Performance benchmark for repeated admin dashboard loads
+
+One "dashboard load" is the set of aggregates the dashboard page issues
+for a month view (summary, trends, per-user, per-model). Compares:
+
+- uncached: UsageRollupService.aggregate() per widget (rollups refreshed)
+- cached:   the same calls through DashboardCache (memory backend), warm
+
+and reports the hit rate of the warm loads.
+
+Usage:
+    poetry run pytest tests/performance/test_dashboard_cache_performance.py -v -s -m slow
+    DASHBOARD_BENCH_SESSIONS=100000 poetry run pytest ... -v -s -m slow
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.counselor import Counselor
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.dashboard_cache import DashboardCache, MemoryCacheBackend
+from app.services.core.usage_rollups import (
+    ANALYSIS,
+    DAY,
+    USAGE,
+    UsageRollupService,
+)
+
+SESSIONS = int(os.environ.get("DASHBOARD_BENCH_SESSIONS", "20000"))
+COUNSELORS = 200
+MODELS = [
+    "gemini-flash-lite-latest",
+    "gemini-1.5-flash-latest",
+    "gemini-3-flash-preview",
+]
+LOADS = 20
+
+
+@pytest.fixture(scope="module")
+def seeded_db(tmp_path_factory):
+    """SESSIONS usage rows and two analysis logs each, spread over 30 days"""
+    db_path = tmp_path_factory.mktemp("perf") / "dashboard.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    counselor_ids = [uuid4() for _ in range(COUNSELORS)]
+    db.execute(
+        insert(Counselor),
+        [
+            {
+                "id": cid,
+                "email": f"dash{i}@test.com",
+                "hashed_password": "x",
+                "tenant_id": "career",
+                "role": "counselor",
+                "is_active": True,
+            }
+            for i, cid in enumerate(counselor_ids)
+        ],
+    )
+    usage, logs = [], []
+    for _ in range(SESSIONS):
+        at = now - timedelta(seconds=rng.randrange(30 * 86400))
+        session_id, counselor_id = uuid4(), rng.choice(counselor_ids)
+        tokens = rng.randrange(1000, 20000)
+        usage.append(
+            {
+                "id": uuid4(),
+                "session_id": session_id,
+                "counselor_id": counselor_id,
+                "tenant_id": "career",
+                "duration_seconds": rng.randrange(60, 3600),
+                "status": "completed",
+                "total_prompt_tokens": tokens,
+                "total_completion_tokens": tokens // 4,
+                "total_tokens": tokens + tokens // 4,
+                "estimated_cost_usd": tokens / 1e6,
+                "created_at": at,
+            }
+        )
+        for j in range(2):
+            logs.append(
+                {
+                    "id": uuid4(),
+                    "session_id": session_id,
+                    "counselor_id": counselor_id,
+                    "tenant_id": "career",
+                    "analysis_type": "quick",
+                    "model_name": rng.choice(MODELS),
+                    "prompt_tokens": tokens // 2,
+                    "completion_tokens": tokens // 8,
+                    "total_tokens": tokens // 2 + tokens // 8,
+                    "estimated_cost_usd": tokens / 2e6,
+                    "safety_level": "green",
+                    "analyzed_at": at + timedelta(minutes=j),
+                }
+            )
+    db.execute(insert(SessionUsage), usage)
+    db.execute(insert(SessionAnalysisLog), logs)
+    db.commit()
+    UsageRollupService(db).refresh()
+
+    yield db
+
+    db.close()
+    engine.dispose()
+
+
+def _dashboard_load(aggregate):
+    """The aggregates behind one month view of the admin dashboard"""
+    start = datetime.now(timezone.utc) - timedelta(days=30)
+    aggregate(USAGE, start, by=("counselor_id",), tenant_id="career")
+    aggregate(ANALYSIS, start, tenant_id="career")
+    aggregate(USAGE, start, period=DAY, tenant_id="career")
+    aggregate(ANALYSIS, start, period=DAY, tenant_id="career")
+    aggregate(USAGE, start, by=("counselor_id",), period=DAY, tenant_id="career")
+    aggregate(
+        ANALYSIS,
+        start,
+        by=("model_name",),
+        tenant_id="career",
+        not_null=("model_name",),
+    )
+    aggregate(ANALYSIS, start, by=("counselor_id",), tenant_id="career")
+
+
+def _ms_per_load(aggregate, loads=LOADS):
+    started = time.perf_counter()
+    for _ in range(loads):
+        _dashboard_load(aggregate)
+    return (time.perf_counter() - started) * 1000 / loads
+
+
+@pytest.mark.slow
+class TestDashboardCachePerformance:
+    """Benchmark repeated dashboard loads with and without the cache"""
+
+    def test_repeated_loads(self, seeded_db):
+        service = UsageRollupService(seeded_db)
+        cache = DashboardCache(
+            MemoryCacheBackend(max_entries=50_000, closed_ttl_seconds=None),
+            current_ttl_seconds=30,
+        )
+
+        def cached(fact, start, **kw):
+            return cache.aggregate(service, fact, start, **kw)
+
+        uncached_ms = _ms_per_load(service.aggregate, loads=5)
+        cold_started = time.perf_counter()
+        _dashboard_load(cached)
+        cold_ms = (time.perf_counter() - cold_started) * 1000
+        cache.stats.__init__()
+        warm_ms = _ms_per_load(cached)
+        stats = cache.stats_dict()
+
+        print(f"\n📊 Dashboard month view ({SESSIONS:,} sessions, {LOADS} loads):")
+        print(f"   - uncached (rollups): {uncached_ms:.1f} ms/load")
+        print(f"   - cached, cold:       {cold_ms:.1f} ms")
+        print(f"   - cached, warm:       {warm_ms:.1f} ms/load")
+        print(f"   - warm hit rate:      {stats['hit_rate']:.1%}")
+
+        # Warm loads only aggregate the partial first hour of each widget
+        assert stats["hit_rate"] > 0.95
+        assert warm_ms < uncached_ms
@@ -0,0 +1,212 @@
+"""
+Benchmark for one admin dashboard load: per-widget fan-out vs snapshot
+
+- fan-out:  one GET per widget (the dashboard page today); each request
+            checks the admin token against the database and checks out
+            its own pooled connection
+- snapshot: one POST /snapshot with the same widgets
+
+Both are measured cold (dashboard cache cleared) and warm; reported are
+wall time, pool checkouts and SQL statements per load.
+
+Usage:
+    poetry run pytest tests/performance/test_dashboard_snapshot_performance.py -v -s -m slow
+    DASHBOARD_BENCH_SESSIONS=100000 poetry run pytest ... -v -s -m slow
+"""
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_analytics_db
+from app.core.security import create_access_token
+from app.main import app
+from app.models.counselor import Counselor
+from app.models.session_analysis_log import SessionAnalysisLog
+from app.models.session_usage import SessionUsage
+from app.services.core.dashboard_cache import dashboard_cache
+from app.services.core.usage_rollups import UsageRollupService
+
+SESSIONS = int(os.environ.get("DASHBOARD_BENCH_SESSIONS", "20000"))
+COUNSELORS = 200
+LOADS = 5
+WIDGETS = [
+    ("summary", {"time_range": "month"}),
+    ("cost-trend", {"time_range": "month"}),
+    ("token-trend", {"time_range": "month"}),
+    ("cost-breakdown", {"time_range": "month"}),
+    ("session-trend", {"time_range": "month"}),
+    ("model-distribution", {"time_range": "month"}),
+    ("daily-active-users", {"time_range": "month"}),
+    ("safety-distribution", {"time_range": "month"}),
+    ("overall-stats", {"time_range": "month"}),
+    ("cost-per-user", {"time_range": "month"}),
+    ("top-users", {"time_range": "month"}),
+    ("user-segments", {"time_range": "month"}),
+    ("cost-prediction", {}),
+]
+
+
+@pytest.fixture(scope="module")
+def dashboard_app(tmp_path_factory):
+    """SESSIONS usage rows + one analysis log each over 30 days; get_analytics_db on that file"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path_factory.mktemp('perf') / 'snapshot.db'}"
+    )
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    counselor_ids = [uuid4() for _ in range(COUNSELORS)]
+    with session_factory() as db:
+        db.execute(
+            insert(Counselor),
+            [
+                {
+                    "id": cid,
+                    "email": f"snap{i}@test.com",
+                    "hashed_password": "x",
+                    "tenant_id": "career",
+                    "role": "admin" if i == 0 else "counselor",
+                    "is_active": True,
+                    "created_at": now - timedelta(days=90),
+                }
+                for i, cid in enumerate(counselor_ids)
+            ],
+        )
+        usage, logs = [], []
+        for _ in range(SESSIONS):
+            at = now - timedelta(seconds=rng.randrange(30 * 86400))
+            session_id, counselor_id = uuid4(), rng.choice(counselor_ids)
+            tokens = rng.randrange(1000, 20000)
+            usage.append(
+                {
+                    "id": uuid4(),
+                    "session_id": session_id,
+                    "counselor_id": counselor_id,
+                    "tenant_id": "career",
+                    "duration_seconds": rng.randrange(60, 3600),
+                    "status": "completed",
+                    "total_tokens": tokens,
+                    "estimated_cost_usd": tokens / 1e6,
+                    "created_at": at,
+                }
+            )
+            logs.append(
+                {
+                    "id": uuid4(),
+                    "session_id": session_id,
+                    "counselor_id": counselor_id,
+                    "tenant_id": "career",
+                    "analysis_type": "quick",
+                    "model_name": "gemini-flash-lite-latest",
+                    "prompt_tokens": tokens // 2,
+                    "completion_tokens": tokens // 8,
+                    "estimated_cost_usd": tokens / 2e6,
+                    "safety_level": "green",
+                    "analyzed_at": at,
+                }
+            )
+        db.execute(insert(SessionUsage), usage)
+        db.execute(insert(SessionAnalysisLog), logs)
+        db.commit()
+        UsageRollupService(db).refresh()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_analytics_db] = override_get_db
+    token = create_access_token(
+        {"sub": "snap0@test.com", "tenant_id": "career", "role": "admin"}
+    )
+    yield engine, {"Authorization": f"Bearer {token}"}
+    app.dependency_overrides.pop(get_analytics_db, None)
+    engine.dispose()
+
+
+def _fan_out(client, headers):
+    for name, params in WIDGETS:
+        assert (
+            client.get(
+                f"/api/v1/admin/dashboard/{name}", params=params, headers=headers
+            ).status_code
+            == 200
+        )
+
+
+def _snapshot(client, headers):
+    body = {"widgets": [{"widget": name, "params": params} for name, params in WIDGETS]}
+    assert (
+        client.post(
+            "/api/v1/admin/dashboard/snapshot", json=body, headers=headers
+        ).status_code
+        == 200
+    )
+
+
+def _measure(engine, load, client, headers, warm):
+    counts = {"checkouts": 0, "statements": 0}
+
+    def on_checkout(*args):
+        counts["checkouts"] += 1
+
+    def on_statement(*args):
+        counts["statements"] += 1
+
+    if warm:
+        load(client, headers)
+    event.listen(engine, "checkout", on_checkout)
+    event.listen(engine, "before_cursor_execute", on_statement)
+    elapsed = 0.0
+    try:
+        for _ in range(LOADS):
+            if not warm:
+                dashboard_cache.clear()
+            started = time.perf_counter()
+            load(client, headers)
+            elapsed += time.perf_counter() - started
+    finally:
+        event.remove(engine, "checkout", on_checkout)
+        event.remove(engine, "before_cursor_execute", on_statement)
+    return (
+        elapsed * 1000 / LOADS,
+        counts["checkouts"] / LOADS,
+        counts["statements"] / LOADS,
+    )
+
+
+@pytest.mark.slow
+class TestDashboardSnapshotPerformance:
+    def test_snapshot_vs_fan_out(self, dashboard_app):
+        engine, headers = dashboard_app
+        results = {}
+        with TestClient(app) as client:
+            for warm in (False, True):
+                for mode, load in (("fan-out", _fan_out), ("snapshot", _snapshot)):
+                    results[(mode, warm)] = _measure(
+                        engine, load, client, headers, warm
+                    )
+
+        print(f"\n📊 Dashboard load, {len(WIDGETS)} widgets ({SESSIONS:,} sessions):")
+        for (mode, warm), (ms, checkouts, statements) in results.items():
+            print(
+                f"   - {mode:<8} {'warm' if warm else 'cold'}: {ms:7.1f} ms, "
+                f"{checkouts:4.0f} connection checkouts, {statements:5.0f} statements"
+            )
+
+        for warm in (False, True):
+            fan_out, snapshot = results[("fan-out", warm)], results[("snapshot", warm)]
+            assert snapshot[1] == 1
+            assert fan_out[1] >= len(WIDGETS)
+            assert snapshot[2] < fan_out[2]
@@ -0,0 +1,133 @@
+"""
+Pricing one million analysis-log rows: per-row helpers vs PricingEngine
+
+- legacy: `calculate_cost_for_model()` per row (normalize + dict walk + KeyError
+  guard for unknown models), as the dashboard/export paths did in Python
+- batch:  `pricing_engine.cost_column()` over whole columns
+- sql:    SUM(pricing_engine.sql_cost(...)) in SQLite (a fraction of the rows,
+  scaled), to show the aggregate never has to leave the database
+
+Usage:
+    poetry run pytest tests/performance/test_pricing_performance.py -v -s -m slow
+    PRICING_BENCH_ROWS=200000 poetry run pytest ... -v -s -m slow
+"""
+import os
+import random
+import time
+
+import pytest
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    func,
+    select,
+)
+
+from app.core.pricing import MODEL_PRICING_MAP, calculate_cost_for_model
+from app.core.pricing_engine import pricing_engine
+
+ROWS = int(os.environ.get("PRICING_BENCH_ROWS", "1000000"))
+SQL_ROWS = min(ROWS, 200_000)
+MODEL_POOL = (
+    list(MODEL_PRICING_MAP)
+    + [f"models/{m}" for m in MODEL_PRICING_MAP]
+    + ["gemini-unknown-experimental"]
+)
+
+
+def _columns(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    models = [rng.choice(MODEL_POOL) for _ in range(count)]
+    inputs = [rng.randrange(100, 20_000) for _ in range(count)]
+    outputs = [rng.randrange(10, 4_000) for _ in range(count)]
+    return models, inputs, outputs
+
+
+def _legacy_total(models, inputs, outputs) -> float:
+    total = 0.0
+    for model, i, o in zip(models, inputs, outputs):
+        try:
+            total += calculate_cost_for_model(model, i, o)
+        except KeyError:
+            continue
+    return total
+
+
+def _sql_total(models, inputs, outputs):
+    metadata = MetaData()
+    logs = Table(
+        "logs",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("model_name", String),
+        Column("prompt_tokens", Integer),
+        Column("completion_tokens", Integer),
+    )
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            logs.insert(),
+            [
+                {"model_name": m, "prompt_tokens": i, "completion_tokens": o}
+                for m, i, o in zip(models, inputs, outputs)
+            ],
+        )
+        start = time.perf_counter()
+        total = conn.execute(
+            select(
+                func.sum(
+                    pricing_engine.sql_cost(
+                        logs.c.model_name,
+                        logs.c.prompt_tokens,
+                        logs.c.completion_tokens,
+                    )
+                )
+            )
+        ).scalar()
+        elapsed = time.perf_counter() - start
+    engine.dispose()
+    return total, elapsed
+
+
+@pytest.mark.slow
+class TestPricingPerformance:
+    def test_price_one_million_rows(self):
+        models, inputs, outputs = _columns(ROWS)
+
+        start = time.perf_counter()
+        legacy = _legacy_total(models, inputs, outputs)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = pricing_engine.total_cost(models, inputs, outputs)
+        batch_s = time.perf_counter() - start
+
+        sql_total, sql_s = _sql_total(
+            models[:SQL_ROWS], inputs[:SQL_ROWS], outputs[:SQL_ROWS]
+        )
+        sql_reference = pricing_engine.total_cost(
+            models[:SQL_ROWS], inputs[:SQL_ROWS], outputs[:SQL_ROWS]
+        )
+
+        print(f"\n📊 Pricing {ROWS:,} rows ({len(MODEL_POOL)} model names):")
+        print(
+            f"   - legacy per-row: {legacy_s:.3f}s ({legacy_s / ROWS * 1e9:.0f} ns/row)"
+        )
+        print(
+            f"   - batch column:   {batch_s:.3f}s ({batch_s / ROWS * 1e9:.0f} ns/row), "
+            f"{legacy_s / batch_s:.1f}x faster"
+        )
+        print(
+            f"   - SQL SUM(CASE):  {sql_s:.3f}s for {SQL_ROWS:,} rows in SQLite "
+            f"({sql_s / SQL_ROWS * 1e9:.0f} ns/row)"
+        )
+        print(f"   - total cost: ${batch:,.2f}")
+
+        assert batch == pytest.approx(legacy, rel=1e-9)
+        assert sql_total == pytest.approx(sql_reference, rel=1e-9)
+        assert batch_s < legacy_s / 2
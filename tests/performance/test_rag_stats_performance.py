@@ -0,0 +1,181 @@
+"""
+Benchmark for the RAG stats page: live aggregation vs materialized counters
+
+Two corpora (SMALL_CHUNKS and LARGE_CHUNKS chunks, one embedding each)
+are generated; for each one the stats page is loaded:
+
+- live:         the previous implementation (five COUNT(*) queries plus
+                one GROUP BY over documents x chunks x embeddings)
+- materialized: GET /api/rag/stats/ (category counters + one page of
+                documents joined with rag_document_stats)
+
+Reports ms and SQL statements per load. The materialized page must cost
+the same on both corpora; the live one grows with the chunk count.
+
+Usage:
+    poetry run pytest tests/performance/test_rag_stats_performance.py -v -s -m slow
+    RAG_BENCH_CHUNKS=1000000 poetry run pytest ... -v -s -m slow
+"""
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, get_analytics_db
+from app.main import app
+from app.models.document import Chunk, Datasource, Document, Embedding
+from app.services.rag.corpus_stats import CorpusStatsService
+
+LARGE_CHUNKS = int(os.environ.get("RAG_BENCH_CHUNKS", "200000"))
+SMALL_CHUNKS = LARGE_CHUNKS // 20
+CHUNKS_PER_DOC = 200
+LOADS = 5
+
+LIVE_QUERIES = [
+    "SELECT COUNT(*) FROM datasources",
+    "SELECT COUNT(*) FROM documents",
+    "SELECT COUNT(*) FROM chunks",
+    "SELECT COUNT(*) FROM embeddings",
+    "SELECT COALESCE(SUM(bytes), 0) FROM documents",
+    """
+    SELECT d.id, d.title, d.category, d.pages, d.bytes, d.text_length, d.created_at,
+           COALESCE(c.chunk_strategy, 'no_chunks') AS chunk_strategy,
+           COUNT(c.id) AS chunks_count, COUNT(e.id) AS embeddings_count,
+           COALESCE(SUM(LENGTH(c.text)), 0) AS total_text_chars
+    FROM documents d
+    LEFT JOIN chunks c ON d.id = c.doc_id
+    LEFT JOIN embeddings e ON c.id = e.chunk_id
+    GROUP BY d.id, d.title, d.category, d.pages, d.bytes, d.text_length, d.created_at,
+             c.chunk_strategy
+    ORDER BY d.created_at DESC, c.chunk_strategy
+    """,
+]
+
+
+def _build_corpus(path, chunks):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    documents = max(chunks // CHUNKS_PER_DOC, 1)
+    with session_factory() as db:
+        db.execute(
+            insert(Datasource),
+            [
+                {"id": i, "type": "pdf", "source_uri": f"gs://b/{i}"}
+                for i in range(1, documents + 1)
+            ],
+        )
+        db.execute(
+            insert(Document),
+            [
+                {
+                    "id": i,
+                    "datasource_id": i,
+                    "title": f"doc-{i}.pdf",
+                    "bytes": 50_000,
+                    "pages": 10,
+                    "text_length": 80_000,
+                    "category": "parenting" if i % 3 == 0 else "general",
+                }
+                for i in range(1, documents + 1)
+            ],
+        )
+        for start in range(0, chunks, 50_000):
+            ids = range(start + 1, min(start + 50_000, chunks) + 1)
+            db.execute(
+                insert(Chunk),
+                [
+                    {
+                        "id": i,
+                        "doc_id": (i - 1) // CHUNKS_PER_DOC % documents + 1,
+                        "chunk_strategy": "rec_400_80",
+                        "ordinal": (i - 1) % CHUNKS_PER_DOC,
+                        "text": "x" * 400,
+                    }
+                    for i in ids
+                ],
+            )
+            db.execute(insert(Embedding), [{"id": i, "chunk_id": i} for i in ids])
+        CorpusStatsService(db).check(fix=True)
+        db.commit()
+    return engine, session_factory
+
+
+@pytest.fixture(
+    scope="module", params=[SMALL_CHUNKS, LARGE_CHUNKS], ids=["small", "large"]
+)
+def corpus(request, tmp_path_factory):
+    engine, session_factory = _build_corpus(
+        tmp_path_factory.mktemp("perf") / "rag.db", request.param
+    )
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_analytics_db] = override_get_db
+    yield request.param, engine, session_factory
+    app.dependency_overrides.pop(get_analytics_db, None)
+    engine.dispose()
+
+
+def _measure(engine, load):
+    statements = []
+
+    def on_statement(*args):
+        statements.append(1)
+
+    load()  # warm up
+    event.listen(engine, "before_cursor_execute", on_statement)
+    try:
+        started = time.perf_counter()
+        for _ in range(LOADS):
+            load()
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", on_statement)
+    return elapsed * 1000 / LOADS, len(statements) / LOADS
+
+
+RESULTS = {}
+
+
+@pytest.mark.slow
+class TestRagStatsPerformance:
+    def test_stats_page_cost_is_independent_of_corpus_size(self, corpus):
+        chunks, engine, session_factory = corpus
+
+        def live():
+            with session_factory() as db:
+                for query in LIVE_QUERIES:
+                    db.execute(text(query)).fetchall()
+
+        with TestClient(app) as client:
+
+            def materialized():
+                response = client.get("/api/rag/stats/")
+                assert response.status_code == 200
+                assert response.json()["total_chunks"] == chunks
+
+            RESULTS[chunks] = {
+                "live": _measure(engine, live),
+                "materialized": _measure(engine, materialized),
+            }
+
+        print(f"\n📊 RAG stats page ({chunks:,} chunks):")
+        for mode, (ms, statements) in RESULTS[chunks].items():
+            print(f"   - {mode:<12}: {ms:8.1f} ms, {statements:3.0f} statements")
+
+        assert RESULTS[chunks]["materialized"][1] <= 2
+        if len(RESULTS) == 2:
+            small, large = RESULTS[SMALL_CHUNKS], RESULTS[LARGE_CHUNKS]
+            # Same statements and (within noise) the same time on a 20x larger corpus
+            assert large["materialized"][1] == small["materialized"][1]
+            assert large["materialized"][0] < small["materialized"][0] * 3 + 5
+            assert large["materialized"][0] < large["live"][0]
@@ -0,0 +1,224 @@
+"""
+Performance benchmark for session listing (keyset pagination + projection)
+
+Seeds 50k sessions for a single counselor and compares:
+1. Deep OFFSET page vs. deep keyset (cursor) page
+2. Payload size with default projection vs. fields=transcript_text,recordings
+
+Uses a local SQLite file so it runs without external services.
+
+Usage:
+    poetry run pytest tests/performance/test_session_list_performance.py -v -s -m slow
+"""
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.case import Case
+from app.models.client import Client
+from app.models.counselor import Counselor
+from app.models.session import Session as SessionModel
+from app.repositories.session_repository import SessionRepository
+
+SESSIONS_PER_COUNSELOR = 50_000
+CLIENTS = 200
+PAGE_SIZE = 20
+TRANSCRIPT = "家長：今天在學校還好嗎？\n孩子：還好。\n" * 40  # ~1KB per session
+
+
+@pytest.fixture(scope="module")
+def seeded_db(tmp_path_factory):
+    """Create a SQLite database with 50k sessions for one counselor"""
+    db_path = tmp_path_factory.mktemp("perf") / "sessions.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    counselor = Counselor(
+        id=uuid4(),
+        email="perf@test.com",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+    )
+    db.add(counselor)
+    db.flush()
+
+    case_ids = []
+    for i in range(CLIENTS):
+        client = Client(
+            id=uuid4(),
+            counselor_id=counselor.id,
+            tenant_id="career",
+            name=f"個案{i:04d}",
+            code=f"PERF{i:04d}",
+            gender="不透露",
+            birth_date=date(2015, 1, 1),
+            phone="0912345678",
+            identity_option="其他",
+            current_status="探索中",
+        )
+        case = Case(
+            id=uuid4(),
+            case_number=f"PERFCASE{i:04d}",
+            counselor_id=counselor.id,
+            client_id=client.id,
+            tenant_id="career",
+        )
+        db.add_all([client, case])
+        case_ids.append(case.id)
+    db.flush()
+
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    recordings = [
+        {
+            "segment_number": 1,
+            "start_time": "2024-01-01T00:00:00Z",
+            "end_time": "2024-01-01T00:10:00Z",
+            "duration_seconds": 600,
+            "transcript_text": TRANSCRIPT,
+        }
+    ]
+    rows = [
+        {
+            "id": uuid4(),
+            "case_id": case_ids[i % CLIENTS],
+            "tenant_id": "career",
+            "session_number": i // CLIENTS + 1,
+            "session_date": base_time + timedelta(minutes=i),
+            "transcript_text": TRANSCRIPT,
+            "transcript_sanitized": TRANSCRIPT,
+            "recordings": recordings,
+            "analysis_logs": [],
+        }
+        for i in range(SESSIONS_PER_COUNSELOR)
+    ]
+    for start in range(0, len(rows), 5_000):
+        db.execute(insert(SessionModel), rows[start : start + 5_000])
+    db.commit()
+
+    yield db, counselor
+
+    db.close()
+    engine.dispose()
+
+
+def _timed(fn, repeat=5):
+    """Return (best_ms, result) over several runs"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+@pytest.mark.slow
+class TestSessionListPerformance:
+    """Benchmark session listing at 50k sessions per counselor"""
+
+    def test_deep_page_keyset_vs_offset(self, seeded_db):
+        db, counselor = seeded_db
+        repo = SessionRepository(db)
+        deep_offset = SESSIONS_PER_COUNSELOR - 100
+
+        offset_ms, (offset_rows, _, _) = _timed(
+            lambda: repo.list_sessions(
+                counselor.id,
+                "career",
+                skip=deep_offset,
+                limit=PAGE_SIZE,
+                count_mode="none",
+            )
+        )
+
+        # Cursor positioned at the same depth as the OFFSET page
+        _, _, cursor = repo.list_sessions(
+            counselor.id, "career", skip=deep_offset - 1, limit=1, count_mode="none"
+        )
+
+        keyset_ms, (keyset_rows, _, _) = _timed(
+            lambda: repo.list_sessions(
+                counselor.id,
+                "career",
+                cursor=cursor,
+                limit=PAGE_SIZE,
+                count_mode="none",
+            )
+        )
+        first_ms, _ = _timed(
+            lambda: repo.list_sessions(
+                counselor.id, "career", limit=PAGE_SIZE, count_mode="none"
+            )
+        )
+
+        print("\n📊 Session list page latency (50k sessions):")
+        print(f"   - First page:            {first_ms:.1f} ms")
+        print(f"   - OFFSET {deep_offset}:      {offset_ms:.1f} ms")
+        print(f"   - Keyset at same depth:  {keyset_ms:.1f} ms")
+
+        assert [r[0].id for r in keyset_rows] == [r[0].id for r in offset_rows]
+        assert keyset_ms < offset_ms
+
+    def test_projection_payload_size(self, seeded_db):
+        db, counselor = seeded_db
+        repo = SessionRepository(db)
+
+        def payload(include_fields):
+            rows, _, _ = repo.list_sessions(
+                counselor.id,
+                "career",
+                limit=100,
+                include_fields=include_fields,
+                count_mode="none",
+            )
+            items = [
+                {
+                    "id": str(s.id),
+                    "session_date": s.session_date.isoformat(),
+                    **{f: getattr(s, f) for f in include_fields},
+                }
+                for s, _, _, _ in rows
+            ]
+            return len(json.dumps(items, ensure_ascii=False).encode("utf-8"))
+
+        slim_ms, slim_bytes = _timed(lambda: payload(()))
+        full_ms, full_bytes = _timed(lambda: payload(("transcript_text", "recordings")))
+
+        print("\n📊 Session list payload (100 items):")
+        print(
+            f"   - Default projection: {slim_bytes / 1024:.1f} KB in {slim_ms:.1f} ms"
+        )
+        print(
+            f"   - With large fields:  {full_bytes / 1024:.1f} KB in {full_ms:.1f} ms"
+        )
+
+        assert slim_bytes * 10 < full_bytes
+
+    def test_count_modes(self, seeded_db):
+        db, counselor = seeded_db
+        repo = SessionRepository(db)
+
+        exact_ms, (_, total, _) = _timed(
+            lambda: repo.list_sessions(counselor.id, "career", limit=PAGE_SIZE)
+        )
+        none_ms, (_, no_total, _) = _timed(
+            lambda: repo.list_sessions(
+                counselor.id, "career", limit=PAGE_SIZE, count_mode="none"
+            )
+        )
+
+        print("\n📊 Count mode cost:")
+        print(f"   - exact: {exact_ms:.1f} ms (total={total})")
+        print(f"   - none:  {none_ms:.1f} ms")
+
+        assert total == SESSIONS_PER_COUNSELOR
+        assert no_total is None
@@ -0,0 +1,154 @@
+"""
+Performance benchmark for the client session timeline
+
+Checks that timeline latency and page size stay flat as a client's history
+grows (50 vs. 500 sessions), and measures the cold-load vs. cached path.
+
+Usage:
+    poetry run pytest tests/performance/test_timeline_performance.py -v -s -m slow
+"""
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.case import Case
+from app.models.client import Client
+from app.models.counselor import Counselor
+from app.models.session import Session as SessionModel
+from app.services.core.timeline_service import TimelineCache, TimelineService
+
+TRANSCRIPT = "家長：今天在學校還好嗎？\n孩子：還好。\n" * 200  # ~5KB per session
+PAGE_SIZE = 20
+
+
+@pytest.fixture(scope="module")
+def seeded_db(tmp_path_factory):
+    """Two clients of one counselor: 50 and 500 sessions with large columns"""
+    db_path = tmp_path_factory.mktemp("perf") / "timeline.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    counselor = Counselor(
+        id=uuid4(),
+        email="timeline@test.com",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+    )
+    db.add(counselor)
+    db.flush()
+
+    clients = {}
+    for size in (50, 500):
+        client = Client(
+            id=uuid4(),
+            counselor_id=counselor.id,
+            tenant_id="career",
+            name=f"個案{size}",
+            code=f"TL{size}",
+            gender="不透露",
+            birth_date=date(2015, 1, 1),
+            phone="0912345678",
+            identity_option="其他",
+            current_status="探索中",
+        )
+        case = Case(
+            id=uuid4(),
+            case_number=f"TLCASE{size}",
+            counselor_id=counselor.id,
+            client_id=client.id,
+            tenant_id="career",
+        )
+        db.add_all([client, case])
+        db.flush()
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        db.execute(
+            insert(SessionModel),
+            [
+                {
+                    "id": uuid4(),
+                    "case_id": case.id,
+                    "tenant_id": "career",
+                    "session_number": i + 1,
+                    "session_date": base + timedelta(days=i),
+                    "start_time": base + timedelta(days=i, hours=10),
+                    "end_time": base + timedelta(days=i, hours=11),
+                    "summary": "本次會談聚焦於情緒調節",
+                    "transcript_text": TRANSCRIPT,
+                    "recordings": [{"transcript_text": TRANSCRIPT}],
+                    "analysis_logs": [{"transcript": TRANSCRIPT}],
+                }
+                for i in range(size)
+            ],
+        )
+        clients[size] = client
+    db.commit()
+
+    yield db, counselor, clients
+
+    db.close()
+    engine.dispose()
+
+
+def _best_ms(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+@pytest.mark.slow
+class TestTimelinePerformance:
+    """Benchmark timeline loading at 50 and 500 sessions per client"""
+
+    def test_page_latency_and_size_flat(self, seeded_db):
+        db, counselor, clients = seeded_db
+        service = TimelineService(db, cache=TimelineCache(60, 100))
+
+        results = {}
+        for size, client in clients.items():
+            service.cache.clear()
+            cold_ms = _best_ms(
+                lambda: (
+                    service.cache.clear(),
+                    service.get_session_timeline(
+                        client.id, counselor.id, "career", limit=PAGE_SIZE
+                    ),
+                ),
+                repeat=3,
+            )
+            warm_ms = _best_ms(
+                lambda: service.get_session_timeline(
+                    client.id, counselor.id, "career", limit=PAGE_SIZE
+                )
+            )
+            _, page, total, _ = service.get_session_timeline(
+                client.id, counselor.id, "career", limit=PAGE_SIZE
+            )
+            page_bytes = len(
+                json.dumps([i.model_dump(mode="json") for i in page]).encode()
+            )
+            results[size] = (cold_ms, warm_ms, page_bytes)
+            assert total == size
+
+        print("\n📊 Timeline page (20 items):")
+        for size, (cold_ms, warm_ms, page_bytes) in results.items():
+            print(
+                f"   - {size:>3} sessions: cold {cold_ms:.1f} ms, "
+                f"cached {warm_ms:.2f} ms, {page_bytes / 1024:.1f} KB"
+            )
+
+        # Page payload is independent of history length
+        assert results[50][2] == results[500][2]
+        # Cached path only pays the client authorization query
+        assert results[500][1] < results[500][0]
@@ -0,0 +1,111 @@
+"""
+Billing duration lookup cost vs session length
+
+The previous billing path loaded the whole Session row and summed every
+recording segment on each analysis; the accumulator reads the running total
+kept on SessionUsage. Measured for short and long sessions.
+
+Usage:
+    poetry run pytest tests/performance/test_usage_accumulator_performance.py -v -s -m slow
+"""
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.session import Session as SessionModel
+from app.models.session_usage import SessionUsage
+from app.services.billing.usage_accumulator import UsageAccumulator
+
+SEGMENT_COUNTS = (10, 5_000)
+REPEAT = 50
+
+
+def _seed(db, segments: int):
+    recordings = [
+        {
+            "segment_number": i + 1,
+            "duration_seconds": 30,
+            "transcript_text": "案主：最近壓力很大，晚上都睡不好。" * 20,
+        }
+        for i in range(segments)
+    ]
+    session = SessionModel(
+        id=uuid4(),
+        case_id=uuid4(),
+        tenant_id="career",
+        session_number=1,
+        session_date=datetime.now(timezone.utc),
+        recordings=recordings,
+        transcript_text="".join(r["transcript_text"] for r in recordings),
+    )
+    usage = SessionUsage(
+        session_id=session.id,
+        counselor_id=uuid4(),
+        tenant_id="career",
+        status="in_progress",
+        credits_deducted=Decimal("0"),
+        last_billed_minutes=0,
+        recorded_seconds=30 * segments,
+        recorded_segments=segments,
+    )
+    db.add_all([session, usage])
+    db.commit()
+    return session.id
+
+
+def _legacy_duration(db, session_id) -> int:
+    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    return sum(r.get("duration_seconds", 0) for r in (session.recordings or []))
+
+
+def _accumulated_duration(db, session_id) -> int:
+    usage = db.query(SessionUsage).filter(SessionUsage.session_id == session_id).first()
+    return UsageAccumulator(db).totals(session_id, usage)[0]
+
+
+def _avg_ms(db, fn, session_id) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(db, session_id)
+        db.expire_all()  # every analysis runs in a fresh request
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+@pytest.mark.slow
+class TestUsageAccumulatorPerformance:
+    def test_duration_lookup_is_flat_in_session_length(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+        Base.metadata.create_all(
+            bind=engine, tables=[SessionModel.__table__, SessionUsage.__table__]
+        )
+        db = sessionmaker(bind=engine)()
+
+        print("\n📊 Billing duration lookup per analysis:")
+        results = {}
+        for segments in SEGMENT_COUNTS:
+            session_id = _seed(db, segments)
+            assert _legacy_duration(db, session_id) == _accumulated_duration(
+                db, session_id
+            )
+            legacy_ms = _avg_ms(db, _legacy_duration, session_id)
+            accumulated_ms = _avg_ms(db, _accumulated_duration, session_id)
+            results[segments] = (legacy_ms, accumulated_ms)
+            print(
+                f"   - {segments:>5} segments: reload + sum {legacy_ms:.2f} ms, "
+                f"running total {accumulated_ms:.2f} ms"
+            )
+
+        db.close()
+        engine.dispose()
+
+        long_legacy, long_accumulated = results[SEGMENT_COUNTS[-1]]
+        short_accumulated = results[SEGMENT_COUNTS[0]][1]
+        assert long_accumulated < long_legacy / 10
+        # Independent of session length (generous bound for CI noise)
+        assert long_accumulated < short_accumulated * 3
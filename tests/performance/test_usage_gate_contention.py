@@ -0,0 +1,189 @@
+"""
+Contention benchmark: many concurrent sessions from one counselor
+
+N threads create sessions (with a known duration) for the same subscription
+counselor until the monthly limit is reached. Compares:
+
+- legacy: check the loaded Counselor row, then `monthly_minutes_used += n`
+  in Python -> lost increments and sessions admitted past the limit
+- usage gate: one conditional UPDATE ... WHERE used < limit per session
+  -> exact usage, no over-admission
+
+A second run mixes plain checks (duration unknown at creation) with
+completions adding minutes, and reports how many checks the snapshot
+answered without a query.
+
+Usage:
+    poetry run pytest tests/performance/test_usage_gate_contention.py -v -s -m slow
+"""
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.counselor import BillingMode, Counselor
+from app.services.billing.usage_gate import SOURCE_SNAPSHOT, UsageGate
+from app.services.billing.usage_tracker import UsageTracker
+
+N_THREADS = 16
+ATTEMPTS_PER_THREAD = 30
+LIMIT_MINUTES = 360
+SESSION_MINUTES = 1
+WORK_SECONDS = 0.001  # session row insert etc. inside the transaction
+
+
+def _make_factory(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"timeout": 30})
+    Base.metadata.create_all(bind=engine, tables=[Counselor.__table__])
+    return sessionmaker(bind=engine)
+
+
+def _seed(factory):
+    db = factory()
+    counselor = Counselor(
+        id=uuid4(),
+        email="gate-perf@test.com",
+        hashed_password="x",
+        tenant_id="career",
+        role="counselor",
+        is_active=True,
+        billing_mode=BillingMode.SUBSCRIPTION,
+        monthly_usage_limit_minutes=LIMIT_MINUTES,
+        monthly_minutes_used=0,
+        usage_period_start=datetime.now(timezone.utc),
+    )
+    db.add(counselor)
+    db.commit()
+    counselor_id = counselor.id
+    db.close()
+    return counselor_id
+
+
+def _legacy_admit(db, counselor) -> bool:
+    tracker = UsageTracker()
+    tracker.reset_if_period_expired(counselor)
+    if tracker.is_limit_exceeded(counselor):
+        return False
+    time.sleep(WORK_SECONDS)
+    counselor.monthly_minutes_used = (
+        counselor.monthly_minutes_used or 0
+    ) + SESSION_MINUTES
+    return True
+
+
+def _mixed_run(factory, gate):
+    """Plain checks + completions; returns (snapshot decisions, checks, used)"""
+    counselor_id = _seed(factory)
+    sources, errors = [], []
+
+    def worker():
+        for _ in range(ATTEMPTS_PER_THREAD):
+            db = factory()
+            try:
+                counselor = db.get(Counselor, counselor_id)
+                sources.append(gate.admit(db, counselor).source)
+                db.commit()
+                gate.add_minutes(db, counselor, SESSION_MINUTES)  # completion
+                db.commit()
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(N_THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db = factory()
+    used = db.get(Counselor, counselor_id).monthly_minutes_used
+    db.close()
+    return sources.count(SOURCE_SNAPSHOT), len(sources), used, errors
+
+
+def _run(factory, admit):
+    counselor_id = _seed(factory)
+    admitted, latencies, errors = [], [], []
+
+    def worker():
+        for _ in range(ATTEMPTS_PER_THREAD):
+            db = factory()
+            try:
+                counselor = db.get(Counselor, counselor_id)  # get_current_user
+                start = time.perf_counter()
+                ok = admit(db, counselor)
+                latencies.append(time.perf_counter() - start)
+                if ok:
+                    db.commit()
+                    admitted.append(1)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(N_THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db = factory()
+    used = db.get(Counselor, counselor_id).monthly_minutes_used
+    db.close()
+    return len(admitted), used, latencies, errors
+
+
+@pytest.mark.slow
+class TestUsageGateContention:
+    def test_gate_vs_legacy_check(self, tmp_path):
+        gate = UsageGate(ttl_seconds=10, credit_margin=60, minute_margin=60)
+
+        def gated_admit(db, counselor):
+            allowed = gate.admit(db, counselor, minutes=SESSION_MINUTES).allowed
+            if allowed:
+                time.sleep(WORK_SECONDS)
+            return allowed
+
+        legacy = _run(_make_factory(tmp_path / "legacy.db"), _legacy_admit)
+        gated = _run(_make_factory(tmp_path / "gate.db"), gated_admit)
+
+        attempts = N_THREADS * ATTEMPTS_PER_THREAD
+        print(
+            f"\n📊 {N_THREADS} threads x {ATTEMPTS_PER_THREAD} session attempts "
+            f"(limit {LIMIT_MINUTES} min, {SESSION_MINUTES} min each):"
+        )
+        for name, (admitted, used, latencies, errors) in (
+            ("legacy", legacy),
+            ("gate", gated),
+        ):
+            print(
+                f"   - {name:>6}: admitted={admitted}, recorded used={used} min, "
+                f"lost increments={admitted * SESSION_MINUTES - used}, "
+                f"check median {statistics.median(latencies) * 1000:.2f} ms, "
+                f"errors={len(errors)}"
+            )
+
+        local, checks, mixed_used, mixed_errors = _mixed_run(
+            _make_factory(tmp_path / "mixed.db"),
+            UsageGate(ttl_seconds=10, credit_margin=60, minute_margin=60),
+        )
+        print(
+            f"   - plain checks + completions: {local}/{checks} checks answered "
+            f"from the snapshot, used={mixed_used} min"
+        )
+
+        admitted, used, _, errors = gated
+        assert attempts > LIMIT_MINUTES
+        assert not errors and not mixed_errors
+        # Every admitted session is counted, and none past the limit
+        assert used == admitted * SESSION_MINUTES
+        assert admitted == LIMIT_MINUTES // SESSION_MINUTES
+        assert mixed_used == attempts * SESSION_MINUTES
+        assert local > checks / 2
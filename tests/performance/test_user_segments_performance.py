@@ -0,0 +1,146 @@
+"""
+Benchmark for user-segments: in-Python segmentation vs UserSegmentation
+
+- python: one by_counselor() row per counselor fetched, p90 and segments
+  computed in a loop (the previous get_user_segments implementation)
+- sql: UserSegmentation.summary() (percentile, CASE, aggregates and top-k
+  members in the database)
+
+Both run on the same SQLite file and must return the same segment counts.
+
+Usage:
+    poetry run pytest tests/performance/test_user_segments_performance.py -v -s -m slow
+    SEGMENT_BENCH_COUNSELORS=20000 poetry run pytest ... -v -s -m slow
+"""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.counselor import Counselor
+from app.models.session_usage import SessionUsage
+from app.services.core.cost_aggregation import CostAggregation
+from app.services.core.usage_rollups import as_utc
+from app.services.core.user_segments import (
+    ACTIVE,
+    AT_RISK,
+    CHURNED,
+    POWER,
+    SegmentationPolicy,
+    UserSegmentation,
+)
+
+COUNSELORS = int(os.environ.get("SEGMENT_BENCH_COUNSELORS", "100000"))
+INSERT_BATCH = 20_000
+NOW = datetime.now(timezone.utc)
+
+
+def _seed(engine):
+    """70% of counselors active: 1-12 sessions, last one 0-25 days ago"""
+    counselors, sessions = [], []
+    for i in range(COUNSELORS):
+        counselor_id = uuid4()
+        counselors.append(
+            {
+                "id": counselor_id,
+                "email": f"c{i}@bench.test",
+                "hashed_password": "x",
+                "tenant_id": "career",
+                "role": "counselor",
+                "is_active": True,
+                "created_at": NOW - timedelta(days=90),
+            }
+        )
+        if i % 10 < 7:
+            for j in range(1 + i % 12):
+                sessions.append(
+                    {
+                        "id": uuid4(),
+                        "session_id": uuid4(),
+                        "counselor_id": counselor_id,
+                        "tenant_id": "career",
+                        "duration_seconds": 600,
+                        "status": "completed",
+                        "estimated_cost_usd": 0.05,
+                        "created_at": NOW - timedelta(days=i % 26, hours=j),
+                    }
+                )
+    with Session(engine) as db:
+        for table, rows in ((Counselor, counselors), (SessionUsage, sessions)):
+            for offset in range(0, len(rows), INSERT_BATCH):
+                db.execute(insert(table), rows[offset : offset + INSERT_BATCH])
+        db.commit()
+    return len(sessions)
+
+
+@pytest.fixture(scope="module")
+def segment_db(tmp_path_factory):
+    engine = create_engine(
+        f"sqlite:///{tmp_path_factory.mktemp('perf') / 'segments.db'}"
+    )
+    Base.metadata.create_all(bind=engine)
+    sessions = _seed(engine)
+    yield engine, sessions
+    engine.dispose()
+
+
+def _python_counts(db: Session, start: datetime):
+    users = db.execute(
+        CostAggregation()
+        .by_counselor(start, active_only=False)
+        .where(Counselor.created_at < NOW - timedelta(days=7))
+    ).all()
+    counts = sorted(int(u.sessions) for u in users if u.sessions > 0)
+    p90 = counts[int(len(counts) * 0.9)] if counts else 0
+    segments = {POWER: 0, ACTIVE: 0, AT_RISK: 0, CHURNED: 0}
+    for user in users:
+        last_activity = as_utc(user.last_activity)
+        if last_activity is None:
+            segments[CHURNED] += 1
+            continue
+        days_inactive = (NOW - last_activity).days
+        if user.sessions >= p90 and user.sessions > 0:
+            segments[POWER] += 1
+        elif 7 <= days_inactive < 30:
+            segments[AT_RISK] += 1
+        elif days_inactive >= 30:
+            segments[CHURNED] += 1
+        else:
+            segments[ACTIVE] += 1
+    return segments, len(users)
+
+
+def _sql_counts(db: Session, start: datetime):
+    result = UserSegmentation(SegmentationPolicy()).summary(db, start, NOW)
+    members = sum(len(s["users"]) for s in result.values())
+    return {name: s["count"] for name, s in result.items()}, len(result) + members
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+@pytest.mark.slow
+class TestUserSegmentsPerformance:
+    def test_sql_segmentation_matches_and_fetches_few_rows(self, segment_db):
+        engine, sessions = segment_db
+        start = NOW - timedelta(days=30)
+
+        with Session(engine) as db:
+            (python_counts, python_rows), python_s = _timed(_python_counts, db, start)
+            (sql_counts, sql_rows), sql_s = _timed(_sql_counts, db, start)
+
+        print(f"\n📊 user-segments, {COUNSELORS:,} counselors / {sessions:,} sessions:")
+        print(f"   - python: {python_s * 1000:8.0f} ms, {python_rows:>7,} rows fetched")
+        print(f"   - sql:    {sql_s * 1000:8.0f} ms, {sql_rows:>7,} rows fetched")
+        print(f"   - segments: {sql_counts}")
+
+        assert sql_counts == python_counts
+        assert sql_rows <= 4 + 4 * SegmentationPolicy().top_k
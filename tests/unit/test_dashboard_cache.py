@@ -0,0 +1,419 @@
+"""
+Unit tests for the tiered dashboard cache (stitching, single-flight,
+invalidation, memory and Redis backends)
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.services.core.dashboard_cache import (
+    CURRENT,
+    DashboardCache,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    SingleFlight,
+)
+from app.services.core.usage_rollups import DAY, HOUR, USAGE, floor_to
+
+NOW = datetime.now(timezone.utc)
+COUNSELORS = [uuid4(), uuid4()]
+
+
+class FakeService:
+    """Stands in for UsageRollupService: aggregates an in-memory event list"""
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+        self.delay = 0.0
+
+    def aggregate(
+        self,
+        fact,
+        start,
+        end=None,
+        by=(),
+        period=None,
+        tenant_id=None,
+        counselor_id=None,
+        not_null=(),
+    ):
+        self.calls.append((start, end, period))
+        time.sleep(self.delay)
+        end = end or datetime.now(timezone.utc)
+        totals = {}
+        for at, counselor, cost in self.events:
+            if not start <= at < end:
+                continue
+            if counselor_id is not None and counselor != counselor_id:
+                continue
+            key = (
+                floor_to(at, period) if period else None,
+                *({"counselor_id": counselor}[k] for k in by),
+            )
+            acc = totals.setdefault(key, {"sessions": 0, "estimated_cost_usd": 0.0})
+            acc["sessions"] += 1
+            acc["estimated_cost_usd"] += cost
+        rows = [
+            {"period": k[0], **dict(zip(by, k[1:])), **v} for k, v in totals.items()
+        ]
+        if period:
+            rows.sort(key=lambda r: r["period"])
+        return rows
+
+
+def _events(count=300, span_hours=24 * 9):
+    return [
+        (
+            NOW - timedelta(hours=span_hours * i / count),
+            COUNSELORS[i % 2],
+            0.25 * (i % 7),
+        )
+        for i in range(count)
+    ]
+
+
+def _normalize(rows):
+    return sorted(
+        (
+            r["period"],
+            str(r.get("counselor_id")),
+            r["sessions"],
+            round(r["estimated_cost_usd"], 9),
+        )
+        for r in rows
+    )
+
+
+def _cache():
+    return DashboardCache(
+        MemoryCacheBackend(max_entries=10_000, closed_ttl_seconds=None),
+        current_ttl_seconds=30,
+    )
+
+
+class TestPlan:
+    def test_splits_head_closed_days_and_current_hour(self):
+        now = datetime(2026, 3, 10, 14, 25, tzinfo=timezone.utc)
+        start = now - timedelta(days=7)
+
+        segments = DashboardCache.plan(start, now, now, DAY)
+
+        assert [s.kind for s in segments] == ["live", HOUR, DAY, HOUR, CURRENT]
+        assert segments[0].hi == datetime(2026, 3, 3, 15, tzinfo=timezone.utc)
+        assert segments[2].lo == datetime(2026, 3, 4, tzinfo=timezone.utc)
+        assert segments[-1].lo == datetime(2026, 3, 10, 14, tzinfo=timezone.utc)
+
+    def test_hourly_period_never_uses_day_buckets(self):
+        now = datetime(2026, 3, 10, 14, 25, tzinfo=timezone.utc)
+
+        segments = DashboardCache.plan(now - timedelta(days=3), now, now, HOUR)
+
+        assert DAY not in [s.kind for s in segments]
+
+    def test_past_end_tail_is_live(self):
+        now = datetime(2026, 3, 10, 14, 25, tzinfo=timezone.utc)
+        end = now - timedelta(hours=5, minutes=10)
+
+        segments = DashboardCache.plan(end - timedelta(days=1), end, now)
+
+        assert segments[-1].kind == "live"
+
+
+class TestStitching:
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {},
+            {"period": HOUR},
+            {"period": DAY},
+            {"by": ("counselor_id",)},
+            {"by": ("counselor_id",), "period": DAY},
+            {"counselor_id": COUNSELORS[0], "period": DAY},
+        ],
+    )
+    def test_matches_uncached_aggregate(self, kwargs):
+        service = FakeService(_events())
+        cache = _cache()
+        start = NOW - timedelta(days=7)
+
+        expected = _normalize(service.aggregate(USAGE, start, NOW, **kwargs))
+        cold = _normalize(cache.aggregate(service, USAGE, start, NOW, **kwargs))
+        warm = _normalize(cache.aggregate(service, USAGE, start, NOW, **kwargs))
+
+        assert cold == expected
+        assert warm == expected
+
+    def test_warm_request_only_aggregates_the_edges(self):
+        service = FakeService(_events())
+        cache = _cache()
+        start = NOW - timedelta(days=7)
+        cache.aggregate(service, USAGE, start, NOW, period=DAY)
+        service.calls.clear()
+
+        cache.aggregate(service, USAGE, start, NOW, period=DAY)
+
+        # Only the partial first hour; closed buckets and current hour hit
+        assert len(service.calls) == 1
+        assert cache.stats.closed_hits == cache.stats.closed_misses > 0
+        assert cache.stats.current_hits == 1
+
+    def test_current_hour_expires(self):
+        service = FakeService(_events())
+        cache = DashboardCache(
+            MemoryCacheBackend(max_entries=100, closed_ttl_seconds=None),
+            current_ttl_seconds=0.05,
+        )
+        start = floor_to(NOW, HOUR) - timedelta(hours=2)
+        cache.aggregate(service, USAGE, start, NOW)
+        service.events.append((floor_to(NOW, HOUR), COUNSELORS[0], 1.0))
+
+        stale = cache.aggregate(service, USAGE, start, NOW)
+        time.sleep(0.1)
+        fresh = cache.aggregate(service, USAGE, start, NOW)
+
+        assert fresh[0]["sessions"] == stale[0]["sessions"] + 1
+
+    def test_disabled_backend_reads_through(self):
+        service = FakeService(_events())
+        cache = DashboardCache(backend=None)
+        start = NOW - timedelta(days=2)
+
+        rows = cache.aggregate(service, USAGE, start, NOW, period=DAY)
+
+        assert len(service.calls) == 1
+        assert _normalize(rows) == _normalize(
+            service.aggregate(USAGE, start, NOW, period=DAY)
+        )
+
+
+class TestMemoize:
+    def test_whole_response_is_cached_per_params(self):
+        cache = _cache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"count": len(calls)}
+
+        first = cache.memoize("widget", ["month", None], compute)
+        again = cache.memoize("widget", ["month", None], compute)
+        other = cache.memoize("widget", ["week", None], compute)
+
+        assert first == again == {"count": 1}
+        assert other == {"count": 2}
+        assert (cache.stats.response_hits, cache.stats.response_misses) == (1, 2)
+
+    def test_expires_with_the_current_ttl(self):
+        cache = DashboardCache(
+            MemoryCacheBackend(max_entries=100, closed_ttl_seconds=None),
+            current_ttl_seconds=0.05,
+        )
+        values = iter([1, 2])
+
+        cache.memoize("widget", [], lambda: next(values))
+        time.sleep(0.1)
+
+        assert cache.memoize("widget", [], lambda: next(values)) == 2
+
+    def test_round_trips_through_redis(self):
+        client = FakeRedis()
+        cache = DashboardCache(RedisCacheBackend(client), current_ttl_seconds=30)
+
+        cache.memoize("widget", ["month"], lambda: {"users": [{"email": "a@test.com"}]})
+        warm = cache.memoize("widget", ["month"], lambda: pytest.fail("not cached"))
+
+        assert warm == {"users": [{"email": "a@test.com"}]}
+        assert list(client.expiry.values()) == [30]
+
+
+class TestInvalidation:
+    def test_invalidate_days_recomputes_that_day_only(self):
+        events = _events()
+        service = FakeService(events)
+        cache = _cache()
+        start = NOW - timedelta(days=7)
+        cache.aggregate(service, USAGE, start, NOW, period=DAY)
+
+        late_day = floor_to(NOW, DAY) - timedelta(days=3)
+        events.append((late_day + timedelta(hours=5), COUNSELORS[1], 2.0))
+        cache.invalidate_days(USAGE.name, [late_day])
+        service.calls.clear()
+        rows = cache.aggregate(service, USAGE, start, NOW, period=DAY)
+
+        by_day = {r["period"]: r for r in rows}
+        expected = {
+            r["period"]: r for r in service.aggregate(USAGE, start, NOW, period=DAY)
+        }
+        assert by_day[late_day]["sessions"] == expected[late_day]["sessions"]
+        # calls[0] is the live head, calls[1] the only recomputed bucket
+        assert service.calls[1][:2] == (late_day, late_day + timedelta(days=1))
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight()
+        runs = []
+        gate = threading.Event()
+
+        def work():
+            runs.append(1)
+            gate.wait(1)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", work)))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.05)
+        gate.set()
+        for t in threads:
+            t.join()
+
+        assert len(runs) == 1
+        assert sorted(shared for _, shared in results) == [False] + [True] * 7
+        assert {value for value, _ in results} == {"value"}
+
+    def test_error_propagates_to_waiters(self):
+        flight = SingleFlight()
+
+        def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            flight.do("k", fail)
+        # The failed call is not remembered
+        assert flight.do("k", lambda: 1) == (1, False)
+
+    def test_identical_dashboard_loads_compute_once(self):
+        service = FakeService(_events())
+        service.delay = 0.05
+        cache = _cache()
+        start = NOW - timedelta(days=7)
+        barrier = threading.Barrier(6)
+
+        def load():
+            barrier.wait()
+            cache.aggregate(service, USAGE, start, NOW, period=DAY)
+
+        threads = [threading.Thread(target=load) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert cache.stats.shared > 0
+        # 6 live heads + one computation per closed range / current hour
+        assert len(service.calls) < 6 * 4
+
+
+class TestMemoryBackend:
+    def test_lru_evicts_oldest(self):
+        backend = MemoryCacheBackend(max_entries=2, closed_ttl_seconds=None)
+        backend.set_many({"a": [], "b": []}, None)
+        backend.get_many(["a"])
+        backend.set_many({"c": []}, None)
+
+        assert set(backend.get_many(["a", "b", "c"])) == {"a", "c"}
+
+    def test_versions_bump(self):
+        backend = MemoryCacheBackend(max_entries=2, closed_ttl_seconds=None)
+        backend.bump(["v1", "v1"])
+
+        assert backend.versions(["v1", "v2"]) == [2, 0]
+
+
+class FakeRedis:
+    """The subset of redis.Redis the backend uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    def scan_iter(self, pattern):
+        prefix = pattern.rstrip("*")
+        return [k for k in self.data if k.startswith(prefix)]
+
+    def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, key, value, ex=None):
+        self.ops.append(("set", key, value, ex))
+
+    def incr(self, key):
+        self.ops.append(("incr", key, None, None))
+
+    def execute(self):
+        for op, key, value, ex in self.ops:
+            if op == "set":
+                self.client.data[key] = value.encode()
+                self.client.expiry[key] = ex
+            else:
+                self.client.data[key] = str(
+                    int(self.client.data.get(key, 0)) + 1
+                ).encode()
+
+
+class BrokenRedis(FakeRedis):
+    def mget(self, keys):
+        raise ConnectionError("redis down")
+
+
+class TestRedisBackend:
+    def test_round_trips_rows_and_uuids(self):
+        client = FakeRedis()
+        service = FakeService(_events())
+        cache = DashboardCache(RedisCacheBackend(client), current_ttl_seconds=30)
+        start = NOW - timedelta(days=3)
+        kwargs = {"by": ("counselor_id",), "period": DAY}
+
+        cache.aggregate(service, USAGE, start, NOW, **kwargs)
+        warm = cache.aggregate(service, USAGE, start, NOW, **kwargs)
+
+        assert _normalize(warm) == _normalize(
+            service.aggregate(USAGE, start, NOW, **kwargs)
+        )
+        assert all(isinstance(r["counselor_id"], type(COUNSELORS[0])) for r in warm)
+        # Closed buckets never expire; the current hour does
+        ttls = {k: v for k, v in client.expiry.items()}
+        assert None in ttls.values() and 30 in ttls.values()
+
+    def test_invalidation_bumps_shared_version(self):
+        client = FakeRedis()
+        cache = DashboardCache(RedisCacheBackend(client))
+        day = floor_to(NOW, DAY)
+
+        cache.invalidate_days(USAGE.name, [day])
+
+        assert cache.backend.versions([cache._version_key(USAGE.name, day)]) == [1]
+
+    def test_backend_failure_reads_uncached(self):
+        service = FakeService(_events())
+        cache = DashboardCache(RedisCacheBackend(BrokenRedis()))
+        start = NOW - timedelta(days=2)
+
+        rows = cache.aggregate(service, USAGE, start, NOW, period=DAY)
+
+        assert _normalize(rows) == _normalize(
+            service.aggregate(USAGE, start, NOW, period=DAY)
+        )
+        assert cache.stats.errors == 1
@@ -71,3 +71,79 @@ class TestDatabaseBase:
         assert TestModel.__tablename__ == "test_model"
         assert hasattr(TestModel, "id")
         assert hasattr(TestModel, "name")
+
+
+class TestAnalyticsEngine:
+    """Analytical reads get their own pool and statement timeout"""
+
+    def test_get_analytics_db_uses_the_analytics_engine(self):
+        from app.core.database import analytics_engine, engine, get_analytics_db
+
+        db_gen = get_analytics_db()
+        db = next(db_gen)
+
+        assert db.get_bind() is analytics_engine
+        assert analytics_engine.pool is not engine.pool
+        db_gen.close()
+
+    def test_postgres_statement_timeout_is_a_connect_option(self, monkeypatch):
+        from app.core import database
+
+        calls = {}
+        monkeypatch.setattr(
+            database,
+            "create_engine",
+            lambda url, **kwargs: calls.update(url=url, **kwargs),
+        )
+
+        database.create_analytics_engine(
+            "postgresql://u:p@replica/db",
+            pool_size=3,
+            statement_timeout_ms=1500,
+            connect_args={"sslmode": "require"},
+        )
+
+        assert calls["pool_size"] == 3
+        assert calls["connect_args"] == {
+            "sslmode": "require",
+            "options": "-c statement_timeout=1500",
+        }
+
+    def test_no_timeout_option_outside_postgres(self, monkeypatch):
+        from app.core import database
+
+        calls = {}
+        monkeypatch.setattr(
+            database,
+            "create_engine",
+            lambda url, **kwargs: calls.update(url=url, **kwargs),
+        )
+
+        database.create_analytics_engine(
+            "sqlite://", pool_size=1, statement_timeout_ms=1500
+        )
+
+        assert calls["connect_args"] == {}
+
+    def test_dashboard_routes_never_use_the_realtime_pool(self):
+        from fastapi.routing import APIRoute
+
+        from app.core.database import get_analytics_db, get_db
+        from app.main import app
+
+        def calls(dependant):
+            yield dependant.call
+            for sub in dependant.dependencies:
+                yield from calls(sub)
+
+        routes = [
+            route
+            for route in app.routes
+            if isinstance(route, APIRoute)
+            and route.path.startswith("/api/v1/admin/dashboard")
+        ]
+        assert routes
+        for route in routes:
+            used = set(calls(route.dependant))
+            assert get_analytics_db in used, route.path
+            assert get_db not in used, route.path
@@ -0,0 +1,207 @@
+"""
+Unit tests for EmotionFeedbackEngine (dedup, deadline fallback, hedging, stats)
+"""
+import asyncio
+
+import pytest
+
+from app.services.analysis.emotion_engine import (
+    PATH_BACKGROUND,
+    PATH_CACHE,
+    PATH_HEDGE,
+    PATH_LEXICON_DEADLINE,
+    PATH_LEXICON_ERROR,
+    PATH_LEXICON_PREDICTED,
+    PATH_LLM,
+    PATH_SHARED,
+    EmotionFeedbackEngine,
+    EmotionLexiconClassifier,
+)
+
+
+class FakeEmotionService:
+    """Stands in for EmotionAnalysisService; delays are consumed per call"""
+
+    def __init__(self, delays=(0.0,), error=None):
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+
+    async def analyze_emotion(self, context, target, timeout=2.5):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        # Honors the timeout like the real service (asyncio.wait_for)
+        await asyncio.wait_for(asyncio.sleep(delay), timeout=timeout)
+        if self.error:
+            raise self.error
+        return {
+            "level": 3,
+            "hint": "試著同理孩子的挫折感",
+            "token_usage": {"total_tokens": 42, "model_name": "fake"},
+        }
+
+
+def make_engine(service, **kwargs):
+    options = dict(
+        deadline_seconds=0.2,
+        cache_ttl_seconds=30,
+        cache_max_entries=100,
+        hedge_enabled=False,
+        hedge_default_delay_seconds=0.05,
+        llm_timeout_seconds=5.0,
+        probe_interval_seconds=60.0,
+    )
+    options.update(kwargs)
+    return EmotionFeedbackEngine(service=service, **options)
+
+
+class TestEmotionLexiconClassifier:
+    @pytest.mark.parametrize(
+        "target,expected",
+        [
+            ("你給我閉嘴！", 3),
+            ("為什麼每次都這樣", 2),
+            ("你辛苦了，早點睡", 1),
+            ("今天晚餐吃麵", 1),
+        ],
+    )
+    def test_levels(self, target, expected):
+        level, hint = EmotionLexiconClassifier().classify("", target)
+        assert level == expected
+        assert 0 < len(hint) <= 17
+
+
+class TestEmotionFeedbackEngine:
+    async def test_llm_path_then_cache(self):
+        service = FakeEmotionService()
+        engine = make_engine(service)
+
+        first = await engine.analyze("ctx", "你就是不用功！")
+        second = await engine.analyze("ctx", "你就是不用功！")
+
+        assert first["path"] == PATH_LLM
+        assert second["path"] == PATH_CACHE
+        assert second["level"] == first["level"]
+        assert service.calls == 1
+        # Only the request that called the LLM reports its tokens
+        assert first["token_usage"]["total_tokens"] == 42
+        assert second["token_usage"]["total_tokens"] == 0
+        assert second["token_usage"]["estimated_cost_usd"] == 0.0
+        assert second["token_usage"]["model_name"] == "fake"
+
+    async def test_concurrent_identical_windows_share_one_call(self):
+        service = FakeEmotionService(delays=(0.05,))
+        engine = make_engine(service)
+
+        results = await asyncio.gather(
+            *[engine.analyze("ctx", "快點去寫功課") for _ in range(5)]
+        )
+
+        assert service.calls == 1
+        assert all(r["level"] == 3 for r in results)
+        assert [r["path"] for r in results].count(PATH_SHARED) == 4
+        assert sum(r["token_usage"]["total_tokens"] for r in results) == 42
+
+    async def test_deadline_falls_back_to_lexicon_and_warms_cache(self):
+        service = FakeEmotionService(delays=(0.3,))
+        engine = make_engine(service, deadline_seconds=0.05)
+
+        result = await engine.analyze("ctx", "你給我閉嘴")
+        assert result["path"] == PATH_LEXICON_DEADLINE
+        assert result["level"] == 3
+        assert result["token_usage"]["total_tokens"] == 0
+
+        # The LLM call keeps running and fills the cache for the next request
+        await asyncio.sleep(0.35)
+        again = await engine.analyze("ctx", "你給我閉嘴")
+        assert again["path"] == PATH_CACHE
+        assert service.calls == 1
+
+    async def test_deadline_fallback_hands_back_the_call_for_billing(self):
+        service = FakeEmotionService(delays=(0.1,))
+        engine = make_engine(service, deadline_seconds=0.02)
+
+        result = await engine.analyze("ctx", "你給我閉嘴")
+        assert result["path"] == PATH_LEXICON_DEADLINE
+        late = await engine.background_result(result["background_call"])
+
+        assert late["path"] == PATH_BACKGROUND
+        assert late["token_usage"]["total_tokens"] == 42
+
+    async def test_hung_llm_call_is_capped_and_not_joined(self):
+        service = FakeEmotionService(delays=(60.0, 0.0))
+        engine = make_engine(service, deadline_seconds=0.02, llm_timeout_seconds=0.1)
+
+        first = await engine.analyze("ctx", "快點去寫功課")
+        assert first["path"] == PATH_LEXICON_DEADLINE
+        assert await engine.background_result(first["background_call"]) is None
+
+        # The timed-out call left the in-flight table; the next request
+        # starts a fresh call instead of joining the hung one
+        second = await engine.analyze("ctx", "快點去寫功課")
+        assert second["path"] == PATH_LLM
+        assert service.calls == 2
+
+    async def test_llm_error_falls_back_to_lexicon(self):
+        engine = make_engine(FakeEmotionService(error=RuntimeError("boom")))
+
+        result = await engine.analyze("ctx", "謝謝你願意告訴我")
+
+        assert result["path"] == PATH_LEXICON_ERROR
+        assert result["level"] == 1
+
+    async def test_slow_p90_answers_immediately(self):
+        service = FakeEmotionService(delays=(0.0,))
+        engine = make_engine(service, deadline_seconds=0.5)
+        for _ in range(20):
+            engine.stats.record_llm_latency(1.0)
+
+        result = await engine.analyze("ctx", "你又忘記了")
+
+        assert result["path"] == PATH_LEXICON_PREDICTED
+        # LLM still runs in the background to warm the cache
+        late = await engine.background_result(result["background_call"])
+        assert late["token_usage"]["total_tokens"] == 42
+        assert service.calls == 1
+        assert (await engine.analyze("ctx", "你又忘記了"))["path"] == PATH_CACHE
+
+    async def test_slow_p90_probes_at_most_once_per_interval(self):
+        service = FakeEmotionService(delays=(0.0,))
+        engine = make_engine(service, deadline_seconds=0.5)
+        for _ in range(20):
+            engine.stats.record_llm_latency(1.0)
+
+        results = [await engine.analyze("ctx", f"第{i}句") for i in range(5)]
+        await asyncio.sleep(0.05)
+
+        assert all(r["path"] == PATH_LEXICON_PREDICTED for r in results)
+        assert ["background_call" in r for r in results] == [True] + [False] * 4
+        assert service.calls == 1
+
+    async def test_hedge_wins_when_primary_is_slow(self):
+        service = FakeEmotionService(delays=(0.5, 0.0))
+        engine = make_engine(service, deadline_seconds=0.3, hedge_enabled=True)
+
+        result = await engine.analyze("ctx", "你到底在幹嘛")
+
+        assert result["path"] == PATH_HEDGE
+        assert service.calls == 2
+
+    async def test_stats_snapshot(self):
+        service = FakeEmotionService(delays=(0.0,))
+        engine = make_engine(service)
+        await engine.analyze("a", "b")
+        await engine.analyze("a", "b")
+        engine.service.error = RuntimeError("boom")
+        await engine.analyze("c", "d")
+
+        snapshot = engine.stats.snapshot()
+
+        assert snapshot["requests"] == 3
+        assert snapshot["paths"] == {
+            PATH_LLM: 1,
+            PATH_CACHE: 1,
+            PATH_LEXICON_ERROR: 1,
+        }
+        assert snapshot["fallback_rate"] == pytest.approx(1 / 3, abs=1e-3)
+        assert snapshot["latency_ms"]["p50"] is not None
@@ -0,0 +1,179 @@
+"""
+Unit tests for the buffered analysis-log writer and local sinks
+"""
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.external.gbq_service import GBQService
+from app.services.external.gbq_sink import (
+    AnalysisLogSink,
+    BigQuerySink,
+    BufferedLogWriter,
+    JsonlFileSink,
+    SinkWriteError,
+    SQLiteSink,
+)
+
+
+class RecordingSink(AnalysisLogSink):
+    """Collects batches; fails the first `failures` writes"""
+
+    name = "recording"
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    def write_rows(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise SinkWriteError("temporary failure")
+        self.batches.append(list(rows))
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestBufferedLogWriter:
+    def test_flushes_by_batch_size(self):
+        sink = RecordingSink()
+        writer = BufferedLogWriter(sink, batch_size=5, flush_interval_seconds=60)
+
+        for i in range(10):
+            assert writer.enqueue({"id": str(i)}) is True
+
+        assert _wait_for(lambda: sum(len(b) for b in sink.batches) == 10)
+        assert [len(b) for b in sink.batches] == [5, 5]
+        writer.close()
+
+    def test_flushes_by_age(self):
+        sink = RecordingSink()
+        writer = BufferedLogWriter(sink, batch_size=100, flush_interval_seconds=0.1)
+
+        writer.enqueue({"id": "1"})
+
+        assert _wait_for(lambda: sink.batches == [[{"id": "1"}]])
+        writer.close()
+
+    def test_close_flushes_pending_rows(self):
+        sink = RecordingSink()
+        writer = BufferedLogWriter(sink, batch_size=100, flush_interval_seconds=60)
+        for i in range(3):
+            writer.enqueue({"id": str(i)})
+
+        writer.close()
+
+        assert sum(len(b) for b in sink.batches) == 3
+        assert writer.pending() == 0
+
+    def test_retry_then_success(self):
+        sink = RecordingSink(failures=2)
+        writer = BufferedLogWriter(
+            sink, batch_size=100, max_retries=3, retry_backoff_seconds=0
+        )
+        writer.enqueue({"id": "1"})
+        writer.close()
+
+        assert sink.batches == [[{"id": "1"}]]
+        assert writer.stats["dead_lettered"] == 0
+
+    def test_dead_letter_after_retries(self, tmp_path):
+        dead_letter = tmp_path / "dead.jsonl"
+        sink = RecordingSink(failures=10)
+        writer = BufferedLogWriter(
+            sink,
+            max_retries=1,
+            retry_backoff_seconds=0,
+            dead_letter_path=str(dead_letter),
+        )
+        writer.enqueue({"id": "1"})
+        writer.enqueue({"id": "2"})
+        writer.close()
+
+        rows = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+        assert [r["id"] for r in rows] == ["1", "2"]
+        assert writer.stats["dead_lettered"] == 2
+
+    def test_full_queue_spools_instead_of_blocking(self, tmp_path):
+        dead_letter = tmp_path / "dead.jsonl"
+        writer = BufferedLogWriter(
+            RecordingSink(), max_queue_size=1, dead_letter_path=str(dead_letter)
+        )
+        # Keep the worker from draining the queue during the test
+        writer._ensure_started = lambda: None
+
+        assert writer.enqueue({"id": "1"}) is True
+        assert writer.enqueue({"id": "2"}) is False
+        assert json.loads(dead_letter.read_text())["id"] == "2"
+
+
+class TestSinks:
+    def test_jsonl_sink(self, tmp_path):
+        path = tmp_path / "logs" / "rows.jsonl"
+        JsonlFileSink(str(path)).write_rows([{"id": "a"}, {"id": "b"}])
+
+        assert [json.loads(line)["id"] for line in path.read_text().splitlines()] == [
+            "a",
+            "b",
+        ]
+
+    def test_sqlite_sink(self, tmp_path):
+        sink = SQLiteSink(str(tmp_path / "rows.db"))
+        sink.write_rows([{"id": "a", "result_data": "{}"}])
+
+        assert sink.read_rows() == [{"id": "a", "result_data": "{}"}]
+
+    def test_sqlite_sink_creates_missing_directory(self, tmp_path):
+        path = tmp_path / "logs" / "analysis_logs.db"
+        sink = SQLiteSink(str(path))
+        sink.write_rows([{"id": "a"}])
+
+        assert path.exists()
+        assert sink.read_rows() == [{"id": "a"}]
+
+    def test_bigquery_sink_batches_and_raises_on_errors(self):
+        client = MagicMock()
+        client.insert_rows_json.return_value = []
+        sink = BigQuerySink(lambda: client, "p.d.t")
+
+        sink.write_rows([{"id": "a"}, {"id": "b"}])
+        client.insert_rows_json.assert_called_once_with(
+            "p.d.t", [{"id": "a"}, {"id": "b"}], row_ids=["a", "b"]
+        )
+
+        client.insert_rows_json.return_value = [{"index": 0, "errors": ["bad"]}]
+        with pytest.raises(SinkWriteError):
+            sink.write_rows([{"id": "a"}])
+
+    def test_sink_interface_is_abstract(self):
+        class IncompleteSink(AnalysisLogSink):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            IncompleteSink()
+
+
+class TestGBQServiceEnqueue:
+    def test_enqueue_builds_row_and_writes_batch(self, tmp_path):
+        service = GBQService()
+        sink = SQLiteSink(str(tmp_path / "rows.db"))
+        service._writer = BufferedLogWriter(sink, batch_size=10)
+
+        assert service.enqueue_analysis_log(
+            {"id": "row-1", "session_id": "s1", "result_data": {"level": 2}}
+        )
+        service.close()
+
+        rows = sink.read_rows()
+        assert rows[0]["id"] == "row-1"
+        assert rows[0]["tenant_id"] == "island_parents"
+        assert json.loads(rows[0]["result_data"]) == {"level": 2}
@@ -0,0 +1,121 @@
+"""
+Unit tests for keyset pagination helpers
+"""
+from datetime import date, datetime, timezone
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, create_engine, select
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from app.utils.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    estimate_row_count,
+    keyset_after,
+)
+
+
+class _Base(DeclarativeBase):
+    pass
+
+
+class _Row(_Base):
+    __tablename__ = "pagination_rows"
+
+    id = Column(Integer, primary_key=True)
+    created = Column(DateTime)
+
+
+class TestCursorEncoding:
+    """Test encode_cursor / decode_cursor round trips"""
+
+    def test_round_trip_typed_values(self):
+        """Test datetime, date, UUID and scalars survive a round trip"""
+        values = [
+            datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            date(2025, 1, 2),
+            uuid4(),
+            42,
+            "text",
+            None,
+        ]
+        assert decode_cursor(encode_cursor(*values)) == values
+
+    def test_cursor_is_url_safe(self):
+        """Test cursor contains no characters needing URL escaping"""
+        cursor = encode_cursor("??//++", uuid4())
+        assert all(c.isalnum() or c in "-_" for c in cursor)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", "e30", "!!!"])
+    def test_malformed_cursor_raises(self, cursor):
+        """Test malformed cursors raise InvalidCursorError"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
+
+    def test_wrong_arity_raises(self):
+        """Test cursor with unexpected number of values is rejected"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(encode_cursor(1, 2, 3), expected_length=2)
+
+    def test_typed_values_accepted(self):
+        """Test values matching the expected types decode"""
+        now, row_id = datetime(2025, 1, 2, tzinfo=timezone.utc), uuid4()
+        cursor = encode_cursor(now, row_id, 7)
+        assert decode_cursor(cursor, types=(datetime, UUID, (int, float))) == [
+            now,
+            row_id,
+            7,
+        ]
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            ("2025-01-02", "abc"),  # strings instead of datetime / UUID
+            (1, 2),
+            (None, None),
+            (datetime(2025, 1, 2), True),  # bool is not an int key
+            (datetime(2025, 1, 2),),  # arity implied by types
+        ],
+    )
+    def test_wrong_value_types_raise(self, values):
+        """Test a cursor that decodes but carries other types is rejected"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(encode_cursor(*values), types=(datetime, (UUID, int)))
+
+
+class TestKeysetAfter:
+    """Test keyset_after predicate against a real table"""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine("sqlite:///:memory:")
+        _Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            ts = [datetime(2025, 1, d) for d in (1, 1, 2, 3, 3, 3, 4)]
+            session.add_all(_Row(id=i + 1, created=t) for i, t in enumerate(ts))
+            session.commit()
+            yield session
+
+    def test_pages_cover_all_rows_without_overlap(self, db):
+        """Test walking pages with keyset_after visits each row once"""
+        seen = []
+        cursor_values = None
+        while True:
+            query = select(_Row).order_by(_Row.created.desc(), _Row.id.desc())
+            if cursor_values:
+                query = query.where(
+                    keyset_after([_Row.created, _Row.id], cursor_values)
+                )
+            page = db.execute(query.limit(2)).scalars().all()
+            if not page:
+                break
+            seen.extend(r.id for r in page)
+            cursor_values = [page[-1].created, page[-1].id]
+
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+    def test_estimate_row_count_not_supported_on_sqlite(self, db):
+        """Test estimate returns None outside PostgreSQL"""
+        assert estimate_row_count(db, select(_Row.id)) is None
@@ -0,0 +1,109 @@
+"""
+Unit tests for PricingEngine (parity with app.core.pricing, batch and SQL pricing)
+"""
+import pytest
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    func,
+    select,
+)
+
+from app.core.pricing import MODEL_PRICING_MAP, calculate_cost_for_model
+from app.core.pricing_engine import PricingEngine, pricing_engine
+
+MODELS = list(MODEL_PRICING_MAP) + [f"models/{m}" for m in MODEL_PRICING_MAP]
+ROWS = [
+    (model, input_tokens, output_tokens)
+    for model in MODELS + ["gpt-4o", None]
+    for input_tokens, output_tokens in [(0, 0), (1200, 300), (None, 50), (987654, None)]
+]
+
+
+def _legacy(model, input_tokens, output_tokens):
+    if model is None or model.replace("models/", "") not in MODEL_PRICING_MAP:
+        return None
+    return calculate_cost_for_model(model, input_tokens or 0, output_tokens or 0)
+
+
+@pytest.mark.parametrize("model,input_tokens,output_tokens", ROWS)
+def test_cost_matches_calculate_cost_for_model(model, input_tokens, output_tokens):
+    expected = _legacy(model, input_tokens, output_tokens)
+    actual = pricing_engine.cost(model, input_tokens, output_tokens)
+
+    assert actual == (None if expected is None else pytest.approx(expected, rel=1e-12))
+
+
+def test_cost_column_matches_row_pricing():
+    models, inputs, outputs = map(list, zip(*ROWS))
+
+    column = pricing_engine.cost_column(models, inputs, outputs)
+
+    assert column == [pricing_engine.cost(*row) for row in ROWS]
+    assert pricing_engine.total_cost(models, inputs, outputs) == pytest.approx(
+        sum(c for c in column if c is not None)
+    )
+
+
+def test_lookup_is_memoized():
+    engine = PricingEngine()
+
+    first = engine.price("models/gemini-3-flash-preview")
+
+    assert first is engine.price("models/gemini-3-flash-preview")
+    assert first.display_name == "Gemini 3 Flash"
+    assert engine.price("unknown") is None
+
+
+def test_sql_expressions_match_python():
+    metadata = MetaData()
+    logs = Table(
+        "logs",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("model_name", String),
+        Column("prompt_tokens", Integer),
+        Column("completion_tokens", Integer),
+    )
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            logs.insert(),
+            [
+                {"model_name": m, "prompt_tokens": i, "completion_tokens": o}
+                for m, i, o in ROWS
+            ],
+        )
+        rows = conn.execute(
+            select(
+                logs.c.model_name,
+                pricing_engine.sql_display_name(logs.c.model_name),
+                pricing_engine.sql_cost(
+                    logs.c.model_name, logs.c.prompt_tokens, logs.c.completion_tokens
+                ),
+            ).order_by(logs.c.id)
+        ).all()
+        total = conn.execute(
+            select(
+                func.sum(
+                    pricing_engine.sql_cost(
+                        logs.c.model_name,
+                        logs.c.prompt_tokens,
+                        logs.c.completion_tokens,
+                    )
+                )
+            )
+        ).scalar()
+
+    for (model, display_name, cost), row in zip(rows, ROWS):
+        price = pricing_engine.price(model)
+        assert display_name == (price.display_name if price else None)
+        expected = pricing_engine.cost(*row)
+        assert cost == (None if expected is None else pytest.approx(expected))
+    models, inputs, outputs = map(list, zip(*ROWS))
+    assert total == pytest.approx(pricing_engine.total_cost(models, inputs, outputs))
@@ -0,0 +1,60 @@
+"""Unit tests for precompiled tiered billing rates."""
+import pytest
+
+from app.services.billing.rate_cache import CompiledTiers
+
+TIERS = [
+    {"max_seconds": 600, "credits_per_second": 1},
+    {"max_seconds": 1800, "credits_per_second": 0.8},
+    {"max_seconds": None, "credits_per_second": 0.5},
+]
+
+
+def _walk_tiers(tiers, duration_seconds):
+    """Reference: the tier walk calculate_credits used before compilation."""
+    credits = 0
+    remaining = duration_seconds
+    breakdown = []
+    for tier in tiers:
+        max_seconds = tier.get("max_seconds")
+        rate = tier.get("credits_per_second", 1)
+        if max_seconds is None:
+            breakdown.append(("unlimited", remaining, remaining * rate))
+            credits += remaining * rate
+            break
+        seconds = min(remaining, max_seconds)
+        breakdown.append((f"0-{max_seconds}s", seconds, seconds * rate))
+        credits += seconds * rate
+        remaining -= seconds
+        if remaining <= 0:
+            break
+    return credits, breakdown
+
+
+class TestCompiledTiers:
+    @pytest.mark.parametrize(
+        "tiers",
+        [
+            TIERS,
+            TIERS[:2],  # no unlimited tier: capped at the last finite tier
+            [{"max_seconds": None, "credits_per_second": 2}],
+            [],
+        ],
+    )
+    @pytest.mark.parametrize("duration", [0, 1, 599, 600, 601, 2400, 2401, 10_000])
+    def test_matches_tier_walk(self, tiers, duration):
+        compiled = CompiledTiers.compile(tiers)
+        expected_credits, expected_rows = _walk_tiers(tiers, duration)
+
+        assert compiled.total(duration) == expected_credits
+        assert [
+            (row["tier"], row["seconds_in_tier"], row["tier_credits"])
+            for row in compiled.breakdown(duration)
+        ] == expected_rows
+
+    def test_boundaries_are_cumulative(self):
+        compiled = CompiledTiers.compile(TIERS)
+
+        assert compiled.starts == (0, 600, 2400)
+        assert compiled.ends[:2] == (600, 2400)
+        assert compiled.prefix == (0, 600, 2040.0)
@@ -260,3 +260,63 @@ class TestSanitizerServiceRealWorldScenarios:
         assert result["count"] >= 3
         assert "test@example.com" not in result["sanitized_text"]
         assert "john.doe+tag@company.co.uk" not in result["sanitized_text"]
+
+
+class TestSanitizerServiceIncremental:
+    """增量脫敏（逐字稿尾端追加）"""
+
+    @pytest.fixture
+    def sanitizer(self):
+        return SanitizerService()
+
+    @pytest.fixture
+    def transcript(self):
+        return (
+            "諮詢師：請問您的聯絡方式？\n"
+            "案主：電話 0912345678，email wang.daming@gmail.com，"
+            "住在新北市50號，身分證 B234567890。\n"
+            "信用卡 5555-6666-7777-8888 已經刷爆了。\n"
+        ) * 3
+
+    def test_single_pass_matches_per_pattern_results(self, sanitizer, transcript):
+        """一次掃描的偵測結果與逐一 pattern findall 相同"""
+        result = sanitizer.sanitize_text(transcript)
+
+        for key, pattern in sanitizer.patterns.items():
+            assert result["found_items"].get(key, []) == pattern.findall(transcript)
+
+    @pytest.mark.parametrize("step", [1, 3, 7, 16])
+    def test_incremental_equals_full_scan(self, sanitizer, transcript, step):
+        """任意切段追加（包含跨段號碼/email）結果與整段脫敏一致"""
+        expected = sanitizer.sanitize_text(transcript)["sanitized_text"]
+
+        raw, sanitized = "", ""
+        for i in range(0, len(transcript), step):
+            new_raw = raw + transcript[i : i + step]
+            sanitized = sanitizer.sanitize_incremental(raw, sanitized, new_raw)[
+                "sanitized_text"
+            ]
+            raw = new_raw
+
+        assert sanitized == expected
+
+    def test_incremental_rescans_only_tail(self, sanitizer, transcript):
+        """追加時只回報重掃範圍內的項目"""
+        previous = sanitizer.sanitize_text(transcript)["sanitized_text"]
+        result = sanitizer.sanitize_incremental(
+            transcript, previous, transcript + "新電話 0987654321"
+        )
+
+        assert result["found_items"] == {"phone": ["0987654321"]}
+        assert result["sanitized_text"] == previous + "新電話 [已遮蔽手機號碼]"
+
+    def test_incremental_falls_back_for_legacy_or_edited_text(self, sanitizer):
+        """舊資料（未脫敏）或非追加修改時退回完整掃描"""
+        legacy = "電話 0912345678。"
+        result = sanitizer.sanitize_incremental(legacy, legacy, legacy + "好。")
+        assert result["sanitized_text"] == "電話 [已遮蔽手機號碼]。好。"
+
+        edited = sanitizer.sanitize_incremental(
+            "電話 0912345678。", "電話 [已遮蔽手機號碼]。", "手機 0987654321。"
+        )
+        assert edited["sanitized_text"] == "手機 [已遮蔽手機號碼]。"
@@ -233,10 +233,10 @@ class TestSessionService:
         client_id = uuid4()
         sessions = [Mock(spec=Session) for _ in range(3)]
 
-        mock_session_repo.list_sessions.return_value = (sessions, 3)
+        mock_session_repo.list_sessions.return_value = (sessions, 3, None)
 
         # Act
-        result, total = session_service.list_sessions(
+        result, total, next_cursor = session_service.list_sessions(
             counselor=sample_counselor,
             tenant_id="career",
             client_id=client_id,
@@ -247,13 +247,19 @@ class TestSessionService:
         # Assert
         assert len(result) == 3
         assert total == 3
+        assert next_cursor is None
         mock_session_repo.list_sessions.assert_called_once_with(
             counselor_id=sample_counselor.id,
             tenant_id="career",
             client_id=client_id,
+            case_id=None,
+            mode=None,
             search=None,
             skip=0,
             limit=20,
+            cursor=None,
+            include_fields=(),
+            count_mode="exact",
         )
 
     def test_update_session_success(
@@ -0,0 +1,110 @@
+"""
+Unit tests for the per-client timeline cache
+"""
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.schemas.session import TimelineSessionItem
+from app.services.core.timeline_service import TimelineCache, TimelineService
+from app.utils.pagination import InvalidCursorError, encode_cursor
+
+
+def _entry(day: int):
+    session_id = uuid4()
+    item = TimelineSessionItem(
+        session_id=session_id,
+        session_number=day,
+        date=f"2025-01-{day:02d}",
+        has_report=False,
+    )
+    return (datetime(2025, 1, day), session_id), item
+
+
+class TestTimelineCache:
+    """Test TimelineCache hit/miss and invalidation rules"""
+
+    def test_get_after_set_hits(self):
+        cache = TimelineCache(ttl_seconds=60, max_clients=10)
+        client_id = uuid4()
+        entries = [_entry(1)]
+
+        assert cache.get(client_id) is None
+        cache.set(client_id, entries, {uuid4()}, cache.generation)
+
+        assert cache.get(client_id) is entries
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_invalidate_case_drops_owning_client(self):
+        cache = TimelineCache(ttl_seconds=60, max_clients=10)
+        client_id, other_client = uuid4(), uuid4()
+        case_id = uuid4()
+        cache.set(client_id, [_entry(1)], {case_id}, cache.generation)
+        cache.set(other_client, [_entry(2)], {uuid4()}, cache.generation)
+
+        cache.invalidate_case(case_id)
+
+        assert cache.get(client_id) is None
+        assert cache.get(other_client) is not None
+
+    def test_stale_load_is_not_cached(self):
+        """Test a load that raced with an invalidation does not populate"""
+        cache = TimelineCache(ttl_seconds=60, max_clients=10)
+        client_id = uuid4()
+        generation = cache.generation
+
+        cache.invalidate_client(client_id)
+        cache.set(client_id, [_entry(1)], set(), generation)
+
+        assert cache.get(client_id) is None
+
+    def test_ttl_expiry(self):
+        cache = TimelineCache(ttl_seconds=0, max_clients=10)
+        client_id = uuid4()
+        cache.set(client_id, [_entry(1)], set(), cache.generation)
+        time.sleep(0.01)
+
+        assert cache.get(client_id) is None
+
+    def test_lru_eviction(self):
+        cache = TimelineCache(ttl_seconds=60, max_clients=2)
+        a, b, c = uuid4(), uuid4(), uuid4()
+        cache.set(a, [], set(), cache.generation)
+        cache.set(b, [], set(), cache.generation)
+        cache.get(a)  # a becomes most recently used
+        cache.set(c, [], set(), cache.generation)
+
+        assert cache.get(b) is None
+        assert cache.get(a) is not None
+        assert cache.get(c) is not None
+
+
+class TestTimelinePagination:
+    """Test cursor slicing over cached timeline entries"""
+
+    def test_pages_are_contiguous(self):
+        entries = [_entry(day) for day in range(1, 8)]
+        numbers, cursor = [], None
+        while True:
+            page, cursor = TimelineService._paginate(entries, 3, cursor)
+            numbers.extend(item.session_number for item in page)
+            if not cursor:
+                break
+
+        assert numbers == list(range(1, 8))
+
+    def test_no_limit_returns_everything(self):
+        entries = [_entry(day) for day in range(1, 4)]
+        page, cursor = TimelineService._paginate(entries, None, None)
+
+        assert len(page) == 3
+        assert cursor is None
+
+    @pytest.mark.parametrize("values", [(1, 2), ("2025-01-02", "abc"), (None, None)])
+    def test_cursor_with_wrong_types_is_invalid(self, values):
+        entries = [_entry(day) for day in range(1, 4)]
+
+        with pytest.raises(InvalidCursorError):
+            TimelineService._paginate(entries, 2, encode_cursor(*values))